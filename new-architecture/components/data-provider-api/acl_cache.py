@@ -0,0 +1,274 @@
+"""
+ACL Snapshot Cache - Cache snapshotów ACL per tenant
+
+Przechowuje zbudowane dokumenty ACL tenantów w pamięci procesu, aby kolejne
+pobrania /tenants/<tenant_id>/acl przez OPAL nie przebudowywały danych z PostgreSQL.
+Każdy tenant ma monotonicznie rosnącą wersję podbijaną przy każdej zmianie
+(invalidate) - snapshot jest ważny tylko dla wersji, z którą został zbudowany.
+"""
+
+import os
+import time
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Awaitable, Tuple
+from etag_utils import compute_etag
+from fast_json import dumps
+from snapshot_store import invalidate_stored_snapshots
+from tenant_acl_builder import EXPANDED_LAYOUT
+
+logger = logging.getLogger(__name__)
+
+# Konfiguracja cache
+ACL_CACHE_ENABLED = os.environ.get("ACL_CACHE_ENABLED", "true").lower() == "true"
+ACL_CACHE_MAX_TENANTS = int(os.environ.get("ACL_CACHE_MAX_TENANTS", 1000))
+# Zabezpieczenie przed zmianami wykonanymi bezpośrednio w SQL (0 = bez wygasania)
+ACL_CACHE_TTL_SECONDS = float(os.environ.get("ACL_CACHE_TTL_SECONDS", 300))
+
+class ACLSnapshot:
+    """Zbudowany dokument ACL tenanta wraz z wersją"""
+    __slots__ = ("tenant_id", "version", "data", "built_at", "_etag", "_body", "representations", "layout")
+
+    def __init__(self, tenant_id: str, version: int, data: Dict[str, Any], built_at: float,
+                 layout: str = EXPANDED_LAYOUT):
+        self.tenant_id = tenant_id
+        self.layout = layout
+        self.version = version
+        self.data = data
+        self.built_at = built_at
+        self._etag = None
+        self._body = None
+        # Zakodowane odpowiedzi (kodowanie -> bajty), np. identity / gzip / zstd
+        self.representations: Dict[str, bytes] = {}
+
+    @property
+    def etag(self) -> str:
+        """ETag z zawartości danych - liczony raz na snapshot"""
+        if self._etag is None:
+            self._etag = compute_etag(self.data)
+        return self._etag
+
+    @property
+    def body(self) -> bytes:
+        """Zserializowane dane ACL - kodowane raz na snapshot, wysyłane bez ponownego kodowania"""
+        if self._body is None:
+            self._body = dumps(self.data)
+        return self._body
+
+class TenantACLCache:
+    """
+    Wersjonowany cache snapshotów ACL z ograniczonym rozmiarem i eviction LRU.
+
+    Cache działa w obrębie jednego procesu - unieważnienie wykonywane jest
+    w tych samych ścieżkach zapisu, które publikują zmiany do OPAL.
+    """
+
+    def __init__(self, max_size: int = ACL_CACHE_MAX_TENANTS, ttl_seconds: float = ACL_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # Klucz (tenant_id, layout) - wszystkie układy tenanta mają wspólną wersję
+        self._snapshots: "OrderedDict[Tuple[str, str], ACLSnapshot]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._layouts = {EXPANDED_LAYOUT}
+
+        # Metryki dla monitoring
+        self.metrics = {
+            "hits": 0,
+            "misses": 0,
+            "rebuilds": 0,
+            "rebuild_time_total_ms": 0.0,
+            "last_rebuild_time_ms": None,
+            "invalidations": 0,
+            "evictions": 0,
+            "expirations": 0
+        }
+
+    def get_version(self, tenant_id: str) -> int:
+        """Zwraca aktualną wersję danych tenanta"""
+        with self._lock:
+            return self._versions.get(tenant_id, 0)
+
+    def get_snapshot(self, tenant_id: str, loader: Callable[[str], Optional[Dict[str, Any]]],
+                     layout: str = EXPANDED_LAYOUT) -> Optional[ACLSnapshot]:
+        """
+        Zwraca snapshot ACL tenanta, budując go przez loader przy braku w cache
+
+        Args:
+            tenant_id: ID tenanta
+            loader: Funkcja budująca dane ACL tenanta w danym układzie (zwraca None gdy brak danych)
+            layout: Układ dokumentu ACL
+
+        Returns:
+            ACLSnapshot lub None jeśli loader nie zwrócił danych
+        """
+        snapshot, version = self._lookup(tenant_id, layout)
+        if snapshot is not None:
+            return snapshot
+
+        # Budowanie poza lockiem - inne tenanty nie czekają na rebuild
+        start_time = time.time()
+        data = loader(tenant_id)
+        return self._store(tenant_id, layout, version, data, start_time)
+
+    async def get_snapshot_async(self, tenant_id: str, loader: Callable[[str], Awaitable[Optional[Dict[str, Any]]]],
+                                 layout: str = EXPANDED_LAYOUT) -> Optional[ACLSnapshot]:
+        """
+        Wariant get_snapshot dla trybu ASGI - loader jest korutyną (async driver PostgreSQL)
+        """
+        snapshot, version = self._lookup(tenant_id, layout)
+        if snapshot is not None:
+            return snapshot
+
+        start_time = time.time()
+        data = await loader(tenant_id)
+        return self._store(tenant_id, layout, version, data, start_time)
+
+    def _lookup(self, tenant_id: str, layout: str) -> Tuple[Optional[ACLSnapshot], int]:
+        """Aktualny snapshot z cache (lub None) i wersja tenanta, dla której należy go zbudować"""
+        with self._lock:
+            key = (tenant_id, layout)
+            version = self._versions.get(tenant_id, 0)
+            snapshot = self._snapshots.get(key)
+
+            if snapshot is not None and self._is_expired(snapshot):
+                del self._snapshots[key]
+                self.metrics["expirations"] += 1
+                snapshot = None
+
+            if snapshot is not None and snapshot.version == version:
+                self._snapshots.move_to_end(key)
+                self.metrics["hits"] += 1
+                return snapshot, version
+
+            self.metrics["misses"] += 1
+            return None, version
+
+    def _store(self, tenant_id: str, layout: str, version: int, data: Optional[Dict[str, Any]],
+               start_time: float) -> Optional[ACLSnapshot]:
+        """Zapisuje zbudowane dane jako snapshot wersji, z którą budowanie się rozpoczęło"""
+        duration_ms = (time.time() - start_time) * 1000
+
+        with self._lock:
+            self.metrics["rebuilds"] += 1
+            self.metrics["rebuild_time_total_ms"] += duration_ms
+            self.metrics["last_rebuild_time_ms"] = round(duration_ms, 3)
+
+            if data is None:
+                return None
+
+            key = (tenant_id, layout)
+            snapshot = ACLSnapshot(tenant_id, version, data, time.time(), layout)
+
+            # Zapisz tylko jeśli w trakcie budowania nie było unieważnienia
+            if self._versions.get(tenant_id, 0) == version:
+                self._layouts.add(layout)
+                self._snapshots[key] = snapshot
+                self._snapshots.move_to_end(key)
+                while len(self._snapshots) > self.max_size:
+                    (evicted_tenant, evicted_layout), _ = self._snapshots.popitem(last=False)
+                    self.metrics["evictions"] += 1
+                    logger.debug(f"ACL cache evicted tenant {evicted_tenant} ({evicted_layout})")
+
+            return snapshot
+
+    def get(self, tenant_id: str, loader: Callable[[str], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """Zwraca dane ACL tenanta z cache lub buduje je przez loader"""
+        snapshot = self.get_snapshot(tenant_id, loader)
+        return snapshot.data if snapshot else None
+
+    def invalidate(self, tenant_id: str) -> int:
+        """
+        Unieważnia snapshot tenanta i podbija jego wersję
+
+        Returns:
+            int: Nowa wersja danych tenanta
+        """
+        with self._lock:
+            version = self._versions.get(tenant_id, 0) + 1
+            self._versions[tenant_id] = version
+            for layout in self._layouts:
+                self._snapshots.pop((tenant_id, layout), None)
+            self.metrics["invalidations"] += 1
+
+        logger.info(f"🗑️ ACL cache invalidated for tenant {tenant_id} (version {version})")
+        return version
+
+    def clear(self):
+        """Unieważnia wszystkie snapshoty"""
+        with self._lock:
+            for tenant_id in {tenant_id for tenant_id, _ in self._snapshots}:
+                self._versions[tenant_id] = self._versions.get(tenant_id, 0) + 1
+            self._snapshots.clear()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Zwraca metryki cache dla monitoring
+
+        Returns:
+            Dict: Metryki cache
+        """
+        with self._lock:
+            lookups = self.metrics["hits"] + self.metrics["misses"]
+            hit_rate = (self.metrics["hits"] / lookups) * 100 if lookups else 0.0
+            avg_rebuild = self.metrics["rebuild_time_total_ms"] / self.metrics["rebuilds"] if self.metrics["rebuilds"] else 0.0
+
+            return {
+                **self.metrics,
+                "rebuild_time_total_ms": round(self.metrics["rebuild_time_total_ms"], 3),
+                "avg_rebuild_time_ms": round(avg_rebuild, 3),
+                "hit_rate_percent": round(hit_rate, 2),
+                "size": len(self._snapshots),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "enabled": ACL_CACHE_ENABLED
+            }
+
+    def _is_expired(self, snapshot: ACLSnapshot) -> bool:
+        return self.ttl_seconds > 0 and time.time() - snapshot.built_at > self.ttl_seconds
+
+# Globalna instancja cache
+tenant_acl_cache = TenantACLCache()
+
+def get_cached_tenant_acl(tenant_id: str, loader: Callable[[str], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    """
+    Pomocnicza funkcja do pobierania ACL tenanta przez cache
+    """
+    if not ACL_CACHE_ENABLED:
+        return loader(tenant_id)
+    return tenant_acl_cache.get(tenant_id, loader)
+
+def get_cached_tenant_acl_snapshot(tenant_id: str, loader: Callable[[str], Optional[Dict[str, Any]]],
+                                   layout: str = EXPANDED_LAYOUT) -> Optional[ACLSnapshot]:
+    """
+    Pomocnicza funkcja do pobierania snapshotu ACL tenanta (dane + wersja + ETag)
+    """
+    if not ACL_CACHE_ENABLED:
+        data = loader(tenant_id)
+        return ACLSnapshot(tenant_id, 0, data, time.time(), layout) if data is not None else None
+    return tenant_acl_cache.get_snapshot(tenant_id, loader, layout)
+
+async def get_cached_tenant_acl_snapshot_async(tenant_id: str,
+                                               loader: Callable[[str], Awaitable[Optional[Dict[str, Any]]]],
+                                               layout: str = EXPANDED_LAYOUT) -> Optional[ACLSnapshot]:
+    """
+    Pomocnicza funkcja do pobierania snapshotu ACL tenanta z loaderem asynchronicznym (tryb ASGI)
+    """
+    if not ACL_CACHE_ENABLED:
+        data = await loader(tenant_id)
+        return ACLSnapshot(tenant_id, 0, data, time.time(), layout) if data is not None else None
+    return await tenant_acl_cache.get_snapshot_async(tenant_id, loader, layout)
+
+def invalidate_tenant_acl(tenant_id: str) -> int:
+    """
+    Pomocnicza funkcja do unieważniania snapshotu ACL tenanta (cache procesu i magazyn na dysku)
+    """
+    invalidate_stored_snapshots(tenant_id)
+    return tenant_acl_cache.invalidate(tenant_id)
+
+def get_acl_cache_metrics() -> Dict[str, Any]:
+    """
+    Pomocnicza funkcja do pobierania metryk cache ACL
+    """
+    return tenant_acl_cache.get_metrics()
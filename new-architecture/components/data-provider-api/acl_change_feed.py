@@ -0,0 +1,349 @@
+"""
+ACL Change Feed - Postgres LISTEN/NOTIFY listener driving ACL cache invalidation and OPAL publishes
+
+Triggers from migration 09_create_acl_change_notify.sql send every permission change
+(also plain SQL: seed scripts, load_ksef_data.sql, manual fixes) on the acl_changes
+channel as {"id", "tenant_id", "user_id", "table", "op"}. The listener collects
+events for a short window and then, per tenant, publishes one OPAL update: the
+changed users, or the whole tenant for tenant-wide events and large batches.
+
+Every process listens (each holds its own ACL cache); only the holder of an
+advisory lock publishes to OPAL, the others just invalidate. After a lost
+connection the listener reconnects with backoff and replays missed events from
+acl_change_events.
+"""
+
+import os
+import json
+import time
+import select
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Set
+
+import psycopg2
+import psycopg2.extras
+
+from acl_cache import invalidate_tenant_acl
+
+logger = logging.getLogger(__name__)
+
+# Listener started with the Flask app (requires migration 09)
+ACL_CHANGE_FEED_ENABLED = os.environ.get("ACL_CHANGE_FEED_ENABLED", "false").lower() == "true"
+# Seconds events are collected before publishing - a bulk change becomes one publish per tenant
+ACL_CHANGE_FEED_COALESCE_SECONDS = float(os.environ.get("ACL_CHANGE_FEED_COALESCE_SECONDS", 0.5))
+# Changed users of a tenant published user-scoped; more become one full tenant sync
+ACL_CHANGE_FEED_MAX_USERS = int(os.environ.get("ACL_CHANGE_FEED_MAX_USERS", 50))
+# Upper bound of the reconnect backoff
+ACL_CHANGE_FEED_RECONNECT_MAX_SECONDS = float(os.environ.get("ACL_CHANGE_FEED_RECONNECT_MAX_SECONDS", 30))
+# Idle seconds between liveness checks (which also retry taking the publisher lock)
+ACL_CHANGE_FEED_KEEPALIVE_SECONDS = float(os.environ.get("ACL_CHANGE_FEED_KEEPALIVE_SECONDS", 30))
+# Already seen events re-read on catch-up - covers transactions committed out of event_id order
+ACL_CHANGE_FEED_CATCHUP_OVERLAP = int(os.environ.get("ACL_CHANGE_FEED_CATCHUP_OVERLAP", 1000))
+
+# Channel used by emit_acl_change() in migration 09
+ACL_CHANGE_CHANNEL = "acl_changes"
+
+LAST_EVENT_QUERY = "SELECT COALESCE(MAX(event_id), 0) AS event_id FROM acl_change_events"
+
+CATCH_UP_QUERY = """
+    SELECT event_id, tenant_id, user_id, table_name, op
+    FROM acl_change_events
+    WHERE event_id > %(after)s
+    ORDER BY event_id
+"""
+
+PUBLISHER_LOCK_QUERY = "SELECT pg_try_advisory_lock(hashtext(%(channel)s)) AS acquired"
+
+KEEPALIVE_QUERY = "SELECT 1"
+
+def parse_change_event(payload: str) -> Optional[Dict[str, Any]]:
+    """
+    Decode a NOTIFY payload
+
+    Returns:
+        Event dict (id, tenant_id, user_id, table, op) or None for a malformed payload
+    """
+    try:
+        event = json.loads(payload)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(event, dict) or not isinstance(event.get("id"), int) or not event.get("tenant_id"):
+        return None
+    return event
+
+def _connect():
+    """Dedicated autocommit connection - LISTEN needs a session of its own, outside the pool"""
+    conn = psycopg2.connect(
+        host=os.environ.get('DB_HOST', 'localhost'),
+        port=int(os.environ.get('DB_PORT', 5432)),
+        database=os.environ.get('DB_NAME', 'opa_zero_poll'),
+        user=os.environ.get('DB_USER', 'opa_user'),
+        password=os.environ.get('DB_PASSWORD', 'opa_password'),
+        cursor_factory=psycopg2.extras.RealDictCursor,
+    )
+    conn.autocommit = True
+    return conn
+
+class ACLChangeListener:
+    """
+    Consumes the acl_changes channel on a background thread
+
+    Pending changes are kept per tenant as a set of user IDs, or None when the
+    whole tenant has to be republished.
+    """
+
+    def __init__(self, publisher=None, invalidate: Callable[[str], Any] = invalidate_tenant_acl,
+                 connect: Callable[[], Any] = _connect,
+                 coalesce_seconds: float = ACL_CHANGE_FEED_COALESCE_SECONDS,
+                 max_users: int = ACL_CHANGE_FEED_MAX_USERS,
+                 reconnect_max_seconds: float = ACL_CHANGE_FEED_RECONNECT_MAX_SECONDS,
+                 keepalive_seconds: float = ACL_CHANGE_FEED_KEEPALIVE_SECONDS,
+                 catch_up_overlap: int = ACL_CHANGE_FEED_CATCHUP_OVERLAP):
+        """
+        Args:
+            publisher: UserDataSyncService publishing to OPAL (None - invalidate only)
+            invalidate: Invalidates the ACL cache of a tenant
+            connect: Opens the listening connection (dict rows, autocommit)
+        """
+        self.publisher = publisher
+        self.invalidate = invalidate
+        self.connect = connect
+        self.coalesce_seconds = coalesce_seconds
+        self.max_users = max_users
+        self.reconnect_max_seconds = reconnect_max_seconds
+        self.keepalive_seconds = keepalive_seconds
+        self.catch_up_overlap = catch_up_overlap
+
+        self.last_event_id: Optional[int] = None
+        self.is_publisher = False
+        self._pending: Dict[str, Optional[Set[str]]] = {}
+        self._pending_since: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.metrics = {
+            "connected": False,
+            "is_publisher": False,
+            "events_received": 0,
+            "events_caught_up": 0,
+            "invalid_payloads": 0,
+            "user_publishes": 0,
+            "tenant_syncs": 0,
+            "invalidations": 0,
+            "publish_errors": 0,
+            "reconnects": 0,
+            "last_event_id": None,
+            "last_error": None
+        }
+
+    def start(self):
+        """Start the listener thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="acl-change-feed", daemon=True)
+        self._thread.start()
+        logger.info(f"ACL change feed listening on channel {ACL_CHANGE_CHANNEL}")
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the listener thread (pending changes are published before it disconnects)"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        """Listen until stopped, reconnecting with exponential backoff"""
+        delay = min(1.0, self.reconnect_max_seconds)
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self.connect()
+                self._listen(conn)
+            except Exception as e:
+                self.metrics["last_error"] = str(e)
+                logger.error(f"ACL change feed connection failed: {e}")
+                if self.metrics["connected"]:
+                    # Lost an established connection - retry right away, back off if it keeps failing
+                    delay = min(1.0, self.reconnect_max_seconds)
+            finally:
+                self.metrics["connected"] = False
+                self.is_publisher = self.metrics["is_publisher"] = False
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+            if self._stop.is_set():
+                break
+            self.metrics["reconnects"] += 1
+            self._stop.wait(delay)
+            delay = min(delay * 2, self.reconnect_max_seconds)
+
+    def _listen(self, conn):
+        """LISTEN, replay missed events, then handle notifications until stopped"""
+        with conn.cursor() as cursor:
+            # LISTEN before the catch-up query - events committed in between arrive twice, none is lost
+            cursor.execute(f"LISTEN {ACL_CHANGE_CHANNEL}")
+            self._try_become_publisher(cursor)
+            self.catch_up(cursor)
+        self.metrics["connected"] = True
+
+        last_activity = time.monotonic()
+        while not self._stop.is_set():
+            if select.select([conn], [], [], self._wait_timeout()) != ([], [], []):
+                conn.poll()
+                while conn.notifies:
+                    self.handle_notification(conn.notifies.pop(0).payload)
+                last_activity = time.monotonic()
+            elif time.monotonic() - last_activity >= self.keepalive_seconds:
+                # Detects a silently dropped connection; a standby retries the publisher lock
+                with conn.cursor() as cursor:
+                    if not self.is_publisher:
+                        self._try_become_publisher(cursor)
+                    else:
+                        cursor.execute(KEEPALIVE_QUERY)
+                last_activity = time.monotonic()
+
+            if self._pending_since is not None and time.monotonic() - self._pending_since >= self.coalesce_seconds:
+                self._flush_on(conn)
+
+        # Stopping - publish what was collected while still holding the publisher lock
+        self._flush_on(conn)
+
+    def _flush_on(self, conn):
+        """
+        Flush pending changes, first retrying the publisher lock on a standby
+
+        A standby takes over as soon as the publisher's connection is gone, so
+        at most one coalescing window of changes is only invalidated.
+        """
+        if not self._pending:
+            return
+        if self.publisher is not None and not self.is_publisher:
+            with conn.cursor() as cursor:
+                self._try_become_publisher(cursor)
+        self.flush()
+
+    def _wait_timeout(self) -> float:
+        if self._pending_since is None:
+            return min(1.0, self.keepalive_seconds)
+        return max(0.0, self._pending_since + self.coalesce_seconds - time.monotonic())
+
+    def _try_become_publisher(self, cursor):
+        """Take the session advisory lock - released by Postgres when this connection drops"""
+        cursor.execute(PUBLISHER_LOCK_QUERY, {"channel": ACL_CHANGE_CHANNEL})
+        self.is_publisher = self.metrics["is_publisher"] = bool(cursor.fetchone()["acquired"])
+        if self.is_publisher:
+            logger.info("ACL change feed publishes changes to OPAL")
+
+    def catch_up(self, cursor):
+        """
+        Queue events missed while disconnected
+
+        On the first connection only the current position is recorded - caches
+        start empty and OPAL clients fetch full data on their own start.
+        """
+        if self.last_event_id is None:
+            cursor.execute(LAST_EVENT_QUERY)
+            self.last_event_id = self.metrics["last_event_id"] = cursor.fetchone()["event_id"]
+            return
+
+        cursor.execute(CATCH_UP_QUERY, {"after": max(0, self.last_event_id - self.catch_up_overlap)})
+        rows = cursor.fetchall()
+        for row in rows:
+            self._record(row["event_id"], row["tenant_id"], row["user_id"])
+        self.metrics["events_caught_up"] += len(rows)
+        if rows:
+            logger.info(f"ACL change feed replayed {len(rows)} events after reconnect")
+
+    def handle_notification(self, payload: str):
+        """Queue the change carried by one NOTIFY payload"""
+        event = parse_change_event(payload)
+        if event is None:
+            self.metrics["invalid_payloads"] += 1
+            logger.warning(f"Ignoring malformed ACL change notification: {payload[:200]}")
+            return
+        self.metrics["events_received"] += 1
+        self._record(event["id"], event["tenant_id"], event.get("user_id"))
+
+    def _record(self, event_id: int, tenant_id: str, user_id: Optional[str]):
+        if self.last_event_id is None or event_id > self.last_event_id:
+            self.last_event_id = self.metrics["last_event_id"] = event_id
+        self._queue(tenant_id, None if user_id is None else {user_id})
+
+    def _queue(self, tenant_id: str, user_ids: Optional[Set[str]]):
+        """Add changed users (None - the whole tenant) to the pending changes of a tenant"""
+        if self._pending_since is None:
+            self._pending_since = time.monotonic()
+
+        if tenant_id in self._pending and self._pending[tenant_id] is None:
+            return
+        users = self._pending.setdefault(tenant_id, set())
+        if user_ids is None or len(users | user_ids) > self.max_users:
+            self._pending[tenant_id] = None
+        else:
+            users.update(user_ids)
+
+    def flush(self):
+        """
+        Invalidate and publish the pending changes, one publish per tenant
+
+        A failed publish is queued again and retried on the next flush - its
+        events are already behind last_event_id, so catch-up would not replay them.
+        """
+        pending, self._pending, self._pending_since = self._pending, {}, None
+        for tenant_id, user_ids in pending.items():
+            try:
+                if self.publisher is None or not self.is_publisher:
+                    self.invalidate(tenant_id)
+                    self.metrics["invalidations"] += 1
+                    continue
+                if user_ids is None:
+                    # Invalidates the cache before notifying OPAL
+                    published = self.publisher.sync_tenant_data(tenant_id, wait=True)
+                else:
+                    published = self.publisher.publish_user_updates(tenant_id, sorted(user_ids), wait=True)
+                if not published:
+                    raise RuntimeError("OPAL notification failed")
+                self.metrics["tenant_syncs" if user_ids is None else "user_publishes"] += 1
+            except Exception as e:
+                self.metrics["publish_errors"] += 1
+                self.metrics["last_error"] = str(e)
+                logger.error(f"Failed to apply ACL changes of tenant {tenant_id}, retrying on next flush: {e}")
+                self._queue(tenant_id, user_ids)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Listener state and counters"""
+        return {
+            **self.metrics,
+            "enabled": ACL_CHANGE_FEED_ENABLED,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "pending_tenants": len(self._pending),
+            "channel": ACL_CHANGE_CHANNEL
+        }
+
+# Global instance (created by start_acl_change_feed)
+acl_change_listener: Optional[ACLChangeListener] = None
+
+def start_acl_change_feed(publisher=None) -> Optional[ACLChangeListener]:
+    """
+    Start the change feed listener when ACL_CHANGE_FEED_ENABLED
+
+    Args:
+        publisher: UserDataSyncService used to publish changes to OPAL
+    """
+    global acl_change_listener
+    if not ACL_CHANGE_FEED_ENABLED:
+        return None
+    if acl_change_listener is None:
+        acl_change_listener = ACLChangeListener(publisher)
+    acl_change_listener.start()
+    return acl_change_listener
+
+def get_acl_change_feed_metrics() -> Optional[Dict[str, Any]]:
+    """Change feed metrics (None while the feed is not running)"""
+    if acl_change_listener is None:
+        return None
+    return acl_change_listener.get_metrics()
@@ -0,0 +1,123 @@
+"""
+ACL Change Journal for Data Provider API
+
+Reads the per-tenant change journal (migration 07_create_tenant_acl_change_journal.sql)
+and returns only the user entries changed since a given version, as JSON Patch
+operations against the tenant ACL document. The cost of a delta is proportional
+to the number of changed users, not to the tenant size.
+"""
+
+import logging
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+TENANT_VERSION_QUERY = """
+    SELECT version, compacted_through
+    FROM tenant_acl_versions
+    WHERE tenant_id = %(tenant_id)s
+"""
+
+# Latest state of every user changed in (since, version]; users without a row were deleted
+CHANGED_USERS_QUERY = """
+    SELECT c.user_id, MAX(c.seq) AS seq,
+           a.user_id IS NULL AS deleted,
+           a.email, a.full_name, a.roles, a.permissions, a.companies, a.teams
+    FROM tenant_acl_changes c
+    LEFT JOIN tenant_user_acl a ON a.tenant_id = c.tenant_id AND a.user_id = c.user_id
+    WHERE c.tenant_id = %(tenant_id)s AND c.seq > %(since)s AND c.seq <= %(version)s
+    GROUP BY c.user_id, a.user_id, a.email, a.full_name, a.roles, a.permissions, a.companies, a.teams
+    ORDER BY MAX(c.seq)
+"""
+
+def escape_json_pointer(token: str) -> str:
+    """Escape a JSON Pointer reference token (RFC 6901)"""
+    return token.replace('~', '~0').replace('/', '~1')
+
+class ACLChangeJournal:
+    """
+    Builds ACL deltas from the change journal.
+
+    Patch operations carry the current state of each changed user, so a delta
+    overlapping a full document re-applies the same state; clients should treat
+    "remove" of an already missing user as a no-op.
+    """
+
+    def __init__(self, cursor):
+        """
+        Args:
+            cursor: Database cursor returning dict rows (RealDictCursor)
+        """
+        self.cursor = cursor
+
+    def get_version(self, tenant_id: str) -> Dict[str, int]:
+        """
+        Current ACL version of a tenant and the journal compaction mark
+
+        Returns:
+            Dict with version and compacted_through (both 0 for tenants without changes)
+        """
+        self.cursor.execute(TENANT_VERSION_QUERY, {'tenant_id': tenant_id})
+        row = self.cursor.fetchone()
+        if not row:
+            return {"version": 0, "compacted_through": 0}
+        return {"version": row['version'], "compacted_through": row['compacted_through']}
+
+    def get_changes(self, tenant_id: str, since: int) -> Dict[str, Any]:
+        """
+        Changes of tenant ACL after a given version
+
+        Args:
+            tenant_id: Tenant identifier
+            since: Version the client already has
+
+        Returns:
+            Dict with version, full_resync_required and JSON Patch changes
+        """
+        state = self.get_version(tenant_id)
+        version = state["version"]
+
+        result = {
+            "tenant_id": tenant_id,
+            "since": since,
+            "version": version,
+            "full_resync_required": False,
+            "changes": []
+        }
+
+        # Journal compacted past the client version, or client ahead of the database
+        if since < state["compacted_through"] or since > version:
+            logger.info(f"Full ACL resync required for tenant {tenant_id} (since={since}, "
+                        f"version={version}, compacted_through={state['compacted_through']})")
+            result["full_resync_required"] = True
+            return result
+
+        if since == version:
+            return result
+
+        self.cursor.execute(CHANGED_USERS_QUERY, {'tenant_id': tenant_id, 'since': since, 'version': version})
+        changes = [self._to_patch_operation(row) for row in self.cursor.fetchall()]
+        changes.append({"op": "add", "path": "/version", "value": version})
+
+        result["changes"] = changes
+        logger.debug(f"ACL delta for tenant {tenant_id}: {len(changes) - 1} users since {since}")
+        return result
+
+    @staticmethod
+    def _to_patch_operation(row: Dict[str, Any]) -> Dict[str, Any]:
+        """JSON Patch operation for one changed user entry"""
+        path = f"/users/{escape_json_pointer(row['user_id'])}"
+        if row['deleted']:
+            return {"op": "remove", "path": path}
+        return {
+            "op": "add",
+            "path": path,
+            "value": {
+                "email": row['email'],
+                "full_name": row['full_name'],
+                "roles": row['roles'],
+                "permissions": row['permissions'],
+                "companies": row['companies'],
+                "teams": row['teams']
+            }
+        }
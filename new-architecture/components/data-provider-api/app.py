@@ -11,14 +11,22 @@ Przygotowany do integracji z OPAL External Data Sources (Task 36).
 import os
 import json
 import time
+import socket
 import datetime
 import logging
+import itertools
 from typing import Dict, Any, Optional, List
 import requests
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import jwt
 from cryptography.hazmat.primitives import serialization
+from etag_utils import compute_etag, combine_etags, is_not_modified, not_modified_response
+from compression import json_response, document_representations, get_compression_metrics
+from fast_json import dumps as dumps_json
+from snapshot_store import SNAPSHOT_STORE_ENABLED, stored_json_response, get_snapshot_store_metrics
+from tenant_summary import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, TENANT_STATUSES
+from tenant_acl_builder import ACL_LAYOUTS, EXPANDED_LAYOUT
 
 # Import Model 2 components
 try:
@@ -44,10 +52,11 @@ except ImportError:
 
 # Import database integration
 try:
-    from database_integration import get_tenant_acl_from_database, get_all_tenants_from_database, is_database_available
+    from database_integration import get_tenant_acl_snapshot, get_all_tenants_from_database, is_database_available, map_tenants, check_materialized_acl_consistency, get_tenant_acl_changes, get_user_acl_from_database, get_database_health, DATABASE_UNAVAILABLE_ERRORS, is_database_unavailable, get_tenant_summaries, get_query_stats, reset_query_stats
     DATABASE_INTEGRATION_AVAILABLE = True
 except ImportError as e:
     DATABASE_INTEGRATION_AVAILABLE = False
+    DATABASE_UNAVAILABLE_ERRORS = ()
 
 # Import Users Management endpoints
 try:
@@ -79,11 +88,25 @@ except ImportError as e:
 
 # Import User Data Sync Service
 try:
-    from user_data_sync import UserDataSyncService, notify_user_change, sync_full_tenant, get_sync_metrics
+    from user_data_sync import UserDataSyncService, user_data_sync, notify_user_change, sync_full_tenant, get_sync_metrics
     USER_DATA_SYNC_AVAILABLE = True
 except ImportError as e:
     USER_DATA_SYNC_AVAILABLE = False
 
+# Import ACL Snapshot Cache
+try:
+    from acl_cache import get_acl_cache_metrics
+    ACL_CACHE_AVAILABLE = True
+except ImportError as e:
+    ACL_CACHE_AVAILABLE = False
+
+# Import ACL Change Feed (LISTEN/NOTIFY)
+try:
+    from acl_change_feed import start_acl_change_feed, get_acl_change_feed_metrics
+    ACL_CHANGE_FEED_AVAILABLE = True
+except ImportError as e:
+    ACL_CHANGE_FEED_AVAILABLE = False
+
 # Import Profile Role Mapper
 try:
     from profile_role_mapper import apply_profile_to_user_roles, remove_profile_from_user_roles, sync_user_profiles_to_roles
@@ -133,6 +156,9 @@ metrics = AppMetrics()
 OPA_URL = os.environ.get("OPA_URL", "http://opa-standalone-new:8181")  
 PROVISIONING_API_URL = os.environ.get("PROVISIONING_API_URL", "http://provisioning-api-new:8010")
 
+# Strumieniowanie /opal/full-snapshot tenant po tenancie (można nadpisać parametrem ?stream=true|false)
+FULL_SNAPSHOT_STREAMING = os.environ.get("FULL_SNAPSHOT_STREAMING", "false").lower() == "true"
+
 # Statyczne dane testowe ACL (Enhanced Model 1) - fallback
 ACL_DATA = {
     "tenant1": {
@@ -142,25 +168,60 @@ ACL_DATA = {
     }
 }
 
+def _acl_envelope(tenant_id):
+    """
+    Envelope odpowiedzi /tenants/<tenant_id>/acl jako (prefix, suffix) wokół danych ACL -
+    klucze posortowane: data, model, source, tenant_id, timestamp (JSON równoważny jsonify,
+    znaki spoza ASCII bez escapowania)
+    """
+    suffix = (b',"model":"1","source":"database","tenant_id":' + dumps_json(tenant_id) +
+              b',"timestamp":' + dumps_json(datetime.datetime.utcnow().isoformat()) + b'}\n')
+    return b'{"data":', suffix
+
+def _get_acl_layout():
+    """Układ dokumentu ACL z parametru ?layout= (None gdy nieprawidłowy)"""
+    layout = request.args.get("layout", EXPANDED_LAYOUT)
+    return layout if layout in ACL_LAYOUTS else None
+
+def _invalid_layout_response():
+    return jsonify({
+        "error": f"Invalid layout '{request.args.get('layout')}', expected one of: {', '.join(ACL_LAYOUTS)}"
+    }), 400
+
 @app.route("/tenants/<tenant_id>/acl", methods=["GET"])
 def get_tenant_acl(tenant_id):
-    """Zwraca dane ACL dla określonego tenanta"""
+    """
+    Zwraca dane ACL dla określonego tenanta
+    
+    Query Parameters:
+        layout (str): 'expanded' (domyślnie) - permissions[app] w każdym użytkowniku;
+                      'normalized' - użytkownicy mają tylko referencje ról (effective_roles),
+                      a uprawnienia ról są raz w role_permissions[app][role]
+    """
     logger.info(f"ACL data requested for tenant: {tenant_id}")
     
+    layout = _get_acl_layout()
+    if layout is None:
+        return _invalid_layout_response()
+    
     # Try database integration first
     if DATABASE_INTEGRATION_AVAILABLE and is_database_available():
         logger.info(f"Using database integration for tenant {tenant_id}")
-        tenant_data = get_tenant_acl_from_database(tenant_id)
+        snapshot = get_tenant_acl_snapshot(tenant_id, layout)
         
-        if tenant_data:
-            logger.info(f"Returning database ACL data for tenant {tenant_id}: {len(tenant_data.get('users', {}))} users")
-            return jsonify({
-                "tenant_id": tenant_id,
-                "data": tenant_data,
-                "timestamp": datetime.datetime.utcnow().isoformat(),
-                "model": "1",
-                "source": "database"
-            })
+        if snapshot is not None:
+            # ETag liczony z danych ACL (bez timestamp) - 304 gdy klient ma aktualną wersję
+            if is_not_modified(snapshot.etag):
+                logger.info(f"ACL data for tenant {tenant_id} not modified (ETag {snapshot.etag})")
+                return not_modified_response(snapshot.etag)
+            
+            logger.info(f"Returning database ACL data for tenant {tenant_id} (ETag {snapshot.etag})")
+            # Dane są kodowane raz na snapshot; envelope doklejany per request
+            if SNAPSHOT_STORE_ENABLED:
+                # Dane z pliku magazynu (mmap, współdzielone między workerami)
+                return stored_json_response(tenant_id, layout, snapshot, _acl_envelope(tenant_id))
+            return json_response(lambda: snapshot.body, snapshot.etag, snapshot.representations,
+                                 envelope=_acl_envelope(tenant_id))
         else:
             logger.warning(f"Tenant {tenant_id} not found in database")
             return jsonify({
@@ -175,29 +236,136 @@ def get_tenant_acl(tenant_id):
             "tenant_id": tenant_id
         }), 503
 
+@app.route("/tenants/<tenant_id>/users/<user_id>/acl", methods=["GET"])
+def get_user_acl(tenant_id, user_id):
+    """
+    Zwraca wpis ACL pojedynczego użytkownika (users.<user_id> z danych ACL tenanta)
+    
+    Odpowiedź nie jest opakowana w envelope - OPAL zapisuje ją bezpośrednio
+    pod dst_path /acl/{tenant_id}/data/users/{user_id}.
+    
+    Query Parameters:
+        missing (str): 'null' - dla użytkownika spoza tenanta zwróć null zamiast 404
+                       (OPAL nadpisuje wtedy wpis usuniętego użytkownika)
+    """
+    logger.info(f"User ACL requested for user {user_id} in tenant {tenant_id}")
+    
+    if not (DATABASE_INTEGRATION_AVAILABLE and is_database_available()):
+        logger.error("Database integration not available")
+        return jsonify({
+            "error": "Database not available",
+            "tenant_id": tenant_id
+        }), 503
+    
+    try:
+        user_acl = get_user_acl_from_database(tenant_id, user_id)
+    except DATABASE_UNAVAILABLE_ERRORS:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to fetch ACL for user {user_id} in tenant {tenant_id}: {e}")
+        return jsonify({
+            "error": f"Failed to fetch user ACL: {str(e)}",
+            "tenant_id": tenant_id,
+            "user_id": user_id
+        }), 500
+    
+    if user_acl is None and request.args.get("missing") != "null":
+        logger.warning(f"User {user_id} not found in tenant {tenant_id}")
+        return jsonify({
+            "error": "User not found in tenant",
+            "tenant_id": tenant_id,
+            "user_id": user_id
+        }), 404
+    
+    etag = compute_etag(user_acl)
+    if is_not_modified(etag):
+        return not_modified_response(etag)
+    
+    response = jsonify(user_acl)
+    response.set_etag(etag)
+    return response
+
+@app.route("/tenants/<tenant_id>/acl/changes", methods=["GET"])
+def get_tenant_acl_changes_endpoint(tenant_id):
+    """
+    Zwraca zmiany ACL tenanta od podanej wersji (JSON Patch względem dokumentu /tenants/<tenant_id>/acl)
+    
+    Query Parameters:
+        since (int): Wersja, którą klient już posiada (pole "version" dokumentu ACL)
+    """
+    since = request.args.get("since", type=int)
+    if since is None or since < 0:
+        return jsonify({
+            "error": "Query parameter 'since' must be a non-negative integer",
+            "tenant_id": tenant_id
+        }), 400
+    
+    if not (DATABASE_INTEGRATION_AVAILABLE and is_database_available()):
+        logger.error("Database integration not available")
+        return jsonify({
+            "error": "Database not available",
+            "tenant_id": tenant_id
+        }), 503
+    
+    try:
+        changes = get_tenant_acl_changes(tenant_id, since)
+        if changes["full_resync_required"]:
+            # Dziennik skompaktowany - klient musi pobrać pełny dokument ACL
+            changes["acl_url"] = f"/tenants/{tenant_id}/acl"
+        
+        changes["timestamp"] = datetime.datetime.utcnow().isoformat()
+        return jsonify(changes)
+        
+    except DATABASE_UNAVAILABLE_ERRORS:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to fetch ACL changes for tenant {tenant_id}: {e}")
+        return jsonify({
+            "error": f"Failed to fetch ACL changes: {str(e)}",
+            "tenant_id": tenant_id
+        }), 500
+
 @app.route("/tenants", methods=["GET"])
 def list_tenants():
-    """Zwraca listę wszystkich dostępnych tenantów"""
+    """
+    Zwraca listę tenantów z liczbą użytkowników (jedno zapytanie na stronę, bez budowania ACL)
+    
+    Query Parameters:
+        limit (int): Rozmiar strony (domyślnie 100, maks. 1000)
+        offset (int): Liczba pominiętych tenantów
+        name_prefix (str): Prefiks nazwy tenanta (bez rozróżniania wielkości liter)
+        status (str): Status tenanta (active, inactive, suspended)
+    """
     logger.info("Tenants list requested")
     
+    limit = request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+    offset = request.args.get("offset", 0, type=int)
+    name_prefix = request.args.get("name_prefix") or None
+    status = request.args.get("status") or None
+    
+    if limit < 1 or offset < 0:
+        return jsonify({
+            "error": "Parameters 'limit' must be positive and 'offset' non-negative"
+        }), 400
+    if status is not None and status not in TENANT_STATUSES:
+        return jsonify({
+            "error": f"Invalid status '{status}', expected one of: {', '.join(TENANT_STATUSES)}"
+        }), 400
+    
     if DATABASE_INTEGRATION_AVAILABLE and is_database_available():
         logger.info("Using database integration for tenants list")
-        tenant_ids = get_all_tenants_from_database()
+        summary = get_tenant_summaries(min(limit, MAX_PAGE_SIZE), offset, name_prefix, status)
         
-        tenants_info = []
-        for tenant_id in tenant_ids:
-            tenant_data = get_tenant_acl_from_database(tenant_id)
-            if tenant_data:
-                tenants_info.append({
-                    "tenant_id": tenant_id,
-                    "tenant_name": tenant_data.get("tenant_name", "Unknown"),
-                    "user_count": len(tenant_data.get("users", {})),
-                    "source": "database"
-                })
+        tenants_info = [{**tenant, "source": "database"} for tenant in summary["tenants"]]
         
         return jsonify({
             "tenants": tenants_info,
-            "total_count": len(tenants_info),
+            "total_count": summary["total_count"],
+            "pagination": {
+                "limit": min(limit, MAX_PAGE_SIZE),
+                "offset": offset,
+                "has_more": offset + len(tenants_info) < summary["total_count"]
+            },
             "timestamp": datetime.datetime.utcnow().isoformat(),
             "source": "database"
         })
@@ -214,9 +382,29 @@ def health_check():
     return jsonify({
         "status": "healthy" if db_available else "degraded",
         "database_available": db_available,
+        "database_health": get_database_health() if DATABASE_INTEGRATION_AVAILABLE else None,
         "timestamp": datetime.datetime.utcnow().isoformat()
     })
 
+def handle_database_unavailable(error):
+    """Awaria bazy danych (circuit breaker otwarty / brak połączenia) - szybka odpowiedź 503"""
+    if not is_database_unavailable(error):
+        # Błąd pojedynczego zapytania (statement_timeout, konflikt serializacji) - baza działa
+        logger.error(f"Database query failed: {error}")
+        return jsonify({
+            "error": "Database query failed",
+            "details": str(error)
+        }), 500
+    logger.error(f"Database unavailable: {error}")
+    return jsonify({
+        "error": "Database not available",
+        "details": str(error)
+    }), 503
+
+if DATABASE_INTEGRATION_AVAILABLE:
+    for error_class in DATABASE_UNAVAILABLE_ERRORS:
+        app.register_error_handler(error_class, handle_database_unavailable)
+
 @app.route("/", methods=["GET"])
 def root():
     """Endpoint główny - informacje o API"""
@@ -305,6 +493,10 @@ def get_user_data_sync_metrics():
         metrics = get_sync_metrics()
         return jsonify({
             "user_data_sync_metrics": metrics,
+            "acl_cache_metrics": get_acl_cache_metrics() if ACL_CACHE_AVAILABLE else None,
+            "compression_metrics": get_compression_metrics(),
+            "snapshot_store_metrics": get_snapshot_store_metrics(),
+            "acl_change_feed_metrics": get_acl_change_feed_metrics() if ACL_CHANGE_FEED_AVAILABLE else None,
             "available": True,
             "service_status": "healthy" if metrics["success_rate_percent"] >= 90 else "degraded",
             "timestamp": datetime.datetime.utcnow().isoformat()
@@ -318,6 +510,10 @@ def get_user_data_sync_metrics():
             "timestamp": datetime.datetime.utcnow().isoformat()
         }), 500
 
+# Kanał zmian uprawnień z PostgreSQL (ACL_CHANGE_FEED_ENABLED) - unieważnianie cache ACL i publikacja do OPAL
+if ACL_CHANGE_FEED_AVAILABLE and DATABASE_INTEGRATION_AVAILABLE:
+    start_acl_change_feed(user_data_sync if USER_DATA_SYNC_AVAILABLE else None)
+
 # Rejestracja endpointów
 if USERS_ENDPOINTS_AVAILABLE:
     try:
@@ -370,7 +566,7 @@ def debug_user_access(user_id, tenant_id):
         return jsonify({"error": "Database not available"}), 503
     
     try:
-        from database.dao import UserAccessDAO, UserRoleDAO
+        from shared.database.dao import UserAccessDAO, UserRoleDAO
         
         # Sprawdź user_access
         user_access_dao = UserAccessDAO()
@@ -401,14 +597,151 @@ def debug_user_access(user_id, tenant_id):
         logger.error(f"Debug user_access failed: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route("/debug/acl-consistency", methods=["GET"])
+def debug_acl_consistency():
+    """
+    Endpoint diagnostyczny - porównuje tabelę tenant_user_acl z widokami na żywo
+    
+    Query Parameters:
+        tenant_id (str): Opcjonalnie - sprawdź tylko jednego tenanta
+    """
+    if not DATABASE_INTEGRATION_AVAILABLE:
+        return jsonify({"error": "Database not available"}), 503
+    
+    tenant_id = request.args.get("tenant_id")
+    try:
+        issues = check_materialized_acl_consistency(tenant_id)
+        
+        if issues:
+            logger.warning(f"tenant_user_acl inconsistent: {len(issues)} rows (tenant: {tenant_id or 'all'})")
+        
+        return jsonify({
+            "tenant_id": tenant_id,
+            "consistent": not issues,
+            "issues_count": len(issues),
+            "issues": issues,
+            "timestamp": datetime.datetime.utcnow().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"ACL consistency check failed: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/debug/db-stats", methods=["GET", "DELETE"])
+def debug_db_stats():
+    """
+    Endpoint diagnostyczny - statystyki zapytań SQL per znormalizowane zapytanie
+    (liczba wywołań, wiersze, p50/p95/p99, histogram czasów, EXPLAIN próbek wolnych zapytań)
+    
+    Zbierane tylko przy DB_QUERY_STATS_ENABLED=true. DELETE zeruje statystyki.
+    
+    Query Parameters:
+        reset (bool): Wyzeruj statystyki po odczycie
+    """
+    if not DATABASE_INTEGRATION_AVAILABLE:
+        return jsonify({"error": "Database not available"}), 503
+    
+    if request.method == "DELETE":
+        reset_query_stats()
+        return jsonify({"reset": True, "timestamp": datetime.datetime.utcnow().isoformat()})
+    
+    reset = request.args.get("reset", "false").lower() == "true"
+    stats = get_query_stats(reset=reset)
+    stats["timestamp"] = datetime.datetime.utcnow().isoformat()
+    return jsonify(stats)
+
+def _get_snapshot_tenant_entry(tenant_id, layout=EXPANDED_LAYOUT):
+    """
+    Zwraca zserializowane dane ACL tenanta (bajty JSON) dla pełnego snapshotu wraz z ETag.
+    Przy błędzie zwraca placeholder z opisem błędu i ETag None.
+    """
+    try:
+        logger.info(f"Processing tenant: {tenant_id}")
+        
+        # Pobierz snapshot ACL dla tego tenanta z Model 2
+        snapshot = get_tenant_acl_snapshot(tenant_id, layout)
+        
+        if snapshot is not None:
+            logger.info(f"Added ACL data for tenant {tenant_id}")
+            return snapshot.body, snapshot.etag
+        
+        logger.warning(f"No ACL data found for tenant {tenant_id}")
+        # Nawet jeśli brak danych, dodaj pustą strukturę
+        empty_acl = {
+            "tenant_id": tenant_id,
+            "users": {},
+            "roles": {},
+            "permissions": {}
+        }
+        return dumps_json(empty_acl), compute_etag(empty_acl)
+        
+    except DATABASE_UNAVAILABLE_ERRORS:
+        # Awaria bazy - nie publikuj snapshotu z placeholderami
+        raise
+    except Exception as e:
+        logger.error(f"Error processing tenant {tenant_id}: {str(e)}")
+        # W przypadku błędu, dodaj placeholder
+        return dumps_json({
+            "tenant_id": tenant_id,
+            "error": f"Failed to load data: {str(e)}",
+            "users": {},
+            "roles": {},
+            "permissions": {}
+        }), None
+
+def _abort_streamed_response(environ):
+    """
+    Zrywa połączenie odpowiedzi strumieniowanej, gdy status 200 został już wysłany.
+    Klient dostaje niekompletne ciało chunked (błąd transferu) zamiast poprawnie
+    zakończonej odpowiedzi z uciętym JSON.
+    """
+    connection = environ.get("werkzeug.socket") or environ.get("gunicorn.socket")
+    if connection is None:
+        return
+    try:
+        connection.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+def _stream_opal_full_snapshot(entries, tenants_count, metadata, environ):
+    """
+    Generator dokumentu pełnego snapshotu - wysyła ACL tenant po tenancie.
+    W pamięci znajduje się naraz tylko kilka tenantów (okno executora); dane tenantów
+    to bajty zserializowane raz na snapshot z posortowanymi kluczami (JSON równoważny
+    jsonify, znaki spoza ASCII bez escapowania).
+    
+    Args:
+        entries: Iterator (tenant_id, (body, etag)) - pierwszy wpis pobrany przed wysłaniem statusu
+    """
+    try:
+        yield b'{"acl":{'
+        
+        for index, (tenant_id, (body, _)) in enumerate(entries):
+            yield b"".join((b"," if index else b"", dumps_json(tenant_id), b":", body))
+        
+        yield b'},"metadata":' + dumps_json(metadata) + b'}\n'
+    except Exception as e:
+        logger.error(f"OPAL Full Snapshot stream aborted: {e}")
+        _abort_streamed_response(environ)
+        raise
+    logger.info(f"OPAL Full Snapshot streamed with {tenants_count} tenants")
+
 @app.route("/opal/full-snapshot", methods=["GET"])
 def get_opal_full_snapshot():
     """
     Endpoint dla OPAL_ALL_DATA_URL - zwraca pełną strukturę danych dla wszystkich tenantów.
     Dane są już w gotowym formacie JSON do załadowania bezpośrednio do OPA data document.
+    
+    Query Parameters:
+        stream (str): 'true' - odpowiedź chunked generowana tenant po tenancie (bez ETag)
+        layout (str): Układ dokumentów ACL tenantów ('expanded' lub 'normalized')
     """
     logger.info("OPAL Full Snapshot requested")
     
+    layout = _get_acl_layout()
+    if layout is None:
+        return _invalid_layout_response()
+    
     if not (DATABASE_INTEGRATION_AVAILABLE and is_database_available()):
         logger.error("Database integration not available for OPAL full snapshot")
         return jsonify({
@@ -420,54 +753,53 @@ def get_opal_full_snapshot():
         tenant_ids = get_all_tenants_from_database()
         logger.info(f"Found {len(tenant_ids)} tenants: {tenant_ids}")
         
-        # Buduj pełną strukturę danych dla OPA
-        full_data = {
-            "acl": {},  # Struktura ACL dla wszystkich tenantów
-            "metadata": {
-                "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat().replace('+00:00', 'Z'),
-                "source": "data-provider-api",
-                "tenants_count": len(tenant_ids)
-            }
+        metadata = {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat().replace('+00:00', 'Z'),
+            "source": "data-provider-api",
+            "tenants_count": len(tenant_ids)
         }
         
-        # Dla każdego tenanta pobierz ACL dane
-        for tenant_id in tenant_ids:
-            try:
-                logger.info(f"Processing tenant: {tenant_id}")
-                
-                # Pobierz ACL dla tego tenanta z Model 2
-                acl_data = get_tenant_acl_from_database(tenant_id)
-                
-                if acl_data:
-                    # Dodaj dane ACL do struktury pod ścieżką /acl/{tenant_id}
-                    full_data["acl"][tenant_id] = acl_data
-                    logger.info(f"Added ACL data for tenant {tenant_id}")
-                else:
-                    logger.warning(f"No ACL data found for tenant {tenant_id}")
-                    # Nawet jeśli brak danych, dodaj pustą strukturę
-                    full_data["acl"][tenant_id] = {
-                        "tenant_id": tenant_id,
-                        "users": {},
-                        "roles": {},
-                        "permissions": {}
-                    }
-                    
-            except Exception as e:
-                logger.error(f"Error processing tenant {tenant_id}: {str(e)}")
-                # W przypadku błędu, dodaj placeholder
-                full_data["acl"][tenant_id] = {
-                    "tenant_id": tenant_id,
-                    "error": f"Failed to load data: {str(e)}",
-                    "users": {},
-                    "roles": {},
-                    "permissions": {}
-                }
+        streaming = request.args.get("stream", str(FULL_SNAPSHOT_STREAMING)).lower() == "true"
+        if streaming:
+            # Pierwszy tenant przed wysłaniem statusu - awaria bazy na starcie to jeszcze 503
+            entries = iter(map_tenants(lambda tid: _get_snapshot_tenant_entry(tid, layout), sorted(tenant_ids)))
+            first_entry = next(entries, None)
+            if first_entry is not None:
+                entries = itertools.chain([first_entry], entries)
+            return Response(
+                stream_with_context(_stream_opal_full_snapshot(entries, len(tenant_ids), metadata, request.environ)),
+                mimetype="application/json"
+            )
+        
+        # Dla każdego tenanta pobierz zserializowane ACL (posortowane klucze)
+        acl_parts = []
+        etag_parts = []
+        has_errors = False
+        for tenant_id, (body, tenant_etag) in map_tenants(
+                lambda tid: _get_snapshot_tenant_entry(tid, layout), sorted(tenant_ids)):
+            # Dodaj dane ACL do struktury pod ścieżką /acl/{tenant_id}
+            acl_parts.append(dumps_json(tenant_id) + b":" + body)
+            if tenant_etag is None:
+                has_errors = True
+            else:
+                etag_parts.append(f"{tenant_id}:{tenant_etag}")
+        
+        # ETag z ETagów tenantów (bez metadata.timestamp); snapshot z błędami nie dostaje ETag
+        etag = None if has_errors else combine_etags(etag_parts)
+        if etag and is_not_modified(etag):
+            logger.info(f"OPAL Full Snapshot not modified (ETag {etag})")
+            return not_modified_response(etag)
         
-        logger.info(f"OPAL Full Snapshot generated with {len(full_data['acl'])} tenants")
+        logger.info(f"OPAL Full Snapshot generated with {len(acl_parts)} tenants")
         
-        # Zwróć gotowe dane JSON - format OPAL_ALL_DATA_URL
-        return jsonify(full_data)
+        # Zwróć gotowe dane JSON - format OPAL_ALL_DATA_URL: {"acl": {...}, "metadata": {...}};
+        # bajty ACL są składane z bajtów snapshotów tenantów, metadata doklejane per request
+        return json_response(lambda: b"{" + b",".join(acl_parts) + b"}", etag,
+                             document_representations.get(f"opal_full_snapshot:{layout}", etag),
+                             envelope=(b'{"acl":', b',"metadata":' + dumps_json(metadata) + b'}\n'))
         
+    except DATABASE_UNAVAILABLE_ERRORS:
+        raise
     except Exception as e:
         logger.error(f"Error generating OPAL full snapshot: {str(e)}")
         return jsonify({
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Data Provider API - tryb ASGI (uvicorn)
+
+Gorące endpointy odczytu (/tenants/<tenant_id>/acl, /opal/full-snapshot, /data/config)
+są obsługiwane asynchronicznie - dane z PostgreSQL przez async driver (psycopg 3),
+a powiadomienia OPAL wysyłane przez httpx.AsyncClient, więc oczekujące pobranie
+nie blokuje wątku. Odpowiedzi mają te same kontrakty JSON, ETagi i kompresję co tryb Flask.
+Pozostałe endpointy (zapis, /v2/*, debug) obsługuje aplikacja Flask zamontowana przez WSGIMiddleware.
+
+Uruchomienie: uvicorn asgi_app:app --host 0.0.0.0 --port 8110 (lub SERVER_MODE=asgi ./start.sh)
+"""
+
+import os
+import asyncio
+import datetime
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Iterable, Optional, Tuple
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.wsgi import WSGIMiddleware
+from fastapi.responses import Response, StreamingResponse
+from werkzeug.http import parse_accept_header, parse_etags
+from app import app as flask_app, _acl_envelope, FULL_SNAPSHOT_STREAMING, Model2Validator, Model2Endpoints
+from async_database import (
+    open_async_pool, close_async_pool, get_tenant_acl_snapshot_async, get_all_tenants_async,
+    get_async_pool_max_size, ASYNC_DATABASE_AVAILABLE, ASYNC_DATABASE_UNAVAILABLE_ERRORS,
+    is_async_database_unavailable
+)
+from compression import encode_representation, document_representations, COMPRESSION_ENABLED
+from database_integration import is_database_available, SNAPSHOT_BUILD_WORKERS, POOL_RESERVED_CONNECTIONS
+from etag_utils import compute_etag, combine_etags, is_not_modified
+from fast_json import dumps as dumps_json
+from opal_endpoints import resolve_data_source_config
+from snapshot_store import SNAPSHOT_STORE_ENABLED, encode_stored
+from tenant_acl_builder import ACL_LAYOUTS, EXPANDED_LAYOUT
+
+# Import User Data Sync Service
+try:
+    from user_data_sync import user_data_sync
+    USER_DATA_SYNC_AVAILABLE = True
+except ImportError:
+    USER_DATA_SYNC_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Liczba tenantów budowanych równolegle w /opal/full-snapshot (każdy zajmuje połączenie z puli async)
+ASYNC_SNAPSHOT_CONCURRENCY = max(1, min(SNAPSHOT_BUILD_WORKERS, get_async_pool_max_size() - POOL_RESERVED_CONNECTIONS))
+
+MODEL2_AVAILABLE = Model2Validator is not None and Model2Endpoints is not None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Pula połączeń async i klient HTTP dla powiadomień OPAL na czas życia serwera"""
+    await open_async_pool()
+    http_client = httpx.AsyncClient(timeout=httpx.Timeout(15.0, connect=5.0))
+    if USER_DATA_SYNC_AVAILABLE:
+        user_data_sync.use_async_transport(asyncio.get_running_loop(), http_client)
+    logger.info("🚀 Data Provider API (ASGI) started")
+    try:
+        yield
+    finally:
+        if USER_DATA_SYNC_AVAILABLE:
+            user_data_sync.use_async_transport(None, None)
+        await http_client.aclose()
+        await close_async_pool()
+
+app = FastAPI(title="Data Provider API", lifespan=lifespan, docs_url=None, redoc_url=None, openapi_url=None)
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+
+def _json_response(data: Any, status_code: int = 200) -> Response:
+    """Odpowiedź JSON równoważna jsonify (posortowane klucze, zwarty zapis, '\\n' na końcu, znaki spoza ASCII bez escapowania)"""
+    return Response(dumps_json(data) + b"\n", status_code=status_code, media_type="application/json")
+
+def _not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": f'"{etag}"'})
+
+def _is_not_modified(request: Request, etag: Optional[str]) -> bool:
+    return is_not_modified(etag, parse_etags(request.headers.get("if-none-match")))
+
+def _accept_encodings(request: Request):
+    return parse_accept_header(request.headers.get("accept-encoding"))
+
+async def _iterate(chunks: Iterable[bytes]) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+def _encoded_response(payload, length: int, encoding: Optional[str], etag: Optional[str]) -> Response:
+    """Odpowiedź z zakodowanych bajtów (lub fragmentów) - nagłówki jak w json_response trybu Flask"""
+    headers = {"Content-Length": str(length)}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    if COMPRESSION_ENABLED:
+        headers["Vary"] = "Accept-Encoding"
+    if etag:
+        # Różne kodowania to różne reprezentacje - silny ETag tylko dla identity
+        headers["ETag"] = f'W/"{etag}"' if encoding else f'"{etag}"'
+    if isinstance(payload, bytes):
+        return Response(payload, headers=headers, media_type="application/json")
+    return StreamingResponse(_iterate(payload), headers=headers, media_type="application/json")
+
+def _get_acl_layout(request: Request) -> Optional[str]:
+    """Układ dokumentu ACL z parametru ?layout= (None gdy nieprawidłowy)"""
+    layout = request.query_params.get("layout", EXPANDED_LAYOUT)
+    return layout if layout in ACL_LAYOUTS else None
+
+def _invalid_layout_response(request: Request) -> Response:
+    return _json_response({
+        "error": f"Invalid layout '{request.query_params.get('layout')}', expected one of: {', '.join(ACL_LAYOUTS)}"
+    }, 400)
+
+def _database_available() -> bool:
+    return ASYNC_DATABASE_AVAILABLE and is_database_available()
+
+async def handle_database_unavailable(request: Request, error: Exception) -> Response:
+    """Awaria bazy danych (circuit breaker otwarty / brak połączenia) - szybka odpowiedź 503"""
+    if not is_async_database_unavailable(error):
+        # Błąd pojedynczego zapytania (statement_timeout, konflikt serializacji) - baza działa
+        logger.error(f"Database query failed: {error}")
+        return _json_response({
+            "error": "Database query failed",
+            "details": str(error)
+        }, 500)
+    logger.error(f"Database unavailable: {error}")
+    return _json_response({
+        "error": "Database not available",
+        "details": str(error)
+    }, 503)
+
+for error_class in ASYNC_DATABASE_UNAVAILABLE_ERRORS:
+    app.add_exception_handler(error_class, handle_database_unavailable)
+
+@app.get("/tenants/{tenant_id}/acl")
+async def get_tenant_acl(tenant_id: str, request: Request):
+    """
+    Zwraca dane ACL dla określonego tenanta (kontrakt jak w trybie Flask)
+
+    Query Parameters:
+        layout (str): 'expanded' (domyślnie) lub 'normalized'
+    """
+    logger.info(f"ACL data requested for tenant: {tenant_id}")
+
+    layout = _get_acl_layout(request)
+    if layout is None:
+        return _invalid_layout_response(request)
+
+    if not _database_available():
+        logger.error("Database integration not available")
+        return _json_response({
+            "error": "Database not available",
+            "tenant_id": tenant_id
+        }, 503)
+
+    snapshot = await get_tenant_acl_snapshot_async(tenant_id, layout)
+    if snapshot is None:
+        logger.warning(f"Tenant {tenant_id} not found in database")
+        return _json_response({
+            "error": "Tenant not found",
+            "tenant_id": tenant_id,
+            "source": "database"
+        }, 404)
+
+    if _is_not_modified(request, snapshot.etag):
+        logger.info(f"ACL data for tenant {tenant_id} not modified (ETag {snapshot.etag})")
+        return _not_modified_response(snapshot.etag)
+
+    # Dane są kodowane raz na snapshot; envelope doklejany per request. Kompresja i zapis
+    # do magazynu snapshotów w puli wątków - nie blokują pętli zdarzeń
+    if SNAPSHOT_STORE_ENABLED:
+        payload, length, encoding = await run_in_threadpool(
+            encode_stored, tenant_id, layout, snapshot, _acl_envelope(tenant_id), _accept_encodings(request))
+    else:
+        payload, length, encoding = await run_in_threadpool(
+            encode_representation, lambda: snapshot.body, snapshot.representations,
+            _acl_envelope(tenant_id), _accept_encodings(request))
+    return _encoded_response(payload, length, encoding, snapshot.etag)
+
+async def _get_snapshot_tenant_entry(tenant_id: str, layout: str) -> Tuple[bytes, Optional[str]]:
+    """
+    Zserializowane dane ACL tenanta dla pełnego snapshotu wraz z ETag
+    (placeholdery jak w app._get_snapshot_tenant_entry)
+    """
+    try:
+        snapshot = await get_tenant_acl_snapshot_async(tenant_id, layout)
+        if snapshot is not None:
+            return snapshot.body, snapshot.etag
+
+        logger.warning(f"No ACL data found for tenant {tenant_id}")
+        empty_acl = {
+            "tenant_id": tenant_id,
+            "users": {},
+            "roles": {},
+            "permissions": {}
+        }
+        return dumps_json(empty_acl), compute_etag(empty_acl)
+
+    except ASYNC_DATABASE_UNAVAILABLE_ERRORS:
+        # Awaria bazy - nie publikuj snapshotu z placeholderami
+        raise
+    except Exception as e:
+        logger.error(f"Error processing tenant {tenant_id}: {str(e)}")
+        return dumps_json({
+            "tenant_id": tenant_id,
+            "error": f"Failed to load data: {str(e)}",
+            "users": {},
+            "roles": {},
+            "permissions": {}
+        }), None
+
+async def _iter_tenant_entries(tenant_ids: Iterable[str], layout: str) -> AsyncIterator[Tuple[str, Tuple[bytes, Optional[str]]]]:
+    """
+    Wpisy tenantów w kolejności wejścia; naraz budowanych jest co najwyżej
+    ASYNC_SNAPSHOT_CONCURRENCY tenantów (okno jak w executorze trybu Flask)
+    """
+    remaining = iter(tenant_ids)
+    pending = deque()
+
+    def schedule():
+        tenant_id = next(remaining, None)
+        if tenant_id is not None:
+            pending.append((tenant_id, asyncio.ensure_future(_get_snapshot_tenant_entry(tenant_id, layout))))
+
+    for _ in range(ASYNC_SNAPSHOT_CONCURRENCY):
+        schedule()
+
+    try:
+        while pending:
+            tenant_id, task = pending.popleft()
+            entry = await task
+            schedule()
+            yield tenant_id, entry
+    finally:
+        for _, task in pending:
+            task.cancel()
+
+async def _stream_opal_full_snapshot(first_entry, entries, tenants_count: int, metadata) -> AsyncIterator[bytes]:
+    """
+    Dokument pełnego snapshotu wysyłany tenant po tenancie
+
+    Pierwszy wpis jest pobierany przed wysłaniem statusu. Błąd w trakcie wysyłania
+    jest propagowany - uvicorn zrywa wtedy połączenie bez kończącego chunka, więc
+    klient nie dostaje poprawnie zakończonego, uciętego JSON.
+    """
+    try:
+        yield b'{"acl":{'
+
+        if first_entry is not None:
+            tenant_id, (body, _) = first_entry
+            yield dumps_json(tenant_id) + b":" + body
+            async for tenant_id, (body, _) in entries:
+                yield b"," + dumps_json(tenant_id) + b":" + body
+
+        yield b'},"metadata":' + dumps_json(metadata) + b'}\n'
+    except Exception as e:
+        logger.error(f"OPAL Full Snapshot stream aborted: {e}")
+        raise
+    finally:
+        await entries.aclose()
+    logger.info(f"OPAL Full Snapshot streamed with {tenants_count} tenants")
+
+@app.get("/opal/full-snapshot")
+async def get_opal_full_snapshot(request: Request):
+    """
+    Endpoint dla OPAL_ALL_DATA_URL - pełna struktura danych wszystkich tenantów (kontrakt jak w trybie Flask)
+
+    Query Parameters:
+        stream (str): 'true' - odpowiedź chunked generowana tenant po tenancie (bez ETag)
+        layout (str): Układ dokumentów ACL tenantów ('expanded' lub 'normalized')
+    """
+    logger.info("OPAL Full Snapshot requested")
+
+    layout = _get_acl_layout(request)
+    if layout is None:
+        return _invalid_layout_response(request)
+
+    if not _database_available():
+        logger.error("Database integration not available for OPAL full snapshot")
+        return _json_response({
+            "error": "Database not available"
+        }, 503)
+
+    try:
+        tenant_ids = await get_all_tenants_async()
+        logger.info(f"Found {len(tenant_ids)} tenants")
+
+        metadata = {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat().replace('+00:00', 'Z'),
+            "source": "data-provider-api",
+            "tenants_count": len(tenant_ids)
+        }
+
+        streaming = request.query_params.get("stream", str(FULL_SNAPSHOT_STREAMING)).lower() == "true"
+        if streaming:
+            # Pierwszy tenant przed wysłaniem statusu - awaria bazy na starcie to jeszcze 503
+            entries = _iter_tenant_entries(sorted(tenant_ids), layout)
+            try:
+                first_entry = await entries.__anext__()
+            except StopAsyncIteration:
+                first_entry = None
+            except BaseException:
+                await entries.aclose()
+                raise
+            return StreamingResponse(_stream_opal_full_snapshot(first_entry, entries, len(tenant_ids), metadata),
+                                     media_type="application/json")
+
+        acl_parts = []
+        etag_parts = []
+        has_errors = False
+        async for tenant_id, (body, tenant_etag) in _iter_tenant_entries(sorted(tenant_ids), layout):
+            acl_parts.append(dumps_json(tenant_id) + b":" + body)
+            if tenant_etag is None:
+                has_errors = True
+            else:
+                etag_parts.append(f"{tenant_id}:{tenant_etag}")
+
+        # ETag z ETagów tenantów (bez metadata.timestamp); snapshot z błędami nie dostaje ETag
+        etag = None if has_errors else combine_etags(etag_parts)
+        if etag and _is_not_modified(request, etag):
+            logger.info(f"OPAL Full Snapshot not modified (ETag {etag})")
+            return _not_modified_response(etag)
+
+        logger.info(f"OPAL Full Snapshot generated with {len(acl_parts)} tenants")
+
+        payload, length, encoding = await run_in_threadpool(
+            encode_representation,
+            lambda: b"{" + b",".join(acl_parts) + b"}",
+            document_representations.get(f"opal_full_snapshot:{layout}", etag),
+            (b'{"acl":', b',"metadata":' + dumps_json(metadata) + b'}\n'),
+            _accept_encodings(request))
+        return _encoded_response(payload, length, encoding, etag)
+
+    except ASYNC_DATABASE_UNAVAILABLE_ERRORS:
+        raise
+    except Exception as e:
+        logger.error(f"Error generating OPAL full snapshot: {str(e)}")
+        return _json_response({
+            "error": f"Failed to generate snapshot: {str(e)}"
+        }, 500)
+
+@app.get("/data/config")
+async def opal_external_data_sources(request: Request):
+    """
+    OPAL External Data Sources endpoint - DataSourceConfig na podstawie JWT token w query param
+    """
+    logger.info("🔗 OPAL External Data Sources request received")
+
+    data_source_config, status = resolve_data_source_config(request.query_params.get("token"), MODEL2_AVAILABLE)
+    return _json_response(data_source_config, status)
+
+# Pozostałe endpointy obsługuje aplikacja Flask (w puli wątków) - montowana na końcu,
+# aby trasy asynchroniczne miały pierwszeństwo
+app.mount("/", WSGIMiddleware(flask_app))
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        "asgi_app:app",
+        host="0.0.0.0",
+        port=int(os.environ.get("PORT", 8110)),
+        workers=int(os.environ.get("WEB_CONCURRENCY", 1)),
+        log_level="info"
+    )
@@ -0,0 +1,130 @@
+"""
+Async Database Integration for the ASGI serving mode
+
+Async counterparts of the tenant ACL helpers in database_integration, on the
+psycopg 3 AsyncConnectionPool of shared.database.async_connection (also used by
+the async DAOs). Builds run the same queries (AsyncTenantACLBuilder)
+and go through the same snapshot cache / snapshot store, so both serving modes
+return identical documents and ETags.
+"""
+
+import time
+import logging
+from typing import Dict, Any, Optional, List
+
+from shared.database.health import DatabaseUnavailableError
+from shared.database.session import REPEATABLE_READ
+from shared.database.async_connection import (
+    open_async_pool, close_async_pool, get_async_pool_max_size, get_async_cursor,
+    ASYNC_CONNECTION_ERRORS, ASYNC_DRIVER_AVAILABLE, is_async_connection_error
+)
+
+try:
+    from tenant_acl_builder import AsyncTenantACLBuilder
+    from acl_changes import TENANT_VERSION_QUERY
+    ASYNC_DATABASE_AVAILABLE = ASYNC_DRIVER_AVAILABLE
+except ImportError as e:
+    ASYNC_DATABASE_AVAILABLE = False
+    print(f"Async database driver not available: {e}")
+
+ASYNC_DATABASE_UNAVAILABLE_ERRORS = (DatabaseUnavailableError,) + ASYNC_CONNECTION_ERRORS if ASYNC_DATABASE_AVAILABLE else ()
+
+def is_async_database_unavailable(error: Exception) -> bool:
+    """Circuit open or connection lost (statement timeouts / serialization failures are not outages)"""
+    return isinstance(error, DatabaseUnavailableError) or is_async_connection_error(error)
+
+from acl_cache import get_cached_tenant_acl_snapshot_async, ACLSnapshot
+from snapshot_store import snapshot_store
+from tenant_acl_builder import EXPANDED_LAYOUT
+from database_integration import MATERIALIZED_ACL_ENABLED, ACL_CHANGE_JOURNAL_ENABLED
+
+logger = logging.getLogger(__name__)
+
+TENANT_IDS_QUERY = "SELECT tenant_id FROM tenants ORDER BY tenant_id"
+
+async def get_tenant_acl_snapshot_async(tenant_id: str, layout: str = EXPANDED_LAYOUT):
+    """
+    Fetch tenant ACL snapshot - same sources as database_integration.get_tenant_acl_snapshot
+
+    Args:
+        tenant_id: Tenant identifier
+        layout: ACL document layout (expanded or normalized)
+
+    Returns:
+        StoredSnapshot / ACLSnapshot or None if not found
+    """
+    if not ASYNC_DATABASE_AVAILABLE:
+        return None
+
+    if snapshot_store is not None:
+        # Shared by all worker processes - builds bypass the per-process cache
+        return await snapshot_store.get_or_build_async(
+            tenant_id, layout, lambda tid: build_tenant_acl_snapshot_async(tid, layout))
+
+    return await get_cached_tenant_acl_snapshot_async(
+        tenant_id, lambda tid: build_tenant_acl_async(tid, layout), layout)
+
+async def build_tenant_acl_snapshot_async(tenant_id: str, layout: str = EXPANDED_LAYOUT) -> Optional[ACLSnapshot]:
+    """
+    Build a tenant ACL snapshot on the async pool without caching it
+
+    Returns:
+        ACLSnapshot or None if not found
+    """
+    data = await build_tenant_acl_async(tenant_id, layout)
+    if data is None:
+        return None
+    return ACLSnapshot(tenant_id, data.get("version", 0), data, time.time(), layout)
+
+async def build_tenant_acl_async(tenant_id: str, layout: str = EXPANDED_LAYOUT) -> Optional[Dict[str, Any]]:
+    """
+    Build tenant ACL data from database on the async pool (bypasses the snapshot cache)
+
+    Args:
+        tenant_id: Tenant identifier
+        layout: ACL document layout (expanded or normalized)
+
+    Returns:
+        Dict containing ACL data or None if not found
+    """
+    try:
+        # One snapshot for the version and all builder queries, as db_session(REPEATABLE_READ) in the sync path
+        async with get_async_cursor(isolation_level=REPEATABLE_READ, readonly=True) as cursor:
+            version = None
+            if ACL_CHANGE_JOURNAL_ENABLED:
+                # Version read before the build - the document is at least as new as the version
+                await cursor.execute(TENANT_VERSION_QUERY, {'tenant_id': tenant_id})
+                row = await cursor.fetchone()
+                version = row['version'] if row else 0
+            acl_data = await AsyncTenantACLBuilder(cursor, materialized=MATERIALIZED_ACL_ENABLED).build(tenant_id, layout)
+
+        if acl_data is None:
+            logger.warning(f"Tenant {tenant_id} not found in database")
+            return None
+
+        if version is not None:
+            acl_data["version"] = version
+
+        logger.info(f"Successfully fetched ACL data for tenant {tenant_id} from database (async)")
+        return acl_data
+
+    except ASYNC_DATABASE_UNAVAILABLE_ERRORS:
+        # Outage is not "tenant not found" - let the caller answer 503
+        raise
+    except Exception as e:
+        logger.error(f"Failed to fetch tenant ACL from database: {e}")
+        return None
+
+async def get_all_tenants_async() -> List[str]:
+    """
+    Get list of all tenant IDs from database on the async pool
+
+    Returns:
+        List of tenant IDs
+    """
+    if not ASYNC_DATABASE_AVAILABLE:
+        return []
+
+    async with get_async_cursor() as cursor:
+        await cursor.execute(TENANT_IDS_QUERY)
+        return [row['tenant_id'] for row in await cursor.fetchall()]
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark równoległych pobrań - tryb Flask vs tryb ASGI
+
+Symuluje wielu OPAL Clientów pobierających jednocześnie dane ACL i porównuje
+przepustowość (req/s) oraz opóźnienia (p50/p95/p99) obu trybów serwowania.
+Oba serwery muszą działać na tej samej bazie danych, np.:
+
+    python3 app.py                                        # Flask, port 8110
+    PORT=8111 uvicorn asgi_app:app --port 8111            # ASGI
+
+    python3 benchmarks/bench_concurrent_fetch.py \\
+        --target flask=http://localhost:8110 --target asgi=http://localhost:8111 \\
+        --path /tenants/tenant1/acl --path /opal/full-snapshot --concurrency 64 --requests 2000
+
+Wymaga httpx (pip install httpx).
+"""
+
+import time
+import asyncio
+import argparse
+import statistics
+from typing import Dict, Any, List
+import httpx
+
+DEFAULT_PATHS = ["/tenants/tenant1/acl", "/opal/full-snapshot", "/data/config"]
+
+def _percentile(values: List[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def run_target(base_url: str, paths: List[str], concurrency: int, total_requests: int,
+                     headers: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Wysyła total_requests pobrań (ścieżki na zmianę) z concurrency równoległymi klientami
+
+    Returns:
+        Dict: Przepustowość, opóźnienia w ms, liczba błędów i przesłanych bajtów
+    """
+    latencies = []
+    errors = 0
+    received = 0
+    counter = iter(range(total_requests))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0, headers=headers) as client:
+        # Rozgrzanie - pierwsze pobranie buduje snapshoty w cache serwera
+        for path in paths:
+            await client.get(path)
+
+        async def worker():
+            nonlocal errors, received
+            for index in counter:
+                path = paths[index % len(paths)]
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    received += len(response.content)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        duration = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "duration_s": round(duration, 3),
+        "requests_per_second": round(len(latencies) / duration, 1) if duration else 0.0,
+        "latency_ms_p50": round(statistics.median(latencies), 2) if latencies else 0.0,
+        "latency_ms_p95": round(_percentile(latencies, 95), 2),
+        "latency_ms_p99": round(_percentile(latencies, 99), 2),
+        "received_mb": round(received / (1024 * 1024), 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark równoległych pobrań Data Provider API")
+    parser.add_argument("--target", action="append", required=True,
+                        help="nazwa=URL serwera, np. flask=http://localhost:8110 (można podać wielokrotnie)")
+    parser.add_argument("--path", action="append", help=f"Pobierana ścieżka (domyślnie: {', '.join(DEFAULT_PATHS)})")
+    parser.add_argument("--concurrency", type=int, default=64, help="Liczba równoległych klientów")
+    parser.add_argument("--requests", type=int, default=2000, help="Liczba pobrań na serwer")
+    parser.add_argument("--accept-encoding", default="gzip", help="Nagłówek Accept-Encoding ('' - bez kompresji)")
+    args = parser.parse_args()
+
+    paths = args.path or DEFAULT_PATHS
+    headers = {"Accept-Encoding": args.accept_encoding} if args.accept_encoding else {"Accept-Encoding": "identity"}
+
+    results = {}
+    for target in args.target:
+        name, _, url = target.partition("=")
+        print(f"⏱️  {name}: {args.requests} requests, concurrency {args.concurrency} -> {url}")
+        results[name] = asyncio.run(run_target(url, paths, args.concurrency, args.requests, headers))
+
+    columns = ["requests_per_second", "latency_ms_p50", "latency_ms_p95", "latency_ms_p99", "errors", "received_mb"]
+    print()
+    print(f"{'mode':<10}" + "".join(f"{column:>22}" for column in columns))
+    for name, result in results.items():
+        print(f"{name:<10}" + "".join(f"{result[column]:>22}" for column in columns))
+
+if __name__ == "__main__":
+    main()
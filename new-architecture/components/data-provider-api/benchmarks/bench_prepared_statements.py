@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark prepared statements - UserDAO.find_by_id z cache'em i bez
+
+Porównuje czas wywołania UserDAO.find_by_id przy zapytaniu budowanym za każdym
+razem (cache wyłączony) i wykonywanym przez EXECUTE przygotowanego zapytania,
+oraz czas planowania raportowany przez EXPLAIN ANALYZE dla obu wariantów.
+Wymaga działającej bazy (zmienne DB_*) z co najmniej jednym użytkownikiem:
+
+    DB_HOST=localhost python3 benchmarks/bench_prepared_statements.py --user-id user1 --iterations 5000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+from typing import Dict, Any, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.database.connection import get_db_cursor
+from shared.database.dao import UserDAO
+from shared.database.prepared import statement_cache
+
+QUERY = "SELECT * FROM users WHERE user_id = %s"
+
+def time_find_by_id(user_id: str, iterations: int, cache_size: int) -> Dict[str, Any]:
+    """
+    Wywołuje UserDAO.find_by_id iterations razy przy danym rozmiarze cache'u
+
+    Returns:
+        Dict: Średni i p99 czas wywołania w mikrosekundach
+    """
+    statement_cache.max_size = cache_size
+    dao = UserDAO()
+    dao.find_by_id(user_id)  # rozgrzanie puli i przygotowanie zapytania
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        dao.find_by_id(user_id)
+        timings.append((time.perf_counter() - start) * 1_000_000)
+
+    timings.sort()
+    return {
+        "mean_us": round(statistics.mean(timings), 1),
+        "p99_us": round(timings[int(0.99 * (len(timings) - 1))], 1)
+    }
+
+def _planning_ms(cursor, statement: str, params: tuple) -> float:
+    cursor.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {statement}", params)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Planning Time"]
+
+def planning_time(user_id: str, iterations: int) -> Dict[str, float]:
+    """
+    Średni czas planowania (ms) zapytania ad hoc i przygotowanego
+
+    Po kilku wykonaniach Postgres używa planu generycznego przygotowanego zapytania
+    i EXECUTE nie planuje go ponownie.
+    """
+    adhoc: List[float] = []
+    prepared: List[float] = []
+    with get_db_cursor(dict_cursor=False) as cursor:
+        cursor.execute("PREPARE bench_find_user AS SELECT * FROM users WHERE user_id = $1")
+        for _ in range(iterations):
+            adhoc.append(_planning_ms(cursor, QUERY, (user_id,)))
+            prepared.append(_planning_ms(cursor, "EXECUTE bench_find_user (%s)", (user_id,)))
+        cursor.execute("DEALLOCATE bench_find_user")
+
+    return {
+        "adhoc_planning_ms": round(statistics.mean(adhoc), 4),
+        "prepared_planning_ms": round(statistics.mean(prepared), 4)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prepared statements dla UserDAO.find_by_id")
+    parser.add_argument("--user-id", required=True, help="Istniejący user_id")
+    parser.add_argument("--iterations", type=int, default=5000, help="Liczba wywołań na wariant")
+    parser.add_argument("--explain-iterations", type=int, default=200, help="Liczba pomiarów EXPLAIN ANALYZE")
+    args = parser.parse_args()
+
+    print(f"⏱️  UserDAO.find_by_id x {args.iterations}")
+    results = {
+        "adhoc": time_find_by_id(args.user_id, args.iterations, cache_size=0),
+        "prepared": time_find_by_id(args.user_id, args.iterations, cache_size=100)
+    }
+    for name, result in results.items():
+        print(f"{name:<10} mean {result['mean_us']:>10} us   p99 {result['p99_us']:>10} us")
+
+    planning = planning_time(args.user_id, args.explain_iterations)
+    print()
+    print(f"planning time (EXPLAIN ANALYZE): ad hoc {planning['adhoc_planning_ms']} ms, "
+          f"prepared {planning['prepared_planning_ms']} ms")
+    print(f"cache: {statement_cache.get_metrics()}")
+
+if __name__ == "__main__":
+    main()
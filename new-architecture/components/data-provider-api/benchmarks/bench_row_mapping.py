@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark mapowania wierszy na modele - RealDictCursor + dict_to_* kontra krotki + row_mapper
+
+Porównuje na syntetycznych wierszach tabeli roles (bez bazy danych):
+  legacy     - RealDictRow -> dict(row) -> dataclass z __dict__ (dotychczasowa ścieżka)
+  dict       - RealDictRow -> dict(row) -> dict_to_role (model ze __slots__)
+  tuple      - krotka -> row_mapper (model ze __slots__, internowane app_id / role_name)
+
+Raportuje w przeliczeniu na 100k wierszy czas mapowania, pamięć wierszy kursora
+oraz pamięć, która zostaje po zwolnieniu wierszy (modele i trzymane przez nie
+napisy - bez internowania każdy model trzyma własne kopie app_id / role_name):
+
+    python3 benchmarks/bench_row_mapping.py --rows 100000 --repeat 5
+"""
+
+import os
+import sys
+import time
+import uuid
+import argparse
+import tracemalloc
+from dataclasses import field, fields, make_dataclass, MISSING
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from psycopg2.extras import RealDictRow
+from shared.database.models import Role, dict_to_role, row_mapper
+
+COLUMNS = ("role_id", "app_id", "role_name", "description", "is_system_role", "metadata", "created_at")
+
+# Ta sama klasa bez __slots__ - model sprzed zmiany
+LegacyRole = make_dataclass("LegacyRole", [
+    (f.name, f.type, field(default=f.default) if f.default is not MISSING else
+     field(default_factory=f.default_factory) if f.default_factory is not MISSING else field())
+    for f in fields(Role)
+])
+
+def dict_to_legacy_role(data: Dict[str, Any]) -> Any:
+    return LegacyRole(
+        role_id=data['role_id'],
+        app_id=data['app_id'],
+        role_name=data['role_name'],
+        description=data.get('description'),
+        is_system_role=data.get('is_system_role', False),
+        metadata=data.get('metadata', {}),
+        created_at=data.get('created_at')
+    )
+
+def make_rows(count: int) -> List[Tuple[Any, ...]]:
+    """Wiersze jak z kursora - każdy z własnymi obiektami str (jak po dekodowaniu z sieci)"""
+    rows = []
+    for i in range(count):
+        app_id = "".join(["app_", str(i % 5)])
+        role_name = "".join(["role_", str(i % 20)])
+        rows.append((str(uuid.UUID(int=i)), app_id, role_name, None, False, {}, None))
+    return rows
+
+def to_dict_rows(rows: List[Tuple[Any, ...]]) -> List[RealDictRow]:
+    dict_rows = []
+    for row in rows:
+        dict_row = RealDictRow()
+        for column, value in zip(COLUMNS, row):
+            dict_row[column] = value
+        dict_rows.append(dict_row)
+    return dict_rows
+
+def measure(name: str, make_input: Callable[[], List[Any]], convert: Callable[[Any], Any],
+            rows: int, repeat: int) -> Dict[str, Any]:
+    """
+    Czas mapowania (najlepszy z repeat), pamięć wierszy wejściowych i pamięć
+    pozostała po ich zwolnieniu
+
+    Returns:
+        Dict: wartości przeliczone na 100k wierszy
+    """
+    scale = 100_000 / rows
+    source = make_input()
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        models = [convert(row) for row in source]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        del models
+
+    del source
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    measured_input = make_input()
+    input_bytes = tracemalloc.get_traced_memory()[0] - baseline
+    models = [convert(row) for row in measured_input]
+    del measured_input
+    retained_bytes = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del models
+
+    return {
+        "name": name,
+        "ms_per_100k": round(best * 1000 * scale, 1),
+        "row_mb_per_100k": round(input_bytes * scale / 1_048_576, 1),
+        "retained_mb_per_100k": round(retained_bytes * scale / 1_048_576, 1)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark mapowania wierszy na modele")
+    parser.add_argument("--rows", type=int, default=100_000, help="Liczba wierszy")
+    parser.add_argument("--repeat", type=int, default=5, help="Liczba powtórzeń pomiaru czasu")
+    args = parser.parse_args()
+
+    build = row_mapper(Role, COLUMNS)
+    results = [
+        measure("legacy", lambda: to_dict_rows(make_rows(args.rows)), lambda row: dict_to_legacy_role(dict(row)),
+                args.rows, args.repeat),
+        measure("dict", lambda: to_dict_rows(make_rows(args.rows)), lambda row: dict_to_role(dict(row)),
+                args.rows, args.repeat),
+        measure("tuple", lambda: make_rows(args.rows), build, args.rows, args.repeat),
+    ]
+
+    print(f"⏱️  roles x {args.rows} (wartości na 100k wierszy)")
+    print(f"{'wariant':<8} {'mapowanie ms':>14} {'wiersze MB':>12} {'po zwolnieniu MB':>18}")
+    for result in results:
+        print(f"{result['name']:<8} {result['ms_per_100k']:>14} {result['row_mb_per_100k']:>12} "
+              f"{result['retained_mb_per_100k']:>18}")
+
+if __name__ == "__main__":
+    main()
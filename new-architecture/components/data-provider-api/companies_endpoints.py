@@ -3,24 +3,25 @@
 
 import datetime
 import logging
-import os
 from flask import request, jsonify
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from shared.database.connection import get_pooled_connection
+from pagination import parse_page_args, split_page, InvalidPageRequest
+
+# Import ACL Snapshot Cache
+try:
+    from acl_cache import invalidate_tenant_acl
+    ACL_CACHE_AVAILABLE = True
+except ImportError:
+    ACL_CACHE_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
 def get_db_connection():
-    """Utworz połączenie z bazą danych PostgreSQL"""
+    """Pobierz połączenie z puli współdzielonej (conn.close() zwraca je do puli)"""
     try:
-        conn = psycopg2.connect(
-            host=os.environ.get("DB_HOST", "postgres-db"),
-            port=os.environ.get("DB_PORT", 5432),
-            user=os.environ.get("DB_USER", "opa_user"),
-            password=os.environ.get("DB_PASSWORD", "opa_password"),
-            database=os.environ.get("DB_NAME", "opa_zero_poll")
-        )
-        return conn
+        return get_pooled_connection()
     except Exception as e:
         logger.error(f"Database connection failed: {e}")
         return None
@@ -30,66 +31,64 @@ def register_companies_endpoints(app):
     
     @app.route("/api/companies", methods=["GET"])
     def get_companies():
-        """Zwraca listę firm z opcjonalnym filtrowaniem po tenant_id"""
+        """Zwraca listę firm z opcjonalnym filtrowaniem po tenant_id (opcjonalnie stronicowaną: ?limit=&cursor=)"""
         logger.info("Companies list requested")
         
         tenant_id = request.args.get('tenant_id')
         status = request.args.get('status', 'active')
         
+        try:
+            limit, after = parse_page_args(request.args, 2)
+        except InvalidPageRequest as e:
+            return jsonify({"error": str(e)}), 400
+        
         conn = get_db_connection()
         if not conn:
             return jsonify({"error": "Database connection failed"}), 503
         
         try:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                # Liczba użytkowników podzapytaniem - strona nie wymaga grupowania wszystkich firm
+                query = """
+                    SELECT 
+                        c.company_id,
+                        c.tenant_id,
+                        c.company_name,
+                        c.company_code,
+                        c.nip,
+                        c.description,
+                        c.parent_company_id,
+                        c.status,
+                        c.created_at,
+                        c.updated_at,
+                        (SELECT COUNT(DISTINCT ua.user_id) FROM user_access ua
+                         WHERE ua.company_id = c.company_id) as users_count
+                    FROM companies c
+                    WHERE c.status = %s
+                """
+                params = [status]
+                
                 if tenant_id:
-                    cur.execute("""
-                        SELECT 
-                            c.company_id,
-                            c.tenant_id,
-                            c.company_name,
-                            c.company_code,
-                            c.nip,
-                            c.description,
-                            c.parent_company_id,
-                            c.status,
-                            c.created_at,
-                            c.updated_at,
-                            COUNT(DISTINCT ua.user_id) as users_count
-                        FROM companies c
-                        LEFT JOIN user_access ua ON c.company_id = ua.company_id
-                        WHERE c.tenant_id = %s AND c.status = %s
-                        GROUP BY c.company_id, c.tenant_id, c.company_name, c.company_code, c.nip, c.description, 
-                                c.parent_company_id, c.status, c.created_at, c.updated_at
-                        ORDER BY c.created_at DESC
-                    """, (tenant_id, status))
-                else:
-                    cur.execute("""
-                        SELECT 
-                            c.company_id,
-                            c.tenant_id,
-                            c.company_name,
-                            c.company_code,
-                            c.nip,
-                            c.description,
-                            c.parent_company_id,
-                            c.status,
-                            c.created_at,
-                            c.updated_at,
-                            COUNT(DISTINCT ua.user_id) as users_count
-                        FROM companies c
-                        LEFT JOIN user_access ua ON c.company_id = ua.company_id
-                        WHERE c.status = %s
-                        GROUP BY c.company_id, c.tenant_id, c.company_name, c.company_code, c.nip, c.description, 
-                                c.parent_company_id, c.status, c.created_at, c.updated_at
-                        ORDER BY c.created_at DESC
-                    """, (status,))
-                
-                companies = cur.fetchall()
+                    query += " AND c.tenant_id = %s"
+                    params.append(tenant_id)
+                
+                if after:
+                    query += " AND (c.created_at, c.company_id) < (%s, %s)"
+                    params.extend(after)
+                
+                query += " ORDER BY c.created_at DESC, c.company_id DESC"
+                
+                if limit:
+                    query += " LIMIT %s"
+                    params.append(limit + 1)
+                
+                cur.execute(query, params)
+                companies, next_cursor = split_page(cur.fetchall(), limit, lambda c: (c["created_at"], c["company_id"]))
                 
                 return jsonify({
                     "companies": [dict(company) for company in companies],
                     "total_count": len(companies),
+                    "next_cursor": next_cursor,
                     "filters": {
                         "tenant_id": tenant_id,
                         "status": status
@@ -453,6 +452,9 @@ def register_companies_endpoints(app):
                 
                 logger.info(f"User access granted: {user_id} -> {company_id}")
                 
+                if ACL_CACHE_AVAILABLE:
+                    invalidate_tenant_acl(company['tenant_id'])
+                
                 return jsonify({
                     "access": dict(access_record),
                     "message": "User access granted successfully",
@@ -498,6 +500,9 @@ def register_companies_endpoints(app):
                 
                 logger.info(f"User access revoked: {user_id} -> {company_id}")
                 
+                if ACL_CACHE_AVAILABLE:
+                    invalidate_tenant_acl(access_record['tenant_id'])
+                
                 return jsonify({
                     "revoked_access": dict(access_record),
                     "message": "User access revoked successfully",
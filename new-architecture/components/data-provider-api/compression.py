@@ -0,0 +1,214 @@
+"""
+Response Compression - negocjowana kompresja dużych odpowiedzi JSON (gzip / zstd / brotli)
+
+Dokumenty ACL powtarzają te same nazwy ról i uprawnień dla każdego użytkownika,
+więc kompresują się bardzo dobrze. Kodowanie wybierane jest z nagłówka
+Accept-Encoding klienta; zstd i brotli są używane tylko gdy biblioteki są zainstalowane.
+Skompresowane bajty mogą być przechowywane obok snapshotu (słownik representations),
+dzięki czemu gorący tenant nie jest kompresowany przy każdym pobraniu.
+"""
+
+import os
+import gzip
+import logging
+import threading
+from typing import Dict, Any, Optional, Callable, List, Tuple, Union
+from flask import request, Response
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Konfiguracja kompresji
+COMPRESSION_ENABLED = os.environ.get("COMPRESSION_ENABLED", "true").lower() == "true"
+# Odpowiedzi mniejsze niż próg są wysyłane bez kompresji
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", 6))
+COMPRESSION_ZSTD_LEVEL = int(os.environ.get("COMPRESSION_ZSTD_LEVEL", 3))
+COMPRESSION_BROTLI_LEVEL = int(os.environ.get("COMPRESSION_BROTLI_LEVEL", 5))
+
+# Klucz niekompresowanej reprezentacji w słowniku representations
+IDENTITY = "identity"
+
+def supported_encodings() -> list:
+    """Kodowania obsługiwane przez serwer w kolejności preferencji"""
+    encodings = []
+    if ZSTD_AVAILABLE:
+        encodings.append("zstd")
+    if BROTLI_AVAILABLE:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+def negotiate_encoding(size: int, accept_encodings=None) -> Optional[str]:
+    """
+    Wybiera kodowanie dla odpowiedzi o danym rozmiarze na podstawie Accept-Encoding
+
+    Args:
+        size: Rozmiar niekompresowanej odpowiedzi
+        accept_encodings: Sparsowany nagłówek Accept-Encoding (werkzeug Accept);
+                          domyślnie z bieżącego requestu Flask
+
+    Returns:
+        str: zstd / br / gzip lub None (bez kompresji)
+    """
+    if not COMPRESSION_ENABLED or size < COMPRESSION_MIN_SIZE:
+        return None
+    if accept_encodings is None:
+        accept_encodings = request.accept_encodings
+    return accept_encodings.best_match(supported_encodings())
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """Kompresuje dane wybranym kodowaniem"""
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=COMPRESSION_GZIP_LEVEL)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compress(data)
+    if encoding == "br":
+        return brotli.compress(data, quality=COMPRESSION_BROTLI_LEVEL)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+class CompressionMetrics:
+    """Metryki kompresji dla monitoring"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.metrics = {
+            "responses_total": 0,
+            "responses_compressed": 0,
+            "compressions": 0,
+            "cache_hits": 0,
+            "bytes_in": 0,
+            "bytes_out": 0
+        }
+
+    def record(self, compressed: bool, size_in: int, size_out: int, cache_hit: bool = False):
+        with self._lock:
+            self.metrics["responses_total"] += 1
+            self.metrics["bytes_in"] += size_in
+            self.metrics["bytes_out"] += size_out
+            if compressed:
+                self.metrics["responses_compressed"] += 1
+                self.metrics["cache_hits" if cache_hit else "compressions"] += 1
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            ratio = self.metrics["bytes_out"] / self.metrics["bytes_in"] if self.metrics["bytes_in"] else 1.0
+            return {
+                **self.metrics,
+                "compression_ratio": round(ratio, 4),
+                "enabled": COMPRESSION_ENABLED,
+                "min_size": COMPRESSION_MIN_SIZE,
+                "encodings": supported_encodings()
+            }
+
+compression_metrics = CompressionMetrics()
+
+def encode_representation(body_factory: Callable[[], bytes],
+                          representations: Optional[Dict[str, bytes]] = None,
+                          envelope: Optional[Tuple[bytes, bytes]] = None,
+                          accept_encodings=None) -> Tuple[Union[bytes, List[bytes]], int, Optional[str]]:
+    """
+    Koduje odpowiedź JSON z negocjowaną kompresją, niezależnie od frameworka (Flask / ASGI)
+
+    Args:
+        body_factory: Funkcja zwracająca niekompresowane bajty JSON (wołana tylko przy braku w cache)
+        representations: Cache reprezentacji (kodowanie -> bajty) przechowywany obok danych
+        envelope: Para (prefix, suffix) doklejana wokół body per request, bez ponownego kodowania body
+        accept_encodings: Sparsowany nagłówek Accept-Encoding (domyślnie z requestu Flask)
+
+    Returns:
+        Tuple: (bajty lub lista fragmentów, długość, kodowanie lub None)
+    """
+    cache = representations if representations is not None else {}
+
+    body = cache.get(IDENTITY)
+    if body is None:
+        body = body_factory()
+        cache[IDENTITY] = body
+
+    prefix, suffix = envelope if envelope else (b"", b"")
+    size = len(prefix) + len(body) + len(suffix)
+
+    encoding = negotiate_encoding(size, accept_encodings)
+    if encoding:
+        # Skompresowana reprezentacja zawiera envelope z chwili kompresji
+        payload = cache.get(encoding)
+        cache_hit = payload is not None
+        if payload is None:
+            payload = compress(b"".join((prefix, body, suffix)), encoding)
+            cache[encoding] = payload
+        compression_metrics.record(True, size, len(payload), cache_hit)
+        return payload, len(payload), encoding
+
+    compression_metrics.record(False, size, size)
+    # Lista fragmentów - body wysyłane bez kopiowania
+    return ([prefix, body, suffix] if envelope else body), size, None
+
+def json_response(body_factory: Callable[[], bytes], etag: Optional[str] = None,
+                  representations: Optional[Dict[str, bytes]] = None,
+                  envelope: Optional[Tuple[bytes, bytes]] = None) -> Response:
+    """
+    Buduje odpowiedź JSON z negocjowaną kompresją
+
+    Args:
+        body_factory: Funkcja zwracająca niekompresowane bajty JSON (wołana tylko przy braku w cache)
+        etag: ETag danych - dla skompresowanej reprezentacji wysyłany jako słaby (W/)
+        representations: Cache reprezentacji (kodowanie -> bajty) przechowywany obok danych
+        envelope: Para (prefix, suffix) doklejana wokół body per request, bez ponownego kodowania body
+
+    Returns:
+        Response: Odpowiedź Flask
+    """
+    payload, _, encoding = encode_representation(body_factory, representations, envelope)
+
+    # Content-Length liczony przez werkzeug z bajtów / fragmentów
+    response = Response(payload, mimetype="application/json")
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    if COMPRESSION_ENABLED:
+        response.vary.add("Accept-Encoding")
+    if etag:
+        # Różne kodowania to różne reprezentacje - silny ETag tylko dla identity
+        response.set_etag(etag, weak=bool(encoding))
+    return response
+
+class DocumentRepresentations:
+    """
+    Reprezentacje dokumentów złożonych (np. pełny snapshot) dla aktualnego ETag
+
+    Dla każdego klucza przechowywany jest tylko zestaw reprezentacji ostatniego ETag.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._documents: Dict[str, tuple] = {}
+
+    def get(self, key: str, etag: Optional[str]) -> Optional[Dict[str, bytes]]:
+        """Zwraca słownik reprezentacji dla ETag (nowy przy zmianie ETag); None gdy brak ETag"""
+        if not etag:
+            return None
+        with self._lock:
+            current = self._documents.get(key)
+            if current is None or current[0] != etag:
+                current = (etag, {})
+                self._documents[key] = current
+            return current[1]
+
+document_representations = DocumentRepresentations()
+
+def get_compression_metrics() -> Dict[str, Any]:
+    """
+    Pomocnicza funkcja do pobierania metryk kompresji
+    """
+    return compression_metrics.get_metrics()
@@ -4,26 +4,98 @@ Database Integration Module for Data Provider API
 Provides functions to fetch tenant data from database instead of static dictionaries.
 """
 
+import os
+import time
 import logging
-import sys
-from typing import Dict, Any, Optional, List
-
-# Add shared modules to path
-sys.path.append('/app/shared')
+from typing import Dict, Any, Optional, List, Callable, Iterable, Iterator, Tuple
 
 try:
-    from database.dao import TenantDAO, UserDAO, UserProfileDAO, UserAccessDAO
-    from database.connection import get_db_connection
+    # Imported as shared.database like the endpoint modules - one pool and circuit breaker per process
+    from shared.database.dao import TenantDAO
+    from shared.database.connection import get_db_connection, get_db_cursor, get_pool_metrics, POOL_MAX_CONNECTIONS, CONNECTION_ERRORS, is_connection_error
+    from shared.database.health import DatabaseUnavailableError, db_health
+    from shared.database.prepared import statement_cache
+    from shared.database.query_stats import query_stats
+    from shared.database.session import db_session, REPEATABLE_READ
+    from tenant_acl_builder import TenantACLBuilder
+    from acl_changes import ACLChangeJournal
+    from tenant_summary import TenantSummaryQuery
+    # Errors that may mean "database unreachable" - not swallowed as "not found";
+    # is_database_unavailable() decides between 503 and a failed statement
+    DATABASE_UNAVAILABLE_ERRORS = (DatabaseUnavailableError,) + CONNECTION_ERRORS
     DATABASE_AVAILABLE = True
 except ImportError as e:
+    DATABASE_UNAVAILABLE_ERRORS = ()
     DATABASE_AVAILABLE = False
     print(f"Database DAO not available: {e}")
 
+def is_database_unavailable(error: Exception) -> bool:
+    """Circuit open or connection lost (statement timeouts / serialization failures are not outages)"""
+    return DATABASE_AVAILABLE and (isinstance(error, DatabaseUnavailableError) or is_connection_error(error))
+
+from acl_cache import get_cached_tenant_acl, get_cached_tenant_acl_snapshot, ACLSnapshot, ACL_CACHE_ENABLED
+from snapshot_store import snapshot_store
+from tenant_acl_builder import EXPANDED_LAYOUT
+from tenant_executor import get_tenant_executor
+
 logger = logging.getLogger(__name__)
 
+# Number of tenants built concurrently (each build holds one pooled connection)
+SNAPSHOT_BUILD_WORKERS = int(os.environ.get("SNAPSHOT_BUILD_WORKERS", 4))
+# Pooled connections kept free for regular request handling
+POOL_RESERVED_CONNECTIONS = 4
+# Serve tenants from the trigger-maintained tenant_user_acl table (requires migration 06)
+MATERIALIZED_ACL_ENABLED = os.environ.get("MATERIALIZED_ACL_ENABLED", "false").lower() == "true"
+# Expose the change journal version in ACL documents (requires migration 07)
+ACL_CHANGE_JOURNAL_ENABLED = os.environ.get("ACL_CHANGE_JOURNAL_ENABLED", "false").lower() == "true"
+
+def get_snapshot_build_workers() -> int:
+    """
+    Effective number of concurrent tenant builds, capped below the pool size
+    """
+    if not DATABASE_AVAILABLE:
+        return 1
+    return max(1, min(SNAPSHOT_BUILD_WORKERS, POOL_MAX_CONNECTIONS - POOL_RESERVED_CONNECTIONS))
+
+def map_tenants(func: Callable[[str], Any], tenant_ids: Iterable[str]) -> Iterator[Tuple[str, Any]]:
+    """
+    Apply func to each tenant concurrently on the shared tenant executor
+    
+    Args:
+        func: Per-tenant function (e.g. get_tenant_acl_snapshot)
+        tenant_ids: Tenant identifiers
+        
+    Returns:
+        Iterator of (tenant_id, result) pairs in input order
+    """
+    return get_tenant_executor(get_snapshot_build_workers()).imap(func, tenant_ids)
+
+def warm_tenant_acl_cache(tenant_ids: Iterable[str], layout: str = EXPANDED_LAYOUT) -> int:
+    """
+    Build missing tenant ACL snapshots concurrently so subsequent fetches hit the cache
+    
+    Args:
+        tenant_ids: Tenant identifiers
+        layout: ACL document layout to warm
+        
+    Returns:
+        Number of tenants with ACL data available
+    """
+    if not (DATABASE_AVAILABLE and (ACL_CACHE_ENABLED or snapshot_store is not None)):
+        return 0
+    
+    def _warm(tenant_id: str) -> bool:
+        try:
+            return get_tenant_acl_snapshot(tenant_id, layout) is not None
+        except Exception as e:
+            logger.error(f"Failed to warm ACL cache for tenant {tenant_id}: {e}")
+            return False
+    
+    return sum(1 for _, available in map_tenants(_warm, tenant_ids) if available)
+
 def get_tenant_acl_from_database(tenant_id: str) -> Optional[Dict[str, Any]]:
     """
-    Fetch tenant ACL data from database
+    Fetch tenant ACL data, served from the snapshot cache when up to date
     
     Args:
         tenant_id: Tenant identifier
@@ -34,152 +106,158 @@ def get_tenant_acl_from_database(tenant_id: str) -> Optional[Dict[str, Any]]:
     if not DATABASE_AVAILABLE:
         return None
         
-    try:
-        # Initialize database connection
-        db = get_db_connection()
-        if not db.test_connection():
-            logger.error("Database connection test failed")
-            return None
-            
-        # Get tenant data using DAO
-        tenant_dao = TenantDAO()
-        tenants = tenant_dao.find_by_criteria({'tenant_id': tenant_id})
+    return get_cached_tenant_acl(tenant_id, build_tenant_acl_from_database)
+
+def get_tenant_acl_snapshot(tenant_id: str, layout: str = EXPANDED_LAYOUT):
+    """
+    Fetch tenant ACL snapshot (serialized body and content ETag) from the on-disk
+    snapshot store when enabled, otherwise from the in-process snapshot cache
+    
+    Args:
+        tenant_id: Tenant identifier
+        layout: ACL document layout (expanded or normalized)
         
-        if not tenants:
-            logger.warning(f"Tenant {tenant_id} not found in database")
-            return None
-            
-        tenant = tenants[0]  # Get first match
+    Returns:
+        StoredSnapshot / ACLSnapshot or None if not found
+    """
+    if not DATABASE_AVAILABLE:
+        return None
+    
+    if snapshot_store is not None:
+        # Shared by all worker processes - builds bypass the per-process cache,
+        # which is not invalidated by writes handled in other processes
+        return snapshot_store.get_or_build(tenant_id, layout, lambda tid: build_tenant_acl_snapshot(tid, layout))
         
-        # Get users for this tenant from BOTH user_access and user_roles tables
-        from shared.database.connection import get_db_cursor
+    return get_cached_tenant_acl_snapshot(
+        tenant_id, lambda tid: build_tenant_acl_from_database(tid, layout), layout)
+
+def build_tenant_acl_snapshot(tenant_id: str, layout: str = EXPANDED_LAYOUT) -> Optional[ACLSnapshot]:
+    """
+    Build a tenant ACL snapshot from database without caching it
+    
+    Args:
+        tenant_id: Tenant identifier
+        layout: ACL document layout (expanded or normalized)
         
-        user_ids = set()
+    Returns:
+        ACLSnapshot or None if not found
+    """
+    data = build_tenant_acl_from_database(tenant_id, layout)
+    if data is None:
+        return None
+    return ACLSnapshot(tenant_id, data.get("version", 0), data, time.time(), layout)
+
+def build_tenant_acl_from_database(tenant_id: str, layout: str = EXPANDED_LAYOUT) -> Optional[Dict[str, Any]]:
+    """
+    Build tenant ACL data from database (bypasses the snapshot cache)
+    
+    Args:
+        tenant_id: Tenant identifier
+        layout: ACL document layout (expanded or normalized)
         
-        # Get users from user_access table
-        try:
-            user_access_dao = UserAccessDAO()
-            user_accesses = user_access_dao.find_by_criteria({'tenant_id': tenant_id})
-            for access in user_accesses:
-                user_ids.add(access.user_id)
-        except Exception as e:
-            logger.warning(f"Could not fetch from user_access table: {e}")
+    Returns:
+        Dict containing ACL data or None if not found
+    """
+    if not DATABASE_AVAILABLE:
+        return None
         
-        # Get users from user_roles table (our new mapping system)
-        try:
-            with get_db_cursor() as cursor:
-                cursor.execute("""
-                    SELECT DISTINCT user_id 
-                    FROM user_roles 
-                    WHERE tenant_id = %s
-                """, (tenant_id,))
-                
-                role_users = cursor.fetchall()
-                for row in role_users:
-                    user_id = row['user_id'] if isinstance(row, dict) else row[0]
-                    user_ids.add(user_id)
-        except Exception as e:
-            logger.warning(f"Could not fetch from user_roles table: {e}")
-        
-        # Get user details for all unique user IDs
-        user_dao = UserDAO()
-        users = []
-        for user_id in user_ids:
-            user = user_dao.find_by_id(user_id)
-            if user:
-                users.append(user)
-        
-        # Get user profiles
-        profile_dao = UserProfileDAO()
-        
-        # Build ACL structure
-        acl_data = {
-            "tenant_id": tenant_id,
-            "tenant_name": tenant.tenant_name if hasattr(tenant, 'tenant_name') else tenant_id,
-            "users": {},
-            "roles": {},
-            "permissions": {}
-        }
-        
-        # Process users and their profiles
-        for user in users:
-            user_id = user.user_id if hasattr(user, 'user_id') else str(user)
-            
-            # Get user profile from UserProfileDAO
-            profile = profile_dao.get_complete_user_profile(user_id, tenant_id)
-            
-            # Get additional roles from user_roles table (our mapping system)
-            user_roles = {}
-            user_permissions = {}
-            
-            try:
-                with get_db_cursor() as cursor:
-                    # Get roles with their permissions for this user from user_roles table
-                    cursor.execute("""
-                        SELECT r.app_id, r.role_name, array_agg(p.permission_name) as permissions
-                        FROM user_roles ur
-                        JOIN roles r ON ur.role_id = r.role_id
-                        LEFT JOIN role_permissions rp ON r.role_id = rp.role_id
-                        LEFT JOIN permissions p ON rp.permission_id = p.permission_id
-                        WHERE ur.user_id = %s AND ur.tenant_id = %s
-                        GROUP BY r.app_id, r.role_name
-                    """, (user_id, tenant_id))
-                    
-                    role_data = cursor.fetchall()
-                    
-                    for row in role_data:
-                        app_id = row['app_id'] if isinstance(row, dict) else row[0]
-                        role_name = row['role_name'] if isinstance(row, dict) else row[1] 
-                        permissions = row['permissions'] if isinstance(row, dict) else row[2]
-                        
-                        # Add to roles structure
-                        if app_id not in user_roles:
-                            user_roles[app_id] = []
-                        user_roles[app_id].append(role_name)
-                        
-                        # Add to permissions structure
-                        if permissions and permissions[0] is not None:  # Check if permissions exist
-                            if app_id not in user_permissions:
-                                user_permissions[app_id] = []
-                            user_permissions[app_id].extend([p for p in permissions if p is not None])
-                            
-            except Exception as e:
-                logger.warning(f"Could not fetch roles from user_roles table for user {user_id}: {e}")
-            
-            # Merge roles and permissions from both sources
-            combined_roles = profile.roles if profile and hasattr(profile, 'roles') else {}
-            combined_permissions = profile.permissions if profile and hasattr(profile, 'permissions') else {}
-            
-            # Add roles from user_roles table
-            for app_id, roles in user_roles.items():
-                if app_id not in combined_roles:
-                    combined_roles[app_id] = []
-                combined_roles[app_id].extend(roles)
-                combined_roles[app_id] = list(set(combined_roles[app_id]))  # Remove duplicates
-            
-            # Add permissions from user_roles table
-            for app_id, permissions in user_permissions.items():
-                if app_id not in combined_permissions:
-                    combined_permissions[app_id] = []
-                combined_permissions[app_id].extend(permissions)
-                combined_permissions[app_id] = list(set(combined_permissions[app_id]))  # Remove duplicates
-            
-            acl_data["users"][user_id] = {
-                "email": user.email if hasattr(user, 'email') else '',
-                "full_name": user.full_name if hasattr(user, 'full_name') else '',
-                "roles": combined_roles,
-                "permissions": combined_permissions,
-                "companies": profile.companies if profile and hasattr(profile, 'companies') else [],
-                "teams": profile.teams if profile and hasattr(profile, 'teams') else []
-            }
+    try:
+        # Build the whole tenant ACL from tenant-wide queries, all reading one snapshot
+        with db_session(REPEATABLE_READ, readonly=True), get_db_cursor() as cursor:
+            # Version read before the build - the document is at least as new as the version
+            version = ACLChangeJournal(cursor).get_version(tenant_id)["version"] if ACL_CHANGE_JOURNAL_ENABLED else None
+            acl_data = TenantACLBuilder(cursor, materialized=MATERIALIZED_ACL_ENABLED).build(tenant_id, layout)
+        
+        if acl_data is None:
+            logger.warning(f"Tenant {tenant_id} not found in database")
+            return None
+        
+        if version is not None:
+            acl_data["version"] = version
             
         logger.info(f"Successfully fetched ACL data for tenant {tenant_id} from database")
         return acl_data
         
+    except DATABASE_UNAVAILABLE_ERRORS:
+        # Outage is not "tenant not found" - let the caller answer 503
+        raise
     except Exception as e:
         logger.error(f"Failed to fetch tenant ACL from database: {e}")
         return None
 
+def get_user_acl_from_database(tenant_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Build the ACL entry of a single user (bypasses the tenant snapshot cache)
+    
+    Unlike the tenant-level helpers, database errors are raised, so callers can
+    tell a missing user from a failed lookup.
+    
+    Args:
+        tenant_id: Tenant identifier
+        user_id: User identifier
+        
+    Returns:
+        Dict containing the user entry or None if the user does not belong to the tenant
+    """
+    if not DATABASE_AVAILABLE:
+        raise RuntimeError("Database integration not available")
+        
+    with db_session(REPEATABLE_READ, readonly=True), get_db_cursor() as cursor:
+        return TenantACLBuilder(cursor, materialized=MATERIALIZED_ACL_ENABLED).build_user(tenant_id, user_id)
+
+def get_tenant_acl_changes(tenant_id: str, since: int) -> Dict[str, Any]:
+    """
+    Fetch tenant ACL changes after a given version from the change journal
+    
+    Args:
+        tenant_id: Tenant identifier
+        since: Version the client already has
+        
+    Returns:
+        Dict with version, full_resync_required and JSON Patch changes
+    """
+    if not DATABASE_AVAILABLE:
+        raise RuntimeError("Database integration not available")
+        
+    with get_db_cursor() as cursor:
+        return ACLChangeJournal(cursor).get_changes(tenant_id, since)
+
+def check_materialized_acl_consistency(tenant_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Compare the tenant_user_acl table against the live views
+    
+    Args:
+        tenant_id: Tenant identifier or None for all tenants
+        
+    Returns:
+        List of inconsistent rows ({tenant_id, user_id, issue}); empty when consistent
+    """
+    if not DATABASE_AVAILABLE:
+        raise RuntimeError("Database integration not available")
+        
+    with get_db_cursor() as cursor:
+        return TenantACLBuilder(cursor).check_consistency(tenant_id)
+
+def get_tenant_summaries(limit: int, offset: int = 0, name_prefix: Optional[str] = None,
+                         status: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Get a page of tenants with distinct user counts (no ACL is built)
+    
+    Args:
+        limit: Page size
+        offset: Number of tenants to skip
+        name_prefix: Case-insensitive tenant_name prefix
+        status: Tenant status filter
+        
+    Returns:
+        Dict with tenants and total_count
+    """
+    if not DATABASE_AVAILABLE:
+        raise RuntimeError("Database integration not available")
+        
+    with get_db_cursor() as cursor:
+        return TenantSummaryQuery(cursor).list(limit, offset, name_prefix, status)
+
 def get_all_tenants_from_database() -> List[str]:
     """
     Get list of all tenant IDs from database
@@ -195,6 +273,9 @@ def get_all_tenants_from_database() -> List[str]:
         tenants = tenant_dao.find_all()
         return [tenant.tenant_id if hasattr(tenant, 'tenant_id') else str(tenant) for tenant in tenants]
         
+    except DATABASE_UNAVAILABLE_ERRORS:
+        # An empty list during an outage would publish an empty snapshot
+        raise
     except Exception as e:
         logger.error(f"Failed to fetch tenants from database: {e}")
         return []
@@ -203,6 +284,9 @@ def is_database_available() -> bool:
     """
     Check if database integration is available and working
     
+    Uses the health state recorded from real queries (circuit breaker),
+    so no connection is checked out.
+    
     Returns:
         True if database is available and accessible
     """
@@ -210,8 +294,36 @@ def is_database_available() -> bool:
         return False
         
     try:
-        db = get_db_connection()
-        return db.test_connection()
+        return get_db_connection().is_available()
     except Exception as e:
         logger.error(f"Database availability check failed: {e}")
-        return False 
\ No newline at end of file
+        return False
+
+def get_database_health() -> Dict[str, Any]:
+    """
+    Get database health state (circuit breaker status, pool gauges and prepared statement cache) for monitoring
+    """
+    if not DATABASE_AVAILABLE:
+        return {"state": "unavailable", "available": False}
+        
+    status = db_health.get_status()
+    status["pool"] = get_pool_metrics()
+    status["prepared_statements"] = statement_cache.get_metrics()
+    return status
+
+def get_query_stats(reset: bool = False) -> Dict[str, Any]:
+    """
+    Per-statement query statistics (DB_QUERY_STATS_ENABLED), optionally resetting them after the read
+    """
+    if not DATABASE_AVAILABLE:
+        return {"enabled": False, "statements": []}
+    
+    stats = query_stats.get_stats()
+    if reset:
+        query_stats.reset()
+    return stats
+
+def reset_query_stats():
+    """Drop collected query statistics"""
+    if DATABASE_AVAILABLE:
+        query_stats.reset()
\ No newline at end of file
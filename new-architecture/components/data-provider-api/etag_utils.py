@@ -0,0 +1,61 @@
+"""
+ETag Utilities - warunkowe odpowiedzi HTTP (If-None-Match / 304 Not Modified)
+
+ETag liczony jest z zawartości danych, bez pól zmiennych per request (np. timestamp),
+dzięki czemu jest stabilny między restartami i workerami. OPAL Client po ponownym
+połączeniu dostaje 304 zamiast pełnego dokumentu, jeśli dane się nie zmieniły.
+"""
+
+import json
+import hashlib
+from typing import Any, Iterable
+from flask import request, Response
+
+def compute_etag(data: Any) -> str:
+    """
+    Liczy ETag (hash SHA-256) z kanonicznej postaci JSON danych
+
+    Args:
+        data: Dane serializowalne do JSON
+
+    Returns:
+        str: Wartość ETag (bez cudzysłowów)
+    """
+    payload = json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+def combine_etags(parts: Iterable[str]) -> str:
+    """
+    Liczy ETag dokumentu złożonego z części o znanych ETagach (np. snapshot wszystkich tenantów)
+
+    Args:
+        parts: Identyfikatory części w kolejności występowania w dokumencie
+
+    Returns:
+        str: Wartość ETag (bez cudzysłowów)
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()[:32]
+
+def is_not_modified(etag: str, if_none_match=None) -> bool:
+    """
+    Sprawdza czy ETag z nagłówka If-None-Match klienta pasuje do aktualnego
+
+    Args:
+        etag: Aktualny ETag
+        if_none_match: Sparsowany nagłówek If-None-Match (werkzeug ETags); domyślnie z requestu Flask
+    """
+    if not etag:
+        return False
+    if if_none_match is None:
+        if_none_match = request.if_none_match
+    return if_none_match.contains_weak(etag)
+
+def not_modified_response(etag: str) -> Response:
+    """Zwraca pustą odpowiedź 304 Not Modified z aktualnym ETag"""
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
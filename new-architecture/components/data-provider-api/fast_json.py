@@ -0,0 +1,46 @@
+"""
+Fast JSON - serializacja dokumentów ACL do bajtów (orjson gdy zainstalowany, fallback na json)
+
+Wynik ma posortowane klucze, więc te same dane dają te same bajty niezależnie od
+kolejności budowania słowników. Dokument jest równoważny (jako JSON) wynikowi jsonify,
+ale nie identyczny bajtowo: znaki spoza ASCII nie są escapowane (UTF-8 jak w orjson,
+ensure_ascii=False w fallbacku), w przeciwieństwie do Flaska. Bajty są przechowywane
+w snapshotach i wysyłane bez ponownego kodowania; envelope odpowiedzi jest doklejany osobno.
+"""
+
+import json
+import uuid
+import datetime
+import decimal
+from typing import Any
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+def _default(value: Any) -> Any:
+    """Typy spoza JSON (jak w domyślnym providerze Flask)"""
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+if ORJSON_AVAILABLE:
+    _ORJSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+    def dumps(data: Any) -> bytes:
+        """Serializuje dane do zwartego JSON (UTF-8, posortowane klucze)"""
+        return orjson.dumps(data, default=_default, option=_ORJSON_OPTIONS)
+else:
+    _encoder = json.JSONEncoder(ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=_default)
+
+    def dumps(data: Any) -> bytes:
+        """Serializuje dane do zwartego JSON (UTF-8, posortowane klucze)"""
+        return _encoder.encode(data).encode("utf-8")
+
+def open_object(body: bytes) -> bytes:
+    """Zserializowany obiekt JSON bez zamykającego '}' - do doklejenia kolejnych kluczy"""
+    return body[:-1]
@@ -5,10 +5,20 @@ Automatycznie inicjalizuje bazę danych schema i seed data
 """
 
 import os
+import csv
 import psycopg2
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 import sys
 import time
+from shared.database.bulk import copy_in, ON_CONFLICT_NOTHING
+
+# Katalog z plikami <tabela>.csv (wiersz nagłówka = kolumny) ładowanymi przez COPY,
+# np. dziesiątki tysięcy wpisów user_access / user_roles przy migracji tenantów
+SEED_BULK_DIR = os.getenv('SEED_BULK_DIR')
+# Kolejność ładowania zgodna z kluczami obcymi - pozostałe pliki po nich, alfabetycznie
+BULK_SEED_ORDER = ['tenants', 'users', 'applications', 'companies', 'roles', 'permissions',
+                   'role_permissions', 'application_profiles', 'profile_roles', 'user_tenants',
+                   'user_roles', 'user_access', 'user_application_profiles']
 
 def get_db_connection():
     """Nawiązuje połączenie z bazą danych z Railway environment variables"""
@@ -123,6 +133,39 @@ def execute_sql_file(conn, file_path, description):
         print(f"❌ Błąd wykonywania {description}: {e}")
         return False
 
+def load_bulk_seed_data(conn, directory):
+    """
+    Ładuje pliki <tabela>.csv z katalogu przez COPY FROM STDIN
+    
+    Istniejące wiersze są pomijane (ON CONFLICT DO NOTHING), więc ładowanie można
+    powtarzać. Puste pola CSV są ładowane jako NULL.
+    """
+    if not os.path.isdir(directory):
+        print(f"❌ Katalog nie istnieje: {directory}")
+        return False
+    
+    files = {name[:-4]: os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.csv')}
+    tables = [t for t in BULK_SEED_ORDER if t in files] + sorted(t for t in files if t not in BULK_SEED_ORDER)
+    
+    cursor = conn.cursor()
+    try:
+        for table in tables:
+            with open(files[table], newline='', encoding='utf-8') as f:
+                reader = csv.reader(f)
+                columns = next(reader)
+                rows = ([value if value != '' else None for value in row] for row in reader)
+                started = time.time()
+                count = copy_in(cursor, table, columns, rows, on_conflict=ON_CONFLICT_NOTHING)
+            print(f"   ✅ {table}: {count} nowych wierszy ({time.time() - started:.2f}s)")
+    except Exception as e:
+        print(f"❌ Błąd ładowania danych masowych: {e}")
+        return False
+    finally:
+        cursor.close()
+    
+    print(f"✅ Dane masowe z {directory} załadowane ({len(tables)} tabel)")
+    return True
+
 def init_database():
     """Główna funkcja inicjalizacji bazy danych"""
     print("🚀 =================================================")
@@ -153,6 +196,8 @@ def init_database():
         if check_tables_exist(conn):
             print("✅ Baza danych już zawiera tabele - pomijanie inicjalizacji")
             print("💡 Jeśli chcesz zresetować bazę, usuń wszystkie tabele ręcznie")
+            if SEED_BULK_DIR:
+                load_bulk_seed_data(conn, SEED_BULK_DIR)
             conn.close()
             return True
         
@@ -167,6 +212,10 @@ def init_database():
         if not execute_sql_file(conn, seed_path, "Seed Data (dane testowe)"):
             print("⚠️  Błąd ładowania danych testowych - kontynuujemy")
         
+        # 4b. Masowe ładowanie danych (opcjonalne)
+        if SEED_BULK_DIR and not load_bulk_seed_data(conn, SEED_BULK_DIR):
+            print("⚠️  Błąd ładowania danych masowych - kontynuujemy")
+        
         # 5. Sprawdzenie końcowe
         if check_tables_exist(conn):
             print("🎉 =================================================")
@@ -5,6 +5,9 @@ Zawiera wszystkie endpointy obsługujące strukturę autoryzacyjną Model 2 (RBA
 from flask import jsonify, request
 import datetime
 import logging
+from etag_utils import compute_etag, is_not_modified, not_modified_response
+from compression import json_response, document_representations
+from fast_json import dumps, open_object
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +22,9 @@ def register_model2_endpoints(app, MODEL2_DATA, MODEL2_AVAILABLE):
     """
     from model2_validator import Model2AuthorizationEngine
     
+    # ETag danych Model 2 (bez metadata.retrieved_at) - dane są statyczne, liczymy raz
+    model2_etag = compute_etag(MODEL2_DATA) if MODEL2_DATA is not None else None
+    
     @app.route("/v2/authorization", methods=["GET"])
     def get_model2_data():
         """
@@ -40,17 +46,29 @@ def register_model2_endpoints(app, MODEL2_DATA, MODEL2_AVAILABLE):
                 }
             }), 503
         
+        if is_not_modified(model2_etag):
+            logger.info("Model 2 authorization data not modified")
+            return not_modified_response(model2_etag)
+        
+        def build_body():
+            # Obiekt danych bez zamykającego '}' - metadata doklejane per request
+            data = {key: value for key, value in MODEL2_DATA.items() if key != "metadata"}
+            return open_object(dumps(data))
+        
         # Dodaj metadane do odpowiedzi
-        response_data = MODEL2_DATA.copy()
-        response_data["metadata"] = {
+        metadata = {
             "retrieved_at": datetime.datetime.utcnow().isoformat(),
             "model_version": "2.0",
             "data_source": "model2-sample-data.json",
             "validation_status": "passed"
         }
+        separator = b"," if len(MODEL2_DATA.keys() - {"metadata"}) else b""
         
+        # Dane są statyczne - zakodowane (i skompresowane) bajty są budowane raz na ETag
         logger.info("Model 2 authorization data successfully retrieved")
-        return jsonify(response_data), 200
+        return json_response(build_body, model2_etag,
+                             document_representations.get("v2_authorization", model2_etag),
+                             envelope=(b"", separator + b'"metadata":' + dumps(metadata) + b"}\n")), 200
 
     @app.route("/v2/users/<user_id>/authorization", methods=["GET"])
     def get_user_authorization(user_id):
@@ -10,7 +10,7 @@ Task 36 - Subtask 1: External Data Source endpoints w Data Provider API
 
 import os
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from flask import request, jsonify
 import datetime
 
@@ -24,13 +24,17 @@ except ImportError:
 
 # Import database integration
 try:
-    from database_integration import get_all_tenants_from_database, is_database_available
+    from database_integration import get_all_tenants_from_database, is_database_available, warm_tenant_acl_cache
     DATABASE_INTEGRATION_AVAILABLE = True
 except ImportError:
     DATABASE_INTEGRATION_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Układ dokumentu ACL pobieranego przez OPAL Client ("expanded" lub "normalized" - role_permissions na poziomie tenanta)
+OPAL_ACL_LAYOUT = os.environ.get("OPAL_ACL_LAYOUT", "expanded").lower()
+ACL_URL_QUERY = "" if OPAL_ACL_LAYOUT == "expanded" else f"?layout={OPAL_ACL_LAYOUT}"
+
 # OPAL Configuration
 OPAL_PUBLIC_KEY = os.environ.get("OPAL_PUBLIC_KEY", None)
 OPAL_JWT_ALGORITHM = os.environ.get("OPAL_JWT_ALGORITHM", "RS256")
@@ -109,7 +113,7 @@ def get_data_source_config_for_client(client_claims: Dict[str, Any], model2_avai
     # Konfiguracja dla Model 1 (legacy ACL) - JEDEN TOPIC dla wszystkich tenantów
     model1_entries = [
         {
-            "url": f"{base_url}/tenants/{tenant_id}/acl",
+            "url": f"{base_url}/tenants/{tenant_id}/acl{ACL_URL_QUERY}",
             "dst_path": f"/acl/{tenant_id}",
             "topics": ["multi_tenant_data"],  # JEDEN TOPIC dla wszystkich tenantów
             "config": {
@@ -166,6 +170,9 @@ def get_tenant_discovery_config(model2_available: bool = False) -> Dict[str, Any
     if DATABASE_INTEGRATION_AVAILABLE and is_database_available():
         tenant_ids = get_all_tenants_from_database()
         logger.info(f"Found {len(tenant_ids)} tenants in database: {tenant_ids}")
+        # Zbuduj ACL tenantów równolegle - OPAL Client pobierze je zaraz po tej konfiguracji
+        warmed = warm_tenant_acl_cache(tenant_ids, OPAL_ACL_LAYOUT)
+        logger.info(f"ACL cache warmed for {warmed} tenants")
     else:
         # Fallback - jeśli baza niedostępna, użyj domyślnego tenanta
         tenant_ids = ["tenant1"]
@@ -180,7 +187,7 @@ def get_tenant_discovery_config(model2_available: bool = False) -> Dict[str, Any
         # Konfiguracja dla Model 1 (Enhanced ACL)
         model1_entries = [
             {
-                "url": f"{base_url}/tenants/{tenant_id}/acl",
+                "url": f"{base_url}/tenants/{tenant_id}/acl{ACL_URL_QUERY}",
                 "dst_path": f"/acl/{tenant_id}",  # Każdy tenant ma osobny dst_path
                 "topics": ["multi_tenant_data"],  # JEDEN TOPIC dla wszystkich tenantów
                 "config": {
@@ -233,6 +240,104 @@ def get_tenant_discovery_config(model2_available: bool = False) -> Dict[str, Any
     logger.info(f"✅ Generated Tenant Discovery config for {len(tenants_config)} tenants")
     return result
 
+def resolve_data_source_config(token: Optional[str], model2_available: bool = False) -> Tuple[Dict[str, Any], int]:
+    """
+    Logika endpointu /data/config wspólna dla trybu Flask i ASGI
+    
+    Args:
+        token: OPAL Client JWT token z query param (None gdy brak)
+        model2_available: Czy Model 2 jest dostępny
+        
+    Returns:
+        Tuple: (DataSourceConfig lub opis błędu, kod HTTP)
+    """
+    # Sprawdź czy JWT validation jest wyłączone
+    if DISABLE_JWT_VALIDATION:
+        logger.info("🔓 JWT validation disabled - generating default config")
+        # Generuj domyślną konfigurację bez JWT validation
+        default_claims = {
+            "client_id": "opal-no-jwt-client",
+            "tenant_id": "tenant1",  # Domyślny tenant dla no-JWT mode
+            "sub": "opal-no-jwt-client",
+            "iss": "opal-no-jwt",
+            "aud": "opal-no-jwt"
+        }
+        
+        try:
+            data_source_config = get_data_source_config_for_client(default_claims, model2_available)
+            logger.info("✅ Returning DataSourceConfig without JWT validation")
+            return data_source_config, 200
+            
+        except Exception as e:
+            logger.error(f"❌ Error generating no-JWT DataSourceConfig: {e}")
+            return {
+                "error": "Internal server error",
+                "details": "Failed to generate data source configuration"
+            }, 500
+    
+    # Sprawdź czy OPAL JWT jest dostępne (tylko jeśli JWT validation włączone)
+    if not OPAL_JWT_AVAILABLE:
+        logger.error("❌ OPAL JWT dependencies not available")
+        return {
+            "error": "OPAL JWT validation not available",
+            "details": "Missing jwt or cryptography dependencies"
+        }, 500
+    
+    # Token z query parameters
+    if not token:
+        logger.error("❌ Missing OPAL JWT token in query parameters")
+        return {
+            "error": "Missing token parameter",
+            "details": "OPAL Client JWT token required in 'token' query parameter"
+        }, 401
+    
+    # Sprawdź czy to dev token OPAL
+    if token == "THIS_IS_A_DEV_SECRET":
+        logger.info("🔧 Using OPAL dev token - generating default config")
+        # Generuj domyślną konfigurację dla dev mode
+        default_claims = {
+            "client_id": "opal-dev-client",
+            "tenant_id": "tenant1",  # Domyślny tenant dla dev mode (zmienione z acme na tenant1)
+            "sub": "opal-dev-client",
+            "iss": "opal-dev",
+            "aud": "opal-dev"
+        }
+        
+        try:
+            data_source_config = get_data_source_config_for_client(default_claims, model2_available)
+            logger.info("✅ Returning dev DataSourceConfig for OPAL dev token")
+            return data_source_config, 200
+            
+        except Exception as e:
+            logger.error(f"❌ Error generating dev DataSourceConfig: {e}")
+            return {
+                "error": "Internal server error",
+                "details": "Failed to generate dev data source configuration"
+            }, 500
+    
+    # Waliduj JWT token (dla prawdziwych tokenów)
+    client_claims = validate_opal_jwt(token)
+    if not client_claims:
+        logger.error("❌ OPAL JWT token validation failed")
+        return {
+            "error": "Invalid or expired token",
+            "details": "OPAL Client JWT token validation failed"
+        }, 401
+    
+    # Generuj DataSourceConfig dla tego klienta
+    try:
+        data_source_config = get_data_source_config_for_client(client_claims, model2_available)
+        
+        logger.info(f"✅ Returning DataSourceConfig for client: {client_claims.get('client_id', 'unknown')}")
+        return data_source_config, 200
+        
+    except Exception as e:
+        logger.error(f"❌ Error generating DataSourceConfig: {e}")
+        return {
+            "error": "Internal server error",
+            "details": "Failed to generate data source configuration"
+        }, 500
+
 def register_opal_endpoints(app, model2_available: bool = False):
     """
     Rejestruje OPAL External Data Sources endpoints w Flask app
@@ -258,93 +363,8 @@ def register_opal_endpoints(app, model2_available: bool = False):
         """
         logger.info("🔗 OPAL External Data Sources request received")
         
-        # Sprawdź czy JWT validation jest wyłączone
-        if DISABLE_JWT_VALIDATION:
-            logger.info("🔓 JWT validation disabled - generating default config")
-            # Generuj domyślną konfigurację bez JWT validation
-            default_claims = {
-                "client_id": "opal-no-jwt-client",
-                "tenant_id": "tenant1",  # Domyślny tenant dla no-JWT mode
-                "sub": "opal-no-jwt-client",
-                "iss": "opal-no-jwt",
-                "aud": "opal-no-jwt"
-            }
-            
-            try:
-                data_source_config = get_data_source_config_for_client(default_claims, model2_available)
-                logger.info("✅ Returning DataSourceConfig without JWT validation")
-                return jsonify(data_source_config), 200
-                
-            except Exception as e:
-                logger.error(f"❌ Error generating no-JWT DataSourceConfig: {e}")
-                return jsonify({
-                    "error": "Internal server error",
-                    "details": "Failed to generate data source configuration"
-                }), 500
-        
-        # Sprawdź czy OPAL JWT jest dostępne (tylko jeśli JWT validation włączone)
-        if not OPAL_JWT_AVAILABLE:
-            logger.error("❌ OPAL JWT dependencies not available")
-            return jsonify({
-                "error": "OPAL JWT validation not available",
-                "details": "Missing jwt or cryptography dependencies"
-            }), 500
-        
-        # Wyciągnij token z query parameters
-        token = request.args.get('token')
-        if not token:
-            logger.error("❌ Missing OPAL JWT token in query parameters")
-            return jsonify({
-                "error": "Missing token parameter",
-                "details": "OPAL Client JWT token required in 'token' query parameter"
-            }), 401
-        
-        # Sprawdź czy to dev token OPAL
-        if token == "THIS_IS_A_DEV_SECRET":
-            logger.info("🔧 Using OPAL dev token - generating default config")
-            # Generuj domyślną konfigurację dla dev mode
-            default_claims = {
-                "client_id": "opal-dev-client",
-                "tenant_id": "tenant1",  # Domyślny tenant dla dev mode (zmienione z acme na tenant1)
-                "sub": "opal-dev-client",
-                "iss": "opal-dev",
-                "aud": "opal-dev"
-            }
-            
-            try:
-                data_source_config = get_data_source_config_for_client(default_claims, model2_available)
-                logger.info("✅ Returning dev DataSourceConfig for OPAL dev token")
-                return jsonify(data_source_config), 200
-                
-            except Exception as e:
-                logger.error(f"❌ Error generating dev DataSourceConfig: {e}")
-                return jsonify({
-                    "error": "Internal server error",
-                    "details": "Failed to generate dev data source configuration"
-                }), 500
-        
-        # Waliduj JWT token (dla prawdziwych tokenów)
-        client_claims = validate_opal_jwt(token)
-        if not client_claims:
-            logger.error("❌ OPAL JWT token validation failed")
-            return jsonify({
-                "error": "Invalid or expired token",
-                "details": "OPAL Client JWT token validation failed"
-            }), 401
-        
-        # Generuj DataSourceConfig dla tego klienta
-        try:
-            data_source_config = get_data_source_config_for_client(client_claims, model2_available)
-            
-            logger.info(f"✅ Returning DataSourceConfig for client: {client_claims.get('client_id', 'unknown')}")
-            return jsonify(data_source_config), 200
-            
-        except Exception as e:
-            logger.error(f"❌ Error generating DataSourceConfig: {e}")
-            return jsonify({
-                "error": "Internal server error",
-                "details": "Failed to generate data source configuration"
-            }), 500
+        data_source_config, status = resolve_data_source_config(request.args.get('token'), model2_available)
+        return jsonify(data_source_config), status
 
     @app.route("/data/tenants-bootstrap", methods=["GET"])
     def tenant_discovery_api():
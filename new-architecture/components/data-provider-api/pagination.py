@@ -0,0 +1,77 @@
+"""
+Stronicowanie kursorem (keyset) dla endpointów list
+
+Token kursora koduje klucz sortowania ostatniego zwróconego wiersza, np.
+(created_at, user_id). Następna strona jest pobierana warunkiem
+(created_at, user_id) < (token), więc jej koszt nie zależy od numeru strony.
+"""
+
+import os
+import json
+import base64
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Maksymalny rozmiar strony (?limit=)
+API_PAGE_SIZE_MAX = int(os.environ.get("API_PAGE_SIZE_MAX", 1000))
+
+class InvalidPageRequest(ValueError):
+    """Niepoprawny parametr limit lub cursor"""
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Koduje klucz sortowania jako nieprzezroczysty token URL-safe"""
+    raw = json.dumps([value.isoformat() if hasattr(value, "isoformat") else value for value in values],
+                     separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(token: str, size: int) -> List[Any]:
+    """
+    Dekoduje token kursora
+
+    Raises:
+        InvalidPageRequest: token uszkodzony lub o innej liczbie pól
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidPageRequest("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidPageRequest("Invalid cursor")
+    return values
+
+def parse_page_args(args: Dict[str, str], key_size: int) -> Tuple[Optional[int], Optional[List[Any]]]:
+    """
+    Odczytuje ?limit= i ?cursor= z parametrów żądania
+
+    Returns:
+        (limit, after) - limit None oznacza listę bez stronicowania (dotychczasowe zachowanie)
+
+    Raises:
+        InvalidPageRequest: niepoprawny limit lub cursor
+    """
+    limit = args.get("limit")
+    cursor = args.get("cursor")
+    if limit is None and cursor is None:
+        return None, None
+
+    try:
+        limit = int(limit) if limit is not None else API_PAGE_SIZE_MAX
+    except ValueError:
+        raise InvalidPageRequest("limit must be an integer")
+    if not 1 <= limit <= API_PAGE_SIZE_MAX:
+        raise InvalidPageRequest(f"limit must be between 1 and {API_PAGE_SIZE_MAX}")
+
+    after = decode_cursor(cursor, key_size) if cursor else None
+    return limit, after
+
+def split_page(rows: List[Any], limit: Optional[int], key: Callable[[Any], Sequence[Any]]) -> Tuple[List[Any], Optional[str]]:
+    """
+    Dzieli wynik zapytania z LIMIT limit + 1 na stronę i token następnej strony
+
+    Returns:
+        (wiersze strony, next_cursor lub None gdy to ostatnia strona)
+    """
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(key(page[-1]))
@@ -23,22 +23,16 @@ Model 1 Structure:
 import logging
 import psycopg2
 from psycopg2.extras import RealDictCursor
-import os
+from shared.database.connection import get_pooled_connection
+from shared.database.dao import UserRoleDAO, UserAccessDAO
 from typing import Dict, Any, Optional, List
 
 logger = logging.getLogger(__name__)
 
 def get_db_connection():
-    """Utworz połączenie z bazą danych PostgreSQL"""
+    """Pobierz połączenie z puli współdzielonej (conn.close() zwraca je do puli)"""
     try:
-        conn = psycopg2.connect(
-            host=os.environ.get("DB_HOST", "postgres-db"),
-            port=os.environ.get("DB_PORT", 5432),
-            user=os.environ.get("DB_USER", "opa_user"),
-            password=os.environ.get("DB_PASSWORD", "opa_password"),
-            database=os.environ.get("DB_NAME", "opa_zero_poll")
-        )
-        return conn
+        return get_pooled_connection()
     except Exception as e:
         logger.error(f"Database connection failed: {e}")
         return None
@@ -283,39 +277,11 @@ class PermissionEventTranslator:
         Returns:
             Dict: Role per aplikacja {"app_id": ["role1", "role2"]}
         """
-        conn = get_db_connection()
-        if not conn:
-            return {}
-        
         try:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute("""
-                    SELECT r.app_id, r.role_name
-                    FROM user_roles ur
-                    JOIN roles r ON ur.role_id = r.role_id
-                    WHERE ur.user_id = %s AND ur.tenant_id = %s
-                """, (user_id, tenant_id))
-                
-                roles_data = cur.fetchall()
-                
-                user_roles = {}
-                for row in roles_data:
-                    app_id = row["app_id"]
-                    role_name = row["role_name"]
-                    
-                    if app_id not in user_roles:
-                        user_roles[app_id] = []
-                    
-                    if role_name not in user_roles[app_id]:
-                        user_roles[app_id].append(role_name)
-                
-                return user_roles
-                
+            return UserRoleDAO().find_roles_for_users([user_id], tenant_id)[user_id]
         except Exception as e:
             self.logger.error(f"❌ Error fetching user roles from database: {e}")
             return {}
-        finally:
-            conn.close()
     
     def _get_user_access_from_database(self, user_id: str, tenant_id: str) -> Dict[str, List[str]]:
         """
@@ -324,38 +290,12 @@ class PermissionEventTranslator:
         Returns:
             Dict: Dostęp per tenant {"tenant_id": ["company1", "company2"]}
         """
-        conn = get_db_connection()
-        if not conn:
-            return {}
-        
         try:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute("""
-                    SELECT tenant_id, company_id
-                    FROM user_access
-                    WHERE user_id = %s AND tenant_id = %s
-                """, (user_id, tenant_id))
-                
-                access_data = cur.fetchall()
-                
-                user_access = {}
-                for row in access_data:
-                    tenant = row["tenant_id"]
-                    company = row["company_id"]
-                    
-                    if tenant not in user_access:
-                        user_access[tenant] = []
-                    
-                    if company not in user_access[tenant]:
-                        user_access[tenant].append(company)
-                
-                return user_access
-                
+            companies = UserAccessDAO().get_companies_for_users([user_id], tenant_id)[user_id]
+            return {tenant_id: companies} if companies else {}
         except Exception as e:
             self.logger.error(f"❌ Error fetching user access from database: {e}")
             return {}
-        finally:
-            conn.close()
     
     def _get_roles_from_profile(self, app_id: str, profile_name: str) -> List[str]:
         """
@@ -6,7 +6,9 @@ Po przypisaniu profilu aplikacji użytkownikowi, automatycznie tworzy odpowiadaj
 import logging
 # DAO imports removed - this module uses direct SQL queries
 from shared.database.connection import get_db_cursor
+from shared.database.bulk import bulk_insert, ON_CONFLICT_NOTHING
 from user_data_sync import UserDataSyncService
+from acl_cache import invalidate_tenant_acl
 
 logger = logging.getLogger(__name__)
 
@@ -41,84 +43,63 @@ def apply_profile_to_user_roles(user_id, profile_id, app_id, tenant_id):
                 logger.warning(f"⚠️ Brak ról zdefiniowanych dla profilu {profile_id} w aplikacji {app_id}")
                 return {"success": False, "message": "Brak ról dla profilu", "created_roles": []}
             
+            # 2. Utwórz wszystkie wpisy w user_roles jednym INSERT - istniejące pomija ON CONFLICT,
+            #    RETURNING zwraca tylko role faktycznie utworzone
+            created_ids = set(bulk_insert(
+                cursor, "user_roles", ["user_id", "role_id", "tenant_id", "assigned_by"],
+                [(user_id, role_row['role_id'], tenant_id, 'profile_mapper') for role_row in profile_roles],
+                on_conflict=ON_CONFLICT_NOTHING, conflict_columns=["user_id", "role_id", "tenant_id"],
+                returning=["role_id"]
+            ))
+            
             created_roles = []
             skipped_roles = []
-            
-            # 2. Dla każdej roli z profilu, utwórz wpis w user_roles
             for role_row in profile_roles:
-                role_id = role_row['role_id']
-                role_name = role_row['role_name']
-                role_app_id = role_row['app_id']
-                try:
-                    # Sprawdź czy rola już istnieje dla użytkownika
-                    cursor.execute("""
-                        SELECT COUNT(*) FROM user_roles 
-                        WHERE user_id = %s AND role_id = %s AND tenant_id = %s
-                    """, (user_id, role_id, tenant_id))
-                    
-                    count_result = cursor.fetchone()
-                    exists = count_result['count'] > 0 if isinstance(count_result, dict) else count_result[0] > 0
-                    
-                    if exists:
-                        logger.info(f"⏭️ Rola {role_name} już przypisana do użytkownika {user_id}")
-                        skipped_roles.append({
-                            "role_id": role_id,
-                            "role_name": role_name,
-                            "reason": "already_exists"
-                        })
-                        continue
-                    
-                    # Utwórz nową rolę dla użytkownika
-                    cursor.execute("""
-                        INSERT INTO user_roles (user_id, role_id, tenant_id, assigned_at, assigned_by)
-                        VALUES (%s, %s, %s, NOW(), 'profile_mapper')
-                    """, (user_id, role_id, tenant_id))
-                    
+                if str(role_row['role_id']) in created_ids:
                     created_roles.append({
-                        "role_id": role_id,
-                        "role_name": role_name,
-                        "app_id": role_app_id
+                        "role_id": role_row['role_id'],
+                        "role_name": role_row['role_name'],
+                        "app_id": role_row['app_id']
                     })
-                    
-                    logger.info(f"✅ Utworzono rolę {role_name} dla użytkownika {user_id}")
-                    
-                except Exception as role_error:
-                    logger.error(f"❌ Błąd tworzenia roli {role_name}: {role_error}")
+                    logger.info(f"✅ Utworzono rolę {role_row['role_name']} dla użytkownika {user_id}")
+                else:
+                    logger.info(f"⏭️ Rola {role_row['role_name']} już przypisana do użytkownika {user_id}")
                     skipped_roles.append({
-                        "role_id": role_id,
-                        "role_name": role_name,
-                        "reason": f"error: {role_error}"
+                        "role_id": role_row['role_id'],
+                        "role_name": role_row['role_name'],
+                        "reason": "already_exists"
                     })
             
             logger.info(f"✅ Mapowanie profilu zakończone - utworzono {len(created_roles)} ról, pominięto {len(skipped_roles)}")
-            
-            # Opublikuj aktualizację do OPAL jeśli utworzono jakieś role
-            if created_roles:
-                try:
-                    role_changes = {
-                        "action": "profile_mapped",
-                        "profile_id": profile_id,
-                        "created_roles": created_roles,
-                        "app_id": app_id
-                    }
-                    sync_service = UserDataSyncService()
-                    publish_success = sync_service.publish_role_update(tenant_id, user_id, role_changes, "update")
-                    if publish_success:
-                        logger.info(f"✅ OPAL role update published for {tenant_id}")
-                    else:
-                        logger.warning(f"⚠️ Failed to publish OPAL role update for {tenant_id}")
-                except Exception as opal_error:
-                    logger.error(f"❌ Error publishing OPAL update: {opal_error}")
-            
-            return {
-                "success": True,
-                "message": f"Pomyślnie zmapowano profil {profile_id}",
-                "created_roles": created_roles,
-                "skipped_roles": skipped_roles,
-                "profile_id": profile_id,
-                "user_id": user_id,
-                "tenant_id": tenant_id
-            }
+        
+        # Opublikuj aktualizację do OPAL jeśli utworzono jakieś role
+        # (po zatwierdzeniu transakcji - OPAL i cache ACL muszą widzieć nowe role)
+        if created_roles:
+            try:
+                role_changes = {
+                    "action": "profile_mapped",
+                    "profile_id": profile_id,
+                    "created_roles": created_roles,
+                    "app_id": app_id
+                }
+                sync_service = UserDataSyncService()
+                publish_success = sync_service.publish_role_update(tenant_id, user_id, role_changes, "update")
+                if publish_success:
+                    logger.info(f"✅ OPAL role update published for {tenant_id}")
+                else:
+                    logger.warning(f"⚠️ Failed to publish OPAL role update for {tenant_id}")
+            except Exception as opal_error:
+                logger.error(f"❌ Error publishing OPAL update: {opal_error}")
+        
+        return {
+            "success": True,
+            "message": f"Pomyślnie zmapowano profil {profile_id}",
+            "created_roles": created_roles,
+            "skipped_roles": skipped_roles,
+            "profile_id": profile_id,
+            "user_id": user_id,
+            "tenant_id": tenant_id
+        }
     
     except Exception as e:
         logger.error(f"❌ Błąd mapowania profilu {profile_id} dla użytkownika {user_id}: {e}")
@@ -155,35 +136,40 @@ def remove_profile_from_user_roles(user_id, profile_id, app_id, tenant_id):
             """, (profile_id, app_id))
             
             profile_roles = cursor.fetchall()
+            role_names = {str(role_row['role_id']): role_row['role_name'] for role_row in profile_roles}
             removed_roles = []
             
-            # 2. Usuń role użytkownika pochodzące z tego profilu
-            for role_row in profile_roles:
-                role_id = role_row['role_id']
-                role_name = role_row['role_name']
+            # 2. Usuń jednym zapytaniem role użytkownika pochodzące z tego profilu
+            if role_names:
                 cursor.execute("""
                     DELETE FROM user_roles 
-                    WHERE user_id = %s AND role_id = %s AND tenant_id = %s 
+                    WHERE user_id = %s AND role_id = ANY(%s::uuid[]) AND tenant_id = %s 
                     AND assigned_by = 'profile_mapper'
-                """, (user_id, role_id, tenant_id))
+                    RETURNING role_id
+                """, (user_id, list(role_names), tenant_id))
                 
-                if cursor.rowcount > 0:
+                for row in cursor.fetchall():
+                    role_id = str(row['role_id'])
                     removed_roles.append({
                         "role_id": role_id,
-                        "role_name": role_name
+                        "role_name": role_names[role_id]
                     })
-                    logger.info(f"🗑️ Usunięto rolę {role_name} dla użytkownika {user_id}")
+                    logger.info(f"🗑️ Usunięto rolę {role_names[role_id]} dla użytkownika {user_id}")
             
             logger.info(f"✅ Usuwanie ról z profilu zakończone - usunięto {len(removed_roles)} ról")
-            
-            return {
-                "success": True,
-                "message": f"Pomyślnie usunięto role z profilu {profile_id}",
-                "removed_roles": removed_roles,
-                "profile_id": profile_id,
-                "user_id": user_id,
-                "tenant_id": tenant_id
-            }
+        
+        # Unieważnij snapshot ACL tenanta po zatwierdzeniu transakcji
+        if removed_roles:
+            invalidate_tenant_acl(tenant_id)
+        
+        return {
+            "success": True,
+            "message": f"Pomyślnie usunięto role z profilu {profile_id}",
+            "removed_roles": removed_roles,
+            "profile_id": profile_id,
+            "user_id": user_id,
+            "tenant_id": tenant_id
+        }
     
     except Exception as e:
         logger.error(f"❌ Błąd usuwania ról z profilu {profile_id}: {e}")
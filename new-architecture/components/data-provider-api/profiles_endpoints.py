@@ -13,7 +13,6 @@ Endpoints:
 - DELETE /api/profiles/{profile_id} - usuń profil
 """
 
-import os
 import json
 import logging
 import datetime
@@ -21,20 +20,15 @@ from typing import Dict, Any, Optional, List
 from flask import request, jsonify
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from shared.database.connection import get_pooled_connection
+from pagination import parse_page_args, split_page, InvalidPageRequest
 
 logger = logging.getLogger(__name__)
 
 def get_db_connection():
-    """Utworz połączenie z bazą danych PostgreSQL"""
+    """Pobierz połączenie z puli współdzielonej (conn.close() zwraca je do puli)"""
     try:
-        conn = psycopg2.connect(
-            host=os.environ.get("DB_HOST", "postgres-db"),
-            port=os.environ.get("DB_PORT", 5432),
-            user=os.environ.get("DB_USER", "opa_user"),
-            password=os.environ.get("DB_PASSWORD", "opa_password"),
-            database=os.environ.get("DB_NAME", "opa_zero_poll")
-        )
-        return conn
+        return get_pooled_connection()
     except Exception as e:
         logger.error(f"Database connection failed: {e}")
         return None
@@ -111,12 +105,20 @@ def register_profiles_endpoints(app):
     
     @app.route("/api/profiles", methods=["GET"])
     def get_profiles():
-        """Pobierz wszystkie profile z opcjonalnym filtrowaniem"""
+        """Pobierz wszystkie profile z opcjonalnym filtrowaniem (opcjonalnie stronicowane: ?limit=&cursor=)"""
         try:
             # Opcjonalne filtry z query parameters
             application_filter = request.args.get('application')
             company_filter = request.args.get('company')  # TODO: Implementować gdy będzie potrzebne
             
+            try:
+                limit, after = parse_page_args(request.args, 2)
+            except InvalidPageRequest as e:
+                return jsonify({
+                    "success": False,
+                    "error": str(e)
+                }), 400
+            
             conn = get_db_connection()
             if not conn:
                 return jsonify({
@@ -139,16 +141,29 @@ def register_profiles_endpoints(app):
                         FROM application_profiles ap
                         JOIN applications a ON ap.app_id = a.app_id
                     """
+                    conditions = []
                     params = []
                     
                     if application_filter:
-                        query += " WHERE ap.app_id = %s"
+                        conditions.append("ap.app_id = %s")
                         params.append(application_filter)
                     
-                    query += " ORDER BY ap.created_at DESC"
+                    if after:
+                        conditions.append("(ap.created_at, ap.profile_id) < (%s, %s)")
+                        params.extend(after)
+                    
+                    if conditions:
+                        query += " WHERE " + " AND ".join(conditions)
+                    
+                    query += " ORDER BY ap.created_at DESC, ap.profile_id DESC"
+                    
+                    if limit:
+                        query += " LIMIT %s"
+                        params.append(limit + 1)
                     
                     cur.execute(query, params)
-                    profiles_data = cur.fetchall()
+                    profiles_data, next_cursor = split_page(cur.fetchall(), limit,
+                                                            lambda p: (p['created_at'], str(p['profile_id'])))
                     
                     # Dla każdego profilu pobierz mapowania ról
                     profiles = []
@@ -195,6 +210,7 @@ def register_profiles_endpoints(app):
                     "success": True,
                     "profiles": profiles,
                     "total_count": len(profiles),
+                    "next_cursor": next_cursor,
                     "filters": {
                         "application": application_filter,
                         "company": company_filter
@@ -0,0 +1,196 @@
+"""
+Async PostgreSQL connection pool (psycopg 3) for the async DAOs and the ASGI serving mode
+"""
+
+import os
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, List, Optional, Sequence, Tuple
+from .health import DatabaseUnavailableError, db_health, is_connectivity_error
+
+logger = logging.getLogger(__name__)
+
+try:
+    import psycopg
+    from psycopg.rows import dict_row, tuple_row
+    from psycopg_pool import AsyncConnectionPool
+    # Errors that may mean "database unreachable" (PoolTimeout is an OperationalError)
+    ASYNC_CONNECTION_ERRORS = (psycopg.OperationalError, psycopg.InterfaceError)
+    ASYNC_DRIVER_AVAILABLE = True
+except ImportError as e:
+    ASYNC_CONNECTION_ERRORS = ()
+    ASYNC_DRIVER_AVAILABLE = False
+    logger.info(f"Async database driver not available: {e}")
+
+# Async pool sizing - one event loop serves all requests, so the pool bounds DB concurrency
+ASYNC_POOL_MIN_SIZE = int(os.environ.get("ASYNC_POOL_MIN_SIZE", 1))
+ASYNC_POOL_MAX_SIZE = int(os.environ.get("ASYNC_POOL_MAX_SIZE", 20))
+# Seconds a request waits for a free connection before failing
+ASYNC_POOL_TIMEOUT_SECONDS = float(os.environ.get("ASYNC_POOL_TIMEOUT_SECONDS", 10))
+
+_pool = None
+_pool_lock = asyncio.Lock()
+
+def is_async_connection_error(error: Exception) -> bool:
+    """Whether the error means the database is unreachable (feeds the circuit breaker)"""
+    return isinstance(error, ASYNC_CONNECTION_ERRORS) and is_connectivity_error(error)
+
+def _conninfo() -> str:
+    """Connection string from the same environment variables as the sync pool"""
+    return psycopg.conninfo.make_conninfo(
+        host=os.environ.get('DB_HOST', 'localhost'),
+        port=int(os.environ.get('DB_PORT', 5432)),
+        dbname=os.environ.get('DB_NAME', 'opa_zero_poll'),
+        user=os.environ.get('DB_USER', 'opa_user'),
+        password=os.environ.get('DB_PASSWORD', 'opa_password'),
+    )
+
+async def open_async_pool():
+    """
+    Open the async connection pool (called from the ASGI lifespan)
+
+    Connections are established in the background, so startup does not fail
+    while the database is still unreachable.
+    """
+    global _pool
+    if not ASYNC_DRIVER_AVAILABLE:
+        return
+
+    async with _pool_lock:
+        if _pool is not None:
+            return
+        pool = AsyncConnectionPool(
+            _conninfo(),
+            min_size=ASYNC_POOL_MIN_SIZE,
+            max_size=ASYNC_POOL_MAX_SIZE,
+            timeout=ASYNC_POOL_TIMEOUT_SECONDS,
+            kwargs={"row_factory": dict_row},
+            open=False
+        )
+        await pool.open(wait=False)
+        _pool = pool
+    logger.info(f"Async database pool opened (max {ASYNC_POOL_MAX_SIZE} connections)")
+
+async def close_async_pool():
+    """Close the async connection pool"""
+    global _pool
+    async with _pool_lock:
+        if _pool is not None:
+            await _pool.close()
+            _pool = None
+
+def get_async_pool_max_size() -> int:
+    """Maximum number of concurrent async connections"""
+    return ASYNC_POOL_MAX_SIZE
+
+@asynccontextmanager
+async def get_async_connection():
+    """
+    Async connection from the pool (opened on first use), committed on exit
+
+    Shares the circuit breaker with the sync pool: fails fast while the circuit
+    is open and feeds connectivity errors into the health state.
+    """
+    if not ASYNC_DRIVER_AVAILABLE:
+        raise RuntimeError("Async database driver (psycopg 3) not installed")
+    if _pool is None:
+        await open_async_pool()
+    if not db_health.allow_request():
+        raise DatabaseUnavailableError("Database unavailable (circuit open)")
+
+    try:
+        async with _pool.connection() as conn:
+            yield conn
+    except ASYNC_CONNECTION_ERRORS as e:
+        if is_async_connection_error(e):
+            db_health.record_failure(e)
+        logger.error(f"Async database operation failed: {e}")
+        raise
+    db_health.record_success()
+
+def _transaction_modes(isolation_level: Optional[str], readonly: bool) -> Optional[str]:
+    """SET TRANSACTION statement for the given modes (None - server defaults)"""
+    modes = []
+    if isolation_level:
+        modes.append(f"ISOLATION LEVEL {isolation_level}")
+    if readonly:
+        modes.append("READ ONLY")
+    return f"SET TRANSACTION {', '.join(modes)}" if modes else None
+
+@asynccontextmanager
+async def get_async_cursor(dict_cursor: bool = True, name: Optional[str] = None,
+                           isolation_level: Optional[str] = None, readonly: bool = False):
+    """
+    Async cursor from the pool (dict rows by default), committed on exit
+
+    A name makes it a server-side cursor, fetching rows in batches. With
+    isolation_level / readonly the transaction is started in those modes -
+    REPEATABLE READ makes all queries on the cursor read one snapshot.
+    """
+    async with get_async_connection() as conn:
+        set_transaction = _transaction_modes(isolation_level, readonly)
+        if set_transaction:
+            await conn.execute(set_transaction)
+        row_factory = dict_row if dict_cursor else tuple_row
+        cursor = conn.cursor(name, row_factory=row_factory) if name else conn.cursor(row_factory=row_factory)
+        async with cursor:
+            yield cursor
+
+async def async_fetch_all(query: str, params: Sequence[Any] = ()) -> List[dict]:
+    """Execute a query on the async pool and return all rows as dicts"""
+    async with get_async_cursor() as cursor:
+        await cursor.execute(query, params)
+        return await cursor.fetchall()
+
+async def async_fetch_one(query: str, params: Sequence[Any] = ()) -> Optional[dict]:
+    """Execute a query on the async pool and return the first row as a dict"""
+    async with get_async_cursor() as cursor:
+        await cursor.execute(query, params)
+        return await cursor.fetchone()
+
+async def async_fetch_rows(query: str, params: Sequence[Any] = ()) -> Tuple[Tuple[str, ...], List[tuple]]:
+    """Execute a query on a tuple cursor - returns column names and rows"""
+    async with get_async_cursor(dict_cursor=False) as cursor:
+        await cursor.execute(query, params)
+        return tuple(column.name for column in cursor.description), await cursor.fetchall()
+
+async def async_execute(query: str, params: Sequence[Any] = ()) -> int:
+    """Execute a statement on the async pool and return the affected row count"""
+    async with get_async_cursor() as cursor:
+        await cursor.execute(query, params)
+        return cursor.rowcount
+
+async def async_fetch_pipelined(statements: Sequence[Tuple[str, Sequence[Any]]],
+                                isolation_level: Optional[str] = None,
+                                readonly: bool = False) -> List[List[dict]]:
+    """
+    Run independent queries on one connection in pipeline mode
+
+    All statements are sent before the first result is read, so N queries cost
+    one network round trip instead of N. They share one transaction - with
+    REPEATABLE READ every result comes from the same snapshot.
+
+    Args:
+        statements: (query, params) pairs
+        isolation_level: READ COMMITTED, REPEATABLE READ or SERIALIZABLE (server default when None)
+        readonly: Start a READ ONLY transaction
+
+    Returns:
+        Rows (dicts) of every statement, in order
+    """
+    set_transaction = _transaction_modes(isolation_level, readonly)
+
+    async with get_async_connection() as conn:
+        if not psycopg.Pipeline.is_supported():
+            # libpq < 14 - same statements, one round trip each
+            if set_transaction:
+                await conn.execute(set_transaction)
+            return [await (await conn.execute(query, params)).fetchall() for query, params in statements]
+
+        async with conn.pipeline():
+            if set_transaction:
+                await conn.execute(set_transaction)
+            cursors = [await conn.execute(query, params) for query, params in statements]
+        # Leaving the pipeline block synced it - every result has arrived
+        return [await cursor.fetchall() for cursor in cursors]
@@ -0,0 +1,521 @@
+"""
+Async DAOs - counterparts of BaseDAO and the DAOs in dao.py on the async pool
+
+Every async DAO wraps its sync DAO for table metadata, WHERE clauses and row
+mapping, so both layers run the same SQL and return the same models. Calls on
+different DAOs take their own pooled connection and can run concurrently:
+
+    users, roles, access = await asyncio.gather(
+        user_dao.find_by_ids(user_ids),
+        user_role_dao.find_roles_for_users(user_ids, tenant_id),
+        user_access_dao.get_companies_for_users(user_ids, tenant_id),
+    )
+
+Not mirrored: bulk_insert / copy_in (write paths stay on the sync pool) and the
+identity map of db_session (async calls have no operation-scoped session).
+"""
+
+import asyncio
+import logging
+import itertools
+from typing import Any, AsyncIterator, Dict, Generic, List, Optional, Tuple, Type, TypeVar
+from uuid import UUID
+from .base_dao import BaseDAO, FIND_BY_IDS_CHUNK_SIZE
+from .connection import SERVER_CURSOR_ITERSIZE
+from .prepared import array_literal, to_pyformat
+from .session import REPEATABLE_READ
+from .async_connection import (
+    async_fetch_all, async_fetch_one, async_fetch_rows, async_execute,
+    async_fetch_pipelined, get_async_cursor
+)
+from .models import (
+    Tenant, User, Application, Company, Role, Permission, Team,
+    UserRole, UserAccess, TeamMembership,
+    UserEffectivePermission, UserEffectiveAccess, UserProfile
+)
+from .dao import (
+    TenantDAO, UserDAO, ApplicationDAO, CompanyDAO, RoleDAO, PermissionDAO, TeamDAO,
+    UserRoleDAO, UserAccessDAO, TeamMembershipDAO,
+    PERMISSIONS_BY_ROLE_QUERY, TEAMS_BY_USER_QUERY, ROLES_FOR_USERS_QUERY, COMPANIES_FOR_USERS_QUERY,
+    USER_EFFECTIVE_PERMISSIONS_QUERY, USER_EFFECTIVE_ACCESS_QUERY,
+    group_roles_by_user, group_companies_by_user,
+    dict_to_effective_permission, dict_to_effective_access, permissions_by_app
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+_async_cursor_names = itertools.count(1)
+
+class AsyncBaseDAO(Generic[T]):
+    """Async Data Access Object with the CRUD operations of BaseDAO"""
+
+    # Sync DAO providing table, model and row mapping
+    dao_class: Type[BaseDAO] = None
+
+    def __init__(self):
+        self.dao = self.dao_class()
+        self.table_name = self.dao.table_name
+        self.model_class = self.dao.model_class
+        self.id_column = self.dao.id_column
+
+    def dict_to_model(self, data: Dict[str, Any]) -> T:
+        return self.dao.dict_to_model(data)
+
+    def model_to_dict(self, model: T) -> Dict[str, Any]:
+        return self.dao.model_to_dict(model)
+
+    async def find_by_id(self, id_value: Any) -> Optional[T]:
+        """Find record by ID"""
+        try:
+            query = f"SELECT * FROM {self.table_name} WHERE {self.id_column} = %s"
+            result = await async_fetch_one(query, (id_value,))
+            return self.dict_to_model(dict(result)) if result else None
+
+        except Exception as e:
+            logger.error(f"Error finding {self.table_name} by {self.id_column}={id_value}: {e}")
+            raise
+
+    async def find_by_ids(self, id_values: List[Any], chunk_size: Optional[int] = None) -> Dict[Any, T]:
+        """
+        Find records for many IDs with = ANY(%s) queries, chunks fetched concurrently
+
+        Returns:
+            Dict keyed by ID - IDs without a record are absent
+        """
+        if not id_values:
+            return {}
+
+        chunk_size = chunk_size or FIND_BY_IDS_CHUNK_SIZE
+        unique_ids = list(dict.fromkeys(id_values))
+        query = f"SELECT * FROM {self.table_name} WHERE {self.id_column} = ANY(%s)"
+
+        try:
+            chunks = await asyncio.gather(*(
+                async_fetch_all(query, (array_literal(unique_ids[start:start + chunk_size]),))
+                for start in range(0, len(unique_ids), chunk_size)
+            ))
+            return {row[self.id_column]: self.dict_to_model(dict(row)) for rows in chunks for row in rows}
+
+        except Exception as e:
+            logger.error(f"Error finding {self.table_name} by {len(unique_ids)} {self.id_column} values: {e}")
+            raise
+
+    async def find_all(self, limit: Optional[int] = None, offset: int = 0) -> List[T]:
+        """Find all records with optional pagination"""
+        try:
+            query = f"SELECT * FROM {self.table_name} ORDER BY {self.id_column}"
+
+            if limit:
+                query += f" LIMIT {limit} OFFSET {offset}"
+
+            columns, rows = await async_fetch_rows(query)
+            return self.dao._to_models(columns, rows)
+
+        except Exception as e:
+            logger.error(f"Error finding all {self.table_name}: {e}")
+            raise
+
+    async def find_page(self, limit: int, after: Any = None,
+                        criteria: Optional[Dict[str, Any]] = None) -> Tuple[List[T], Optional[Any]]:
+        """
+        Find one page of records ordered by ID (keyset pagination, see BaseDAO.find_page)
+
+        Returns:
+            (records, next_after) - next_after is None on the last page
+
+        Raises:
+            ValueError: limit is smaller than 1
+        """
+        if limit < 1:
+            raise ValueError(f"Page limit must be at least 1, got {limit}")
+
+        try:
+            where_clause, params, _ = self.dao._where(criteria or {})
+            conditions = [where_clause] if where_clause else []
+
+            if after is not None:
+                params.append(after)
+                conditions.append(f"{self.id_column} > ${len(params)}")
+
+            query = f"SELECT * FROM {self.table_name}"
+            if conditions:
+                query += f" WHERE {' AND '.join(conditions)}"
+
+            params.append(limit + 1)
+            query += f" ORDER BY {self.id_column} LIMIT ${len(params)}"
+
+            results = await async_fetch_all(to_pyformat(query), params)
+            records = [self.dict_to_model(dict(row)) for row in results[:limit]]
+            next_after = results[limit - 1][self.id_column] if len(results) > limit else None
+            return records, next_after
+
+        except Exception as e:
+            logger.error(f"Error finding {self.table_name} page after {self.id_column}={after}: {e}")
+            raise
+
+    async def find_iter(self, criteria: Optional[Dict[str, Any]] = None, itersize: Optional[int] = None) -> AsyncIterator[T]:
+        """
+        Iterate over all matching records ordered by ID without loading them into memory
+
+        Backed by a server-side cursor fetching itersize rows per round trip; holds
+        one pooled connection until the iteration ends or the generator is closed.
+        """
+        where_clause, params, _ = self.dao._where(criteria or {})
+        query = f"SELECT * FROM {self.table_name}"
+        if where_clause:
+            query += f" WHERE {where_clause}"
+        query += f" ORDER BY {self.id_column}"
+
+        try:
+            async with get_async_cursor(dict_cursor=False, name=f"async_dao_cursor_{next(_async_cursor_names)}") as cursor:
+                cursor.itersize = itersize or SERVER_CURSOR_ITERSIZE
+                await cursor.execute(to_pyformat(query), params)
+                build = None
+                async for row in cursor:
+                    if build is None:
+                        build = self.dao._row_mapper(tuple(column.name for column in cursor.description))
+                    yield build(row)
+
+        except Exception as e:
+            logger.error(f"Error iterating {self.table_name}: {e}")
+            raise
+
+    async def find_by_criteria(self, criteria: Dict[str, Any], limit: Optional[int] = None) -> List[T]:
+        """Find records by criteria"""
+        try:
+            if not criteria:
+                return await self.find_all(limit=limit)
+
+            where_clause, params, _ = self.dao._where(criteria)
+            query = f"SELECT * FROM {self.table_name} WHERE {where_clause} ORDER BY {self.id_column}"
+
+            if limit:
+                params.append(limit)
+                query += f" LIMIT ${len(params)}"
+
+            columns, rows = await async_fetch_rows(to_pyformat(query), params)
+            return self.dao._to_models(columns, rows)
+
+        except Exception as e:
+            logger.error(f"Error finding {self.table_name} by criteria {criteria}: {e}")
+            raise
+
+    async def create(self, model: T) -> T:
+        """Create new record"""
+        try:
+            data = {k: v for k, v in self.model_to_dict(model).items() if v is not None}
+            columns = list(data.keys())
+
+            query = f"""
+                INSERT INTO {self.table_name} ({', '.join(columns)})
+                VALUES ({', '.join(['%s'] * len(columns))})
+                RETURNING *
+            """
+
+            result = await async_fetch_one(query, tuple(data.values()))
+            return self.dict_to_model(dict(result))
+
+        except Exception as e:
+            logger.error(f"Error creating {self.table_name}: {e}")
+            raise
+
+    async def update(self, id_value: Any, updates: Dict[str, Any]) -> Optional[T]:
+        """Update record by ID"""
+        try:
+            if not updates:
+                return await self.find_by_id(id_value)
+
+            updates = {k: v for k, v in updates.items() if v is not None}
+            set_clauses = [f"{key} = %s" for key in updates.keys()]
+
+            query = f"""
+                UPDATE {self.table_name}
+                SET {', '.join(set_clauses)}
+                WHERE {self.id_column} = %s
+                RETURNING *
+            """
+
+            result = await async_fetch_one(query, (*updates.values(), id_value))
+            return self.dict_to_model(dict(result)) if result else None
+
+        except Exception as e:
+            logger.error(f"Error updating {self.table_name} {self.id_column}={id_value}: {e}")
+            raise
+
+    async def delete(self, id_value: Any) -> bool:
+        """Delete record by ID"""
+        try:
+            query = f"DELETE FROM {self.table_name} WHERE {self.id_column} = %s"
+            return await async_execute(query, (id_value,)) > 0
+
+        except Exception as e:
+            logger.error(f"Error deleting {self.table_name} {self.id_column}={id_value}: {e}")
+            raise
+
+    async def bulk_delete(self, id_values: List[Any]) -> int:
+        """Delete records by ID in one statement - returns the number of deleted rows"""
+        if not id_values:
+            return 0
+
+        try:
+            query = f"DELETE FROM {self.table_name} WHERE {self.id_column} = ANY(%s)"
+            return await async_execute(query, (array_literal(list(dict.fromkeys(id_values))),))
+
+        except Exception as e:
+            logger.error(f"Error bulk deleting {self.table_name}: {e}")
+            raise
+
+    async def exists(self, id_value: Any) -> bool:
+        """Check if record exists by ID"""
+        try:
+            query = f"SELECT 1 FROM {self.table_name} WHERE {self.id_column} = %s LIMIT 1"
+            return await async_fetch_one(query, (id_value,)) is not None
+
+        except Exception as e:
+            logger.error(f"Error checking existence of {self.table_name} {self.id_column}={id_value}: {e}")
+            raise
+
+    async def count(self, criteria: Optional[Dict[str, Any]] = None) -> int:
+        """Count records with optional criteria"""
+        try:
+            where_clause, params, _ = self.dao._where(criteria or {})
+            query = f"SELECT COUNT(*) as count FROM {self.table_name}"
+            if where_clause:
+                query += f" WHERE {where_clause}"
+
+            result = await async_fetch_one(to_pyformat(query), params)
+            return result['count']
+
+        except Exception as e:
+            logger.error(f"Error counting {self.table_name} with criteria {criteria}: {e}")
+            raise
+
+    async def execute_custom_query(self, query: str, params: tuple = None, fetch_one: bool = False) -> Any:
+        """Execute custom query (%s placeholders) and return dict rows"""
+        try:
+            if fetch_one:
+                return await async_fetch_one(query, params or ())
+            return await async_fetch_all(query, params or ())
+
+        except Exception as e:
+            logger.error(f"Error executing custom query on {self.table_name}: {e}")
+            raise
+
+class AsyncTenantDAO(AsyncBaseDAO[Tenant]):
+    """Async DAO for Tenant entities"""
+
+    dao_class = TenantDAO
+
+    async def find_by_status(self, status: str) -> List[Tenant]:
+        """Find tenants by status"""
+        return await self.find_by_criteria({'status': status})
+
+class AsyncUserDAO(AsyncBaseDAO[User]):
+    """Async DAO for User entities"""
+
+    dao_class = UserDAO
+
+    async def find_by_username(self, username: str) -> Optional[User]:
+        """Find user by username"""
+        results = await self.find_by_criteria({'username': username})
+        return results[0] if results else None
+
+    async def find_by_email(self, email: str) -> Optional[User]:
+        """Find user by email"""
+        results = await self.find_by_criteria({'email': email})
+        return results[0] if results else None
+
+class AsyncApplicationDAO(AsyncBaseDAO[Application]):
+    """Async DAO for Application entities"""
+
+    dao_class = ApplicationDAO
+
+class AsyncCompanyDAO(AsyncBaseDAO[Company]):
+    """Async DAO for Company entities"""
+
+    dao_class = CompanyDAO
+
+    async def find_by_tenant(self, tenant_id: str) -> List[Company]:
+        """Find companies by tenant"""
+        return await self.find_by_criteria({'tenant_id': tenant_id})
+
+    async def find_by_tenant_and_status(self, tenant_id: str, status: str) -> List[Company]:
+        """Find companies by tenant and status"""
+        return await self.find_by_criteria({'tenant_id': tenant_id, 'status': status})
+
+class AsyncRoleDAO(AsyncBaseDAO[Role]):
+    """Async DAO for Role entities"""
+
+    dao_class = RoleDAO
+
+    async def find_by_application(self, app_id: str) -> List[Role]:
+        """Find roles by application"""
+        return await self.find_by_criteria({'app_id': app_id})
+
+    async def find_by_app_and_name(self, app_id: str, role_name: str) -> Optional[Role]:
+        """Find role by application and name"""
+        results = await self.find_by_criteria({'app_id': app_id, 'role_name': role_name})
+        return results[0] if results else None
+
+class AsyncPermissionDAO(AsyncBaseDAO[Permission]):
+    """Async DAO for Permission entities"""
+
+    dao_class = PermissionDAO
+
+    async def find_by_application(self, app_id: str) -> List[Permission]:
+        """Find permissions by application"""
+        return await self.find_by_criteria({'app_id': app_id})
+
+    async def find_by_role(self, role_id: UUID) -> List[Permission]:
+        """Find permissions assigned to a role"""
+        results = await async_fetch_all(PERMISSIONS_BY_ROLE_QUERY, (role_id,))
+        return [self.dict_to_model(dict(row)) for row in results]
+
+class AsyncTeamDAO(AsyncBaseDAO[Team]):
+    """Async DAO for Team entities"""
+
+    dao_class = TeamDAO
+
+    async def find_by_tenant(self, tenant_id: str) -> List[Team]:
+        """Find teams by tenant"""
+        return await self.find_by_criteria({'tenant_id': tenant_id})
+
+    async def find_by_user(self, user_id: str) -> List[Team]:
+        """Find teams that user belongs to"""
+        results = await async_fetch_all(TEAMS_BY_USER_QUERY, (user_id,))
+        return [self.dict_to_model(dict(row)) for row in results]
+
+class AsyncUserRoleDAO(AsyncBaseDAO[UserRole]):
+    """Async DAO for UserRole assignments"""
+
+    dao_class = UserRoleDAO
+
+    async def find_by_user_and_tenant(self, user_id: str, tenant_id: str) -> List[UserRole]:
+        """Find user roles by user and tenant"""
+        return await self.find_by_criteria({'user_id': user_id, 'tenant_id': tenant_id})
+
+    async def find_roles_for_user(self, user_id: str, tenant_id: str) -> Dict[str, List[str]]:
+        """Get user roles grouped by application"""
+        return (await self.find_roles_for_users([user_id], tenant_id))[user_id]
+
+    async def find_roles_for_users(self, user_ids: List[str], tenant_id: str) -> Dict[str, Dict[str, List[str]]]:
+        """
+        Get roles of many users in one query, grouped by user and application
+
+        Returns:
+            {user_id: {app_id: [role_name, ...]}} - users without roles map to {}
+        """
+        results = await async_fetch_all(to_pyformat(ROLES_FOR_USERS_QUERY), (array_literal(user_ids), tenant_id))
+        return group_roles_by_user(results, user_ids)
+
+class AsyncUserAccessDAO(AsyncBaseDAO[UserAccess]):
+    """Async DAO for UserAccess assignments"""
+
+    dao_class = UserAccessDAO
+
+    async def find_by_user_and_tenant(self, user_id: str, tenant_id: str) -> List[UserAccess]:
+        """Find user access by user and tenant"""
+        return await self.find_by_criteria({'user_id': user_id, 'tenant_id': tenant_id})
+
+    async def get_user_companies(self, user_id: str, tenant_id: str) -> List[str]:
+        """Get list of company IDs user has access to"""
+        return (await self.get_companies_for_users([user_id], tenant_id))[user_id]
+
+    async def get_companies_for_users(self, user_ids: List[str], tenant_id: str) -> Dict[str, List[str]]:
+        """
+        Get company IDs of many users in one query
+
+        Returns:
+            {user_id: [company_id, ...]} - users without access map to []
+        """
+        results = await async_fetch_all(to_pyformat(COMPANIES_FOR_USERS_QUERY), (array_literal(user_ids), tenant_id))
+        return group_companies_by_user(results, user_ids)
+
+class AsyncTeamMembershipDAO(AsyncBaseDAO[TeamMembership]):
+    """Async DAO for TeamMembership assignments"""
+
+    dao_class = TeamMembershipDAO
+
+    async def find_by_user(self, user_id: str) -> List[TeamMembership]:
+        """Find team memberships by user"""
+        return await self.find_by_criteria({'user_id': user_id})
+
+    async def find_by_team(self, team_id: UUID) -> List[TeamMembership]:
+        """Find team memberships by team"""
+        return await self.find_by_criteria({'team_id': team_id})
+
+# Composite DAO for complex queries
+
+class AsyncUserProfileDAO:
+    """Async DAO for complex user profile queries"""
+
+    def __init__(self):
+        self.user_dao = AsyncUserDAO()
+        self.user_role_dao = AsyncUserRoleDAO()
+        self.user_access_dao = AsyncUserAccessDAO()
+        self.company_dao = AsyncCompanyDAO()
+        self.team_dao = AsyncTeamDAO()
+        self.team_membership_dao = AsyncTeamMembershipDAO()
+
+    async def get_user_effective_permissions(self, user_id: str, tenant_id: str) -> List[UserEffectivePermission]:
+        """Get all effective permissions for user (direct + team-based)"""
+        results = await async_fetch_all(USER_EFFECTIVE_PERMISSIONS_QUERY, (user_id, tenant_id))
+        return [dict_to_effective_permission(row) for row in results]
+
+    async def get_user_effective_access(self, user_id: str, tenant_id: str) -> List[UserEffectiveAccess]:
+        """Get all effective company access for user (direct + team-based)"""
+        results = await async_fetch_all(USER_EFFECTIVE_ACCESS_QUERY, (user_id, tenant_id))
+        return [dict_to_effective_access(row) for row in results]
+
+    async def get_complete_user_profile(self, user_id: str, tenant_id: str) -> Optional[UserProfile]:
+        """
+        Get complete user profile with all roles, permissions, and access
+
+        The five queries are pipelined on one connection - one round trip, one
+        REPEATABLE READ snapshot (the sync DAO needs five round trips).
+        """
+        users, roles, permissions, companies, teams = await async_fetch_pipelined([
+            (f"SELECT * FROM {self.user_dao.table_name} WHERE {self.user_dao.id_column} = %s", (user_id,)),
+            (to_pyformat(ROLES_FOR_USERS_QUERY), (array_literal([user_id]), tenant_id)),
+            (USER_EFFECTIVE_PERMISSIONS_QUERY, (user_id, tenant_id)),
+            (to_pyformat(COMPANIES_FOR_USERS_QUERY), (array_literal([user_id]), tenant_id)),
+            (TEAMS_BY_USER_QUERY, (user_id,)),
+        ], isolation_level=REPEATABLE_READ, readonly=True)
+
+        if not users:
+            return None
+
+        return UserProfile(
+            user=self.user_dao.dict_to_model(dict(users[0])),
+            roles=group_roles_by_user(roles, [user_id])[user_id],
+            permissions=permissions_by_app([dict_to_effective_permission(row) for row in permissions]),
+            companies=group_companies_by_user(companies, [user_id])[user_id],
+            teams=[row['team_name'] for row in teams],
+            tenant_id=tenant_id
+        )
+
+    async def get_tenant_assignments(self, tenant_id: str) -> Dict[str, Any]:
+        """
+        Get role assignments, company access, companies and teams of a tenant, fetched concurrently
+
+        Returns:
+            Dict with user_roles, user_access, companies, teams and the users
+            referenced by the assignments (keyed by user_id)
+        """
+        user_roles, user_access, companies, teams = await asyncio.gather(
+            self.user_role_dao.find_by_criteria({'tenant_id': tenant_id}),
+            self.user_access_dao.find_by_criteria({'tenant_id': tenant_id}),
+            self.company_dao.find_by_tenant(tenant_id),
+            self.team_dao.find_by_tenant(tenant_id),
+        )
+        user_ids = [assignment.user_id for assignment in user_roles + user_access]
+
+        return {
+            'users': await self.user_dao.find_by_ids(user_ids),
+            'user_roles': user_roles,
+            'user_access': user_access,
+            'companies': companies,
+            'teams': teams,
+        }
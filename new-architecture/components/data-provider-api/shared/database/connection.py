@@ -3,16 +3,268 @@ Database connection management for PostgreSQL
 """
 
 import os
+import time
 import logging
 import psycopg2
 import psycopg2.extras
+from collections import deque
 from contextlib import contextmanager
-from typing import Optional, Dict, Any
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, Callable
 import threading
-from psycopg2.pool import ThreadedConnectionPool
+import itertools
+from psycopg2.pool import PoolError
+from .health import db_health, DatabaseUnavailableError, is_connectivity_error
+from .query_stats import QUERY_STATS_ENABLED, InstrumentedConnection
 
 logger = logging.getLogger(__name__)
 
+# Driver errors that may indicate the database is unreachable - is_connection_error()
+# tells them apart from failing statements (QueryCanceledError, TransactionRollbackError, ...)
+CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+# OperationalError subclasses raised by a single statement on a healthy server
+STATEMENT_ERRORS = (psycopg2.extensions.QueryCanceledError, psycopg2.extensions.TransactionRollbackError)
+
+def is_connection_error(error: Exception) -> bool:
+    """Whether the error means the database is unreachable (feeds the circuit breaker)"""
+    return (isinstance(error, CONNECTION_ERRORS) and not isinstance(error, STATEMENT_ERRORS)
+            and is_connectivity_error(error))
+
+# Connections opened at startup / maximum number held by the shared pool
+POOL_MIN_CONNECTIONS = int(os.environ.get('DB_POOL_MIN_CONNECTIONS', 1))
+POOL_MAX_CONNECTIONS = int(os.environ.get('DB_POOL_MAX_CONNECTIONS', 20))
+# Seconds a caller waits for a free connection before PoolTimeoutError
+POOL_TIMEOUT_SECONDS = float(os.environ.get('DB_POOL_TIMEOUT_SECONDS', 10))
+# Connections older than this are closed instead of reused (0 disables recycling)
+POOL_MAX_LIFETIME_SECONDS = float(os.environ.get('DB_POOL_MAX_LIFETIME_SECONDS', 1800))
+# Rows fetched per round trip by server-side cursors
+SERVER_CURSOR_ITERSIZE = int(os.environ.get('DB_SERVER_CURSOR_ITERSIZE', 2000))
+
+_server_cursor_names = itertools.count(1)
+
+# DatabaseSession (session.py) active in the current context - the helpers below run on its connection
+active_session: ContextVar = ContextVar('db_session', default=None)
+
+class PoolTimeoutError(PoolError):
+    """No pooled connection became free within the pool timeout"""
+
+class ConnectionPool:
+    """
+    Thread-safe connection pool with bounded wait and connection lifetime
+    
+    Unlike psycopg2's ThreadedConnectionPool, an exhausted pool blocks the caller
+    for up to `timeout` seconds instead of raising PoolError immediately, and
+    connections older than `max_lifetime` are replaced on checkout / return.
+    """
+    
+    def __init__(self, connect: Callable[[], Any], min_size: int = 1, max_size: int = 20,
+                 timeout: float = 10.0, max_lifetime: float = 0):
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._created_at = {}
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+        self._metrics = {
+            'connections_opened': 0,
+            'connections_recycled': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'wait_time_ms_total': 0.0,
+            'wait_time_ms_max': 0.0,
+        }
+        
+        for _ in range(min_size):
+            with self._cond:
+                self._size += 1
+            self._idle.append(self._open())
+    
+    def _open(self):
+        """Open a new connection - the caller has already reserved a slot in _size"""
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._created_at[id(conn)] = time.monotonic()
+            self._metrics['connections_opened'] += 1
+        return conn
+    
+    def _is_stale(self, conn) -> bool:
+        if conn.closed:
+            return True
+        if not self.max_lifetime:
+            return False
+        return time.monotonic() - self._created_at.get(id(conn), 0) > self.max_lifetime
+    
+    def _discard(self, conn, recycled: bool = False):
+        """Close a connection and free its slot (called with the lock held)"""
+        self._created_at.pop(id(conn), None)
+        self._size -= 1
+        if recycled:
+            self._metrics['connections_recycled'] += 1
+        try:
+            conn.close()
+        except Exception as e:
+            logger.warning(f"Failed to close pooled connection: {e}")
+        self._cond.notify()
+    
+    def getconn(self, timeout: Optional[float] = None):
+        """
+        Check out a connection, waiting up to `timeout` seconds when the pool is exhausted
+        
+        Raises PoolTimeoutError when no connection became free in time.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolError("connection pool is closed")
+                while self._idle:
+                    conn = self._idle.pop()
+                    if self._is_stale(conn):
+                        self._discard(conn, recycled=True)
+                        continue
+                    self._in_use += 1
+                    self._record_wait(deadline, timeout)
+                    return conn
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                
+                now = time.monotonic()
+                if deadline is None:
+                    deadline = now + timeout
+                    self._metrics['waits'] += 1
+                remaining = deadline - now
+                if remaining <= 0:
+                    self._metrics['timeouts'] += 1
+                    self._record_wait(deadline, timeout)
+                    raise PoolTimeoutError(
+                        f"No database connection available within {timeout}s ({self.max_size} in use)")
+                self._cond.wait(remaining)
+        
+        # Connect outside the lock - other callers keep checking out idle connections
+        conn = self._open()
+        with self._cond:
+            self._in_use += 1
+            self._record_wait(deadline, timeout)
+        return conn
+    
+    def _record_wait(self, deadline: Optional[float], timeout: float):
+        """Accumulate wait time of a caller that blocked (called with the lock held)"""
+        if deadline is None:
+            return
+        waited_ms = (time.monotonic() - (deadline - timeout)) * 1000
+        self._metrics['wait_time_ms_total'] += waited_ms
+        self._metrics['wait_time_ms_max'] = max(self._metrics['wait_time_ms_max'], waited_ms)
+    
+    def _reset(self, conn) -> bool:
+        """
+        Roll back a transaction the caller left open (as psycopg2's pool does)
+        
+        Returns False when the connection is unusable - its state is unknown
+        (broken mid-transaction) or the rollback failed - so putconn discards it.
+        """
+        status = conn.info.transaction_status
+        if status == psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            return True
+        if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        try:
+            conn.rollback()
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to roll back returned connection: {e}")
+            return False
+    
+    def putconn(self, conn, close: bool = False):
+        """Return a checked out connection; closed or expired connections are replaced lazily"""
+        # Roll back outside the lock - it is a round trip to the server
+        if not close and not conn.closed:
+            close = not self._reset(conn)
+        with self._cond:
+            self._in_use -= 1
+            if close or self._closed or self._is_stale(conn):
+                self._discard(conn, recycled=not close and not self._closed)
+                return
+            self._idle.append(conn)
+            self._cond.notify()
+    
+    def closeall(self):
+        """Close idle connections; checked out connections are closed when returned"""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                self._discard(self._idle.pop())
+            self._cond.notify_all()
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Pool gauges (in use, idle, size) and wait counters"""
+        with self._cond:
+            metrics = dict(self._metrics)
+            metrics.update({
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'size': self._size,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'timeout_seconds': self.timeout,
+                'max_lifetime_seconds': self.max_lifetime,
+            })
+        metrics['wait_time_ms_total'] = round(metrics['wait_time_ms_total'], 2)
+        metrics['wait_time_ms_max'] = round(metrics['wait_time_ms_max'], 2)
+        metrics['wait_time_ms_avg'] = round(metrics['wait_time_ms_total'] / metrics['waits'], 2) if metrics['waits'] else 0.0
+        return metrics
+
+class PooledConnection:
+    """
+    Pooled connection with the plain psycopg2 connection interface
+    
+    close() rolls back any open transaction and returns the connection to the
+    pool instead of closing it, so code written for psycopg2.connect() works unchanged.
+    """
+    
+    def __init__(self, db: 'DatabaseConnection', conn):
+        self._db = db
+        self._conn = conn
+    
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise psycopg2.InterfaceError("connection already returned to pool")
+        return getattr(self._conn, name)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        # psycopg2 semantics - `with conn:` ends the transaction, it does not close
+        return self._conn.__exit__(exc_type, exc_value, traceback)
+    
+    @property
+    def closed(self) -> int:
+        return 1 if self._conn is None else self._conn.closed
+    
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        if not conn.closed:
+            try:
+                conn.rollback()
+            except Exception as e:
+                _record_failure(None, e)
+        self._db.return_connection(conn)
+
 class DatabaseConnection:
     """Singleton class for managing PostgreSQL connections"""
     
@@ -30,7 +282,12 @@ class DatabaseConnection:
     def __init__(self):
         if not hasattr(self, 'initialized'):
             self.initialized = True
-            self._initialize_pool()
+            db_health.set_probe(self.test_connection)
+            try:
+                self._initialize_pool()
+            except CONNECTION_ERRORS as e:
+                # Database not reachable at startup - pool is created on first successful connection
+                db_health.record_failure(e)
     
     def _initialize_pool(self):
         """Initialize connection pool"""
@@ -43,30 +300,55 @@ class DatabaseConnection:
                 'user': os.environ.get('DB_USER', 'opa_user'),
                 'password': os.environ.get('DB_PASSWORD', 'opa_password'),
             }
+            if QUERY_STATS_ENABLED:
+                # Statement timings for /debug/db-stats
+                db_config['connection_factory'] = InstrumentedConnection
             
             # Create connection pool
-            self._pool = ThreadedConnectionPool(
-                minconn=1,
-                maxconn=20,
-                **db_config
+            self._pool = ConnectionPool(
+                lambda: psycopg2.connect(**db_config),
+                min_size=POOL_MIN_CONNECTIONS,
+                max_size=POOL_MAX_CONNECTIONS,
+                timeout=POOL_TIMEOUT_SECONDS,
+                max_lifetime=POOL_MAX_LIFETIME_SECONDS
             )
             
-            logger.info(f"Database connection pool initialized: {db_config['host']}:{db_config['port']}/{db_config['database']}")
+            logger.info(f"Database connection pool initialized: {db_config['host']}:{db_config['port']}/{db_config['database']} "
+                        f"(max {POOL_MAX_CONNECTIONS} connections)")
             
         except Exception as e:
             logger.error(f"Failed to initialize database connection pool: {e}")
             raise
     
-    def get_connection(self):
-        """Get connection from pool"""
-        if self._pool is None:
-            raise RuntimeError("Database connection pool not initialized")
+    def get_connection(self, check_health: bool = True):
+        """
+        Get connection from pool
+        
+        Raises DatabaseUnavailableError immediately while the database circuit is open.
+        """
+        if check_health and not db_health.allow_request():
+            raise DatabaseUnavailableError("Database unavailable (circuit open)")
         
         try:
+            if self._pool is None:
+                with self._lock:
+                    if self._pool is None:
+                        self._initialize_pool()
+            
             conn = self._pool.getconn()
-            # Set autocommit to False for transaction control
-            conn.autocommit = False
+            try:
+                # Set autocommit to False for transaction control
+                conn.autocommit = False
+            except Exception:
+                # Broken connection - free its pool slot instead of leaking it
+                self._pool.putconn(conn, close=True)
+                raise
             return conn
+        except CONNECTION_ERRORS as e:
+            if is_connection_error(e):
+                db_health.record_failure(e)
+            logger.error(f"Failed to get database connection: {e}")
+            raise
         except Exception as e:
             logger.error(f"Failed to get database connection: {e}")
             raise
@@ -79,6 +361,16 @@ class DatabaseConnection:
             except Exception as e:
                 logger.error(f"Failed to return connection to pool: {e}")
     
+    def get_pooled_connection(self) -> PooledConnection:
+        """Get connection from pool that is returned to the pool by close()"""
+        return PooledConnection(self, self.get_connection())
+    
+    def get_pool_metrics(self) -> Dict[str, Any]:
+        """Pool gauges - empty until the pool has been created"""
+        if self._pool is None:
+            return {'in_use': 0, 'idle': 0, 'size': 0, 'max_size': POOL_MAX_CONNECTIONS}
+        return self._pool.get_metrics()
+    
     def close_all_connections(self):
         """Close all connections in pool"""
         if self._pool:
@@ -89,16 +381,27 @@ class DatabaseConnection:
                 logger.error(f"Failed to close database connections: {e}")
     
     def test_connection(self) -> bool:
-        """Test database connectivity"""
+        """Test database connectivity (bypasses the circuit breaker - used by health probes)"""
+        conn = None
         try:
-            with self.get_connection_context() as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute("SELECT 1")
-                    result = cursor.fetchone()
-                    return result[0] == 1
+            conn = self.get_connection(check_health=False)
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                result = cursor.fetchone()
+            conn.rollback()
+            return result[0] == 1
         except Exception as e:
             logger.error(f"Database connection test failed: {e}")
+            if conn is not None and not conn.closed:
+                conn.rollback()
             return False
+        finally:
+            if conn is not None:
+                self.return_connection(conn)
+    
+    def is_available(self) -> bool:
+        """Cached availability from recent query outcomes - no database round trip"""
+        return db_health.is_available()
     
     @contextmanager
     def get_connection_context(self):
@@ -107,15 +410,25 @@ class DatabaseConnection:
         try:
             conn = self.get_connection()
             yield conn
+            db_health.record_success()
         except Exception as e:
-            if conn:
-                conn.rollback()
+            _record_failure(conn, e)
             logger.error(f"Database operation failed: {e}")
             raise
         finally:
             if conn:
                 self.return_connection(conn)
 
+def _record_failure(conn, error: Exception):
+    """Roll back after a failed operation and feed connectivity errors to the health state"""
+    if is_connection_error(error):
+        db_health.record_failure(error)
+    if conn and not conn.closed:
+        try:
+            conn.rollback()
+        except CONNECTION_ERRORS as e:
+            db_health.record_failure(e)
+
 # Global instance
 _db_instance = None
 
@@ -126,9 +439,24 @@ def get_db_connection():
         _db_instance = DatabaseConnection()
     return _db_instance
 
+def get_pooled_connection() -> PooledConnection:
+    """Get a pooled connection for code written against psycopg2.connect()"""
+    return get_db_connection().get_pooled_connection()
+
+def get_pool_metrics() -> Dict[str, Any]:
+    """Gauges of the shared connection pool"""
+    return get_db_connection().get_pool_metrics()
+
 @contextmanager
 def get_db_cursor(dict_cursor=True):
     """Context manager for database cursor with automatic connection management"""
+    session = active_session.get()
+    if session is not None:
+        # Committed by the session
+        with session.cursor(dict_cursor) as cursor:
+            yield cursor
+        return
+    
     db = get_db_connection()
     conn = None
     cursor = None
@@ -143,10 +471,10 @@ def get_db_cursor(dict_cursor=True):
             
         yield cursor
         conn.commit()
+        db_health.record_success()
         
     except Exception as e:
-        if conn:
-            conn.rollback()
+        _record_failure(conn, e)
         logger.error(f"Database cursor operation failed: {e}")
         raise
     finally:
@@ -155,9 +483,61 @@ def get_db_cursor(dict_cursor=True):
         if conn:
             db.return_connection(conn)
 
+@contextmanager
+def get_db_server_cursor(itersize: int = None, dict_cursor: bool = True):
+    """
+    Named (server-side) cursor for streaming large result sets
+    
+    Iterating fetches itersize rows per round trip instead of loading the whole
+    result. The transaction is rolled back on exit (read-only use) - also when
+    the consumer stops iterating early.
+    """
+    session = active_session.get()
+    if session is not None:
+        with session.cursor(dict_cursor, name=f"server_cursor_{next(_server_cursor_names)}", itersize=itersize) as cursor:
+            yield cursor
+        return
+    
+    db = get_db_connection()
+    conn = None
+    cursor = None
+    
+    try:
+        conn = db.get_connection()
+        name = f"server_cursor_{next(_server_cursor_names)}"
+        if dict_cursor:
+            cursor = conn.cursor(name=name, cursor_factory=psycopg2.extras.RealDictCursor)
+        else:
+            cursor = conn.cursor(name=name)
+        cursor.itersize = itersize or SERVER_CURSOR_ITERSIZE
+        
+        yield cursor
+        db_health.record_success()
+        
+    except Exception as e:
+        _record_failure(conn, e)
+        logger.error(f"Database server cursor operation failed: {e}")
+        raise
+    finally:
+        if conn:
+            if not conn.closed:
+                try:
+                    # Closes the named cursor with the transaction
+                    conn.rollback()
+                except CONNECTION_ERRORS as e:
+                    db_health.record_failure(e)
+            db.return_connection(conn)
+
 @contextmanager 
 def get_db_transaction():
     """Context manager for database transactions"""
+    session = active_session.get()
+    if session is not None:
+        # Part of the session transaction - a failure rolls back only this block
+        with session.savepoint() as conn:
+            yield conn
+        return
+    
     db = get_db_connection()
     conn = None
     
@@ -165,10 +545,10 @@ def get_db_transaction():
         conn = db.get_connection()
         yield conn
         conn.commit()
+        db_health.record_success()
         
     except Exception as e:
-        if conn:
-            conn.rollback()
+        _record_failure(conn, e)
         logger.error(f"Database transaction failed: {e}")
         raise
     finally:
@@ -0,0 +1,161 @@
+"""
+Database health state with circuit-breaker semantics
+
+Availability is derived from the outcome of real queries instead of running
+SELECT 1 before every request. After a number of consecutive connectivity
+failures the circuit opens: new requests fail fast with DatabaseUnavailableError
+and a background probe checks the database until it answers again.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Callable, Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+# Consecutive connectivity failures that open the circuit
+DB_FAILURE_THRESHOLD = int(os.environ.get('DB_FAILURE_THRESHOLD', 3))
+# Seconds between background probes while the database is unhealthy
+DB_PROBE_INTERVAL_SECONDS = float(os.environ.get('DB_PROBE_INTERVAL_SECONDS', 2.0))
+
+# SQLSTATE classes of a lost / refused connection (08) and of a server shutting down or
+# starting (57P) - other OperationalErrors (statement_timeout, serialization failure,
+# deadlock, lock timeout) come from one statement on a healthy server
+CONNECTIVITY_SQLSTATE_PREFIXES = ('08', '57P')
+
+def is_connectivity_error(error: Exception) -> bool:
+    """
+    Whether a driver OperationalError / InterfaceError means the database is unreachable
+
+    Errors without SQLSTATE are raised client side (socket errors, closed
+    connection, pool timeout) and count as connectivity failures.
+    """
+    sqlstate = getattr(error, 'pgcode', None) or getattr(error, 'sqlstate', None)
+    return sqlstate is None or sqlstate.startswith(CONNECTIVITY_SQLSTATE_PREFIXES)
+
+
+class DatabaseUnavailableError(Exception):
+    """Raised without touching the pool while the database circuit is open"""
+
+
+class DatabaseHealth:
+    """Thread-safe circuit breaker fed by query outcomes"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+
+    def __init__(self, failure_threshold: int = DB_FAILURE_THRESHOLD,
+                 probe_interval: float = DB_PROBE_INTERVAL_SECONDS):
+        self.failure_threshold = max(1, failure_threshold)
+        self.probe_interval = probe_interval
+        self._probe: Optional[Callable[[], bool]] = None
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._last_error = None
+        self._last_success_at = None
+        self._last_failure_at = None
+        self._trips = 0
+        self._probes = 0
+        self._rejected = 0
+        self._probe_thread = None
+
+    def set_probe(self, probe: Callable[[], bool]):
+        """Set the function used by background probes (returns True when healthy)"""
+        self._probe = probe
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def is_available(self) -> bool:
+        """True unless the circuit is open - no database round trip"""
+        return self._state == self.CLOSED
+
+    def allow_request(self) -> bool:
+        """Check whether a request may use the database; counts rejected requests"""
+        if self._state == self.CLOSED:
+            return True
+        with self._lock:
+            self._rejected += 1
+        return False
+
+    def record_success(self):
+        """Record a successful database operation"""
+        if self._state == self.CLOSED and self._consecutive_failures == 0:
+            self._last_success_at = time.time()
+            return
+        with self._lock:
+            self._consecutive_failures = 0
+            self._last_success_at = time.time()
+            if self._state == self.OPEN:
+                self._close()
+
+    def record_failure(self, error: Exception):
+        """Record a connectivity failure; opens the circuit after the threshold"""
+        with self._lock:
+            self._consecutive_failures += 1
+            self._last_failure_at = time.time()
+            self._last_error = str(error)
+            if self._state == self.CLOSED and self._consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def get_status(self) -> Dict[str, Any]:
+        """Health state for monitoring"""
+        with self._lock:
+            return {
+                'state': self._state,
+                'available': self._state == self.CLOSED,
+                'consecutive_failures': self._consecutive_failures,
+                'failure_threshold': self.failure_threshold,
+                'opened_at': self._opened_at,
+                'last_success_at': self._last_success_at,
+                'last_failure_at': self._last_failure_at,
+                'last_error': self._last_error,
+                'trips': self._trips,
+                'probes': self._probes,
+                'rejected_requests': self._rejected,
+            }
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.time()
+        self._trips += 1
+        logger.error(f"Database circuit opened after {self._consecutive_failures} failures: {self._last_error}")
+
+        if self._probe is not None and self._probe_thread is None:
+            self._probe_thread = threading.Thread(target=self._probe_loop, name='db-health-probe', daemon=True)
+            self._probe_thread.start()
+
+    def _close(self):
+        downtime = time.time() - self._opened_at if self._opened_at else 0
+        self._state = self.CLOSED
+        self._opened_at = None
+        logger.info(f"Database circuit closed after {downtime:.1f}s")
+
+    def _probe_loop(self):
+        """Probe the database until it recovers; runs only while the circuit is open"""
+        while True:
+            time.sleep(self.probe_interval)
+            with self._lock:
+                if self._state != self.OPEN:
+                    self._probe_thread = None
+                    return
+                self._probes += 1
+            try:
+                healthy = self._probe()
+            except Exception as e:
+                healthy = False
+                with self._lock:
+                    self._last_error = str(e)
+            if healthy:
+                self.record_success()
+            else:
+                logger.debug("Database probe failed, circuit stays open")
+
+
+# Global instance
+db_health = DatabaseHealth()
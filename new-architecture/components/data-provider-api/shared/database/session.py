@@ -0,0 +1,151 @@
+"""
+Operation-scoped database session - one connection, one transaction and an identity map
+"""
+
+import logging
+import itertools
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+import psycopg2
+import psycopg2.extras
+from .connection import get_db_connection, active_session, _record_failure, is_connection_error, CONNECTION_ERRORS, SERVER_CURSOR_ITERSIZE
+from .health import db_health
+
+logger = logging.getLogger(__name__)
+
+READ_COMMITTED = 'READ COMMITTED'
+REPEATABLE_READ = 'REPEATABLE READ'
+SERIALIZABLE = 'SERIALIZABLE'
+ISOLATION_LEVELS = (READ_COMMITTED, REPEATABLE_READ, SERIALIZABLE)
+
+# Returned by DatabaseSession.lookup for keys not in the identity map
+MISSING = object()
+
+class DatabaseSession:
+    """
+    One pooled connection and transaction shared by all DAO calls in a scope
+
+    While the session is active (see db_session), get_db_cursor, get_db_transaction
+    and get_db_server_cursor run on its connection without committing - the
+    session commits once on exit. BaseDAO keeps rows loaded by primary key in
+    the identity map, so repeated lookups within the scope don't hit the database.
+
+    A failed statement aborts the whole transaction: later queries in the scope
+    fail until the session ends. get_db_transaction blocks run behind a
+    savepoint and only roll back their own writes.
+    """
+
+    def __init__(self, conn, isolation_level: Optional[str] = None, readonly: bool = False):
+        self.conn = conn
+        self.isolation_level = isolation_level
+        self.readonly = readonly
+        self.identity_map: Dict[Tuple[str, Any], Any] = {}
+        self.identity_hits = 0
+        self._savepoints = itertools.count(1)
+
+    def begin(self):
+        """Set the transaction mode - must run before the first query of the transaction"""
+        modes = []
+        if self.isolation_level:
+            modes.append(f"ISOLATION LEVEL {self.isolation_level}")
+        if self.readonly:
+            modes.append("READ ONLY")
+        if modes:
+            with self.conn.cursor() as cursor:
+                cursor.execute(f"SET TRANSACTION {', '.join(modes)}")
+
+    @contextmanager
+    def cursor(self, dict_cursor: bool = True, name: Optional[str] = None, itersize: Optional[int] = None):
+        """Cursor on the session connection (named when name is given), closed on exit"""
+        cursor_factory = psycopg2.extras.RealDictCursor if dict_cursor else None
+        cursor = self.conn.cursor(name=name, cursor_factory=cursor_factory)
+        if name:
+            cursor.itersize = itersize or SERVER_CURSOR_ITERSIZE
+        try:
+            yield cursor
+        except CONNECTION_ERRORS as e:
+            if is_connection_error(e):
+                db_health.record_failure(e)
+            raise
+        finally:
+            if not self.conn.closed:
+                cursor.close()
+
+    @contextmanager
+    def savepoint(self):
+        """Nested transaction - rolled back to the savepoint when the block fails"""
+        name = f"session_savepoint_{next(self._savepoints)}"
+        with self.conn.cursor() as cursor:
+            cursor.execute(f"SAVEPOINT {name}")
+        try:
+            yield self.conn
+        except Exception:
+            if not self.conn.closed:
+                try:
+                    with self.conn.cursor() as cursor:
+                        cursor.execute(f"ROLLBACK TO SAVEPOINT {name}")
+                except psycopg2.Error as e:
+                    logger.warning(f"Rollback to savepoint {name} failed: {e}")
+            raise
+        with self.conn.cursor() as cursor:
+            cursor.execute(f"RELEASE SAVEPOINT {name}")
+
+    def lookup(self, table: str, key: Any) -> Any:
+        """Entity loaded earlier in the session or MISSING"""
+        entity = self.identity_map.get((table, key), MISSING)
+        if entity is not MISSING:
+            self.identity_hits += 1
+        return entity
+
+    def remember(self, table: str, key: Any, entity: Any):
+        self.identity_map[(table, key)] = entity
+
+    def forget(self, table: str, key: Any = MISSING):
+        """Drop one entity, or every entity of the table when no key is given"""
+        if key is not MISSING:
+            self.identity_map.pop((table, key), None)
+            return
+        for cached in [cached for cached in self.identity_map if cached[0] == table]:
+            del self.identity_map[cached]
+
+def get_session() -> Optional[DatabaseSession]:
+    """Session active in the current context, if any"""
+    return active_session.get()
+
+@contextmanager
+def db_session(isolation_level: Optional[str] = None, readonly: bool = False):
+    """
+    Run a block (or, as a decorator, a function) in a DatabaseSession
+
+    Joins the session already active in this context - the outer scope owns
+    the transaction and its isolation level. Threads start without a session.
+
+    Args:
+        isolation_level: READ_COMMITTED, REPEATABLE_READ or SERIALIZABLE (server default when None)
+        readonly: Start a READ ONLY transaction
+    """
+    session = active_session.get()
+    if session is not None:
+        yield session
+        return
+
+    if isolation_level is not None and isolation_level not in ISOLATION_LEVELS:
+        raise ValueError(f"Unknown isolation level: {isolation_level}")
+
+    db = get_db_connection()
+    conn = db.get_connection()
+    session = DatabaseSession(conn, isolation_level, readonly)
+    token = active_session.set(session)
+    try:
+        session.begin()
+        yield session
+        conn.commit()
+        db_health.record_success()
+
+    except Exception as e:
+        _record_failure(conn, e)
+        logger.error(f"Database session failed: {e}")
+        raise
+    finally:
+        active_session.reset(token)
+        db.return_connection(conn)
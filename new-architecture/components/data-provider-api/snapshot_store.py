@@ -0,0 +1,318 @@
+"""
+Snapshot Store - zserializowane snapshoty ACL na dysku, współdzielone między procesami
+
+Każdy tenant (i układ dokumentu) ma plik z nagłówkiem JSON (etag, version, built_at)
+i bajtami danych ACL. Plik jest zapisywany do pliku tymczasowego i podmieniany
+atomowo przez rename, a czytany przez mmap - wszystkie procesy workerów korzystają
+z jednej kopii w page cache, a zrestartowany worker od razu serwuje gotowe dane.
+
+Unieważnienie (te same miejsca co invalidate_tenant_acl) usuwa pliki tenanta
+i zapisuje znacznik czasu; snapshot zbudowany przed znacznikiem nie jest zapisywany.
+"""
+
+import os
+import json
+import mmap
+import time
+import logging
+import tempfile
+import threading
+from urllib.parse import quote
+from typing import Dict, Any, Optional, Callable, Awaitable, Iterator, Tuple
+from flask import Response
+from compression import negotiate_encoding, compress, compression_metrics, COMPRESSION_ENABLED, IDENTITY
+from fast_json import dumps
+
+logger = logging.getLogger(__name__)
+
+# Katalog magazynu snapshotów (pusty = wyłączony); musi być wspólny dla wszystkich workerów
+SNAPSHOT_STORE_DIR = os.environ.get("SNAPSHOT_STORE_DIR", "")
+SNAPSHOT_STORE_ENABLED = bool(SNAPSHOT_STORE_DIR)
+# Zabezpieczenie przed zmianami wykonanymi bezpośrednio w SQL (0 = bez wygasania)
+SNAPSHOT_STORE_TTL_SECONDS = float(os.environ.get("SNAPSHOT_STORE_TTL_SECONDS", os.environ.get("ACL_CACHE_TTL_SECONDS", 300)))
+# Rozmiar fragmentów wysyłanych z mmap
+SNAPSHOT_CHUNK_SIZE = 64 * 1024
+
+INVALIDATION_DIR = ".invalidated"
+
+def _file_name(value: str) -> str:
+    """Bezpieczna nazwa pliku/katalogu (bez '/', '.' i '..')"""
+    return quote(value, safe="").replace(".", "%2E")
+
+class StoredSnapshot:
+    """Snapshot zmapowany z pliku - dane nie są kopiowane do pamięci procesu"""
+    __slots__ = ("etag", "version", "built_at", "_mmap", "_offset")
+
+    def __init__(self, header: Dict[str, Any], mapped: mmap.mmap, offset: int):
+        self.etag = header["etag"]
+        self.version = header.get("version", 0)
+        self.built_at = header.get("built_at")
+        self._mmap = mapped
+        self._offset = offset
+
+    def __len__(self) -> int:
+        return len(self._mmap) - self._offset
+
+    @property
+    def body(self) -> bytes:
+        """Kopia danych (dla składania dokumentów złożonych)"""
+        return self._mmap[self._offset:]
+
+    def chunks(self, chunk_size: int = SNAPSHOT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Dane we fragmentach - w pamięci jest naraz tylko jeden fragment"""
+        for start in range(self._offset, len(self._mmap), chunk_size):
+            yield self._mmap[start:start + chunk_size]
+
+class SnapshotStore:
+    """Magazyn snapshotów w plikach podmienianych atomowo przez rename"""
+
+    def __init__(self, directory: str, ttl_seconds: float = SNAPSHOT_STORE_TTL_SECONDS):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+        # Metryki dla monitoring (per proces)
+        self.metrics = {
+            "hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "discarded_writes": 0,
+            "invalidations": 0,
+            "errors": 0
+        }
+
+    def _tenant_dir(self, tenant_id: str, layout: str) -> str:
+        return os.path.join(self.directory, _file_name(layout), _file_name(tenant_id))
+
+    def _marker_path(self, tenant_id: str) -> str:
+        return os.path.join(self.directory, INVALIDATION_DIR, _file_name(tenant_id))
+
+    def _count(self, metric: str):
+        with self._lock:
+            self.metrics[metric] += 1
+
+    def get(self, tenant_id: str, layout: str, encoding: str = IDENTITY) -> Optional[StoredSnapshot]:
+        """
+        Zwraca zmapowany snapshot tenanta lub None (brak, wygasł lub uszkodzony)
+        """
+        path = os.path.join(self._tenant_dir(tenant_id, layout), encoding)
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            self._count("misses")
+            return None
+
+        try:
+            stat = os.fstat(fd)
+            if self.ttl_seconds > 0 and time.time() - stat.st_mtime > self.ttl_seconds:
+                self._count("misses")
+                return None
+            mapped = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to map snapshot {path}: {e}")
+            self._count("errors")
+            return None
+        finally:
+            os.close(fd)
+
+        header_end = mapped.find(b"\n")
+        try:
+            header = json.loads(mapped[:header_end])
+        except ValueError as e:
+            logger.error(f"Corrupted snapshot header in {path}: {e}")
+            mapped.close()
+            self._count("errors")
+            return None
+
+        self._count("hits")
+        return StoredSnapshot(header, mapped, header_end + 1)
+
+    def put(self, tenant_id: str, layout: str, body: bytes, header: Dict[str, Any],
+            started_at_ns: int, encoding: str = IDENTITY) -> bool:
+        """
+        Zapisuje snapshot atomowo (plik tymczasowy + rename)
+
+        Args:
+            started_at_ns: Czas rozpoczęcia budowania (time.time_ns) - snapshot starszy
+                           niż ostatnie unieważnienie tenanta nie jest zapisywany
+
+        Returns:
+            bool: True jeśli plik został podmieniony
+        """
+        directory = self._tenant_dir(tenant_id, layout)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(dumps(header))
+                tmp_file.write(b"\n")
+                tmp_file.write(body)
+
+            if self._invalidated_since(tenant_id, started_at_ns):
+                os.unlink(tmp_path)
+                logger.debug(f"Snapshot of tenant {tenant_id} invalidated during build - not stored")
+                self._count("discarded_writes")
+                return False
+
+            os.replace(tmp_path, os.path.join(directory, encoding))
+            self._count("writes")
+            return True
+        except OSError as e:
+            logger.error(f"Failed to store snapshot of tenant {tenant_id}: {e}")
+            self._count("errors")
+            return False
+
+    def invalidate(self, tenant_id: str):
+        """Usuwa snapshoty tenanta (wszystkie układy i kodowania) we wszystkich procesach"""
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory, exist_ok=True)
+        try:
+            marker = self._marker_path(tenant_id)
+            os.makedirs(os.path.dirname(marker), exist_ok=True)
+            with open(marker, "wb"):
+                pass
+            now_ns = time.time_ns()
+            os.utime(marker, ns=(now_ns, now_ns))
+
+            for layout in os.listdir(self.directory):
+                if layout.startswith("."):
+                    continue
+                tenant_dir = os.path.join(self.directory, layout, _file_name(tenant_id))
+                if not os.path.isdir(tenant_dir):
+                    continue
+                for name in os.listdir(tenant_dir):
+                    if name.startswith("."):
+                        continue
+                    try:
+                        os.unlink(os.path.join(tenant_dir, name))
+                    except FileNotFoundError:
+                        pass
+        except OSError as e:
+            logger.error(f"Failed to invalidate stored snapshots of tenant {tenant_id}: {e}")
+            self._count("errors")
+            return
+
+        self._count("invalidations")
+
+    def get_or_build(self, tenant_id: str, layout: str, builder: Callable[[str], Any]):
+        """
+        Zwraca snapshot z magazynu lub buduje go (builder zwraca ACLSnapshot lub None) i zapisuje
+
+        Returns:
+            StoredSnapshot, ACLSnapshot (gdy zapis się nie powiódł) lub None
+        """
+        stored = self.get(tenant_id, layout)
+        if stored is not None:
+            return stored
+
+        started_at_ns = time.time_ns()
+        return self._store_built(tenant_id, layout, builder(tenant_id), started_at_ns)
+
+    async def get_or_build_async(self, tenant_id: str, layout: str, builder: Callable[[str], Awaitable[Any]]):
+        """
+        Wariant get_or_build dla trybu ASGI - builder jest korutyną
+        """
+        stored = self.get(tenant_id, layout)
+        if stored is not None:
+            return stored
+
+        started_at_ns = time.time_ns()
+        return self._store_built(tenant_id, layout, await builder(tenant_id), started_at_ns)
+
+    def _store_built(self, tenant_id: str, layout: str, snapshot, started_at_ns: int):
+        """Zapisuje zbudowany snapshot i zwraca jego zmapowaną wersję (lub snapshot gdy zapis się nie powiódł)"""
+        if snapshot is None:
+            return None
+
+        header = {"etag": snapshot.etag, "version": snapshot.version, "built_at": snapshot.built_at}
+        if self.put(tenant_id, layout, snapshot.body, header, started_at_ns):
+            return self.get(tenant_id, layout) or snapshot
+        return snapshot
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.metrics,
+                "directory": self.directory,
+                "ttl_seconds": self.ttl_seconds,
+                "enabled": SNAPSHOT_STORE_ENABLED
+            }
+
+    def _invalidated_since(self, tenant_id: str, started_at_ns: int) -> bool:
+        try:
+            return os.stat(self._marker_path(tenant_id)).st_mtime_ns >= started_at_ns
+        except FileNotFoundError:
+            return False
+
+# Globalna instancja magazynu (None gdy wyłączony)
+snapshot_store = SnapshotStore(SNAPSHOT_STORE_DIR) if SNAPSHOT_STORE_ENABLED else None
+
+def _snapshot_chunks(snapshot) -> Tuple[int, Iterator[bytes]]:
+    """Rozmiar i fragmenty danych snapshotu (StoredSnapshot lub ACLSnapshot z pamięci)"""
+    if isinstance(snapshot, StoredSnapshot):
+        return len(snapshot), snapshot.chunks()
+    return len(snapshot.body), iter((snapshot.body,))
+
+def encode_stored(tenant_id: str, layout: str, snapshot, envelope: Tuple[bytes, bytes],
+                  accept_encodings=None) -> Tuple[Iterator[bytes], int, Optional[str]]:
+    """
+    Fragmenty odpowiedzi JSON z danymi snapshotu z magazynu (fragmenty mmap) i doklejonym envelope.
+    Skompresowana reprezentacja (z envelope z chwili kompresji) też jest zapisywana w magazynie.
+
+    Returns:
+        Tuple: (iterator fragmentów, długość, kodowanie lub None)
+    """
+    prefix, suffix = envelope
+    body_size, body_chunks = _snapshot_chunks(snapshot)
+    size = len(prefix) + body_size + len(suffix)
+
+    encoding = negotiate_encoding(size, accept_encodings)
+    if encoding:
+        compressed = snapshot_store.get(tenant_id, layout, encoding)
+        cache_hit = compressed is not None and compressed.etag == snapshot.etag
+        if cache_hit:
+            payload_size = len(compressed)
+            payload = compressed.chunks()
+        else:
+            started_at_ns = time.time_ns()
+            data = compress(b"".join((prefix, snapshot.body, suffix)), encoding)
+            snapshot_store.put(tenant_id, layout, data, {"etag": snapshot.etag}, started_at_ns, encoding)
+            payload_size = len(data)
+            payload = iter((data,))
+        compression_metrics.record(True, size, payload_size, cache_hit)
+        return payload, payload_size, encoding
+
+    def generate():
+        yield prefix
+        yield from body_chunks
+        yield suffix
+    compression_metrics.record(False, size, size)
+    return generate(), size, None
+
+def stored_json_response(tenant_id: str, layout: str, snapshot, envelope: Tuple[bytes, bytes]) -> Response:
+    """
+    Odpowiedź Flask z danymi snapshotu z magazynu (zob. encode_stored)
+    """
+    payload, payload_size, encoding = encode_stored(tenant_id, layout, snapshot, envelope)
+
+    response = Response(payload, mimetype="application/json")
+    response.content_length = payload_size
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    if COMPRESSION_ENABLED:
+        response.vary.add("Accept-Encoding")
+    response.set_etag(snapshot.etag, weak=bool(encoding))
+    return response
+
+def invalidate_stored_snapshots(tenant_id: str):
+    """
+    Pomocnicza funkcja do unieważniania snapshotów tenanta w magazynie
+    """
+    if snapshot_store is not None:
+        snapshot_store.invalidate(tenant_id)
+
+def get_snapshot_store_metrics() -> Optional[Dict[str, Any]]:
+    """
+    Pomocnicza funkcja do pobierania metryk magazynu snapshotów
+    """
+    return snapshot_store.get_metrics() if snapshot_store is not None else None
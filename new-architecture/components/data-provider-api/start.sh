@@ -61,6 +61,16 @@ else
     echo "   Kontynuujemy uruchomienie aplikacji..."
 fi
 
+# Tryb ASGI (SERVER_MODE=asgi) - uvicorn z asynchronicznymi endpointami odczytu
+if [ "$SERVER_MODE" = "asgi" ]; then
+    if ! python3 -c "import fastapi, uvicorn, psycopg_pool, httpx" 2>/dev/null; then
+        echo "❌ Brak zależności trybu ASGI - zainstaluj: pip install -r requirements-asgi.txt"
+        exit 1
+    fi
+    echo "🚀 Uruchamianie aplikacji ASGI (uvicorn)..."
+    exec uvicorn asgi_app:app --host 0.0.0.0 --port "${PORT:-8110}" --workers "${WEB_CONCURRENCY:-1}"
+fi
+
 # Uruchom aplikację Flask
 echo "🚀 Uruchamianie aplikacji Flask..."
 exec python3 app.py 
\ No newline at end of file
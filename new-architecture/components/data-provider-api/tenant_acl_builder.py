@@ -0,0 +1,379 @@
+"""
+Tenant ACL Builder for Data Provider API
+
+Builds the complete ACL document of a tenant (users/roles/permissions/companies/teams)
+from a fixed number of tenant-wide queries and groups the rows in Python,
+instead of querying the database separately for every user.
+"""
+
+import logging
+from typing import Dict, Any, Optional, List
+
+logger = logging.getLogger(__name__)
+
+# Users of a tenant come from BOTH user_access and user_roles tables
+TENANT_USERS_SUBQUERY = """
+    SELECT user_id FROM user_access WHERE tenant_id = %(tenant_id)s
+    UNION
+    SELECT user_id FROM user_roles WHERE tenant_id = %(tenant_id)s
+"""
+
+TENANT_QUERY = """
+    SELECT tenant_id, tenant_name FROM tenants WHERE tenant_id = %(tenant_id)s
+"""
+
+USERS_QUERY = f"""
+    SELECT u.user_id, u.email, u.full_name
+    FROM users u
+    WHERE u.user_id IN ({TENANT_USERS_SUBQUERY})
+    ORDER BY u.user_id
+"""
+
+DIRECT_ROLES_QUERY = """
+    SELECT ur.user_id, r.app_id, r.role_name
+    FROM user_roles ur
+    JOIN roles r ON ur.role_id = r.role_id
+    WHERE ur.tenant_id = %(tenant_id)s
+    ORDER BY ur.user_id, r.app_id, r.role_name
+"""
+
+# Direct + team-based permissions (direct role permissions are a subset of the view)
+EFFECTIVE_PERMISSIONS_QUERY = """
+    SELECT DISTINCT user_id, app_id, permission_name
+    FROM user_effective_permissions
+    WHERE tenant_id = %(tenant_id)s
+    ORDER BY user_id, app_id, permission_name
+"""
+
+COMPANIES_QUERY = """
+    SELECT user_id, company_id
+    FROM user_access
+    WHERE tenant_id = %(tenant_id)s
+    ORDER BY user_id, company_id
+"""
+
+# Team memberships are not filtered by tenant - same semantics as TeamDAO.find_by_user
+TEAMS_QUERY = f"""
+    SELECT tm.user_id, t.team_name
+    FROM team_memberships tm
+    JOIN teams t ON tm.team_id = t.team_id
+    WHERE tm.user_id IN ({TENANT_USERS_SUBQUERY})
+    ORDER BY tm.user_id, t.team_name
+"""
+
+# Roles granting permissions in the tenant - direct assignments and team roles
+# (the same two sources as the user_effective_permissions view)
+EFFECTIVE_ROLES_QUERY = """
+    SELECT ur.user_id, r.app_id, r.role_name
+    FROM user_roles ur
+    JOIN roles r ON ur.role_id = r.role_id
+    WHERE ur.tenant_id = %(tenant_id)s
+    UNION
+    SELECT tm.user_id, r.app_id, r.role_name
+    FROM team_memberships tm
+    JOIN teams t ON tm.team_id = t.team_id
+    JOIN team_roles tr ON t.team_id = tr.team_id
+    JOIN roles r ON tr.role_id = r.role_id
+    WHERE t.tenant_id = %(tenant_id)s
+    ORDER BY user_id, app_id, role_name
+"""
+
+# Permissions of every role referenced in the tenant, emitted once per role
+ROLE_PERMISSIONS_QUERY = """
+    SELECT r.app_id, r.role_name, p.permission_name
+    FROM roles r
+    JOIN role_permissions rp ON r.role_id = rp.role_id
+    JOIN permissions p ON rp.permission_id = p.permission_id
+    WHERE r.role_id IN (
+        SELECT role_id FROM user_roles WHERE tenant_id = %(tenant_id)s
+        UNION
+        SELECT tr.role_id FROM team_roles tr JOIN teams t ON tr.team_id = t.team_id
+        WHERE t.tenant_id = %(tenant_id)s
+    )
+    ORDER BY r.app_id, r.role_name, p.permission_name
+"""
+
+# Single-user variants of the queries above (same semantics, filtered by user_id)
+USER_QUERY = f"""
+    SELECT u.user_id, u.email, u.full_name
+    FROM users u
+    WHERE u.user_id = %(user_id)s AND u.user_id IN ({TENANT_USERS_SUBQUERY})
+"""
+
+USER_DIRECT_ROLES_QUERY = """
+    SELECT ur.user_id, r.app_id, r.role_name
+    FROM user_roles ur
+    JOIN roles r ON ur.role_id = r.role_id
+    WHERE ur.tenant_id = %(tenant_id)s AND ur.user_id = %(user_id)s
+    ORDER BY r.app_id, r.role_name
+"""
+
+USER_EFFECTIVE_PERMISSIONS_QUERY = """
+    SELECT DISTINCT user_id, app_id, permission_name
+    FROM user_effective_permissions
+    WHERE tenant_id = %(tenant_id)s AND user_id = %(user_id)s
+    ORDER BY user_id, app_id, permission_name
+"""
+
+USER_COMPANIES_QUERY = """
+    SELECT user_id, company_id
+    FROM user_access
+    WHERE tenant_id = %(tenant_id)s AND user_id = %(user_id)s
+    ORDER BY company_id
+"""
+
+USER_TEAMS_QUERY = """
+    SELECT tm.user_id, t.team_name
+    FROM team_memberships tm
+    JOIN teams t ON tm.team_id = t.team_id
+    WHERE tm.user_id = %(user_id)s
+    ORDER BY t.team_name
+"""
+
+# Per-user rows maintained by triggers (migration 06_create_tenant_user_acl_table.sql)
+MATERIALIZED_USERS_QUERY = """
+    SELECT user_id, email, full_name, roles, permissions, companies, teams
+    FROM tenant_user_acl
+    WHERE tenant_id = %(tenant_id)s
+    ORDER BY user_id
+"""
+
+MATERIALIZED_USER_QUERY = """
+    SELECT user_id, email, full_name, roles, permissions, companies, teams
+    FROM tenant_user_acl
+    WHERE tenant_id = %(tenant_id)s AND user_id = %(user_id)s
+"""
+
+# Differences between tenant_user_acl and the live views (tenant_id NULL = all tenants)
+CONSISTENCY_CHECK_QUERY = """
+    SELECT tenant_id, user_id, issue FROM check_tenant_user_acl(%(tenant_id)s)
+"""
+
+# Document layouts: "expanded" lists permissions[app] in every user entry,
+# "normalized" lists only role references and a tenant-level role_permissions map
+EXPANDED_LAYOUT = 'expanded'
+NORMALIZED_LAYOUT = 'normalized'
+ACL_LAYOUTS = (EXPANDED_LAYOUT, NORMALIZED_LAYOUT)
+
+class TenantACLBuilder:
+    """
+    Assembles tenant ACL data with set-based queries.
+
+    The number of round trips is constant (one query per ACL component),
+    so the cost depends on the tenant size only.
+    """
+
+    def __init__(self, cursor, materialized: bool = False):
+        """
+        Args:
+            cursor: Database cursor returning dict rows (RealDictCursor)
+            materialized: Read users from the tenant_user_acl table (single indexed scan)
+        """
+        self.cursor = cursor
+        self.materialized = materialized
+
+    def build(self, tenant_id: str, layout: str = EXPANDED_LAYOUT) -> Optional[Dict[str, Any]]:
+        """
+        Build ACL data for a tenant
+
+        Args:
+            tenant_id: Tenant identifier
+            layout: Document layout (EXPANDED_LAYOUT or NORMALIZED_LAYOUT)
+
+        Returns:
+            Dict containing ACL data or None if tenant not found
+        """
+        if layout not in ACL_LAYOUTS:
+            raise ValueError(f"Unknown ACL layout: {layout}")
+
+        params = {'tenant_id': tenant_id}
+
+        tenants = self._fetch_all(TENANT_QUERY, params)
+        if not tenants:
+            return None
+
+        rows = {query: self._fetch_all(query, params) for query in self._build_queries(layout)}
+        return self._assemble_rows(tenant_id, tenants[0], rows, layout)
+
+    def build_user(self, tenant_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Build the ACL entry of a single user, as found under users.<user_id> in the tenant ACL
+
+        Args:
+            tenant_id: Tenant identifier
+            user_id: User identifier
+
+        Returns:
+            Dict containing the user entry or None if the user does not belong to the tenant
+        """
+        params = {'tenant_id': tenant_id, 'user_id': user_id}
+
+        if self.materialized:
+            users = self._fetch_all(MATERIALIZED_USER_QUERY, params)
+            return self._user_entry(users[0]) if users else None
+
+        users = self._fetch_all(USER_QUERY, params)
+        if not users:
+            return None
+
+        return self._user_entry({
+            **users[0],
+            "roles": self._group_by_user_and_app(self._fetch_all(USER_DIRECT_ROLES_QUERY, params), 'role_name').get(user_id, {}),
+            "permissions": self._group_by_user_and_app(self._fetch_all(USER_EFFECTIVE_PERMISSIONS_QUERY, params), 'permission_name').get(user_id, {}),
+            "companies": self._group_by_user(self._fetch_all(USER_COMPANIES_QUERY, params), 'company_id').get(user_id, []),
+            "teams": self._group_by_user(self._fetch_all(USER_TEAMS_QUERY, params), 'team_name').get(user_id, [])
+        })
+
+    def check_consistency(self, tenant_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Compare tenant_user_acl with the live views
+
+        Args:
+            tenant_id: Tenant identifier or None for all tenants
+
+        Returns:
+            List of {tenant_id, user_id, issue} rows (missing / orphan / stale)
+        """
+        return [dict(row) for row in self._fetch_all(CONSISTENCY_CHECK_QUERY, {'tenant_id': tenant_id})]
+
+    def _build_queries(self, layout: str) -> List[str]:
+        """Queries run after the tenant lookup - their rows are passed to _assemble_rows"""
+        if self.materialized:
+            queries = [MATERIALIZED_USERS_QUERY]
+        elif layout == NORMALIZED_LAYOUT:
+            # The normalized layout resolves permissions through role_permissions instead
+            queries = [USERS_QUERY, DIRECT_ROLES_QUERY, COMPANIES_QUERY, TEAMS_QUERY]
+        else:
+            queries = [USERS_QUERY, DIRECT_ROLES_QUERY, EFFECTIVE_PERMISSIONS_QUERY, COMPANIES_QUERY, TEAMS_QUERY]
+
+        if layout == NORMALIZED_LAYOUT:
+            queries += [EFFECTIVE_ROLES_QUERY, ROLE_PERMISSIONS_QUERY]
+        return queries
+
+    def _assemble_rows(self, tenant_id: str, tenant: Dict[str, Any], rows: Dict[str, List[Dict[str, Any]]],
+                       layout: str) -> Dict[str, Any]:
+        """Assemble the ACL document from the rows of _build_queries (query -> rows)"""
+        if self.materialized:
+            users = rows[MATERIALIZED_USERS_QUERY]
+        else:
+            roles = self._group_by_user_and_app(rows[DIRECT_ROLES_QUERY], 'role_name')
+            permissions = self._group_by_user_and_app(rows.get(EFFECTIVE_PERMISSIONS_QUERY, []), 'permission_name')
+            companies = self._group_by_user(rows[COMPANIES_QUERY], 'company_id')
+            teams = self._group_by_user(rows[TEAMS_QUERY], 'team_name')
+
+            users = [
+                {
+                    **user,
+                    "roles": roles.get(user['user_id'], {}),
+                    "permissions": permissions.get(user['user_id'], {}),
+                    "companies": companies.get(user['user_id'], []),
+                    "teams": teams.get(user['user_id'], [])
+                }
+                for user in rows[USERS_QUERY]
+            ]
+
+        acl_data = self._assemble(tenant_id, tenant, users)
+        if layout == NORMALIZED_LAYOUT:
+            self._normalize(acl_data, rows[EFFECTIVE_ROLES_QUERY], rows[ROLE_PERMISSIONS_QUERY])
+        return acl_data
+
+    def _assemble(self, tenant_id: str, tenant: Dict[str, Any], users: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Assemble the ACL document from per-user rows"""
+        acl_data = {
+            "tenant_id": tenant_id,
+            "tenant_name": tenant['tenant_name'],
+            "users": {},
+            "roles": {},
+            "permissions": {}
+        }
+
+        for user in users:
+            acl_data["users"][user['user_id']] = self._user_entry(user)
+
+        logger.debug(f"Built ACL for tenant {tenant_id}: {len(users)} users")
+        return acl_data
+
+    def _normalize(self, acl_data: Dict[str, Any], effective_role_rows: List[Dict[str, Any]],
+                   role_permission_rows: List[Dict[str, Any]]):
+        """
+        Replace per-user permissions with role references and a tenant-level
+        role_permissions[app][role] map - the document grows with users + roles
+        instead of users x permissions
+        """
+        effective_roles = self._group_by_user_and_app(effective_role_rows, 'role_name')
+
+        role_permissions = {}
+        for row in role_permission_rows:
+            role_permissions.setdefault(row['app_id'], {}).setdefault(row['role_name'], []).append(row['permission_name'])
+
+        for user_id, entry in acl_data["users"].items():
+            del entry["permissions"]
+            entry["effective_roles"] = effective_roles.get(user_id, {})
+            # Every referenced role is present, also roles without permissions
+            for app_id, role_names in entry["effective_roles"].items():
+                app_roles = role_permissions.setdefault(app_id, {})
+                for role_name in role_names:
+                    app_roles.setdefault(role_name, [])
+
+        acl_data["layout"] = NORMALIZED_LAYOUT
+        acl_data["role_permissions"] = role_permissions
+
+    @staticmethod
+    def _user_entry(user: Dict[str, Any]) -> Dict[str, Any]:
+        """User entry of the ACL document"""
+        return {
+            "email": user['email'],
+            "full_name": user['full_name'],
+            "roles": user['roles'],
+            "permissions": user['permissions'],
+            "companies": user['companies'],
+            "teams": user['teams']
+        }
+
+    def _fetch_all(self, query: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        self.cursor.execute(query, params)
+        return self.cursor.fetchall()
+
+    @staticmethod
+    def _group_by_user_and_app(rows: List[Dict[str, Any]], value_key: str) -> Dict[str, Dict[str, List[str]]]:
+        """Group rows into user_id -> app_id -> [values], preserving query order"""
+        grouped = {}
+        for row in rows:
+            grouped.setdefault(row['user_id'], {}).setdefault(row['app_id'], []).append(row[value_key])
+        return grouped
+
+    @staticmethod
+    def _group_by_user(rows: List[Dict[str, Any]], value_key: str) -> Dict[str, List[str]]:
+        """Group rows into user_id -> [values], preserving query order"""
+        grouped = {}
+        for row in rows:
+            grouped.setdefault(row['user_id'], []).append(row[value_key])
+        return grouped
+
+class AsyncTenantACLBuilder(TenantACLBuilder):
+    """
+    TenantACLBuilder on an async cursor (psycopg 3 AsyncCursor with dict_row).
+
+    Runs the same queries and assembles the same document as the sync builder,
+    awaiting each round trip instead of blocking a thread.
+    """
+
+    async def build(self, tenant_id: str, layout: str = EXPANDED_LAYOUT) -> Optional[Dict[str, Any]]:
+        """
+        Build ACL data for a tenant (see TenantACLBuilder.build)
+        """
+        if layout not in ACL_LAYOUTS:
+            raise ValueError(f"Unknown ACL layout: {layout}")
+
+        params = {'tenant_id': tenant_id}
+
+        tenants = await self._fetch_all(TENANT_QUERY, params)
+        if not tenants:
+            return None
+
+        rows = {query: await self._fetch_all(query, params) for query in self._build_queries(layout)}
+        return self._assemble_rows(tenant_id, tenants[0], rows, layout)
+
+    async def _fetch_all(self, query: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        await self.cursor.execute(query, params)
+        return await self.cursor.fetchall()
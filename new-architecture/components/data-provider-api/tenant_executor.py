@@ -0,0 +1,71 @@
+"""
+Tenant Executor - równoległe przetwarzanie tenantów na ograniczonej puli wątków
+
+Budowanie ACL tenanta to kilka zapytań do PostgreSQL, więc przy setkach tenantów
+czas snapshotu/bootstrapu jest sumą czasów pojedynczych tenantów. Executor pozwala
+budować kilka tenantów naraz, zachowując kolejność wyników zgodną z wejściem.
+Pula wątków jest współdzielona przez wszystkie requesty, więc łączna liczba
+równoległych budowań (i zajętych połączeń z puli DB) nie przekracza max_workers.
+"""
+
+import logging
+import itertools
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+class BoundedTenantExecutor:
+    """Executor z ograniczoną liczbą wątków i uporządkowanymi wynikami"""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max(1, max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tenant-acl")
+
+    def imap(self, func: Callable[[T], R], items: Iterable[T]) -> Iterator[Tuple[T, R]]:
+        """
+        Wykonuje func dla każdego elementu i zwraca pary (element, wynik) w kolejności wejścia
+
+        W locie jest najwyżej max_workers zadań na wywołanie - pamięć pozostaje
+        ograniczona do kilku tenantów również przy odpowiedziach strumieniowanych.
+        Wyjątek z func jest zgłaszany przy odczycie wyniku danego elementu.
+        """
+        items = iter(items)
+        pending = deque(
+            (item, self._executor.submit(func, item))
+            for item in itertools.islice(items, self.max_workers)
+        )
+
+        while pending:
+            item, future = pending.popleft()
+            for next_item in itertools.islice(items, 1):
+                pending.append((next_item, self._executor.submit(func, next_item)))
+            yield item, future.result()
+
+    def map(self, func: Callable[[T], R], items: Iterable[T]) -> list:
+        """Jak imap, ale zwraca listę par (element, wynik)"""
+        return list(self.imap(func, items))
+
+    def shutdown(self):
+        """Zatrzymuje pulę wątków"""
+        self._executor.shutdown(wait=True)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_tenant_executor(max_workers: int) -> BoundedTenantExecutor:
+    """
+    Zwraca współdzielony executor tenantów (tworzony przy pierwszym użyciu)
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = BoundedTenantExecutor(max_workers)
+                logger.info(f"Tenant executor initialized with {_executor.max_workers} workers")
+    return _executor
@@ -0,0 +1,105 @@
+"""
+Tenant Summary Query for Data Provider API
+
+Lists tenants with their distinct user counts (users of a tenant come from BOTH
+user_roles and user_access) in a single query per page, without building any ACL.
+"""
+
+import logging
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+TENANT_STATUSES = ('active', 'inactive', 'suspended')
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+TENANT_FILTER = """
+    WHERE (%(status)s::varchar IS NULL OR t.status = %(status)s)
+      AND (%(name_pattern)s::varchar IS NULL OR t.tenant_name ILIKE %(name_pattern)s)
+"""
+
+# Users are counted only for tenants on the requested page (indexed by tenant_id)
+TENANT_SUMMARY_QUERY = f"""
+    WITH page AS (
+        SELECT t.tenant_id, t.tenant_name, t.status, COUNT(*) OVER () AS total_count
+        FROM tenants t
+        {TENANT_FILTER}
+        ORDER BY t.tenant_id
+        LIMIT %(limit)s OFFSET %(offset)s
+    )
+    SELECT p.tenant_id, p.tenant_name, p.status, p.total_count,
+           (SELECT COUNT(*) FROM (
+                SELECT user_id FROM user_roles WHERE tenant_id = p.tenant_id
+                UNION
+                SELECT user_id FROM user_access WHERE tenant_id = p.tenant_id
+           ) tenant_users) AS user_count
+    FROM page p
+    ORDER BY p.tenant_id
+"""
+
+# Total for pages past the end, where the window count is not available
+TENANT_COUNT_QUERY = f"""
+    SELECT COUNT(*) AS total_count
+    FROM tenants t
+    {TENANT_FILTER}
+"""
+
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards so the value is matched literally"""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+class TenantSummaryQuery:
+    """Paginated tenant list with user counts"""
+
+    def __init__(self, cursor):
+        """
+        Args:
+            cursor: Database cursor returning dict rows (RealDictCursor)
+        """
+        self.cursor = cursor
+
+    def list(self, limit: int = DEFAULT_PAGE_SIZE, offset: int = 0,
+             name_prefix: Optional[str] = None, status: Optional[str] = None) -> Dict[str, Any]:
+        """
+        List tenants ordered by tenant_id
+
+        Args:
+            limit: Page size (capped at MAX_PAGE_SIZE)
+            offset: Number of tenants to skip
+            name_prefix: Case-insensitive tenant_name prefix
+            status: Tenant status filter
+
+        Returns:
+            Dict with tenants (tenant_id, tenant_name, status, user_count) and total_count
+        """
+        params = {
+            'status': status,
+            'name_pattern': f"{escape_like(name_prefix)}%" if name_prefix else None,
+            'limit': max(1, min(limit, MAX_PAGE_SIZE)),
+            'offset': max(0, offset)
+        }
+
+        self.cursor.execute(TENANT_SUMMARY_QUERY, params)
+        rows = self.cursor.fetchall()
+
+        if rows:
+            total_count = rows[0]['total_count']
+        elif params['offset'] > 0:
+            self.cursor.execute(TENANT_COUNT_QUERY, params)
+            total_count = self.cursor.fetchone()['total_count']
+        else:
+            total_count = 0
+
+        tenants = [
+            {
+                "tenant_id": row['tenant_id'],
+                "tenant_name": row['tenant_name'],
+                "status": row['status'],
+                "user_count": row['user_count']
+            }
+            for row in rows
+        ]
+
+        logger.debug(f"Tenant summary page: {len(tenants)} of {total_count} tenants")
+        return {"tenants": tenants, "total_count": total_count}
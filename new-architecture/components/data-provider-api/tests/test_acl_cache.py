@@ -0,0 +1,125 @@
+"""
+Testy jednostkowe dla ACL Snapshot Cache
+"""
+
+import asyncio
+import pytest
+from acl_cache import TenantACLCache
+
+class CountingLoader:
+    """Loader zliczający przebudowy ACL"""
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, tenant_id):
+        self.calls.append(tenant_id)
+        return {"tenant_id": tenant_id, "build": len(self.calls)}
+
+@pytest.fixture
+def cache():
+    return TenantACLCache(max_size=2, ttl_seconds=0)
+
+class TestTenantACLCache:
+    """Testy cache snapshotów ACL"""
+
+    def test_hit_after_first_build(self, cache):
+        """Test drugie pobranie jest obsłużone z cache"""
+        loader = CountingLoader()
+        first = cache.get("tenant1", loader)
+        second = cache.get("tenant1", loader)
+
+        assert first is second
+        assert loader.calls == ["tenant1"]
+        metrics = cache.get_metrics()
+        assert metrics["hits"] == 1
+        assert metrics["misses"] == 1
+        assert metrics["rebuilds"] == 1
+
+    def test_invalidate_bumps_version_and_rebuilds(self, cache):
+        """Test unieważnienie podbija wersję i wymusza przebudowę"""
+        loader = CountingLoader()
+        cache.get("tenant1", loader)
+
+        assert cache.invalidate("tenant1") == 1
+        assert cache.get_version("tenant1") == 1
+        assert cache.get("tenant1", loader)["build"] == 2
+        assert cache.get_snapshot("tenant1", loader).version == 1
+
+    def test_lru_eviction(self, cache):
+        """Test usuwa najdawniej używanego tenanta po przekroczeniu rozmiaru"""
+        loader = CountingLoader()
+        cache.get("tenant1", loader)
+        cache.get("tenant2", loader)
+        cache.get("tenant1", loader)
+        cache.get("tenant3", loader)
+
+        cache.get("tenant1", loader)
+        assert loader.calls == ["tenant1", "tenant2", "tenant3"]
+        cache.get("tenant2", loader)
+        assert loader.calls[-1] == "tenant2"
+        assert cache.get_metrics()["evictions"] == 2
+
+    def test_invalidation_during_rebuild_is_not_cached(self, cache):
+        """Test snapshot zbudowany przed unieważnieniem nie trafia do cache"""
+        def stale_loader(tenant_id):
+            cache.invalidate(tenant_id)
+            return {"tenant_id": tenant_id, "stale": True}
+
+        cache.get("tenant1", stale_loader)
+        loader = CountingLoader()
+        assert cache.get("tenant1", loader)["build"] == 1
+
+    def test_missing_tenant_not_cached(self, cache):
+        """Test brak danych (None) nie jest zapisywany w cache"""
+        calls = []
+        def empty_loader(tenant_id):
+            calls.append(tenant_id)
+            return None
+
+        assert cache.get("nonexistent", empty_loader) is None
+        assert cache.get("nonexistent", empty_loader) is None
+        assert len(calls) == 2
+
+    def test_layouts_cached_separately_and_invalidated_together(self, cache):
+        """Test układy dokumentu mają osobne snapshoty, ale wspólne unieważnienie"""
+        loader = CountingLoader()
+        expanded = cache.get_snapshot("tenant1", loader)
+        normalized = cache.get_snapshot("tenant1", loader, "normalized")
+
+        assert expanded is not normalized
+        assert normalized.layout == "normalized"
+        assert cache.get_snapshot("tenant1", loader, "normalized") is normalized
+
+        cache.invalidate("tenant1")
+        cache.get_snapshot("tenant1", loader)
+        cache.get_snapshot("tenant1", loader, "normalized")
+        assert len(loader.calls) == 4
+
+class TestAsyncSnapshot:
+    """Testy pobierania snapshotu z loaderem asynchronicznym (tryb ASGI)"""
+
+    def test_async_loader_shares_cache_with_sync(self, cache):
+        """Test snapshot zbudowany asynchronicznie jest trafieniem dla trybu sync"""
+        loader = CountingLoader()
+
+        async def async_loader(tenant_id):
+            return loader(tenant_id)
+
+        first = asyncio.run(cache.get_snapshot_async("tenant1", async_loader))
+        second = cache.get_snapshot("tenant1", loader)
+
+        assert first is second
+        assert loader.calls == ["tenant1"]
+
+    def test_invalidation_during_async_rebuild_is_not_cached(self, cache):
+        """Test dane zbudowane przed unieważnieniem nie trafiają do cache"""
+        loader = CountingLoader()
+
+        async def invalidating_loader(tenant_id):
+            cache.invalidate(tenant_id)
+            return loader(tenant_id)
+
+        asyncio.run(cache.get_snapshot_async("tenant1", invalidating_loader))
+        cache.get("tenant1", loader)
+
+        assert loader.calls == ["tenant1", "tenant1"]
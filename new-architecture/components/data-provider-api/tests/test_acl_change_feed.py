@@ -0,0 +1,239 @@
+"""
+Testy jednostkowe dla kanału zmian uprawnień (LISTEN/NOTIFY)
+"""
+
+import json
+import asyncio
+import threading
+import pytest
+import user_data_sync as user_data_sync_module
+from acl_change_feed import (
+    ACLChangeListener, parse_change_event, LAST_EVENT_QUERY, CATCH_UP_QUERY, PUBLISHER_LOCK_QUERY
+)
+from user_data_sync import UserDataSyncService
+
+class FakeCursor:
+    """Kursor zwracający przygotowane wiersze dla każdego zapytania"""
+    def __init__(self, results):
+        self.results = results
+        self.executed = []
+        self._last = None
+
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+        self._last = query
+
+    def fetchall(self):
+        return self.results.get(self._last, [])
+
+    def fetchone(self):
+        rows = self.fetchall()
+        return rows[0] if rows else None
+
+class FakePublisher:
+    """UserDataSyncService zapisujący publikacje (published=False - OPAL Server niedostępny)"""
+    def __init__(self):
+        self.calls = []
+        self.published = True
+
+    def publish_user_updates(self, tenant_id, user_ids, wait=False):
+        self.calls.append(("users", tenant_id, user_ids))
+        return self.published
+
+    def sync_tenant_data(self, tenant_id, wait=False):
+        self.calls.append(("tenant", tenant_id))
+        return self.published
+
+class FakeConnection:
+    """Połączenie nasłuchujące (tylko zamykane)"""
+    def close(self):
+        pass
+
+def notification(event_id, tenant_id, user_id, table="user_roles", op="INSERT"):
+    return json.dumps({"id": event_id, "tenant_id": tenant_id, "user_id": user_id, "table": table, "op": op})
+
+@pytest.fixture
+def publisher():
+    return FakePublisher()
+
+@pytest.fixture
+def listener(publisher):
+    listener = ACLChangeListener(publisher, invalidate=lambda tenant_id: None, max_users=2)
+    listener.is_publisher = True
+    return listener
+
+class TestParseChangeEvent:
+    """Testy dekodowania ładunku NOTIFY"""
+
+    def test_valid_payload(self):
+        """Test poprawny ładunek zwraca zdarzenie"""
+        event = parse_change_event(notification(7, "tenant1", "user1"))
+        assert event == {"id": 7, "tenant_id": "tenant1", "user_id": "user1", "table": "user_roles", "op": "INSERT"}
+
+    def test_malformed_payload(self):
+        """Test uszkodzony ładunek lub brak tenanta jest odrzucany"""
+        assert parse_change_event("not json") is None
+        assert parse_change_event(json.dumps({"id": 1})) is None
+        assert parse_change_event(json.dumps([1, 2])) is None
+
+class TestCoalescing:
+    """Testy łączenia zdarzeń w publikacje"""
+
+    def test_changes_published_once_per_tenant(self, listener, publisher):
+        """Test wiele zmian tenanta daje jedną publikację zmienionych użytkowników"""
+        for event_id, user_id in enumerate(["user2", "user1", "user2"], start=1):
+            listener.handle_notification(notification(event_id, "tenant1", user_id))
+        listener.handle_notification(notification(4, "tenant2", "user9", table="user_access", op="DELETE"))
+        listener.flush()
+
+        assert publisher.calls == [("users", "tenant1", ["user1", "user2"]), ("users", "tenant2", ["user9"])]
+        assert listener.last_event_id == 4
+        assert listener.metrics["events_received"] == 4
+
+    def test_tenant_wide_event_syncs_tenant(self, listener, publisher):
+        """Test zdarzenie bez użytkownika (np. role_permissions) publikuje cały tenant"""
+        listener.handle_notification(notification(1, "tenant1", "user1"))
+        listener.handle_notification(notification(2, "tenant1", None, table="role_permissions"))
+        listener.handle_notification(notification(3, "tenant1", "user2"))
+        listener.flush()
+
+        assert publisher.calls == [("tenant", "tenant1")]
+
+    def test_too_many_users_syncs_tenant(self, listener, publisher):
+        """Test więcej zmienionych użytkowników niż max_users publikuje cały tenant"""
+        for event_id, user_id in enumerate(["user1", "user2", "user3"], start=1):
+            listener.handle_notification(notification(event_id, "tenant1", user_id))
+        listener.flush()
+
+        assert publisher.calls == [("tenant", "tenant1")]
+
+    def test_failed_publish_is_retried(self, listener, publisher):
+        """Test nieudana publikacja wraca do oczekujących i jest ponawiana przy kolejnym flush"""
+        publisher.published = False
+        listener.handle_notification(notification(1, "tenant1", "user1"))
+        listener.flush()
+
+        assert listener.metrics["publish_errors"] == 1
+        assert listener.metrics["user_publishes"] == 0
+
+        publisher.published = True
+        listener.handle_notification(notification(2, "tenant1", "user2"))
+        listener.flush()
+
+        assert publisher.calls == [("users", "tenant1", ["user1"]), ("users", "tenant1", ["user1", "user2"])]
+        assert listener.metrics["user_publishes"] == 1
+        assert listener.get_metrics()["pending_tenants"] == 0
+
+    def test_standby_only_invalidates(self, publisher):
+        """Test proces bez blokady publikującego tylko unieważnia swój cache"""
+        invalidated = []
+        listener = ACLChangeListener(publisher, invalidate=invalidated.append)
+        listener.handle_notification(notification(1, "tenant1", "user1"))
+        listener.handle_notification("garbage")
+        listener.flush()
+
+        assert invalidated == ["tenant1"]
+        assert publisher.calls == []
+        assert listener.metrics["invalid_payloads"] == 1
+
+class TestCatchUp:
+    """Testy doczytywania zdarzeń po ponownym połączeniu"""
+
+    def test_first_connection_records_position(self, listener, publisher):
+        """Test pierwsze połączenie zapamiętuje ostatnie zdarzenie bez odtwarzania historii"""
+        cursor = FakeCursor({LAST_EVENT_QUERY: [{"event_id": 41}]})
+        listener.catch_up(cursor)
+        listener.flush()
+
+        assert listener.last_event_id == 41
+        assert publisher.calls == []
+
+    def test_reconnect_replays_missed_events(self, listener, publisher):
+        """Test po ponownym połączeniu pominięte zdarzenia są odtwarzane z nakładką"""
+        listener.last_event_id = 1500
+        cursor = FakeCursor({CATCH_UP_QUERY: [
+            {"event_id": 1499, "tenant_id": "tenant1", "user_id": "user1", "table_name": "user_roles", "op": "INSERT"},
+            {"event_id": 1502, "tenant_id": "tenant1", "user_id": "user2", "table_name": "user_access", "op": "UPDATE"},
+        ]})
+        listener.catch_up(cursor)
+        listener.flush()
+
+        assert cursor.executed == [(CATCH_UP_QUERY, {"after": 500})]
+        assert publisher.calls == [("users", "tenant1", ["user1", "user2"])]
+        assert listener.last_event_id == 1502
+        assert listener.metrics["events_caught_up"] == 2
+
+class TestReconnect:
+    """Testy ponownego łączenia po awarii"""
+
+    def test_reconnects_after_failure(self, publisher):
+        """Test nieudane połączenie jest ponawiane"""
+        attempts = []
+
+        def connect():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise OSError("connection refused")
+            return FakeConnection()
+
+        listener = ACLChangeListener(publisher, connect=connect, reconnect_max_seconds=0.01)
+        listener._listen = lambda conn: listener._stop.set()
+        listener._run()
+
+        assert len(attempts) == 2
+        assert listener.metrics["reconnects"] == 1
+        assert listener.metrics["last_error"] == "connection refused"
+
+    def test_publisher_lock(self, publisher):
+        """Test blokada doradcza decyduje, który proces publikuje"""
+        listener = ACLChangeListener(publisher)
+        listener._try_become_publisher(FakeCursor({PUBLISHER_LOCK_QUERY: [{"acquired": True}]}))
+        assert listener.is_publisher and listener.metrics["is_publisher"]
+
+class TestPublishUserUpdates:
+    """Testy publikacji zmian wielu użytkowników jednym powiadomieniem"""
+
+    def test_one_notification_with_entry_per_user(self, monkeypatch):
+        """Test jedno powiadomienie OPAL z wpisem dla każdego użytkownika"""
+        sent = []
+        monkeypatch.setattr(user_data_sync_module, "ACL_CACHE_AVAILABLE", False)
+        service = UserDataSyncService()
+        monkeypatch.setattr(service, "_send_opal_notification",
+                            lambda data, operation_type, tenant_id, user_id=None, wait=False: sent.append(data) or True)
+
+        assert service.publish_user_updates("tenant1", ["user1", "user2"])
+        assert len(sent) == 1
+        assert [entry["dst_path"] for entry in sent[0]["entries"]] == [
+            "/acl/tenant1/data/users/user1", "/acl/tenant1/data/users/user2"]
+
+    def test_user_id_with_path_separator_publishes_tenant(self, monkeypatch):
+        """Test user_id z '/' lub '~' nie trafia do dst_path - publikowany jest cały tenant"""
+        sent = []
+        monkeypatch.setattr(user_data_sync_module, "ACL_CACHE_AVAILABLE", False)
+        service = UserDataSyncService()
+        monkeypatch.setattr(service, "_send_opal_notification",
+                            lambda data, operation_type, tenant_id, user_id=None, wait=False: sent.append(data) or True)
+
+        assert service.publish_user_updates("tenant1", ["user1", "dział/kadry", "a~b"])
+        assert [entry["dst_path"] for entry in sent[0]["entries"]] == [
+            "/acl/tenant1/data/users/user1", "/acl/tenant1"]
+
+    def test_async_transport_reports_failure_when_waiting(self, monkeypatch):
+        """Test w trybie ASGI wait=True zwraca rzeczywisty wynik wysyłki przez httpx"""
+        class FailingClient:
+            async def post(self, url, json=None, headers=None):
+                return type("Response", (), {"status_code": 400, "text": "bad request"})()
+
+        monkeypatch.setattr(user_data_sync_module, "ACL_CACHE_AVAILABLE", False)
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        try:
+            service = UserDataSyncService()
+            service.use_async_transport(loop, FailingClient())
+            assert service.publish_user_updates("tenant1", ["user1"]) is True
+            assert service.sync_tenant_data("tenant1", wait=True) is False
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
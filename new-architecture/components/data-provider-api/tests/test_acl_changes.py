@@ -0,0 +1,81 @@
+"""
+Testy jednostkowe dla dziennika zmian ACL (delta od wersji)
+"""
+
+import pytest
+from acl_changes import ACLChangeJournal, TENANT_VERSION_QUERY, CHANGED_USERS_QUERY, escape_json_pointer
+
+class FakeCursor:
+    """Kursor zwracający przygotowane wiersze dla każdego zapytania"""
+    def __init__(self, results):
+        self.results = results
+        self.executed = []
+        self._last = None
+
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+        self._last = query
+
+    def fetchall(self):
+        return self.results.get(self._last, [])
+
+    def fetchone(self):
+        rows = self.fetchall()
+        return rows[0] if rows else None
+
+@pytest.fixture
+def journal_rows():
+    return {
+        TENANT_VERSION_QUERY: [{"version": 12, "compacted_through": 5}],
+        CHANGED_USERS_QUERY: [
+            {"user_id": "user1", "seq": 9, "deleted": False, "email": "admin@test.com", "full_name": "Admin",
+             "roles": {"fk": ["fk_admin"]}, "permissions": {"fk": ["view_entry"]}, "companies": [], "teams": []},
+            {"user_id": "user/2", "seq": 12, "deleted": True, "email": None, "full_name": None,
+             "roles": None, "permissions": None, "companies": None, "teams": None},
+        ],
+    }
+
+class TestACLChangeJournal:
+    """Testy budowania delty ACL"""
+
+    def test_changes_as_json_patch(self, journal_rows):
+        """Test zmienieni użytkownicy jako operacje add/remove oraz nowa wersja dokumentu"""
+        cursor = FakeCursor(journal_rows)
+        result = ACLChangeJournal(cursor).get_changes("tenant1", 7)
+
+        assert result["version"] == 12
+        assert result["full_resync_required"] is False
+        assert result["changes"] == [
+            {"op": "add", "path": "/users/user1", "value": {
+                "email": "admin@test.com", "full_name": "Admin", "roles": {"fk": ["fk_admin"]},
+                "permissions": {"fk": ["view_entry"]}, "companies": [], "teams": []}},
+            {"op": "remove", "path": "/users/user~12"},
+            {"op": "add", "path": "/version", "value": 12},
+        ]
+        assert cursor.executed[1][1] == {"tenant_id": "tenant1", "since": 7, "version": 12}
+
+    def test_full_resync_when_journal_compacted(self, journal_rows):
+        """Test wersja sprzed kompaktowania wymaga pełnej resynchronizacji"""
+        cursor = FakeCursor(journal_rows)
+        result = ACLChangeJournal(cursor).get_changes("tenant1", 3)
+
+        assert result["full_resync_required"] is True
+        assert result["changes"] == []
+        assert len(cursor.executed) == 1
+
+    def test_full_resync_when_client_ahead(self, journal_rows):
+        """Test wersja klienta nowsza niż w bazie wymaga pełnej resynchronizacji"""
+        result = ACLChangeJournal(FakeCursor(journal_rows)).get_changes("tenant1", 13)
+        assert result["full_resync_required"] is True
+
+    def test_no_changes_when_up_to_date(self, journal_rows):
+        """Test aktualny klient dostaje pustą deltę bez odczytu dziennika"""
+        cursor = FakeCursor(journal_rows)
+        result = ACLChangeJournal(cursor).get_changes("tenant1", 12)
+
+        assert result["changes"] == []
+        assert len(cursor.executed) == 1
+
+    def test_escape_json_pointer(self):
+        """Test escapowania znaków specjalnych JSON Pointer"""
+        assert escape_json_pointer("a/b~c") == "a~1b~0c"
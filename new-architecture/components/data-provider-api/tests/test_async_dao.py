@@ -0,0 +1,140 @@
+"""
+Testy jednostkowe dla asynchronicznych DAO (shared.database.async_dao)
+"""
+
+import asyncio
+import shared.database.async_dao as async_dao_module
+from shared.database.async_dao import AsyncUserDAO, AsyncUserRoleDAO, AsyncUserProfileDAO
+from shared.database.models import User, UserRole, UserAccess, Company, Team
+
+class TestAsyncBaseDAO:
+    """Testy operacji CRUD w AsyncBaseDAO"""
+
+    def test_find_by_criteria_maps_tuple_rows(self, monkeypatch):
+        """Test zapytanie jak w BaseDAO (placeholdery %s), wiersze krotek mapowane na modele"""
+        calls = []
+
+        async def fake_fetch_rows(query, params=()):
+            calls.append((query, params))
+            return ("user_id", "username"), [("user1", "a"), ("user2", "b")]
+
+        monkeypatch.setattr(async_dao_module, "async_fetch_rows", fake_fetch_rows)
+        users = asyncio.run(AsyncUserDAO().find_by_criteria({"status": "active"}, limit=10))
+
+        assert calls == [("SELECT * FROM users WHERE status = %s ORDER BY user_id LIMIT %s", ["active", 10])]
+        assert users == [User(user_id="user1", username="a"), User(user_id="user2", username="b")]
+
+    def test_find_by_ids_fetches_chunks_concurrently(self, monkeypatch):
+        """Test porcje ID są pobierane równolegle, brakujące ID są pomijane"""
+        in_flight = []
+        max_in_flight = []
+
+        async def fake_fetch_all(query, params=()):
+            in_flight.append(params)
+            max_in_flight.append(len(in_flight))
+            await asyncio.sleep(0)
+            in_flight.remove(params)
+            ids = params[0].strip("{}").replace('"', "").split(",")
+            return [{"user_id": user_id, "username": user_id} for user_id in ids if user_id != "missing"]
+
+        monkeypatch.setattr(async_dao_module, "async_fetch_all", fake_fetch_all)
+        users = asyncio.run(AsyncUserDAO().find_by_ids(["user1", "user2", "user1", "missing"], chunk_size=2))
+
+        assert sorted(users) == ["user1", "user2"]
+        assert max(max_in_flight) == 2
+
+    def test_find_page_seeks_after_last_id(self, monkeypatch):
+        """Test stronicowanie kursorem jak w BaseDAO.find_page"""
+        calls = []
+
+        async def fake_fetch_all(query, params=()):
+            calls.append((query, params))
+            return [{"user_id": f"user{i}", "username": f"user{i}"} for i in range(3)]
+
+        monkeypatch.setattr(async_dao_module, "async_fetch_all", fake_fetch_all)
+        users, next_after = asyncio.run(AsyncUserDAO().find_page(2, after="user0"))
+
+        assert calls == [("SELECT * FROM users WHERE user_id > %s ORDER BY user_id LIMIT %s", ["user0", 3])]
+        assert [user.user_id for user in users] == ["user0", "user1"]
+        assert next_after == "user1"
+
+    def test_roles_grouped_by_user(self, monkeypatch):
+        """Test role wielu użytkowników jednym zapytaniem, pogrupowane jak w UserRoleDAO"""
+        rows = [{"user_id": "user1", "app_id": "fk", "role_name": "admin"}]
+
+        async def fake_fetch_all(query, params=()):
+            assert "ANY(%s)" in query
+            assert params == ('{"user1","user2"}', "tenant1")
+            return rows
+
+        monkeypatch.setattr(async_dao_module, "async_fetch_all", fake_fetch_all)
+        roles = asyncio.run(AsyncUserRoleDAO().find_roles_for_users(["user1", "user2"], "tenant1"))
+
+        assert roles == {"user1": {"fk": ["admin"]}, "user2": {}}
+
+class TestAsyncUserProfileDAO:
+    """Testy złożonych zapytań profilu użytkownika"""
+
+    def test_complete_profile_is_pipelined(self, monkeypatch):
+        """Test profil pobierany jednym potokiem zapytań w jednej migawce REPEATABLE READ"""
+        calls = []
+
+        async def fake_pipelined(statements, isolation_level=None, readonly=False):
+            calls.append((len(statements), isolation_level, readonly))
+            return [
+                [{"user_id": "user1", "username": "jan"}],
+                [{"user_id": "user1", "app_id": "fk", "role_name": "admin"}],
+                [{"user_id": "user1", "tenant_id": "tenant1", "app_id": "fk", "role_name": "admin",
+                  "permission_name": "view", "source_type": "direct", "source_id": "r1"}] * 2,
+                [{"user_id": "user1", "company_id": "c1"}],
+                [{"team_name": "finance"}],
+            ]
+
+        monkeypatch.setattr(async_dao_module, "async_fetch_pipelined", fake_pipelined)
+        profile = asyncio.run(AsyncUserProfileDAO().get_complete_user_profile("user1", "tenant1"))
+
+        assert calls == [(5, "REPEATABLE READ", True)]
+        assert profile.user.username == "jan"
+        assert profile.roles == {"fk": ["admin"]}
+        assert profile.permissions == {"fk": ["view"]}
+        assert profile.companies == ["c1"]
+        assert profile.teams == ["finance"]
+
+    def test_missing_user_returns_none(self, monkeypatch):
+        """Test brak użytkownika zwraca None"""
+        async def fake_pipelined(statements, isolation_level=None, readonly=False):
+            return [[] for _ in statements]
+
+        monkeypatch.setattr(async_dao_module, "async_fetch_pipelined", fake_pipelined)
+        assert asyncio.run(AsyncUserProfileDAO().get_complete_user_profile("nobody", "tenant1")) is None
+
+    def test_tenant_assignments_fetched_concurrently(self, monkeypatch):
+        """Test przypisania, firmy i zespoły tenanta pobierane równolegle, użytkownicy jednym zapytaniem"""
+        started = []
+
+        async def fake_fetch_rows(query, params=()):
+            started.append(query.split()[3])
+            await asyncio.sleep(0)
+            # Wszystkie cztery zapytania muszą wystartować przed zakończeniem pierwszego
+            assert len(started) == 4
+            return {
+                "user_roles": (("user_id", "role_id", "tenant_id"), [("user1", "r1", "tenant1")]),
+                "user_access": (("user_id", "company_id", "tenant_id"), [("user2", "c1", "tenant1")]),
+                "companies": (("company_id", "tenant_id", "company_name"), [("c1", "tenant1", "ACME")]),
+                "teams": (("team_id", "tenant_id", "team_name"), [("t1", "tenant1", "finance")]),
+            }[query.split()[3]]
+
+        async def fake_fetch_all(query, params=()):
+            assert params == ('{"user1","user2"}',)
+            return [{"user_id": "user1", "username": "a"}, {"user_id": "user2", "username": "b"}]
+
+        monkeypatch.setattr(async_dao_module, "async_fetch_rows", fake_fetch_rows)
+        monkeypatch.setattr(async_dao_module, "async_fetch_all", fake_fetch_all)
+        result = asyncio.run(AsyncUserProfileDAO().get_tenant_assignments("tenant1"))
+
+        assert sorted(started) == ["companies", "teams", "user_access", "user_roles"]
+        assert sorted(result["users"]) == ["user1", "user2"]
+        assert result["user_roles"] == [UserRole(user_id="user1", role_id="r1", tenant_id="tenant1")]
+        assert result["user_access"] == [UserAccess(user_id="user2", company_id="c1", tenant_id="tenant1")]
+        assert result["companies"] == [Company(company_id="c1", tenant_id="tenant1", company_name="ACME")]
+        assert result["teams"] == [Team(team_id="t1", tenant_id="tenant1", team_name="finance")]
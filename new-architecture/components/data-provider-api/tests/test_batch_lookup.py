@@ -0,0 +1,132 @@
+"""
+Testy jednostkowe dla wsadowego pobierania rekordów (find_by_ids, role i dostęp wielu użytkowników)
+"""
+
+from contextlib import contextmanager
+import shared.database.base_dao as base_dao_module
+import shared.database.dao as dao_module
+import profile_role_mapper
+from shared.database.dao import UserDAO, UserRoleDAO, UserAccessDAO
+
+def fail_query(*args):
+    raise AssertionError("query executed")
+
+class TestFindByIds:
+    """Testy find_by_ids w BaseDAO"""
+
+    def test_chunks_unique_ids(self, monkeypatch):
+        """Test ID są deduplikowane i pobierane porcjami przez = ANY($1)"""
+        calls = []
+
+        def fake_execute_prepared(shape, query, params):
+            calls.append((shape, query, params))
+            return [{"user_id": user_id, "username": user_id} for user_id in params[0].strip("{}").replace('"', "").split(",")
+                    if user_id != "missing"]
+
+        monkeypatch.setattr(base_dao_module, "execute_prepared", fake_execute_prepared)
+        users = UserDAO().find_by_ids(["user1", "user2", "user1", "missing"], chunk_size=2)
+
+        assert [params for _, _, params in calls] == [('{"user1","user2"}',), ('{"missing"}',)]
+        assert calls[0][1] == "SELECT * FROM users WHERE user_id = ANY($1)"
+        assert sorted(users) == ["user1", "user2"]
+        assert users["user2"].username == "user2"
+
+    def test_empty_ids_skip_query(self, monkeypatch):
+        """Test pusta lista ID nie wykonuje zapytania"""
+        monkeypatch.setattr(base_dao_module, "execute_prepared", fail_query)
+        assert UserDAO().find_by_ids([]) == {}
+
+class TestGroupedLookups:
+    """Testy ról i dostępu wielu użytkowników jednym zapytaniem"""
+
+    def test_roles_grouped_by_user_and_app(self, monkeypatch):
+        """Test role są grupowane per użytkownik i aplikacja, użytkownik bez ról ma pusty słownik"""
+        rows = [
+            {"user_id": "user1", "app_id": "fk", "role_name": "admin"},
+            {"user_id": "user1", "app_id": "fk", "role_name": "viewer"},
+            {"user_id": "user1", "app_id": "hr", "role_name": "viewer"},
+            {"user_id": "user2", "app_id": "hr", "role_name": "admin"},
+        ]
+        calls = []
+        monkeypatch.setattr(dao_module, "execute_prepared", lambda shape, query, params: calls.append(params) or rows)
+
+        roles = UserRoleDAO().find_roles_for_users(["user1", "user2", "user3"], "tenant1")
+
+        assert calls == [('{"user1","user2","user3"}', "tenant1")]
+        assert roles == {
+            "user1": {"fk": ["admin", "viewer"], "hr": ["viewer"]},
+            "user2": {"hr": ["admin"]},
+            "user3": {},
+        }
+
+    def test_companies_grouped_by_user(self, monkeypatch):
+        """Test firmy są grupowane per użytkownik, get_user_companies korzysta z tego samego zapytania"""
+        rows = [{"user_id": "user1", "company_id": "c1"}, {"user_id": "user1", "company_id": "c2"}]
+        monkeypatch.setattr(dao_module, "execute_prepared", lambda shape, query, params: rows)
+
+        assert UserAccessDAO().get_companies_for_users(["user1", "user2"], "tenant1") == {"user1": ["c1", "c2"], "user2": []}
+        assert UserAccessDAO().get_user_companies("user1", "tenant1") == ["c1", "c2"]
+
+class FakeConnection:
+    encoding = "UTF8"
+
+class FakeCursor:
+    """Kursor słownikowy zapisujący zapytania profile_role_mapper"""
+    def __init__(self, profile_roles, returned):
+        self.connection = FakeConnection()
+        self.profile_roles = profile_roles
+        self.returned = returned
+        self.statements = []
+        self._rows = []
+
+    def mogrify(self, template, args):
+        return ("(" + ",".join(repr(value) for value in args) + ")").encode()
+
+    def execute(self, query, params=None):
+        query = query.decode() if isinstance(query, bytes) else query
+        self.statements.append((" ".join(query.split()), params))
+        self._rows = self.profile_roles if "FROM profile_roles" in query else self.returned
+
+    def fetchall(self):
+        return self._rows
+
+class TestProfileRoleMapper:
+    """Testy mapowania profilu na role jednym zapytaniem"""
+
+    PROFILE_ROLES = [
+        {"role_id": "r1", "role_name": "admin", "app_id": "fk"},
+        {"role_id": "r2", "role_name": "viewer", "app_id": "fk"},
+    ]
+
+    def use_cursor(self, monkeypatch, cursor):
+        @contextmanager
+        def fake_db_cursor():
+            yield cursor
+        monkeypatch.setattr(profile_role_mapper, "get_db_cursor", fake_db_cursor)
+
+    def test_apply_inserts_all_roles_at_once(self, monkeypatch):
+        """Test role profilu są wstawiane jednym INSERT, istniejące oznaczane jako pominięte"""
+        cursor = FakeCursor(self.PROFILE_ROLES, [{"role_id": "r1"}])
+        self.use_cursor(monkeypatch, cursor)
+        monkeypatch.setattr(profile_role_mapper.UserDataSyncService, "publish_role_update", lambda *args: True)
+
+        result = profile_role_mapper.apply_profile_to_user_roles("user1", "p1", "fk", "tenant1")
+
+        inserts = [query for query, _ in cursor.statements if query.startswith("INSERT")]
+        assert len(inserts) == 1
+        assert inserts[0].endswith("ON CONFLICT (user_id, role_id, tenant_id) DO NOTHING RETURNING role_id")
+        assert [role["role_id"] for role in result["created_roles"]] == ["r1"]
+        assert result["skipped_roles"] == [{"role_id": "r2", "role_name": "viewer", "reason": "already_exists"}]
+
+    def test_remove_deletes_all_roles_at_once(self, monkeypatch):
+        """Test role profilu są usuwane jednym DELETE ... = ANY"""
+        cursor = FakeCursor(self.PROFILE_ROLES, [{"role_id": "r2"}])
+        self.use_cursor(monkeypatch, cursor)
+        monkeypatch.setattr(profile_role_mapper, "invalidate_tenant_acl", lambda tenant_id: None)
+
+        result = profile_role_mapper.remove_profile_from_user_roles("user1", "p1", "fk", "tenant1")
+
+        deletes = [(query, params) for query, params in cursor.statements if query.startswith("DELETE")]
+        assert len(deletes) == 1
+        assert deletes[0][1] == ("user1", ["r1", "r2"], "tenant1")
+        assert result["removed_roles"] == [{"role_id": "r2", "role_name": "viewer"}]
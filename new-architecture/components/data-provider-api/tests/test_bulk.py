@@ -0,0 +1,99 @@
+"""
+Testy jednostkowe dla masowego zapisu (multi-row INSERT i COPY)
+"""
+
+import pytest
+from shared.database.bulk import bulk_insert, copy_in, copy_buffer, conflict_clause, ON_CONFLICT_NOTHING, ON_CONFLICT_UPDATE
+
+class FakeConnection:
+    encoding = "UTF8"
+
+class FakeCursor:
+    """Kursor zapisujący instrukcje i dane COPY"""
+    def __init__(self):
+        self.connection = FakeConnection()
+        self.statements = []
+        self.copied = []
+        self.rowcount = 0
+        self._rows = []
+
+    def mogrify(self, template, args):
+        return ("(" + ",".join(repr(value) for value in args) + ")").encode()
+
+    def execute(self, query, params=None):
+        query = query.decode() if isinstance(query, bytes) else query
+        self.statements.append(query)
+        if query.startswith("INSERT"):
+            rows = query.count("(") - 1 if "VALUES" in query else len(self.copied[-1][1].splitlines())
+            self.rowcount = rows
+            self._rows = [(f"key{i}",) for i in range(rows)]
+
+    def copy_expert(self, sql, buffer):
+        self.copied.append((sql, buffer.read()))
+
+    def fetchall(self):
+        return self._rows
+
+@pytest.fixture
+def cursor():
+    return FakeCursor()
+
+ROWS = [(f"user{i}", "company1", "tenant1") for i in range(5)]
+COLUMNS = ["user_id", "company_id", "tenant_id"]
+
+class TestBulkInsert:
+    """Testy wielowierszowego INSERT"""
+
+    def test_chunks_rows(self, cursor):
+        """Test wiersze są wysyłane w porcjach chunk_size"""
+        count = bulk_insert(cursor, "user_access", COLUMNS, iter(ROWS), chunk_size=2)
+
+        assert count == 5
+        assert len(cursor.statements) == 3
+        assert cursor.statements[0].startswith("INSERT INTO user_access (user_id, company_id, tenant_id) VALUES ('user0'")
+
+    def test_returning_keys(self, cursor):
+        """Test returning zwraca klucze zapisanych wierszy"""
+        keys = bulk_insert(cursor, "user_access", COLUMNS, ROWS, chunk_size=3, returning=["user_id"])
+        assert keys == ["key0", "key1", "key2", "key0", "key1"]
+        assert cursor.statements[0].endswith("RETURNING user_id")
+
+class TestCopyIn:
+    """Testy COPY FROM STDIN"""
+
+    def test_plain_copy(self, cursor):
+        """Test bez obsługi konfliktów dane trafiają bezpośrednio do tabeli"""
+        count = copy_in(cursor, "user_access", COLUMNS, ROWS, chunk_size=4)
+
+        assert count == 5
+        assert [sql for sql, _ in cursor.copied] == ["COPY user_access (user_id, company_id, tenant_id) FROM STDIN"] * 2
+        assert cursor.statements == []
+
+    def test_conflict_goes_through_staging_table(self, cursor):
+        """Test ON CONFLICT wymaga tabeli pośredniej i INSERT ... SELECT"""
+        count = copy_in(cursor, "user_access", COLUMNS, ROWS, on_conflict=ON_CONFLICT_NOTHING,
+                        conflict_columns=["user_id", "company_id", "tenant_id"])
+
+        assert count == 5
+        assert cursor.copied[0][0] == "COPY bulk_staging_user_access (user_id, company_id, tenant_id) FROM STDIN"
+        assert any(s.startswith("INSERT INTO user_access") and s.endswith("ON CONFLICT (user_id, company_id, tenant_id) DO NOTHING")
+                   for s in cursor.statements)
+        assert cursor.statements[-1] == "DROP TABLE bulk_staging_user_access"
+
+    def test_copy_buffer_escapes_values(self):
+        """Test format tekstowy COPY escapuje znaki specjalne i NULL"""
+        buffer = copy_buffer([("a\tb", None, True, {"k": "v"}, "x\\y\nz")])
+        assert buffer.read() == 'a\\tb\t\\N\tt\t{"k": "v"}\tx\\\\y\\nz\n'
+
+class TestConflictClause:
+    """Testy klauzuli ON CONFLICT"""
+
+    def test_upsert_updates_non_key_columns(self):
+        """Test upsert nadpisuje domyślnie kolumny spoza klucza"""
+        clause = conflict_clause(["user_id", "username", "email"], ON_CONFLICT_UPDATE, ["user_id"])
+        assert clause == " ON CONFLICT (user_id) DO UPDATE SET username = EXCLUDED.username, email = EXCLUDED.email"
+
+    def test_upsert_requires_target(self):
+        """Test upsert bez kolumn konfliktu jest błędem"""
+        with pytest.raises(ValueError):
+            conflict_clause(["user_id"], ON_CONFLICT_UPDATE)
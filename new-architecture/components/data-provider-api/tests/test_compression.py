@@ -0,0 +1,150 @@
+"""
+Testy jednostkowe dla negocjowanej kompresji odpowiedzi
+"""
+
+import gzip
+import json
+import pytest
+from flask import Flask
+from werkzeug.http import parse_accept_header
+import compression
+from compression import json_response, encode_representation, DocumentRepresentations, IDENTITY
+from etag_utils import compute_etag
+from fast_json import dumps
+
+ACL = {
+    "tenant_id": "tenant1",
+    "users": {f"user{i}": {"permissions": {"fk": ["view_invoices", "edit_invoices"]}} for i in range(100)}
+}
+SMALL = {"tenant_id": "tenant1", "users": {}}
+
+@pytest.fixture
+def app():
+    """Tworzy testową aplikację Flask z endpointami kompresowanymi"""
+    app = Flask(__name__)
+    app.representations = {}
+    app.builds = 0
+
+    def build(data):
+        def factory():
+            app.builds += 1
+            return dumps(data)
+        return factory
+
+    @app.route("/acl")
+    def acl():
+        return json_response(build(ACL), compute_etag(ACL), app.representations)
+
+    @app.route("/enveloped")
+    def enveloped():
+        return json_response(build(ACL), compute_etag(ACL), app.representations,
+                             envelope=(b'{"data":', b',"timestamp":"now"}\n'))
+
+    @app.route("/small")
+    def small():
+        return json_response(build(SMALL), compute_etag(SMALL))
+
+    return app
+
+@pytest.fixture
+def client(app):
+    with app.test_client() as client:
+        yield client
+
+class TestNegotiation:
+    """Testy wyboru kodowania"""
+
+    def test_gzip_when_accepted(self, client):
+        """Test duża odpowiedź jest kompresowana gzip"""
+        response = client.get("/acl", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert json.loads(gzip.decompress(response.data)) == ACL
+        assert "Accept-Encoding" in response.headers["Vary"]
+
+    def test_identity_without_accept_encoding(self, client):
+        """Test bez Accept-Encoding odpowiedź nie jest kompresowana"""
+        response = client.get("/acl")
+        assert "Content-Encoding" not in response.headers
+        assert response.get_json() == ACL
+
+    def test_unsupported_encoding_is_ignored(self, client):
+        """Test nieobsługiwane kodowanie daje odpowiedź bez kompresji"""
+        response = client.get("/acl", headers={"Accept-Encoding": "compress"})
+        assert "Content-Encoding" not in response.headers
+
+    def test_small_response_not_compressed(self, client):
+        """Test odpowiedź poniżej progu nie jest kompresowana"""
+        response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+        assert "Content-Encoding" not in response.headers
+        assert response.get_json() == SMALL
+
+    def test_disabled(self, client, monkeypatch):
+        """Test COMPRESSION_ENABLED=false wyłącza kompresję"""
+        monkeypatch.setattr(compression, "COMPRESSION_ENABLED", False)
+        response = client.get("/acl", headers={"Accept-Encoding": "gzip"})
+        assert "Content-Encoding" not in response.headers
+
+class TestETag:
+    """Testy ETag dla reprezentacji"""
+
+    def test_weak_etag_when_compressed(self, client):
+        """Test skompresowana odpowiedź ma słaby ETag, identity silny"""
+        compressed = client.get("/acl", headers={"Accept-Encoding": "gzip"})
+        identity = client.get("/acl")
+        assert compressed.headers["ETag"] == f'W/"{compute_etag(ACL)}"'
+        assert identity.headers["ETag"] == f'"{compute_etag(ACL)}"'
+
+class TestRepresentationCache:
+    """Testy cache zakodowanych bajtów"""
+
+    def test_body_and_compression_cached(self, app, client):
+        """Test kolejne pobrania nie kodują ani nie kompresują ponownie"""
+        first = client.get("/acl", headers={"Accept-Encoding": "gzip"})
+        second = client.get("/acl", headers={"Accept-Encoding": "gzip"})
+        assert app.builds == 1
+        assert first.data == second.data
+        assert set(app.representations) == {IDENTITY, "gzip"}
+
+    def test_document_representations_reset_on_etag_change(self):
+        """Test nowy ETag dokumentu daje pusty zestaw reprezentacji"""
+        documents = DocumentRepresentations()
+        documents.get("snapshot", "a")[IDENTITY] = b"{}"
+        assert IDENTITY in documents.get("snapshot", "a")
+        assert documents.get("snapshot", "b") == {}
+        assert documents.get("snapshot", None) is None
+
+class TestEnvelope:
+    """Testy doklejania envelope bez ponownego kodowania danych"""
+
+    def test_envelope_spliced_around_cached_body(self, app, client):
+        """Test envelope otacza dane, a dane są kodowane tylko raz"""
+        first = client.get("/enveloped")
+        second = client.get("/enveloped")
+        assert first.get_json() == {"data": ACL, "timestamp": "now"}
+        assert int(first.headers["Content-Length"]) == len(first.data)
+        assert second.data == first.data
+        assert app.builds == 1
+
+    def test_envelope_in_compressed_response(self, client):
+        """Test skompresowana odpowiedź zawiera envelope"""
+        response = client.get("/enveloped", headers={"Accept-Encoding": "gzip"})
+        assert json.loads(gzip.decompress(response.data)) == {"data": ACL, "timestamp": "now"}
+
+class TestEncodeRepresentation:
+    """Testy kodowania poza requestem Flask (tryb ASGI)"""
+
+    def test_explicit_accept_encoding(self):
+        """Test nagłówek Accept-Encoding przekazany jawnie wybiera kodowanie"""
+        payload, length, encoding = encode_representation(lambda: dumps(ACL), {}, None,
+                                                          parse_accept_header("gzip, deflate"))
+        assert encoding == "gzip"
+        assert length == len(payload)
+        assert json.loads(gzip.decompress(payload)) == ACL
+
+    def test_identity_returns_fragments(self):
+        """Test bez kompresji envelope i body są osobnymi fragmentami"""
+        payload, length, encoding = encode_representation(lambda: dumps(ACL), {}, (b'{"data":', b'}'),
+                                                          parse_accept_header(None))
+        assert encoding is None
+        assert length == sum(len(part) for part in payload)
+        assert json.loads(b"".join(payload)) == {"data": ACL}
@@ -0,0 +1,187 @@
+"""
+Testy jednostkowe dla współdzielonej puli połączeń bazy danych
+"""
+
+import time
+import threading
+import pytest
+from types import SimpleNamespace
+from psycopg2 import extensions
+from shared.database.connection import (
+    ConnectionPool, DatabaseConnection, PooledConnection, PoolTimeoutError
+)
+
+class FakeConnection:
+    """Połączenie zliczające rollback i zamknięcie"""
+    def __init__(self):
+        self.closed = 0
+        self.rollbacks = 0
+        self.info = SimpleNamespace(transaction_status=extensions.TRANSACTION_STATUS_IDLE)
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+class FakeConnector:
+    """Fabryka połączeń zapamiętująca utworzone połączenia"""
+    def __init__(self):
+        self.connections = []
+
+    def __call__(self):
+        conn = FakeConnection()
+        self.connections.append(conn)
+        return conn
+
+class FakeDatabase:
+    """Minimalny DatabaseConnection - zwraca połączenia do puli"""
+    def __init__(self, pool):
+        self.pool = pool
+
+    def return_connection(self, conn):
+        self.pool.putconn(conn)
+
+@pytest.fixture
+def connector():
+    return FakeConnector()
+
+class TestConnectionPool:
+    """Testy puli z ograniczonym oczekiwaniem i czasem życia połączeń"""
+
+    def test_reuses_returned_connection(self, connector):
+        """Test zwrócone połączenie jest używane ponownie bez nowego połączenia"""
+        pool = ConnectionPool(connector, min_size=1, max_size=2)
+        first = pool.getconn()
+        pool.putconn(first)
+
+        assert pool.getconn() is first
+        assert len(connector.connections) == 1
+        assert pool.get_metrics()["in_use"] == 1
+
+    def test_exhausted_pool_times_out(self, connector):
+        """Test wyczerpana pula czeka do limitu czasu zamiast od razu zgłaszać PoolError"""
+        pool = ConnectionPool(connector, min_size=0, max_size=1, timeout=0.05)
+        pool.getconn()
+
+        started = time.monotonic()
+        with pytest.raises(PoolTimeoutError):
+            pool.getconn()
+
+        assert time.monotonic() - started >= 0.05
+        metrics = pool.get_metrics()
+        assert metrics["timeouts"] == 1
+        assert metrics["waits"] == 1
+
+    def test_waiter_gets_returned_connection(self, connector):
+        """Test oczekujący wątek otrzymuje połączenie zwrócone przez inny wątek"""
+        pool = ConnectionPool(connector, min_size=0, max_size=1, timeout=5)
+        conn = pool.getconn()
+        threading.Timer(0.05, pool.putconn, args=(conn,)).start()
+
+        assert pool.getconn() is conn
+        metrics = pool.get_metrics()
+        assert metrics["waits"] == 1
+        assert metrics["wait_time_ms_max"] > 0
+        assert metrics["timeouts"] == 0
+
+    def test_expired_connection_is_recycled(self, connector):
+        """Test połączenie starsze niż max_lifetime jest zamykane i zastępowane"""
+        pool = ConnectionPool(connector, min_size=1, max_size=1, max_lifetime=0.01)
+        first = pool.getconn()
+        time.sleep(0.02)
+        pool.putconn(first)
+
+        second = pool.getconn()
+        assert second is not first
+        assert first.closed
+        assert pool.get_metrics()["connections_recycled"] == 1
+
+    def test_closed_connection_not_reused(self, connector):
+        """Test zerwane połączenie nie wraca do puli i zwalnia miejsce"""
+        pool = ConnectionPool(connector, min_size=0, max_size=1, timeout=0.01)
+        conn = pool.getconn()
+        conn.closed = 2
+        pool.putconn(conn)
+
+        assert pool.getconn() is not conn
+        assert pool.get_metrics()["size"] == 1
+
+    def test_open_transaction_rolled_back_on_return(self, connector):
+        """Test połączenie z otwartą transakcją jest wycofywane przed ponownym użyciem"""
+        pool = ConnectionPool(connector, min_size=0, max_size=1)
+        conn = pool.getconn()
+        conn.info.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+        pool.putconn(conn)
+
+        assert conn.rollbacks == 1
+        assert pool.getconn() is conn
+
+    def test_unknown_transaction_state_discarded(self, connector):
+        """Test połączenie w nieznanym stanie transakcji jest zamykane zamiast wracać do puli"""
+        pool = ConnectionPool(connector, min_size=0, max_size=1, timeout=0.01)
+        conn = pool.getconn()
+        conn.info.transaction_status = extensions.TRANSACTION_STATUS_UNKNOWN
+        pool.putconn(conn)
+
+        assert conn.closed
+        assert conn.rollbacks == 0
+        assert pool.getconn() is not conn
+        assert pool.get_metrics()["size"] == 1
+
+    def test_failed_rollback_discards_connection(self, connector):
+        """Test połączenie, którego nie da się wycofać, jest zamykane i zwalnia miejsce"""
+        pool = ConnectionPool(connector, min_size=0, max_size=1, timeout=0.01)
+        conn = pool.getconn()
+        conn.info.transaction_status = extensions.TRANSACTION_STATUS_INERROR
+
+        def broken_rollback():
+            raise RuntimeError("connection lost")
+        conn.rollback = broken_rollback
+        pool.putconn(conn)
+
+        assert conn.closed
+        assert pool.getconn() is not conn
+
+class TestDatabaseConnection:
+    """Testy pobierania połączenia z puli przez DatabaseConnection"""
+
+    def test_failed_setup_releases_slot(self, connector):
+        """Test błąd ustawienia autocommit zamyka połączenie i zwalnia miejsce w puli"""
+        class BrokenConnection(FakeConnection):
+            @property
+            def autocommit(self):
+                return True
+
+            @autocommit.setter
+            def autocommit(self, value):
+                raise RuntimeError("connection lost")
+
+        pool = ConnectionPool(BrokenConnection, min_size=0, max_size=1, timeout=0.01)
+        db = object.__new__(DatabaseConnection)
+        db._pool = pool
+
+        with pytest.raises(RuntimeError):
+            db.get_connection(check_health=False)
+
+        metrics = pool.get_metrics()
+        assert metrics["in_use"] == 0
+        assert metrics["size"] == 0
+
+class TestPooledConnection:
+    """Testy połączenia zwracanego do puli przez close()"""
+
+    def test_close_rolls_back_and_returns_to_pool(self, connector):
+        """Test close() wycofuje otwartą transakcję i zwraca połączenie zamiast je zamykać"""
+        pool = ConnectionPool(connector, min_size=0, max_size=1)
+        raw = pool.getconn()
+        conn = PooledConnection(FakeDatabase(pool), raw)
+
+        conn.close()
+        conn.close()
+
+        assert raw.rollbacks == 1
+        assert not raw.closed
+        assert conn.closed
+        assert pool.get_metrics()["idle"] == 1
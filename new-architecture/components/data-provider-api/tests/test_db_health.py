@@ -0,0 +1,77 @@
+"""
+Testy jednostkowe dla stanu zdrowia bazy danych (circuit breaker)
+"""
+
+import time
+import pytest
+import psycopg2
+import psycopg2.errors
+from shared.database.health import DatabaseHealth
+from shared.database.connection import is_connection_error
+
+class FakeProbe:
+    """Probe zwracający kolejno przygotowane wyniki"""
+    def __init__(self, results):
+        self.results = list(results)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.results.pop(0) if self.results else True
+
+@pytest.fixture
+def health():
+    return DatabaseHealth(failure_threshold=2, probe_interval=0.01)
+
+class TestDatabaseHealth:
+    """Testy circuit breakera bazy danych"""
+
+    def test_opens_after_threshold(self, health):
+        """Test circuit otwiera się po progu kolejnych błędów i odrzuca żądania"""
+        health.record_failure(ConnectionError("refused"))
+        assert health.allow_request()
+
+        health.record_failure(ConnectionError("refused"))
+        assert not health.is_available()
+        assert not health.allow_request()
+        assert health.get_status()["rejected_requests"] == 1
+        assert health.get_status()["trips"] == 1
+
+    def test_success_resets_failures(self, health):
+        """Test udane zapytanie zeruje licznik kolejnych błędów"""
+        health.record_failure(ConnectionError("refused"))
+        health.record_success()
+        health.record_failure(ConnectionError("refused"))
+        assert health.is_available()
+
+    def test_probe_closes_circuit_after_recovery(self, health):
+        """Test background probe działa tylko przy otwartym circuit i zamyka go po odzyskaniu bazy"""
+        probe = FakeProbe([False, False, True])
+        health.set_probe(probe)
+        assert probe.calls == 0
+
+        health.record_failure(ConnectionError("refused"))
+        health.record_failure(ConnectionError("refused"))
+
+        deadline = time.time() + 2
+        while not health.is_available() and time.time() < deadline:
+            time.sleep(0.01)
+
+        assert health.is_available()
+        assert probe.calls == 3
+        assert health.get_status()["probes"] == 3
+
+class TestConnectionErrorClassification:
+    """Testy rozróżniania awarii połączenia od błędów pojedynczego zapytania"""
+
+    def test_connection_loss_is_connectivity_failure(self):
+        """Test zerwane połączenie (bez SQLSTATE) zasila circuit breaker"""
+        assert is_connection_error(psycopg2.OperationalError("server closed the connection unexpectedly"))
+        assert is_connection_error(psycopg2.InterfaceError("connection already closed"))
+
+    def test_statement_errors_are_not_connectivity_failures(self):
+        """Test statement_timeout, konflikt serializacji i zakleszczenie nie otwierają circuit"""
+        assert not is_connection_error(psycopg2.errors.QueryCanceled("canceling statement due to statement timeout"))
+        assert not is_connection_error(psycopg2.errors.SerializationFailure("could not serialize access"))
+        assert not is_connection_error(psycopg2.errors.DeadlockDetected("deadlock detected"))
+        assert not is_connection_error(ValueError("not a driver error"))
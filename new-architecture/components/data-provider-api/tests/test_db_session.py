@@ -0,0 +1,135 @@
+"""
+Testy jednostkowe dla sesji bazy danych (jedno połączenie, jedna transakcja, identity map)
+"""
+
+import pytest
+import shared.database.session as session_module
+import shared.database.base_dao as base_dao_module
+from shared.database.connection import get_db_cursor, get_db_transaction
+from shared.database.session import db_session, get_session, REPEATABLE_READ
+from shared.database.dao import UserDAO
+
+class FakeCursor:
+    """Kursor zapisujący instrukcje do logu połączenia"""
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, params=None):
+        self.conn.log.append(query)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+class FakeConnection:
+    closed = 0
+
+    def __init__(self):
+        self.log = []
+
+    def cursor(self, name=None, cursor_factory=None):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.log.append("COMMIT")
+
+    def rollback(self):
+        self.log.append("ROLLBACK")
+
+class FakeDatabase:
+    """Pula z jednym połączeniem zliczająca pobrania"""
+    def __init__(self):
+        self.conn = FakeConnection()
+        self.checkouts = 0
+        self.returned = 0
+
+    def get_connection(self):
+        self.checkouts += 1
+        return self.conn
+
+    def return_connection(self, conn):
+        self.returned += 1
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDatabase()
+    monkeypatch.setattr(session_module, "get_db_connection", lambda: db)
+    return db
+
+class TestDbSession:
+    """Testy zakresu sesji"""
+
+    def test_one_connection_and_commit(self, db):
+        """Test zapytania w sesji używają jednego połączenia i jednej transakcji REPEATABLE READ"""
+        with db_session(REPEATABLE_READ, readonly=True):
+            for _ in range(3):
+                with get_db_cursor() as cursor:
+                    cursor.execute("SELECT 1")
+
+        assert db.checkouts == db.returned == 1
+        assert db.conn.log == ["SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY",
+                               "SELECT 1", "SELECT 1", "SELECT 1", "COMMIT"]
+        assert get_session() is None
+
+    def test_nested_session_joins(self, db):
+        """Test zagnieżdżona sesja dołącza do zewnętrznej"""
+        with db_session() as outer:
+            with db_session(REPEATABLE_READ) as inner:
+                assert inner is outer
+        assert db.checkouts == 1
+        assert db.conn.log == ["COMMIT"]
+
+    def test_error_rolls_back(self, db):
+        """Test błąd w sesji wycofuje transakcję i zwraca połączenie do puli"""
+        with pytest.raises(RuntimeError):
+            with db_session():
+                raise RuntimeError("boom")
+        assert db.conn.log == ["ROLLBACK"]
+        assert db.returned == 1
+
+    def test_transaction_uses_savepoint(self, db):
+        """Test nieudany blok get_db_transaction wycofuje tylko swój savepoint"""
+        with db_session():
+            with pytest.raises(RuntimeError):
+                with get_db_transaction():
+                    raise RuntimeError("boom")
+        assert db.conn.log == ["SAVEPOINT session_savepoint_1", "ROLLBACK TO SAVEPOINT session_savepoint_1", "COMMIT"]
+
+    def test_invalid_isolation_level(self, db):
+        """Test nieznany poziom izolacji jest błędem"""
+        with pytest.raises(ValueError):
+            with db_session("READ SOMETIMES"):
+                pass
+
+class TestIdentityMap:
+    """Testy identity map w BaseDAO"""
+
+    def test_repeated_lookup_hits_memory(self, db, monkeypatch):
+        """Test ponowne find_by_id / find_by_ids w sesji nie odpytuje bazy"""
+        calls = []
+
+        def fake_execute_prepared(shape, query, params, fetch_one=False):
+            calls.append(shape[0])
+            if fetch_one:
+                return {"user_id": params[0], "username": "a"}
+            return [{"user_id": "user2", "username": "b"}]
+
+        monkeypatch.setattr(base_dao_module, "execute_prepared", fake_execute_prepared)
+        dao = UserDAO()
+        with db_session() as session:
+            user = dao.find_by_id("user1")
+            assert dao.find_by_id("user1") is user
+            users = dao.find_by_ids(["user1", "user2"])
+            assert users["user1"] is user
+            assert dao.find_by_ids(["user2"])["user2"] is users["user2"]
+            assert session.identity_hits == 3
+
+        assert calls == ["find_by_id", "find_by_ids"]
+        # Poza sesją bez identity map
+        dao.find_by_id("user1")
+        assert calls[-1] == "find_by_id" and len(calls) == 3
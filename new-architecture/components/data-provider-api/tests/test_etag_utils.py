@@ -0,0 +1,73 @@
+"""
+Testy jednostkowe dla warunkowych odpowiedzi (ETag / If-None-Match)
+"""
+
+import datetime
+import pytest
+from flask import Flask, jsonify
+from werkzeug.http import parse_etags
+from etag_utils import compute_etag, combine_etags, is_not_modified, not_modified_response
+
+ACL = {"tenant_id": "tenant1", "users": {"user1": {"roles": {"fk": ["fk_admin"]}}}}
+
+@pytest.fixture
+def client():
+    """Tworzy testowego klienta Flask z endpointem warunkowym"""
+    app = Flask(__name__)
+
+    @app.route("/acl")
+    def acl():
+        etag = compute_etag(ACL)
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+        response = jsonify({"data": ACL, "timestamp": datetime.datetime.utcnow().isoformat()})
+        response.set_etag(etag)
+        return response
+
+    with app.test_client() as client:
+        yield client
+
+class TestETag:
+    """Testy liczenia ETag"""
+
+    def test_etag_independent_of_key_order(self):
+        """Test ETag nie zależy od kolejności kluczy"""
+        assert compute_etag({"a": 1, "b": [1, 2]}) == compute_etag({"b": [1, 2], "a": 1})
+
+    def test_etag_changes_with_content(self):
+        """Test ETag zmienia się razem z danymi"""
+        assert compute_etag({"a": 1}) != compute_etag({"a": 2})
+
+    def test_combined_etag_depends_on_parts(self):
+        """Test ETag złożony zależy od części i ich kolejności"""
+        assert combine_etags(["t1:a", "t2:b"]) == combine_etags(["t1:a", "t2:b"])
+        assert combine_etags(["t1:a", "t2:b"]) != combine_etags(["t2:b", "t1:a"])
+
+class TestConditionalResponse:
+    """Testy odpowiedzi 304 Not Modified"""
+
+    def test_returns_etag(self, client):
+        """Test odpowiedź zawiera silny ETag"""
+        response = client.get("/acl")
+        assert response.status_code == 200
+        assert response.headers["ETag"] == f'"{compute_etag(ACL)}"'
+
+    def test_not_modified_when_etag_matches(self, client):
+        """Test 304 gdy ETag klienta jest aktualny mimo zmiennego timestamp"""
+        etag = client.get("/acl").headers["ETag"]
+        response = client.get("/acl", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.data == b""
+        assert response.headers["ETag"] == etag
+
+    def test_full_response_when_etag_stale(self, client):
+        """Test pełna odpowiedź gdy ETag klienta jest nieaktualny"""
+        response = client.get("/acl", headers={"If-None-Match": '"stale"'})
+        assert response.status_code == 200
+
+    def test_explicit_if_none_match(self):
+        """Test nagłówek If-None-Match przekazany jawnie (tryb ASGI) - także słaby ETag"""
+        etag = compute_etag(ACL)
+        assert is_not_modified(etag, parse_etags(f'W/"{etag}"'))
+        assert not is_not_modified(etag, parse_etags('"stale"'))
+        assert not is_not_modified(etag, parse_etags(None))
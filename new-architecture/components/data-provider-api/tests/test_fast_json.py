@@ -0,0 +1,31 @@
+"""
+Testy jednostkowe dla serializacji snapshotów (fast_json)
+"""
+
+import json
+import decimal
+import datetime
+from fast_json import dumps, open_object
+
+class TestDumps:
+    """Testy szybkiego encodera"""
+
+    def test_matches_sorted_compact_json(self):
+        """Test wynik jest identyczny z json.dumps z posortowanymi kluczami"""
+        data = {"users": {"user2": {"full_name": "Łukasz"}, "user1": {"roles": {"fk": ["fk_admin"]}}}, "tenant_id": "t1"}
+        expected = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        assert dumps(data) == expected
+
+    def test_independent_of_key_order(self):
+        """Test te same dane dają te same bajty"""
+        assert dumps({"a": 1, "b": 2}) == dumps({"b": 2, "a": 1})
+
+    def test_non_json_types(self):
+        """Test Decimal i datetime są serializowane jako tekst"""
+        data = {"amount": decimal.Decimal("1.50"), "at": datetime.datetime(2024, 1, 2, 3, 4, 5)}
+        assert json.loads(dumps(data)) == {"amount": "1.50", "at": "2024-01-02T03:04:05"}
+
+    def test_open_object(self):
+        """Test obiekt bez zamykającego nawiasu pozwala dokleić klucze"""
+        body = open_object(dumps({"a": 1}))
+        assert json.loads(body + b',"b":2}') == {"a": 1, "b": 2}
@@ -0,0 +1,102 @@
+"""
+Testy jednostkowe dla stronicowania kursorem (keyset)
+"""
+
+import datetime
+from contextlib import contextmanager
+import pytest
+import shared.database.base_dao as base_dao_module
+from shared.database.dao import UserDAO
+from pagination import encode_cursor, decode_cursor, parse_page_args, split_page, InvalidPageRequest
+
+CREATED = datetime.datetime(2025, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc)
+
+class TestCursorTokens:
+    """Testy tokenów kursora list API"""
+
+    def test_roundtrip(self):
+        """Test token koduje klucz sortowania, daty jako ISO"""
+        token = encode_cursor((CREATED, "user1"))
+        assert "=" not in token
+        assert decode_cursor(token, 2) == [CREATED.isoformat(), "user1"]
+
+    def test_invalid_token(self):
+        """Test uszkodzony token lub token innej listy jest odrzucany"""
+        with pytest.raises(InvalidPageRequest):
+            decode_cursor("not-a-cursor", 2)
+        with pytest.raises(InvalidPageRequest):
+            decode_cursor(encode_cursor(("only-one",)), 2)
+
+    def test_parse_without_pagination(self):
+        """Test brak limit i cursor zachowuje pełną listę"""
+        assert parse_page_args({}, 2) == (None, None)
+
+    def test_parse_limit_bounds(self):
+        """Test limit musi być liczbą w dozwolonym zakresie"""
+        assert parse_page_args({"limit": "50"}, 2) == (50, None)
+        for limit in ("0", "abc", "100000"):
+            with pytest.raises(InvalidPageRequest):
+                parse_page_args({"limit": limit}, 2)
+
+    def test_split_page(self):
+        """Test dodatkowy wiersz oznacza kolejną stronę, token wskazuje ostatni wiersz strony"""
+        rows = [{"created_at": CREATED, "user_id": f"user{i}"} for i in range(3)]
+        page, next_cursor = split_page(rows, 2, lambda r: (r["created_at"], r["user_id"]))
+
+        assert page == rows[:2]
+        assert decode_cursor(next_cursor, 2) == [CREATED.isoformat(), "user1"]
+        assert split_page(rows, 3, lambda r: (r["created_at"], r["user_id"]))[1] is None
+
+class FakeServerCursor:
+    """Kursor serwerowy zwracający przygotowane wiersze (krotki)"""
+    def __init__(self, columns, rows):
+        self.description = [(column,) for column in columns]
+        self.rows = rows
+        self.executed = None
+
+    def execute(self, query, params):
+        self.executed = (query, params)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+class TestDAOPagination:
+    """Testy find_page i find_iter w BaseDAO"""
+
+    def test_find_page_seeks_after_last_id(self, monkeypatch):
+        """Test następna strona zaczyna się po ostatnim ID zamiast od OFFSET"""
+        calls = []
+
+        def fake_execute_prepared(shape, query, params):
+            calls.append((query, params))
+            return [{"user_id": f"user{i}", "username": f"user{i}"} for i in range(3)]
+
+        monkeypatch.setattr(base_dao_module, "execute_prepared", fake_execute_prepared)
+        users, next_after = UserDAO().find_page(2, after="user0", criteria={"status": "active"})
+
+        assert calls == [("SELECT * FROM users WHERE status = $1 AND user_id > $2 ORDER BY user_id LIMIT $3",
+                          ["active", "user0", 3])]
+        assert [user.user_id for user in users] == ["user0", "user1"]
+        assert next_after == "user1"
+
+    @pytest.mark.parametrize("limit", [0, -1])
+    def test_find_page_rejects_invalid_limit(self, limit, monkeypatch):
+        """Test limit mniejszy niż 1 jest odrzucany przed zapytaniem (jak parse_page_args)"""
+        monkeypatch.setattr(base_dao_module, "execute_prepared", lambda *args: pytest.fail("query executed"))
+        with pytest.raises(ValueError):
+            UserDAO().find_page(limit)
+
+    def test_find_iter_streams_from_server_cursor(self, monkeypatch):
+        """Test find_iter czyta wiersze z kursora serwerowego"""
+        cursor = FakeServerCursor(["user_id", "username"], [("user1", "a"), ("user2", "b")])
+
+        @contextmanager
+        def fake_server_cursor(itersize, dict_cursor=True):
+            assert itersize == 500 and not dict_cursor
+            yield cursor
+
+        monkeypatch.setattr(base_dao_module, "get_db_server_cursor", fake_server_cursor)
+        users = list(UserDAO().find_iter({"status": "active"}, itersize=500))
+
+        assert [user.user_id for user in users] == ["user1", "user2"]
+        assert cursor.executed == ("SELECT * FROM users WHERE status = %s ORDER BY user_id", ["active"])
@@ -0,0 +1,117 @@
+"""
+Testy jednostkowe dla cache'u prepared statements w BaseDAO
+"""
+
+import pytest
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from shared.database.prepared import PreparedStatementCache, array_literal
+from shared.database.dao import UserDAO
+
+class FakeConnection:
+    """Połączenie - klucz cache'u (musi wspierać weakref)"""
+    def __init__(self, autocommit=True):
+        self.autocommit = autocommit
+
+    def get_transaction_status(self):
+        return TRANSACTION_STATUS_IDLE
+
+class FakeCursor:
+    """Kursor zapisujący wykonane instrukcje"""
+    def __init__(self, connection, fail_execute=False, fail_prepare=False):
+        self.connection = connection
+        self.fail_execute = fail_execute
+        self.fail_prepare = fail_prepare
+        self.statements = []
+
+    def execute(self, query, params=None):
+        self.statements.append((query, params))
+        if self.fail_execute and query.startswith("EXECUTE"):
+            raise RuntimeError("cached plan must not change result type")
+        if self.fail_prepare and query.startswith("PREPARE"):
+            raise RuntimeError("relation does not exist")
+
+@pytest.fixture
+def cache():
+    return PreparedStatementCache(max_size=2)
+
+class TestPreparedStatementCache:
+    """Testy przygotowywania i ponownego użycia zapytań"""
+
+    def test_prepares_once_per_connection(self, cache):
+        """Test pierwsze wykonanie przygotowuje zapytanie, kolejne używają EXECUTE"""
+        cursor = FakeCursor(FakeConnection())
+        cache.execute(cursor, "shape", "SELECT * FROM users WHERE user_id = $1", ("u1",))
+        cache.execute(cursor, "shape", "SELECT * FROM users WHERE user_id = $1", ("u2",))
+
+        prepares = [q for q, _ in cursor.statements if q.startswith("PREPARE")]
+        assert prepares == ["PREPARE dao_stmt_1 AS SELECT * FROM users WHERE user_id = $1"]
+        assert cursor.statements[-1] == ("EXECUTE dao_stmt_1 (%s)", ("u2",))
+        assert cache.get_metrics()["hits"] == 1
+
+    def test_each_connection_prepares_separately(self, cache):
+        """Test prepared statements są przypisane do połączenia"""
+        first = FakeCursor(FakeConnection())
+        second = FakeCursor(FakeConnection())
+        cache.execute(first, "shape", "SELECT 1", ())
+        cache.execute(second, "shape", "SELECT 1", ())
+
+        assert cache.get_metrics()["prepares"] == 2
+        assert second.statements[-1] == ("EXECUTE dao_stmt_2", None)
+
+    def test_least_recently_used_is_deallocated(self, cache):
+        """Test przekroczenie limitu zwalnia najdawniej używane zapytanie"""
+        cursor = FakeCursor(FakeConnection())
+        cache.execute(cursor, "a", "SELECT 1", ())
+        cache.execute(cursor, "b", "SELECT 2", ())
+        cache.execute(cursor, "a", "SELECT 1", ())
+        cache.execute(cursor, "c", "SELECT 3", ())
+
+        assert ("DEALLOCATE dao_stmt_2", None) in cursor.statements
+        assert cache.get_metrics()["evictions"] == 1
+
+    def test_failed_execute_prepares_again(self, cache):
+        """Test błąd EXECUTE usuwa zapytanie z cache'u, a przy kolejnym użyciu połączenia zwalnia je na serwerze"""
+        connection = FakeConnection()
+        with pytest.raises(RuntimeError):
+            cache.execute(FakeCursor(connection, fail_execute=True), "shape", "SELECT 1", ())
+
+        cursor = FakeCursor(connection)
+        cache.execute(cursor, "shape", "SELECT 1", ())
+        assert [query for query, _ in cursor.statements] == [
+            "DEALLOCATE dao_stmt_1", "PREPARE dao_stmt_2 AS SELECT 1", "EXECUTE dao_stmt_2"]
+
+    def test_failed_prepare_keeps_transaction(self, cache):
+        """Test błąd PREPARE w transakcji jest wycofany do savepointu, a zapytanie wykonane bez przygotowania"""
+        cursor = FakeCursor(FakeConnection(autocommit=False), fail_prepare=True)
+        cache.execute(cursor, "shape", "SELECT * FROM users WHERE user_id = $1", ("u1",))
+
+        assert [query for query, _ in cursor.statements] == [
+            "SAVEPOINT prepared_statement_cache",
+            "PREPARE dao_stmt_1 AS SELECT * FROM users WHERE user_id = $1",
+            "ROLLBACK TO SAVEPOINT prepared_statement_cache",
+            "SELECT * FROM users WHERE user_id = %s",
+        ]
+        assert cache.get_metrics()["errors"] == 1
+
+    def test_disabled_cache_runs_plain_query(self):
+        """Test cache wyłączony (rozmiar 0) wykonuje zapytanie bez PREPARE"""
+        cursor = FakeCursor(FakeConnection())
+        PreparedStatementCache(max_size=0).execute(cursor, "shape", "SELECT * FROM users WHERE a = $1 AND b = $2", (1, 2))
+        assert cursor.statements == [("SELECT * FROM users WHERE a = %s AND b = %s", (1, 2))]
+
+class TestQueryShape:
+    """Testy budowania klauzuli WHERE z kształtem zapytania"""
+
+    def test_shape_ignores_values_and_list_length(self):
+        """Test kształt zależy od kluczy i rodzaju wartości, nie od samych wartości"""
+        dao = UserDAO()
+        clause, params, shape = dao._where({"tenant_id": "t1", "user_id": ["u1", "u2"], "deleted_at": None})
+        _, _, other_shape = dao._where({"tenant_id": "t2", "user_id": ["u3"], "deleted_at": None})
+
+        assert clause == "tenant_id = $1 AND user_id = ANY($2) AND deleted_at IS NULL"
+        assert params == ["t1", '{"u1","u2"}']
+        assert shape == other_shape
+
+    def test_array_literal_escapes_elements(self):
+        """Test literał tablicy escapuje cudzysłowy i backslashe"""
+        assert array_literal(['a"b', 'c\\d', None]) == '{"a\\"b","c\\\\d",NULL}'
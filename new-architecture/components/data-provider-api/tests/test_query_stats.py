@@ -0,0 +1,108 @@
+"""
+Testy jednostkowe dla instrumentacji zapytań SQL (/debug/db-stats)
+"""
+
+import logging
+import pytest
+import shared.database.query_stats as query_stats_module
+from shared.database.query_stats import QueryStats, normalize_statement, redact_params, instrumented_cursor, OTHER_STATEMENTS
+
+class TestNormalizeStatement:
+    """Testy normalizacji zapytań do klucza statystyk"""
+
+    def test_literals_and_whitespace(self):
+        """Test literały są zastępowane ?, parametry i identyfikatory zostają"""
+        query = "SELECT *\n  FROM users WHERE status = 'active' AND age > 18 AND user_id = $1 AND t2.x = %s LIMIT 10"
+        assert normalize_statement(query) == "SELECT * FROM users WHERE status = ? AND age > ? AND user_id = $1 AND t2.x = %s LIMIT ?"
+
+    def test_values_lists_collapse(self):
+        """Test wielowierszowy INSERT daje jeden klucz niezależnie od liczby wierszy"""
+        two = "INSERT INTO user_access (user_id) VALUES ('a'),('b') ON CONFLICT (user_id) DO NOTHING"
+        three = "INSERT INTO user_access (user_id) VALUES ('a'),('b'),('c') ON CONFLICT (user_id) DO NOTHING"
+        assert normalize_statement(two) == normalize_statement(three) == \
+            "INSERT INTO user_access (user_id) VALUES (...) ON CONFLICT (user_id) DO NOTHING"
+
+    def test_prepared_statement_names(self):
+        """Test nazwy prepared statements nie tworzą osobnych kluczy"""
+        assert normalize_statement("DEALLOCATE dao_stmt_7") == "DEALLOCATE ?"
+
+    def test_execute_resolves_prepared_query(self):
+        """Test EXECUTE jest raportowany jako przygotowane zapytanie"""
+        stats = QueryStats()
+        stats.register_prepared("dao_stmt_3", "SELECT * FROM users WHERE user_id = $1")
+        assert stats.statement_for("EXECUTE dao_stmt_3 ('user1')") == "SELECT * FROM users WHERE user_id = $1"
+
+    def test_redact_params(self):
+        """Test w logu zostają tylko typy parametrów"""
+        assert redact_params(("secret", 5, None)) == ["<str>", "<int>", "<NoneType>"]
+        assert redact_params({"email": "a@b.c"}) == {"email": "<str>"}
+
+class TestQueryStats:
+    """Testy agregacji statystyk per zapytanie"""
+
+    def test_percentiles_from_histogram(self):
+        """Test percentyle są odczytywane z kubełków histogramu"""
+        stats = QueryStats(slow_query_ms=1000)
+        for _ in range(90):
+            stats.record("SELECT ?", 0.8, rows=2)
+        for _ in range(10):
+            stats.record("SELECT ?", 40.0)
+
+        entry = stats.get_stats()["statements"][0]
+        assert entry["calls"] == 100
+        assert entry["rows"] == 180
+        assert entry["p50_ms"] == 1
+        assert entry["p95_ms"] == 40.0
+        assert entry["histogram_ms"]["1"] == 90
+
+    def test_statement_limit_and_reset(self):
+        """Test nadmiarowe zapytania trafiają do <other>, reset czyści statystyki"""
+        stats = QueryStats(max_statements=1)
+        stats.record("SELECT ?", 1.0)
+        stats.record("SELECT * FROM users", 1.0)
+
+        assert [entry["statement"] for entry in stats.get_stats()["statements"]] == ["SELECT ?", OTHER_STATEMENTS]
+        stats.reset()
+        assert stats.get_stats()["statements"] == []
+
+class FakeConnection:
+    encoding = "UTF8"
+
+class FakeCursor:
+    """Bazowy kursor symulujący wykonanie zapytania"""
+    def __init__(self, rowcount=3, error=None):
+        self.connection = FakeConnection()
+        self.name = None
+        self.rowcount = rowcount
+        self.error = error
+
+    def execute(self, query, vars=None):
+        if self.error:
+            raise self.error
+
+class TestInstrumentedCursor:
+    """Testy kursora raportującego zapytania"""
+
+    @pytest.fixture
+    def stats(self, monkeypatch):
+        stats = QueryStats(slow_query_ms=0)
+        monkeypatch.setattr(query_stats_module, "query_stats", stats)
+        return stats
+
+    def test_records_and_logs_slow_query(self, stats, caplog):
+        """Test zapytanie jest zliczane, a wolne logowane bez wartości parametrów"""
+        cursor = instrumented_cursor(FakeCursor)()
+        with caplog.at_level(logging.WARNING, logger=query_stats_module.__name__):
+            cursor.execute(b"SELECT * FROM users WHERE email = %s", ("secret@example.com",))
+
+        entry = stats.get_stats()["statements"][0]
+        assert (entry["statement"], entry["calls"], entry["rows"]) == ("SELECT * FROM users WHERE email = %s", 1, 3)
+        assert "Slow query" in caplog.text
+        assert "secret@example.com" not in caplog.text
+
+    def test_records_errors(self, stats):
+        """Test błąd zapytania jest zliczany i przekazywany dalej"""
+        cursor = instrumented_cursor(FakeCursor)(error=RuntimeError("boom"))
+        with pytest.raises(RuntimeError):
+            cursor.execute("SELECT 1")
+        assert stats.get_stats()["statements"][0]["errors"] == 1
@@ -0,0 +1,56 @@
+"""
+Testy jednostkowe dla mapowania wierszy-krotek na modele ze __slots__
+"""
+
+import pytest
+import shared.database.base_dao as base_dao_module
+from shared.database.models import User, Role, row_mapper
+from shared.database.dao import RoleDAO
+
+class TestRowMapper:
+    """Testy row_mapper"""
+
+    def test_maps_columns_by_name(self):
+        """Test kolumny są mapowane po nazwie niezależnie od kolejności, nadmiarowe pomijane"""
+        build = row_mapper(User, ("username", "extra", "user_id", "metadata"))
+        user = build(("alice", 1, "user1", {"k": "v"}))
+
+        assert (user.user_id, user.username, user.metadata) == ("user1", "alice", {"k": "v"})
+        assert user.status == "active"
+        assert not hasattr(user, "__dict__")
+
+    def test_missing_defaults_and_factories(self):
+        """Test brakujące kolumny dostają wartości domyślne, metadata nowy słownik na wiersz"""
+        build = row_mapper(User, ("user_id", "username"))
+        first, second = build(("user1", "a")), build(("user2", "b"))
+
+        assert first.metadata == {} and first.metadata is not second.metadata
+        assert first.status == "active"
+
+    def test_required_column_missing(self):
+        """Test brak wymaganej kolumny jest błędem"""
+        with pytest.raises(KeyError):
+            row_mapper(User, ("user_id",))
+
+    def test_repeated_ids_are_interned(self):
+        """Test powtarzające się identyfikatory (app_id, role_name) współdzielą jeden obiekt str"""
+        build = row_mapper(Role, ("role_id", "app_id", "role_name"))
+        first = build(("r1", "".join(["fk", "_app"]), "".join(["ad", "min"])))
+        second = build(("r2", "".join(["fk", "_app"]), "".join(["ad", "min"])))
+
+        assert first.app_id is second.app_id
+        assert first.role_name is second.role_name
+
+class TestDAOTupleRows:
+    """Testy szybkiej ścieżki DAO na kursorze krotkowym"""
+
+    def test_find_by_criteria_maps_tuple_rows(self, monkeypatch):
+        """Test find_by_criteria buduje modele z krotek bez pośrednich słowników"""
+        def fake_execute_prepared_rows(shape, query, params):
+            return ("role_id", "app_id", "role_name", "metadata"), [("r1", "fk", "admin", None), ("r2", "fk", "viewer", {})]
+
+        monkeypatch.setattr(base_dao_module, "execute_prepared_rows", fake_execute_prepared_rows)
+        roles = RoleDAO().find_by_criteria({"app_id": "fk"})
+
+        assert [(role.role_id, role.role_name) for role in roles] == [("r1", "admin"), ("r2", "viewer")]
+        assert roles[0].is_system_role is False
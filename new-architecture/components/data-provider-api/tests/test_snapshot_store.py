@@ -0,0 +1,143 @@
+"""
+Testy jednostkowe dla magazynu snapshotów na dysku (Snapshot Store)
+"""
+
+import gzip
+import json
+import asyncio
+import time
+import pytest
+from flask import Flask
+import snapshot_store as store_module
+from snapshot_store import SnapshotStore, StoredSnapshot, stored_json_response
+from acl_cache import ACLSnapshot
+
+ACL = {"tenant_id": "tenant1", "users": {f"user{i}": {"permissions": {"fk": ["view_entry"]}} for i in range(100)}}
+
+class CountingBuilder:
+    """Builder zliczający budowanie snapshotów"""
+    def __init__(self, data=ACL):
+        self.data = data
+        self.calls = 0
+
+    def __call__(self, tenant_id):
+        self.calls += 1
+        return ACLSnapshot(tenant_id, 0, self.data, time.time()) if self.data is not None else None
+
+@pytest.fixture
+def store(tmp_path):
+    return SnapshotStore(str(tmp_path), ttl_seconds=0)
+
+class TestSnapshotStore:
+    """Testy zapisu i odczytu snapshotów"""
+
+    def test_put_and_get_roundtrip(self, store):
+        """Test zapisany snapshot jest odczytywany przez mmap z nagłówkiem"""
+        assert store.put("tenant1", "expanded", b'{"a":1}', {"etag": "e1", "version": 3}, time.time_ns())
+        stored = store.get("tenant1", "expanded")
+
+        assert isinstance(stored, StoredSnapshot)
+        assert stored.etag == "e1"
+        assert stored.version == 3
+        assert stored.body == b'{"a":1}'
+        assert b"".join(stored.chunks(chunk_size=2)) == b'{"a":1}'
+
+    def test_get_or_build_builds_once(self, store):
+        """Test drugi odczyt (także z innej instancji - innego workera) nie buduje snapshotu"""
+        builder = CountingBuilder()
+        first = store.get_or_build("tenant1", "expanded", builder)
+        other_worker = SnapshotStore(store.directory, ttl_seconds=0)
+        second = other_worker.get_or_build("tenant1", "expanded", builder)
+
+        assert builder.calls == 1
+        assert json.loads(second.body) == ACL
+        assert second.etag == first.etag
+
+    def test_get_or_build_async_shares_files(self, store):
+        """Test snapshot zbudowany asynchronicznie jest odczytywany przez tryb sync"""
+        builder = CountingBuilder()
+
+        async def async_builder(tenant_id):
+            return builder(tenant_id)
+
+        first = asyncio.run(store.get_or_build_async("tenant1", "expanded", async_builder))
+        second = store.get_or_build("tenant1", "expanded", builder)
+
+        assert builder.calls == 1
+        assert second.etag == first.etag
+
+    def test_missing_tenant_not_stored(self, store):
+        """Test brak danych nie tworzy pliku"""
+        builder = CountingBuilder(data=None)
+        assert store.get_or_build("nonexistent", "expanded", builder) is None
+        assert store.get("nonexistent", "expanded") is None
+
+    def test_invalidate_removes_all_layouts(self, store):
+        """Test unieważnienie usuwa snapshoty tenanta we wszystkich układach i kodowaniach"""
+        started = time.time_ns()
+        store.put("tenant1", "expanded", b"{}", {"etag": "e1"}, started)
+        store.put("tenant1", "normalized", b"{}", {"etag": "e2"}, started)
+        store.put("tenant1", "expanded", b"gz", {"etag": "e1"}, started, "gzip")
+        store.put("tenant2", "expanded", b"{}", {"etag": "e3"}, started)
+
+        store.invalidate("tenant1")
+
+        assert store.get("tenant1", "expanded") is None
+        assert store.get("tenant1", "normalized") is None
+        assert store.get("tenant1", "expanded", "gzip") is None
+        assert store.get("tenant2", "expanded") is not None
+
+    def test_build_started_before_invalidation_is_discarded(self, store):
+        """Test snapshot budowany przed unieważnieniem nie jest zapisywany"""
+        started = time.time_ns()
+        store.invalidate("tenant1")
+
+        assert not store.put("tenant1", "expanded", b"{}", {"etag": "stale"}, started)
+        assert store.get("tenant1", "expanded") is None
+        assert store.get_metrics()["discarded_writes"] == 1
+
+    def test_expired_snapshot_is_a_miss(self, tmp_path):
+        """Test snapshot starszy niż TTL jest traktowany jak brak"""
+        store = SnapshotStore(str(tmp_path), ttl_seconds=0.01)
+        store.put("tenant1", "expanded", b"{}", {"etag": "e1"}, time.time_ns())
+        time.sleep(0.05)
+        assert store.get("tenant1", "expanded") is None
+
+    def test_tenant_id_cannot_escape_directory(self, store, tmp_path):
+        """Test identyfikator tenanta nie może wskazać ścieżki poza magazynem"""
+        store.put("../evil", "expanded", b"{}", {"etag": "e1"}, time.time_ns())
+        assert not (tmp_path.parent / "evil").exists()
+        assert store.get("../evil", "expanded").etag == "e1"
+
+class TestStoredResponse:
+    """Testy odpowiedzi serwowanych z magazynu"""
+
+    @pytest.fixture
+    def client(self, store, monkeypatch):
+        monkeypatch.setattr(store_module, "snapshot_store", store)
+        app = Flask(__name__)
+        builder = CountingBuilder()
+
+        @app.route("/acl")
+        def acl():
+            snapshot = store.get_or_build("tenant1", "expanded", builder)
+            return stored_json_response("tenant1", "expanded", snapshot, (b'{"data":', b',"timestamp":"now"}\n'))
+
+        with app.test_client() as client:
+            yield client
+
+    def test_identity_response(self, client):
+        """Test odpowiedź zawiera envelope i dane z pliku"""
+        response = client.get("/acl")
+        assert response.get_json() == {"data": ACL, "timestamp": "now"}
+        assert int(response.headers["Content-Length"]) == len(response.data)
+
+    def test_compressed_representation_stored(self, client, store):
+        """Test skompresowana reprezentacja jest zapisywana i używana ponownie"""
+        first = client.get("/acl", headers={"Accept-Encoding": "gzip"})
+        second = client.get("/acl", headers={"Accept-Encoding": "gzip"})
+
+        assert first.headers["Content-Encoding"] == "gzip"
+        assert json.loads(gzip.decompress(second.data)) == {"data": ACL, "timestamp": "now"}
+        assert second.data == first.data
+        assert store.get("tenant1", "expanded", "gzip") is not None
@@ -0,0 +1,222 @@
+"""
+Testy jednostkowe dla Tenant ACL Builder
+"""
+
+import asyncio
+import pytest
+from contextlib import asynccontextmanager
+import async_database
+from tenant_acl_builder import (
+    TenantACLBuilder, AsyncTenantACLBuilder, TENANT_QUERY, USERS_QUERY, DIRECT_ROLES_QUERY,
+    EFFECTIVE_PERMISSIONS_QUERY, COMPANIES_QUERY, TEAMS_QUERY,
+    MATERIALIZED_USERS_QUERY, CONSISTENCY_CHECK_QUERY, USER_QUERY, USER_DIRECT_ROLES_QUERY,
+    USER_EFFECTIVE_PERMISSIONS_QUERY, USER_COMPANIES_QUERY, USER_TEAMS_QUERY,
+    EFFECTIVE_ROLES_QUERY, ROLE_PERMISSIONS_QUERY, NORMALIZED_LAYOUT
+)
+
+class FakeCursor:
+    """Kursor zwracający przygotowane wiersze dla każdego zapytania"""
+    def __init__(self, results):
+        self.results = results
+        self.executed = []
+        self._last = None
+
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+        self._last = query
+
+    def fetchall(self):
+        return self.results.get(self._last, [])
+
+class FakeAsyncCursor(FakeCursor):
+    """Asynchroniczny odpowiednik FakeCursor (interfejs psycopg 3 AsyncCursor)"""
+    async def execute(self, query, params=None):
+        super().execute(query, params)
+
+    async def fetchall(self):
+        return super().fetchall()
+
+@pytest.fixture
+def tenant_rows():
+    return {
+        TENANT_QUERY: [{"tenant_id": "tenant1", "tenant_name": "Test Company 1"}],
+        USERS_QUERY: [
+            {"user_id": "user1", "email": "admin@test.com", "full_name": "Admin"},
+            {"user_id": "user2", "email": None, "full_name": "Viewer"},
+        ],
+        DIRECT_ROLES_QUERY: [
+            {"user_id": "user1", "app_id": "fk", "role_name": "fk_admin"},
+            {"user_id": "user1", "app_id": "hr", "role_name": "hr_viewer"},
+        ],
+        EFFECTIVE_PERMISSIONS_QUERY: [
+            {"user_id": "user1", "app_id": "fk", "permission_name": "edit_entry"},
+            {"user_id": "user1", "app_id": "fk", "permission_name": "view_entry"},
+            {"user_id": "user2", "app_id": "hr", "permission_name": "view_profile"},
+        ],
+        COMPANIES_QUERY: [
+            {"user_id": "user1", "company_id": "company1"},
+            {"user_id": "user1", "company_id": "company2"},
+        ],
+        TEAMS_QUERY: [
+            {"user_id": "user2", "team_name": "Księgowość"},
+        ],
+    }
+
+class TestTenantACLBuilder:
+    """Testy budowania ACL tenanta"""
+
+    def test_build_groups_rows_per_user(self, tenant_rows):
+        """Test grupowania wierszy w strukturę users/roles/permissions/companies/teams"""
+        acl = TenantACLBuilder(FakeCursor(tenant_rows)).build("tenant1")
+
+        assert acl["tenant_id"] == "tenant1"
+        assert acl["tenant_name"] == "Test Company 1"
+        assert acl["roles"] == {}
+        assert acl["permissions"] == {}
+        assert acl["users"]["user1"] == {
+            "email": "admin@test.com",
+            "full_name": "Admin",
+            "roles": {"fk": ["fk_admin"], "hr": ["hr_viewer"]},
+            "permissions": {"fk": ["edit_entry", "view_entry"]},
+            "companies": ["company1", "company2"],
+            "teams": []
+        }
+        assert acl["users"]["user2"] == {
+            "email": None,
+            "full_name": "Viewer",
+            "roles": {},
+            "permissions": {"hr": ["view_profile"]},
+            "companies": [],
+            "teams": ["Księgowość"]
+        }
+
+    def test_query_count_is_constant(self, tenant_rows):
+        """Test sprawdza stałą liczbę zapytań niezależnie od liczby użytkowników"""
+        tenant_rows[USERS_QUERY] = [
+            {"user_id": f"user{i}", "email": None, "full_name": None} for i in range(1000)
+        ]
+        cursor = FakeCursor(tenant_rows)
+        acl = TenantACLBuilder(cursor).build("tenant1")
+
+        assert len(acl["users"]) == 1000
+        assert len(cursor.executed) == 6
+
+    def test_missing_tenant_returns_none(self):
+        """Test zwraca None dla nieistniejącego tenanta bez dalszych zapytań"""
+        cursor = FakeCursor({})
+        assert TenantACLBuilder(cursor).build("nonexistent") is None
+        assert len(cursor.executed) == 1
+
+    def test_materialized_build_matches_query_build(self, tenant_rows):
+        """Test odczyt z tenant_user_acl daje ten sam dokument jednym zapytaniem o użytkowników"""
+        expected = TenantACLBuilder(FakeCursor(tenant_rows)).build("tenant1")
+        materialized_rows = {
+            TENANT_QUERY: tenant_rows[TENANT_QUERY],
+            MATERIALIZED_USERS_QUERY: [
+                {"user_id": user_id, **user} for user_id, user in expected["users"].items()
+            ],
+        }
+        cursor = FakeCursor(materialized_rows)
+
+        assert TenantACLBuilder(cursor, materialized=True).build("tenant1") == expected
+        assert len(cursor.executed) == 2
+
+    def test_consistency_check_returns_issues(self):
+        """Test sprawdzenie spójności zwraca rozbieżne wiersze"""
+        cursor = FakeCursor({
+            CONSISTENCY_CHECK_QUERY: [{"tenant_id": "tenant1", "user_id": "user1", "issue": "stale"}]
+        })
+
+        issues = TenantACLBuilder(cursor).check_consistency("tenant1")
+        assert issues == [{"tenant_id": "tenant1", "user_id": "user1", "issue": "stale"}]
+        assert cursor.executed[0][1] == {"tenant_id": "tenant1"}
+
+    def test_build_user_matches_tenant_entry(self, tenant_rows):
+        """Test wpis pojedynczego użytkownika jest identyczny z wpisem w ACL tenanta"""
+        expected = TenantACLBuilder(FakeCursor(tenant_rows)).build("tenant1")["users"]["user1"]
+        user_rows = {
+            USER_QUERY: tenant_rows[USERS_QUERY][:1],
+            USER_DIRECT_ROLES_QUERY: tenant_rows[DIRECT_ROLES_QUERY],
+            USER_EFFECTIVE_PERMISSIONS_QUERY: tenant_rows[EFFECTIVE_PERMISSIONS_QUERY][:2],
+            USER_COMPANIES_QUERY: tenant_rows[COMPANIES_QUERY],
+            USER_TEAMS_QUERY: [],
+        }
+        cursor = FakeCursor(user_rows)
+
+        assert TenantACLBuilder(cursor).build_user("tenant1", "user1") == expected
+        assert cursor.executed[0][1] == {"tenant_id": "tenant1", "user_id": "user1"}
+
+    def test_build_user_outside_tenant_returns_none(self):
+        """Test użytkownik spoza tenanta zwraca None bez dalszych zapytań"""
+        cursor = FakeCursor({})
+        assert TenantACLBuilder(cursor).build_user("tenant1", "stranger") is None
+        assert len(cursor.executed) == 1
+
+    def test_normalized_layout_resolves_to_expanded_permissions(self, tenant_rows):
+        """Test układ normalized: referencje ról + role_permissions dają te same uprawnienia"""
+        tenant_rows[EFFECTIVE_ROLES_QUERY] = [
+            {"user_id": "user1", "app_id": "fk", "role_name": "fk_admin"},
+            {"user_id": "user1", "app_id": "hr", "role_name": "hr_viewer"},
+            {"user_id": "user2", "app_id": "hr", "role_name": "hr_team_viewer"},
+        ]
+        tenant_rows[ROLE_PERMISSIONS_QUERY] = [
+            {"app_id": "fk", "role_name": "fk_admin", "permission_name": "edit_entry"},
+            {"app_id": "fk", "role_name": "fk_admin", "permission_name": "view_entry"},
+            {"app_id": "hr", "role_name": "hr_team_viewer", "permission_name": "view_profile"},
+        ]
+        expanded = TenantACLBuilder(FakeCursor(tenant_rows)).build("tenant1")
+        cursor = FakeCursor(tenant_rows)
+        acl = TenantACLBuilder(cursor).build("tenant1", NORMALIZED_LAYOUT)
+
+        assert acl["layout"] == NORMALIZED_LAYOUT
+        assert EFFECTIVE_PERMISSIONS_QUERY not in [query for query, _ in cursor.executed]
+        assert acl["role_permissions"]["hr"]["hr_viewer"] == []
+        for user_id, user in acl["users"].items():
+            assert "permissions" not in user
+            resolved = {
+                app_id: sorted({p for role in roles for p in acl["role_permissions"][app_id][role]})
+                for app_id, roles in user["effective_roles"].items()
+            }
+            assert {app: perms for app, perms in resolved.items() if perms} == expanded["users"][user_id]["permissions"]
+
+    def test_unknown_layout_raises(self, tenant_rows):
+        """Test nieznany układ dokumentu jest odrzucany"""
+        with pytest.raises(ValueError):
+            TenantACLBuilder(FakeCursor(tenant_rows)).build("tenant1", "compact")
+
+class TestAsyncTenantACLBuilder:
+    """Testy budowania ACL tenanta na kursorze asynchronicznym"""
+
+    @pytest.mark.parametrize("layout", ["expanded", NORMALIZED_LAYOUT])
+    def test_async_build_matches_sync_build(self, tenant_rows, layout):
+        """Test tryb async wykonuje te same zapytania i zwraca ten sam dokument"""
+        sync_cursor = FakeCursor(tenant_rows)
+        async_cursor = FakeAsyncCursor(tenant_rows)
+
+        expected = TenantACLBuilder(sync_cursor).build("tenant1", layout)
+        acl = asyncio.run(AsyncTenantACLBuilder(async_cursor).build("tenant1", layout))
+
+        assert acl == expected
+        assert async_cursor.executed == sync_cursor.executed
+
+    def test_async_missing_tenant_returns_none(self):
+        """Test brak tenanta kończy budowanie po pierwszym zapytaniu"""
+        cursor = FakeAsyncCursor({})
+        assert asyncio.run(AsyncTenantACLBuilder(cursor).build("nonexistent")) is None
+        assert len(cursor.executed) == 1
+
+    def test_async_build_reads_one_snapshot(self, tenant_rows, monkeypatch):
+        """Test budowanie w trybie ASGI w jednej transakcji REPEATABLE READ READ ONLY jak w trybie sync"""
+        cursor_modes = []
+
+        @asynccontextmanager
+        async def fake_get_async_cursor(**modes):
+            cursor_modes.append(modes)
+            yield FakeAsyncCursor(tenant_rows)
+
+        monkeypatch.setattr(async_database, "get_async_cursor", fake_get_async_cursor)
+        monkeypatch.setattr(async_database, "ACL_CHANGE_JOURNAL_ENABLED", False)
+        acl = asyncio.run(async_database.build_tenant_acl_async("tenant1"))
+
+        assert acl == TenantACLBuilder(FakeCursor(tenant_rows)).build("tenant1")
+        assert cursor_modes == [{"isolation_level": "REPEATABLE READ", "readonly": True}]
@@ -0,0 +1,56 @@
+"""
+Testy jednostkowe dla równoległego przetwarzania tenantów
+"""
+
+import time
+import random
+import threading
+import pytest
+from tenant_executor import BoundedTenantExecutor
+
+@pytest.fixture
+def executor():
+    executor = BoundedTenantExecutor(max_workers=4)
+    yield executor
+    executor.shutdown()
+
+class TestBoundedTenantExecutor:
+    """Testy executora tenantów"""
+
+    def test_results_keep_input_order(self, executor):
+        """Test wyniki są w kolejności wejścia mimo różnych czasów budowania"""
+        def build(tenant_id):
+            time.sleep(random.uniform(0, 0.01))
+            return f"acl-{tenant_id}"
+
+        tenant_ids = [f"tenant{i}" for i in range(20)]
+        assert executor.map(build, tenant_ids) == [(t, f"acl-{t}") for t in tenant_ids]
+
+    def test_concurrency_is_bounded(self, executor):
+        """Test liczba równoległych zadań nie przekracza max_workers"""
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0}
+
+        def build(tenant_id):
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.01)
+            with lock:
+                state["running"] -= 1
+            return tenant_id
+
+        executor.map(build, range(16))
+        assert 1 < state["peak"] <= 4
+
+    def test_exception_raised_for_failing_tenant(self, executor):
+        """Test wyjątek z budowania tenanta jest zgłaszany przy jego wyniku"""
+        def build(tenant_id):
+            if tenant_id == "broken":
+                raise RuntimeError("boom")
+            return tenant_id
+
+        results = executor.imap(build, ["tenant1", "broken", "tenant2"])
+        assert next(results) == ("tenant1", "tenant1")
+        with pytest.raises(RuntimeError):
+            next(results)
@@ -0,0 +1,56 @@
+"""
+Testy jednostkowe dla listy tenantów z liczbą użytkowników
+"""
+
+from tenant_summary import TenantSummaryQuery, TENANT_SUMMARY_QUERY, TENANT_COUNT_QUERY, MAX_PAGE_SIZE, escape_like
+
+class FakeCursor:
+    """Kursor zwracający przygotowane wiersze dla każdego zapytania"""
+    def __init__(self, results):
+        self.results = results
+        self.executed = []
+        self._last = None
+
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+        self._last = query
+
+    def fetchall(self):
+        return self.results.get(self._last, [])
+
+    def fetchone(self):
+        rows = self.fetchall()
+        return rows[0] if rows else None
+
+class TestTenantSummaryQuery:
+    """Testy zapytania podsumowania tenantów"""
+
+    def test_single_query_per_page(self):
+        """Test strona tenantów z liczbą użytkowników jednym zapytaniem"""
+        cursor = FakeCursor({TENANT_SUMMARY_QUERY: [
+            {"tenant_id": "tenant1", "tenant_name": "Test Company 1", "status": "active", "total_count": 5, "user_count": 3},
+            {"tenant_id": "tenant2", "tenant_name": "Test Company 2", "status": "active", "total_count": 5, "user_count": 0},
+        ]})
+        result = TenantSummaryQuery(cursor).list(limit=2, name_prefix="Test", status="active")
+
+        assert result["total_count"] == 5
+        assert result["tenants"][0] == {"tenant_id": "tenant1", "tenant_name": "Test Company 1", "status": "active", "user_count": 3}
+        assert len(cursor.executed) == 1
+        assert cursor.executed[0][1] == {"status": "active", "name_pattern": "Test%", "limit": 2, "offset": 0}
+
+    def test_total_count_past_last_page(self):
+        """Test liczba tenantów dla strony poza zakresem"""
+        cursor = FakeCursor({TENANT_COUNT_QUERY: [{"total_count": 5}]})
+        result = TenantSummaryQuery(cursor).list(limit=10, offset=50)
+
+        assert result == {"tenants": [], "total_count": 5}
+
+    def test_limit_is_capped(self):
+        """Test rozmiar strony jest ograniczony do MAX_PAGE_SIZE"""
+        cursor = FakeCursor({})
+        TenantSummaryQuery(cursor).list(limit=10 ** 6)
+        assert cursor.executed[0][1]["limit"] == MAX_PAGE_SIZE
+
+    def test_escape_like(self):
+        """Test prefiks nazwy jest dopasowywany dosłownie"""
+        assert escape_like("50%_a\\b") == "50\\%\\_a\\\\b"
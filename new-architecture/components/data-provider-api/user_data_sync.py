@@ -7,14 +7,23 @@ OPAL Server o zmianach w kontekście danego tenanta.
 
 import os
 import json
+import asyncio
 import logging
 import requests
 import datetime
 import time
 from typing import Dict, Any, Optional, List
+from urllib.parse import quote
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+# Asynchroniczny klient HTTP (tryb ASGI, opcjonalny)
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
 # Import Permission Event Translator
 try:
     from permission_event_translator import translate_permission_event
@@ -22,11 +31,31 @@ try:
 except ImportError:
     TRANSLATOR_AVAILABLE = False
 
+# Import ACL Snapshot Cache
+try:
+    from acl_cache import invalidate_tenant_acl
+    ACL_CACHE_AVAILABLE = True
+except ImportError:
+    ACL_CACHE_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Retry powiadomień OPAL (wspólne dla transportu requests i httpx)
+OPAL_NOTIFICATION_RETRIES = 3
+OPAL_NOTIFICATION_BACKOFF_FACTOR = 1
+OPAL_NOTIFICATION_RETRY_STATUSES = (408, 429, 500, 502, 503, 504)
+
 # Konfiguracja OPAL Server URL
 OPAL_SERVER_URL = os.environ.get("OPAL_SERVER_URL", "http://opal-server:7002")
 DATA_PROVIDER_API_URL = os.environ.get("DATA_PROVIDER_API_URL", "http://data-provider-api:8110")
+# Zmiany jednego użytkownika publikowane jako entry tylko z jego wpisem ACL (zamiast całego tenanta)
+USER_SCOPED_UPDATES = os.environ.get("OPAL_USER_SCOPED_UPDATES", "true").lower() == "true"
+# Układ dokumentu ACL (jak w opal_endpoints) - w układzie "normalized" zmiana użytkownika może
+# wymagać nowej roli w role_permissions tenanta, więc publikowany jest cały tenant
+OPAL_ACL_LAYOUT = os.environ.get("OPAL_ACL_LAYOUT", "expanded").lower()
+ACL_URL_QUERY = "" if OPAL_ACL_LAYOUT == "expanded" else f"?layout={OPAL_ACL_LAYOUT}"
+# Znaki user_id, których nie da się wstawić do dst_path jako jednego segmentu (separator / escape JSON Pointer)
+USER_PATH_UNSAFE_CHARACTERS = {"/", "~"}
 
 logger.info(f"🔗 User Data Sync Service configured with OPAL Server: {OPAL_SERVER_URL}")
 logger.info(f"🔗 Data Provider API URL: {DATA_PROVIDER_API_URL}")
@@ -43,9 +72,9 @@ class UserDataSyncService:
         
         # Konfiguracja retry strategy zgodnie z best practices OPAL
         retry_strategy = Retry(
-            total=3,  # maksymalnie 3 próby
-            backoff_factor=1,  # exponential backoff: 1s, 2s, 4s
-            status_forcelist=[408, 429, 500, 502, 503, 504],  # HTTP status codes do retry
+            total=OPAL_NOTIFICATION_RETRIES,  # maksymalnie 3 próby
+            backoff_factor=OPAL_NOTIFICATION_BACKOFF_FACTOR,  # exponential backoff: 1s, 2s, 4s
+            status_forcelist=list(OPAL_NOTIFICATION_RETRY_STATUSES),  # HTTP status codes do retry
             allowed_methods=["POST"]  # tylko POST requests
         )
         
@@ -56,6 +85,10 @@ class UserDataSyncService:
         # Timeout konfiguracja
         self.timeout = (5, 15)  # (connect_timeout, read_timeout)
         
+        # Tryb ASGI - powiadomienia wysyłane przez httpx.AsyncClient na pętli zdarzeń serwera
+        self._async_loop = None
+        self._async_client = None
+        
         # Metryki dla monitoring
         self.metrics = {
             "total_notifications": 0,
@@ -65,7 +98,8 @@ class UserDataSyncService:
             "last_error": None
         }
     
-    def _send_opal_notification(self, data: Dict[str, Any], operation_type: str, tenant_id: str, user_id: str = None) -> bool:
+    def _send_opal_notification(self, data: Dict[str, Any], operation_type: str, tenant_id: str, user_id: str = None,
+                                wait: bool = False) -> bool:
         """
         Bezpieczne wysyłanie powiadomień do OPAL Server z retry logic i monitoring
         
@@ -74,10 +108,25 @@ class UserDataSyncService:
             operation_type: Typ operacji (user_update, role_update, permission_update, full_sync)
             tenant_id: ID tenanta
             user_id: ID użytkownika (opcjonalne)
+            wait: W trybie ASGI czeka na wynik wysyłki (tylko poza pętlą zdarzeń, np. ACL Change Feed)
             
         Returns:
             bool: True jeśli powiadomienie zostało wysłane pomyślnie
         """
+        if self._async_client is not None:
+            future = asyncio.run_coroutine_threadsafe(
+                self._send_opal_notification_async(data, operation_type, tenant_id, user_id), self._async_loop)
+            if not wait:
+                # Wątek requestu nie czeka na OPAL Server - wynik trafia do metryk
+                return True
+            try:
+                return future.result()
+            except Exception as e:
+                self.metrics["failed_notifications"] += 1
+                self.metrics["last_error"] = f"Unexpected error: {str(e)}"
+                self.logger.error(f"❌ OPAL {operation_type} notification failed in tenant {tenant_id}: {e}")
+                return False
+        
         start_time = time.time()
         self.metrics["total_notifications"] += 1
         
@@ -152,6 +201,98 @@ class UserDataSyncService:
             )
             return False
     
+    def use_async_transport(self, loop: asyncio.AbstractEventLoop, client):
+        """
+        Włącza wysyłanie powiadomień klientem httpx.AsyncClient (tryb ASGI)
+        
+        Args:
+            loop: Pętla zdarzeń serwera ASGI
+            client: httpx.AsyncClient (None wyłącza transport asynchroniczny)
+        """
+        self._async_loop = loop
+        self._async_client = client
+    
+    async def _send_opal_notification_async(self, data: Dict[str, Any], operation_type: str, tenant_id: str,
+                                            user_id: str = None) -> bool:
+        """
+        Asynchroniczny odpowiednik _send_opal_notification (te same metryki i retry)
+        """
+        start_time = time.time()
+        self.metrics["total_notifications"] += 1
+        user_info = f" for user {user_id}" if user_id else ""
+        
+        error_msg = None
+        for attempt in range(OPAL_NOTIFICATION_RETRIES + 1):
+            if attempt:
+                await asyncio.sleep(OPAL_NOTIFICATION_BACKOFF_FACTOR * (2 ** (attempt - 1)))
+            try:
+                response = await self._async_client.post(
+                    f"{OPAL_SERVER_URL}/data/config",
+                    json=data,
+                    headers={"User-Agent": "DataProviderAPI-UserDataSync/1.0"}
+                )
+            except httpx.TransportError as e:
+                error_msg = f"Connection error: {str(e)}"
+                continue
+            
+            if response.status_code == 200:
+                self.metrics["successful_notifications"] += 1
+                self.metrics["last_notification_time"] = datetime.datetime.utcnow()
+                self.metrics["last_error"] = None
+                self.logger.info(
+                    f"✅ OPAL {operation_type} notification sent successfully{user_info} "
+                    f"in tenant {tenant_id} (duration: {time.time() - start_time:.3f}s)"
+                )
+                return True
+            
+            error_msg = f"HTTP {response.status_code}: {response.text[:200]}"
+            if response.status_code not in OPAL_NOTIFICATION_RETRY_STATUSES:
+                break
+        
+        self.metrics["failed_notifications"] += 1
+        self.metrics["last_error"] = error_msg
+        self.logger.warning(
+            f"⚠️ OPAL {operation_type} notification failed{user_info} "
+            f"in tenant {tenant_id}: {error_msg} (duration: {time.time() - start_time:.3f}s)"
+        )
+        return False
+    
+    def _invalidate_acl_cache(self, tenant_id: str):
+        """
+        Unieważnia snapshot ACL tenanta przed powiadomieniem OPAL,
+        aby OPAL Client pobrał już aktualne dane
+        """
+        if not ACL_CACHE_AVAILABLE or not tenant_id:
+            return
+        try:
+            invalidate_tenant_acl(tenant_id)
+        except Exception as e:
+            self.logger.error(f"❌ Failed to invalidate ACL cache for tenant {tenant_id}: {e}")
+    
+    def _user_acl_entry(self, tenant_id: str, user_id: str, config: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Buduje entry data-config dla zmiany danych użytkownika
+        
+        W trybie user-scoped OPAL Client pobiera tylko wpis użytkownika i zapisuje go
+        pod /acl/{tenant_id}/data/users/{user_id}; użytkownik usunięty z tenanta
+        dostaje wartość null. W przeciwnym razie pobierany jest cały tenant - także
+        dla user_id z '/' lub '~', które zmieniłyby ścieżkę dokumentu w OPA.
+        """
+        if USER_SCOPED_UPDATES and not ACL_URL_QUERY and not set(user_id) & USER_PATH_UNSAFE_CHARACTERS:
+            return {
+                "url": f"{DATA_PROVIDER_API_URL}/tenants/{tenant_id}/users/{quote(user_id, safe='')}/acl?missing=null",
+                "topics": ["multi_tenant_data"],  # Wspólny topic dla użytkowników/ról/uprawnień
+                "dst_path": f"/acl/{tenant_id}/data/users/{user_id}",
+                "config": config
+            }
+        
+        return {
+            "url": f"{DATA_PROVIDER_API_URL}/tenants/{tenant_id}/acl{ACL_URL_QUERY}",
+            "topics": ["multi_tenant_data"],  # Wspólny topic dla użytkowników/ról/uprawnień
+            "dst_path": f"/acl/{tenant_id}",  # Hierarchiczne oddzielenie tenantów
+            "config": config
+        }
+    
     def get_metrics(self) -> Dict[str, Any]:
         """
         Zwraca metryki synchronizacji dla monitoring
@@ -182,27 +323,66 @@ class UserDataSyncService:
         Returns:
             bool: True jeśli publikacja powiodła się
         """
+        self._invalidate_acl_cache(tenant_id)
+        
         # Wspólny topic ale różne data-config dla różnych tenantów
         data = {
             "entries": [
-                {
-                    "url": f"{DATA_PROVIDER_API_URL}/tenants/{tenant_id}/acl",
-                    "topics": ["multi_tenant_data"],  # Wspólny topic dla użytkowników/ról/uprawnień
-                    "dst_path": f"/acl/{tenant_id}",  # Hierarchiczne oddzielenie tenantów
-                    "config": {
-                        "tenant_id": tenant_id,
-                        "user_id": user_id,
-                        "action": action,
-                        "change_type": "user",
-                        "timestamp": datetime.datetime.utcnow().isoformat()
-                    }
-                }
+                self._user_acl_entry(tenant_id, user_id, {
+                    "tenant_id": tenant_id,
+                    "user_id": user_id,
+                    "action": action,
+                    "change_type": "user",
+                    "timestamp": datetime.datetime.utcnow().isoformat()
+                })
             ],
             "reason": f"User {action}: {user_id} in tenant {tenant_id}"
         }
         
         return self._send_opal_notification(data, "user_update", tenant_id, user_id)
     
+    def publish_user_updates(self, tenant_id: str, user_ids: List[str], action: str = "update",
+                             wait: bool = False) -> bool:
+        """
+        Publikuje zmiany wielu użytkowników tenanta jednym powiadomieniem OPAL
+        
+        Jeden data-config z wpisem per użytkownik (w trybie bez user-scoped jeden
+        wpis całego tenanta) - używane przez ACL Change Feed dla zebranych zmian.
+        
+        Args:
+            tenant_id: ID tenanta
+            user_ids: ID zmienionych użytkowników
+            action: Typ akcji (add, update, delete)
+            wait: W trybie ASGI czeka na wynik wysyłki
+            
+        Returns:
+            bool: True jeśli publikacja powiodła się
+        """
+        if not user_ids:
+            return True
+        
+        self._invalidate_acl_cache(tenant_id)
+        
+        timestamp = datetime.datetime.utcnow().isoformat()
+        entries = {}
+        for user_id in user_ids:
+            entry = self._user_acl_entry(tenant_id, user_id, {
+                "tenant_id": tenant_id,
+                "user_id": user_id,
+                "action": action,
+                "change_type": "user",
+                "timestamp": timestamp
+            })
+            # Wpisy całego tenanta mają ten sam URL - wystarczy jeden
+            entries.setdefault(entry["url"], entry)
+        
+        data = {
+            "entries": list(entries.values()),
+            "reason": f"User {action}: {len(user_ids)} users in tenant {tenant_id}"
+        }
+        
+        return self._send_opal_notification(data, "user_update", tenant_id, wait=wait)
+    
     def publish_role_update(self, tenant_id: str, user_id: str, role_changes: Dict[str, Any], action: str = "update") -> bool:
         """
         Publikuje aktualizację ról użytkownika do OPAL Server
@@ -216,21 +396,18 @@ class UserDataSyncService:
         Returns:
             bool: True jeśli publikacja powiodła się
         """
+        self._invalidate_acl_cache(tenant_id)
+        
         data = {
             "entries": [
-                {
-                    "url": f"{DATA_PROVIDER_API_URL}/tenants/{tenant_id}/acl",
-                    "topics": ["multi_tenant_data"],  # Wspólny topic dla użytkowników/ról/uprawnień
-                    "dst_path": f"/acl/{tenant_id}",
-                    "config": {
-                        "tenant_id": tenant_id,
-                        "user_id": user_id,
-                        "action": action,
-                        "change_type": "role",
-                        "role_changes": role_changes,
-                        "timestamp": datetime.datetime.utcnow().isoformat()
-                    }
-                }
+                self._user_acl_entry(tenant_id, user_id, {
+                    "tenant_id": tenant_id,
+                    "user_id": user_id,
+                    "action": action,
+                    "change_type": "role",
+                    "role_changes": role_changes,
+                    "timestamp": datetime.datetime.utcnow().isoformat()
+                })
             ],
             "reason": f"Role {action}: {user_id} in tenant {tenant_id} - {json.dumps(role_changes)}"
         }
@@ -250,41 +427,41 @@ class UserDataSyncService:
         Returns:
             bool: True jeśli publikacja powiodła się
         """
+        self._invalidate_acl_cache(tenant_id)
+        
         data = {
             "entries": [
-                {
-                    "url": f"{DATA_PROVIDER_API_URL}/tenants/{tenant_id}/acl",
-                    "topics": ["multi_tenant_data"],  # Wspólny topic dla użytkowników/ról/uprawnień
-                    "dst_path": f"/acl/{tenant_id}",
-                    "config": {
-                        "tenant_id": tenant_id,
-                        "user_id": user_id,
-                        "action": action,
-                        "change_type": "permission",
-                        "permission_changes": permission_changes,
-                        "timestamp": datetime.datetime.utcnow().isoformat()
-                    }
-                }
+                self._user_acl_entry(tenant_id, user_id, {
+                    "tenant_id": tenant_id,
+                    "user_id": user_id,
+                    "action": action,
+                    "change_type": "permission",
+                    "permission_changes": permission_changes,
+                    "timestamp": datetime.datetime.utcnow().isoformat()
+                })
             ],
             "reason": f"Permission {action}: {user_id} in tenant {tenant_id} - {json.dumps(permission_changes)}"
         }
         
         return self._send_opal_notification(data, "permission_update", tenant_id, user_id)
     
-    def sync_tenant_data(self, tenant_id: str) -> bool:
+    def sync_tenant_data(self, tenant_id: str, wait: bool = False) -> bool:
         """
         Synchronizuje wszystkie dane tenanta z OPAL (pełna synchronizacja)
         
         Args:
             tenant_id: ID tenanta
+            wait: W trybie ASGI czeka na wynik wysyłki
             
         Returns:
             bool: True jeśli synchronizacja powiodła się
         """
+        self._invalidate_acl_cache(tenant_id)
+        
         data = {
             "entries": [
                 {
-                    "url": f"{DATA_PROVIDER_API_URL}/tenants/{tenant_id}/acl",
+                    "url": f"{DATA_PROVIDER_API_URL}/tenants/{tenant_id}/acl{ACL_URL_QUERY}",
                     "topics": ["multi_tenant_full_sync"],  # Topic dla pełnej synchronizacji
                     "dst_path": f"/acl/{tenant_id}",
                     "config": {
@@ -298,7 +475,7 @@ class UserDataSyncService:
             "reason": f"Full tenant sync: {tenant_id}"
         }
         
-        return self._send_opal_notification(data, "full_sync", tenant_id)
+        return self._send_opal_notification(data, "full_sync", tenant_id, wait=wait)
     
     def publish_translated_permission_event(self, event_data: Dict[str, Any]) -> bool:
         """
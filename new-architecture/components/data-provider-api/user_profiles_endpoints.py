@@ -31,6 +31,7 @@ from flask import Blueprint
 # DAO imports removed - this module uses direct SQL queries
 from shared.database.connection import get_db_cursor
 from profile_role_mapper import apply_profile_to_user_roles, remove_profile_from_user_roles, sync_user_profiles_to_roles
+from acl_cache import invalidate_tenant_acl
 
 logger = logging.getLogger(__name__)
 
@@ -358,9 +359,12 @@ def register_user_profiles_endpoints(app):
                         "company_code": company_data['company_code']
                     }
                 }
-                
-                logger.info(f"✅ Firma {company_id} przypisana użytkownikowi {user_id}")
-                return jsonify(result), 201
+            
+            # Unieważnij snapshot ACL tenanta po zatwierdzeniu transakcji
+            invalidate_tenant_acl(company_data['tenant_id'])
+            
+            logger.info(f"✅ Firma {company_id} przypisana użytkownikowi {user_id}")
+            return jsonify(result), 201
                 
         except Exception as e:
             logger.error(f"❌ Błąd przypisywania firmy użytkownikowi {user_id}: {e}")
@@ -375,7 +379,7 @@ def register_user_profiles_endpoints(app):
             with get_db_cursor() as cursor:
                 # Sprawdź czy przypisanie istnieje i pobierz dane firmy
                 cursor.execute("""
-                    SELECT c.company_name, c.company_code
+                    SELECT c.company_name, c.company_code, ua.tenant_id
                     FROM user_access ua
                     JOIN companies c ON ua.company_id = c.company_id
                     WHERE ua.user_id = %s AND ua.company_id = %s
@@ -403,9 +407,12 @@ def register_user_profiles_endpoints(app):
                         "company_code": company_data['company_code']
                     }
                 }
-                
-                logger.info(f"✅ Firma {company_id} usunięta dla użytkownika {user_id}")
-                return jsonify(result)
+            
+            # Unieważnij snapshot ACL tenanta po zatwierdzeniu transakcji
+            invalidate_tenant_acl(company_data['tenant_id'])
+            
+            logger.info(f"✅ Firma {company_id} usunięta dla użytkownika {user_id}")
+            return jsonify(result)
                 
         except Exception as e:
             logger.error(f"❌ Błąd usuwania firmy od użytkownika {user_id}: {e}")
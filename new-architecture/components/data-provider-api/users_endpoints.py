@@ -6,7 +6,8 @@ import datetime
 import logging
 import psycopg2
 from psycopg2.extras import RealDictCursor
-import os
+from shared.database.connection import get_pooled_connection
+from pagination import parse_page_args, split_page, InvalidPageRequest
 
 # Import User Data Sync Service
 try:
@@ -22,16 +23,9 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 def get_db_connection():
-    """Utworz połączenie z bazą danych PostgreSQL"""
+    """Pobierz połączenie z puli współdzielonej (conn.close() zwraca je do puli)"""
     try:
-        conn = psycopg2.connect(
-            host=os.environ.get("DB_HOST", "postgres-db"),
-            port=os.environ.get("DB_PORT", 5432),
-            user=os.environ.get("DB_USER", "opa_user"),
-            password=os.environ.get("DB_PASSWORD", "opa_password"),
-            database=os.environ.get("DB_NAME", "opa_zero_poll")
-        )
-        return conn
+        return get_pooled_connection()
     except Exception as e:
         logger.error(f"Database connection failed: {e}")
         return None
@@ -41,16 +35,22 @@ def register_users_endpoints(app):
     
     @app.route("/api/users", methods=["GET"])
     def get_users():
-        """Zwraca listę użytkowników"""
+        """Zwraca listę użytkowników (opcjonalnie stronicowaną: ?limit=&cursor=)"""
         logger.info("Users list requested")
         
+        try:
+            limit, after = parse_page_args(request.args, 2)
+        except InvalidPageRequest as e:
+            return jsonify({"error": str(e)}), 400
+        
         conn = get_db_connection()
         if not conn:
             return jsonify({"error": "Database connection failed"}), 503
         
         try:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute("""
+                # Liczba firm podzapytaniem - strona nie wymaga grupowania wszystkich użytkowników
+                query = """
                     SELECT 
                         u.user_id,
                         u.username,
@@ -58,19 +58,30 @@ def register_users_endpoints(app):
                         u.full_name,
                         u.status,
                         u.created_at,
-                        COUNT(DISTINCT ua.company_id) as companies_count
+                        (SELECT COUNT(DISTINCT ua.company_id) FROM user_access ua
+                         WHERE ua.user_id = u.user_id) as companies_count
                     FROM users u
-                    LEFT JOIN user_access ua ON u.user_id = ua.user_id
                     WHERE u.status = %s
-                    GROUP BY u.user_id, u.username, u.email, u.full_name, u.status, u.created_at
-                    ORDER BY u.created_at DESC
-                """, ("active",))
+                """
+                params = ["active"]
+                
+                if after:
+                    query += " AND (u.created_at, u.user_id) < (%s, %s)"
+                    params.extend(after)
+                
+                query += " ORDER BY u.created_at DESC, u.user_id DESC"
+                
+                if limit:
+                    query += " LIMIT %s"
+                    params.append(limit + 1)
                 
-                users = cur.fetchall()
+                cur.execute(query, params)
+                users, next_cursor = split_page(cur.fetchall(), limit, lambda u: (u["created_at"], u["user_id"]))
                 
                 return jsonify({
                     "users": [dict(user) for user in users],
                     "total_count": len(users),
+                    "next_cursor": next_cursor,
                     "timestamp": datetime.datetime.utcnow().isoformat()
                 }), 200
                 
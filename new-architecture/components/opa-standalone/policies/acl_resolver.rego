@@ -0,0 +1,37 @@
+package acl_resolver
+
+import rego.v1
+
+# Funkcje pomocnicze do odczytu danych ACL z /acl/{tenant} - działają dla obu układów dokumentu:
+#   expanded   - każdy użytkownik ma pełną listę permissions[app]
+#   normalized - użytkownik ma tylko effective_roles[app] (role bezpośrednie + zespołowe),
+#                a uprawnienia ról są raz na tenanta w role_permissions[app][role]
+# (pakiet nie może nazywać się "acl" - kolidowałby z danymi ładowanymi pod data.acl)
+
+# Uprawnienia użytkownika w aplikacji (zbiór)
+user_permissions(tenant, user, app) := permissions if {
+	tenant_data := data.acl[tenant].data
+	tenant_data.layout == "normalized"
+	user_data := tenant_data.users[user]
+	permissions := {permission |
+		some role in user_data.effective_roles[app]
+		some permission in tenant_data.role_permissions[app][role]
+	}
+} else := permissions if {
+	permissions := {permission | some permission in data.acl[tenant].data.users[user].permissions[app]}
+}
+
+# Czy użytkownik ma uprawnienie w aplikacji
+user_has_permission(tenant, user, app, permission) if {
+	permission in user_permissions(tenant, user, app)
+}
+
+# Role użytkownika w aplikacji, przez które uprawnienia są nadawane (bezpośrednie + zespołowe)
+# - w układzie expanded dostępne są tylko role bezpośrednie
+user_roles(tenant, user, app) := roles if {
+	tenant_data := data.acl[tenant].data
+	tenant_data.layout == "normalized"
+	roles := {role | some role in tenant_data.users[user].effective_roles[app]}
+} else := roles if {
+	roles := {role | some role in data.acl[tenant].data.users[user].roles[app]}
+}
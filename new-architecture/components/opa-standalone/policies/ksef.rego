@@ -2,6 +2,7 @@ package ksef
 
 import rego.v1
 import data.rbac  # Import bazowej polityki RBAC
+import data.acl_resolver  # Uprawnienia z dokumentu ACL (układ expanded lub normalized)
 
 # Główna funkcja autoryzacji dla aplikacji KSEF
 default allow := false
@@ -10,14 +11,11 @@ default allow := false
 
 allow if {
     # Sprawdzamy czy użytkownik istnieje w rzeczywistych danych - z poprawną strukturą
-    user_data := data.acl[input.tenant].data.users[input.user]
-    
-    # Sprawdzamy bezpośrednio uprawnienia w permissions.ksef
-    ksef_permissions := user_data.permissions.ksef
+    data.acl[input.tenant].data.users[input.user]
     
     # Mapowanie akcji na wymagane uprawnienia
     required_permission := action_to_permission[input.action]
-    required_permission in ksef_permissions
+    acl_resolver.user_has_permission(input.tenant, input.user, "ksef", required_permission)
 }
 
 # Mapowanie akcji na wymagane uprawnienia KSEF
@@ -55,10 +53,7 @@ user_roles_safe := roles if {
 } else = [] if true
 
 # Bezpieczne pobieranie uprawnień użytkownika
-user_permissions_safe := permissions if {
-    user_data := data.acl[input.tenant].data.users[input.user]
-    permissions := user_data.permissions.ksef
-} else = [] if true
+user_permissions_safe := sort(acl_resolver.user_permissions(input.tenant, input.user, "ksef"))
 
 reason := "Access granted - user has required permission" if allow
 reason := sprintf("Access denied - user permissions %v do not include required permission '%s'", [user_permissions_safe, action_to_permission[input.action]]) if not allow 
\ No newline at end of file
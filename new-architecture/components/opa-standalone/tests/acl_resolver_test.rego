@@ -0,0 +1,50 @@
+package acl_resolver
+
+import rego.v1
+
+# Ten sam tenant w obu układach dokumentu ACL
+expanded_acl := {"tenant1": {"data": {
+	"tenant_id": "tenant1",
+	"users": {"user1": {
+		"roles": {"ksef": ["ksiegowa"]},
+		"permissions": {"ksef": ["canViewPurchaseInvoices", "canViewSalesInvoices"]},
+	}},
+}}}
+
+normalized_acl := {"tenant1": {"data": {
+	"tenant_id": "tenant1",
+	"layout": "normalized",
+	"users": {"user1": {
+		"roles": {"ksef": ["ksiegowa"]},
+		"effective_roles": {"ksef": ["ksiegowa", "przegladajacy"]},
+	}},
+	"role_permissions": {"ksef": {
+		"ksiegowa": ["canViewSalesInvoices"],
+		"przegladajacy": ["canViewPurchaseInvoices", "canViewSalesInvoices"],
+	}},
+}}}
+
+test_expanded_permissions if {
+	user_permissions("tenant1", "user1", "ksef") == {"canViewPurchaseInvoices", "canViewSalesInvoices"} with data.acl as expanded_acl
+}
+
+test_normalized_permissions_resolved_through_roles if {
+	user_permissions("tenant1", "user1", "ksef") == {"canViewPurchaseInvoices", "canViewSalesInvoices"} with data.acl as normalized_acl
+}
+
+test_normalized_has_permission if {
+	user_has_permission("tenant1", "user1", "ksef", "canViewPurchaseInvoices") with data.acl as normalized_acl
+}
+
+test_normalized_missing_permission if {
+	not user_has_permission("tenant1", "user1", "ksef", "canManageUsers") with data.acl as normalized_acl
+}
+
+test_unknown_user_has_no_permissions if {
+	count(user_permissions("tenant1", "user2", "ksef")) == 0 with data.acl as normalized_acl
+	count(user_permissions("tenant1", "user2", "ksef")) == 0 with data.acl as expanded_acl
+}
+
+test_normalized_roles_include_team_roles if {
+	user_roles("tenant1", "user1", "ksef") == {"ksiegowa", "przegladajacy"} with data.acl as normalized_acl
+}
@@ -14,6 +14,7 @@ import os
 import json
 import requests
 from contextlib import contextmanager
+from shared.database.bulk import bulk_insert, copy_in, ON_CONFLICT_NOTHING, ON_CONFLICT_UPDATE
 
 # Konfiguracja logowania
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -35,6 +36,43 @@ DB_CONFIG = {
 OPAL_SERVER_URL = os.environ.get("OPAL_SERVER_URL", "http://opal-server:7002")
 DATA_PROVIDER_API_URL = os.environ.get("DATA_PROVIDER_API_URL", "http://data-provider-api:8110")
 
+# Import masowy - od tej liczby wierszy tabela jest ładowana przez COPY zamiast INSERT
+BULK_COPY_THRESHOLD = int(os.environ.get("BULK_COPY_THRESHOLD", 10000))
+
+# Tabele importowane przez /tenants/<tenant_id>/import (w kolejności kluczy obcych):
+# kolumny, klucz konfliktu i czy wiersze dostają tenant_id z URL (tylko te są aktualizowane
+# przy "upsert" - users są globalne, import jednego tenanta nie nadpisuje użytkowników innych)
+IMPORT_TABLES = {
+    "users": (["user_id", "username", "email", "full_name", "status"], ["user_id"], False),
+    "user_access": (["user_id", "company_id", "tenant_id", "access_type", "granted_by"], ["user_id", "company_id", "tenant_id"], True),
+    "user_roles": (["user_id", "role_id", "tenant_id", "assigned_by"], ["user_id", "role_id", "tenant_id"], True),
+}
+
+def group_import_records(table, records, columns, key_columns):
+    """
+    Grupuje rekordy importu według podanych w nich kolumn
+    
+    Każda grupa jest zapisywana tylko z obecnymi kolumnami - pominięte pola dostają
+    wartości domyślne kolumn (users.status, user_access.access_type), a upsert
+    nadpisuje wyłącznie przesłane pola.
+    
+    Returns:
+        Dict: krotka kolumn -> lista wierszy
+    
+    Raises:
+        ValueError: rekord nie jest obiektem lub nie zawiera kolumn klucza
+    """
+    groups = {}
+    for record in records:
+        if not isinstance(record, dict):
+            raise ValueError(f"{table} entries must be objects")
+        missing = [column for column in key_columns if record.get(column) is None]
+        if missing:
+            raise ValueError(f"{table} entry is missing required fields: {', '.join(missing)}")
+        present = tuple(column for column in columns if column in record)
+        groups.setdefault(present, []).append(tuple(record[column] for column in present))
+    return groups
+
 @contextmanager
 def get_db_connection():
     """Context manager dla połączeń z PostgreSQL"""
@@ -257,30 +295,21 @@ def create_complete_tenant_structure(cursor, tenant_id, tenant_name, admin_email
             ('system_admin', 'Administracja systemu')
         ]
         
-        created_permissions = []
-        for perm_name, perm_desc in portal_permissions:
-            # Dodaj uprawnienie jeśli nie istnieje
-            cursor.execute("""
-                INSERT INTO permissions (permission_id, permission_name, app_id, description, created_at)
-                VALUES (uuid_generate_v4(), %s, 'portal', %s, NOW())
-                ON CONFLICT (permission_name, app_id) DO NOTHING
-            """, (perm_name, perm_desc))
-            
-            # Pobierz ID uprawnienia
-            cursor.execute("""
-                SELECT permission_id FROM permissions 
-                WHERE permission_name = %s AND app_id = 'portal'
-            """, (perm_name,))
-            permission_id = cursor.fetchone()[0]
-            
-            # Przypisz uprawnienie do roli
-            cursor.execute("""
-                INSERT INTO role_permissions (role_id, permission_id)
-                VALUES (%s, %s)
-                ON CONFLICT (role_id, permission_id) DO NOTHING
-            """, (role_id, permission_id))
-            
-            created_permissions.append(perm_name)
+        # Dodaj brakujące uprawnienia i przypisz je do roli - jedno wielowierszowe INSERT na tabelę
+        bulk_insert(cursor, "permissions", ["permission_name", "app_id", "description"],
+                    [(perm_name, 'portal', perm_desc) for perm_name, perm_desc in portal_permissions],
+                    on_conflict=ON_CONFLICT_NOTHING, conflict_columns=["permission_name", "app_id"])
+        
+        created_permissions = [perm_name for perm_name, _ in portal_permissions]
+        cursor.execute("""
+            SELECT permission_id FROM permissions 
+            WHERE app_id = 'portal' AND permission_name = ANY(%s)
+        """, (created_permissions,))
+        permission_ids = [row[0] for row in cursor.fetchall()]
+        
+        bulk_insert(cursor, "role_permissions", ["role_id", "permission_id"],
+                    [(role_id, permission_id) for permission_id in permission_ids],
+                    on_conflict=ON_CONFLICT_NOTHING, conflict_columns=["role_id", "permission_id"])
         
         # Zwróć informacje o utworzonej strukturze
         structure = {
@@ -560,6 +589,90 @@ def update_tenant_status(tenant_id):
             "details": str(e)
         }), 500
 
+@app.route("/tenants/<tenant_id>/import", methods=["POST"])
+def import_tenant_data(tenant_id):
+    """
+    Masowy import użytkowników i uprawnień tenanta (seed / migracja)
+    
+    Expected JSON:
+    {
+        "users": [{"user_id": "u1", "username": "u1@firma.pl", ...}],
+        "user_access": [{"user_id": "u1", "company_id": "company1"}],
+        "user_roles": [{"user_id": "u1", "role_id": "<uuid>"}],
+        "upsert": false (optional - aktualizuje istniejące przypisania tenanta zamiast je pomijać;
+                         istniejący użytkownicy są zawsze pomijani)
+    }
+    
+    Pominięte pola nie są zapisywane (kolumny zachowują wartości domyślne / dotychczasowe).
+    
+    Tabele z co najmniej BULK_COPY_THRESHOLD wierszami są ładowane przez COPY,
+    mniejsze przez wielowierszowe INSERT. Całość w jednej transakcji.
+    """
+    logger.info(f"Tenant data import requested for: {tenant_id}")
+    
+    if not request.is_json:
+        return jsonify({"error": "Content-Type must be application/json"}), 400
+    
+    data = request.json
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    
+    groups = {}
+    try:
+        for table, (columns, key_columns, tenant_scoped) in IMPORT_TABLES.items():
+            records = data.get(table) or []
+            if not isinstance(records, list):
+                raise ValueError(f"{table} must be a list")
+            if tenant_scoped:
+                records = [{**record, "tenant_id": tenant_id} if isinstance(record, dict) else record
+                           for record in records]
+            groups[table] = group_import_records(table, records, columns, key_columns)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    upsert = bool(data.get("upsert"))
+    
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            
+            # Sprawdź czy tenant istnieje
+            cursor.execute("SELECT tenant_id FROM tenants WHERE tenant_id = %s", (tenant_id,))
+            if not cursor.fetchone():
+                return jsonify({"error": "Tenant not found"}), 404
+            
+            imported = {}
+            started = datetime.datetime.utcnow()
+            for table, (columns, key_columns, tenant_scoped) in IMPORT_TABLES.items():
+                # Globalnych użytkowników import tenanta tylko dodaje
+                on_conflict = ON_CONFLICT_UPDATE if upsert and tenant_scoped else ON_CONFLICT_NOTHING
+                for group_columns, rows in groups[table].items():
+                    write = copy_in if len(rows) >= BULK_COPY_THRESHOLD else bulk_insert
+                    imported[table] = imported.get(table, 0) + write(
+                        cursor, table, list(group_columns), rows, on_conflict=on_conflict,
+                        conflict_columns=key_columns)
+            
+            conn.commit()
+            duration = (datetime.datetime.utcnow() - started).total_seconds()
+            logger.info(f"Tenant {tenant_id} data imported in {duration:.2f}s: {imported}")
+            
+            if imported:
+                publish_tenant_update(tenant_id, action="import")
+            
+            return jsonify({
+                "message": "Tenant data imported successfully",
+                "tenant_id": tenant_id,
+                "imported": imported,
+                "duration_seconds": round(duration, 3)
+            }), 200
+            
+    except Exception as e:
+        logger.error(f"Error importing data for tenant {tenant_id}: {str(e)}")
+        return jsonify({
+            "error": "Failed to import tenant data",
+            "details": str(e)
+        }), 500
+
 @app.route("/", methods=["GET"])
 def root():
     """Root endpoint z informacjami o serwisie"""
@@ -573,7 +686,8 @@ def root():
             "list": "GET /tenants",
             "get": "GET /tenants/{tenant_id}",
             "delete": "DELETE /tenants/{tenant_id}",
-            "update_status": "PUT /tenants/{tenant_id}/status"
+            "update_status": "PUT /tenants/{tenant_id}/status",
+            "import": "POST /tenants/{tenant_id}/import"
         },
         "database": "PostgreSQL",
         "features": [
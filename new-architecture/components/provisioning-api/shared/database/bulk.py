@@ -0,0 +1,173 @@
+"""
+Bulk write helpers - multi-row INSERT and COPY FROM STDIN
+
+Both work on a caller-provided cursor, so they run inside the caller's
+transaction (DAO, init_db, provisioning) and only depend on psycopg2.
+"""
+
+import io
+import os
+import json
+import logging
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Union
+from psycopg2.extras import execute_values, Json
+
+logger = logging.getLogger(__name__)
+
+# Rows sent per statement / COPY
+BULK_CHUNK_SIZE = int(os.environ.get('DB_BULK_CHUNK_SIZE', 5000))
+
+# on_conflict modes
+ON_CONFLICT_NOTHING = 'nothing'
+ON_CONFLICT_UPDATE = 'update'
+
+def _chunks(rows: Iterable[Sequence[Any]], size: int) -> Iterator[List[Sequence[Any]]]:
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def conflict_clause(columns: Sequence[str], on_conflict: Optional[str] = None,
+                    conflict_columns: Optional[Sequence[str]] = None,
+                    update_columns: Optional[Sequence[str]] = None) -> str:
+    """
+    ON CONFLICT clause for the given mode
+
+    Args:
+        columns: Inserted columns
+        on_conflict: None (fail on conflict), 'nothing' or 'update' (upsert)
+        conflict_columns: Conflict target - required for upsert
+        update_columns: Columns overwritten by an upsert (default: all non-key columns)
+    """
+    if on_conflict is None:
+        return ""
+
+    target = f" ({', '.join(conflict_columns)})" if conflict_columns else ""
+    if on_conflict == ON_CONFLICT_NOTHING:
+        return f" ON CONFLICT{target} DO NOTHING"
+
+    if on_conflict == ON_CONFLICT_UPDATE:
+        if not conflict_columns:
+            raise ValueError("Upsert requires conflict_columns")
+        if update_columns is None:
+            update_columns = [column for column in columns if column not in conflict_columns]
+        if not update_columns:
+            return f" ON CONFLICT{target} DO NOTHING"
+        assignments = ', '.join(f"{column} = EXCLUDED.{column}" for column in update_columns)
+        return f" ON CONFLICT{target} DO UPDATE SET {assignments}"
+
+    raise ValueError(f"Unknown on_conflict mode: {on_conflict}")
+
+def _returning_clause(returning: Optional[Sequence[str]]) -> str:
+    return f" RETURNING {', '.join(returning)}" if returning else ""
+
+def _keys(rows: List[Sequence[Any]], returning: Sequence[str]) -> List[Any]:
+    """Single returned column as plain values, several as tuples (tuple or dict cursor rows)"""
+    rows = [tuple(row[column] for column in returning) if isinstance(row, dict) else tuple(row) for row in rows]
+    if len(returning) == 1:
+        return [row[0] for row in rows]
+    return rows
+
+def _adapt(value: Any) -> Any:
+    # JSONB columns (metadata) are passed as dicts
+    return Json(value) if isinstance(value, dict) else value
+
+def bulk_insert(cursor, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]],
+                chunk_size: Optional[int] = None, on_conflict: Optional[str] = None,
+                conflict_columns: Optional[Sequence[str]] = None,
+                update_columns: Optional[Sequence[str]] = None,
+                returning: Optional[Sequence[str]] = None) -> Union[int, List[Any]]:
+    """
+    Insert rows with multi-row INSERT ... VALUES statements (one per chunk)
+
+    An upsert chunk must not contain the same key twice (Postgres cannot
+    update a row twice in one statement).
+
+    Returns:
+        Number of inserted/updated rows, or the `returning` values of those rows
+    """
+    chunk_size = chunk_size or BULK_CHUNK_SIZE
+    query = (f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s"
+             f"{conflict_clause(columns, on_conflict, conflict_columns, update_columns)}"
+             f"{_returning_clause(returning)}")
+
+    count = 0
+    keys = []
+    for chunk in _chunks(rows, chunk_size):
+        values = [tuple(_adapt(value) for value in row) for row in chunk]
+        if returning:
+            keys.extend(execute_values(cursor, query, values, page_size=len(values), fetch=True))
+        else:
+            execute_values(cursor, query, values, page_size=len(values))
+            count += cursor.rowcount
+
+    return _keys(keys, returning) if returning else count
+
+def _copy_value(value: Any) -> str:
+    """Value in COPY text format"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    text = str(value)
+    return text.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+def copy_buffer(rows: Iterable[Sequence[Any]]) -> io.StringIO:
+    """Rows as a COPY text format buffer"""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(_copy_value(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    return buffer
+
+def copy_in(cursor, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]],
+            chunk_size: Optional[int] = None, on_conflict: Optional[str] = None,
+            conflict_columns: Optional[Sequence[str]] = None,
+            update_columns: Optional[Sequence[str]] = None,
+            returning: Optional[Sequence[str]] = None) -> Union[int, List[Any]]:
+    """
+    Load rows with COPY FROM STDIN (one COPY per chunk)
+
+    COPY has no ON CONFLICT - with on_conflict or returning, each chunk is
+    copied into a temporary staging table and moved with INSERT ... SELECT.
+
+    Returns:
+        Number of inserted/updated rows, or the `returning` values of those rows
+    """
+    chunk_size = chunk_size or BULK_CHUNK_SIZE
+    column_list = ', '.join(columns)
+
+    if on_conflict is None and not returning:
+        count = 0
+        for chunk in _chunks(rows, chunk_size):
+            cursor.copy_expert(f"COPY {table} ({column_list}) FROM STDIN", copy_buffer(chunk))
+            count += len(chunk)
+        return count
+
+    # Without constraints of the target table - conflicts are resolved by the INSERT
+    staging = f"bulk_staging_{table.replace('.', '_')}"
+    cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+    cursor.execute(f"CREATE TEMP TABLE {staging} AS SELECT {column_list} FROM {table} WITH NO DATA")
+    insert = (f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {staging}"
+              f"{conflict_clause(columns, on_conflict, conflict_columns, update_columns)}"
+              f"{_returning_clause(returning)}")
+
+    count = 0
+    keys = []
+    for chunk in _chunks(rows, chunk_size):
+        cursor.copy_expert(f"COPY {staging} ({column_list}) FROM STDIN", copy_buffer(chunk))
+        cursor.execute(insert)
+        if returning:
+            keys.extend(cursor.fetchall())
+        else:
+            count += cursor.rowcount
+        cursor.execute(f"TRUNCATE {staging}")
+
+    cursor.execute(f"DROP TABLE {staging}")
+    return _keys(keys, returning) if returning else count
@@ -2,15 +2,24 @@
 Base DAO class with common CRUD operations
 """
 
+import os
 import logging
-from typing import List, Optional, Dict, Any, Type, TypeVar, Generic
+from dataclasses import is_dataclass
+from typing import List, Optional, Dict, Any, Type, TypeVar, Generic, Union, Iterator, Tuple
 from abc import ABC, abstractmethod
-from .connection import get_db_cursor, get_db_transaction, execute_query
+from .connection import get_db_cursor, get_db_transaction, get_db_server_cursor, execute_query
+from .prepared import execute_prepared, execute_prepared_rows, array_literal, to_pyformat
+from .models import row_mapper
+from .session import get_session, MISSING
+from . import bulk
 
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T')
 
+# IDs per find_by_ids query
+FIND_BY_IDS_CHUNK_SIZE = int(os.environ.get('DB_FIND_BY_IDS_CHUNK_SIZE', 1000))
+
 class BaseDAO(Generic[T], ABC):
     """Base Data Access Object with common CRUD operations"""
     
@@ -29,20 +38,120 @@ class BaseDAO(Generic[T], ABC):
         """Convert model instance to dictionary"""
         pass
     
+    def _where(self, criteria: Dict[str, Any]):
+        """
+        WHERE clause with $n placeholders for criteria
+        
+        Returns:
+            (clause, params, shape) - shape records what the clause text depends on:
+            the keys and whether each value is NULL, a list or a scalar
+        """
+        where_clauses = []
+        params = []
+        shape = []
+        
+        for key, value in criteria.items():
+            if value is None:
+                where_clauses.append(f"{key} IS NULL")
+                shape.append((key, 'null'))
+            elif isinstance(value, list):
+                # One array parameter - the statement does not depend on the list length
+                params.append(array_literal(value))
+                where_clauses.append(f"{key} = ANY(${len(params)})")
+                shape.append((key, 'list'))
+            else:
+                params.append(value)
+                where_clauses.append(f"{key} = ${len(params)}")
+                shape.append((key, 'value'))
+        
+        return " AND ".join(where_clauses), params, tuple(shape)
+    
+    def _row_mapper(self, columns: Tuple[str, ...]):
+        """
+        Tuple row -> model function for a result with the given columns
+        
+        Dataclass models are filled positionally (models.row_mapper); other
+        models go through dict_to_model.
+        """
+        if is_dataclass(self.model_class):
+            return row_mapper(self.model_class, columns)
+        return lambda row: self.dict_to_model(dict(zip(columns, row)))
+    
+    def _to_models(self, columns: Tuple[str, ...], rows: List[tuple]) -> List[T]:
+        build = self._row_mapper(columns)
+        return [build(row) for row in rows]
+    
+    def _remember(self, id_value: Any, model: T):
+        """Keep a loaded / written model in the identity map of the active session"""
+        session = get_session()
+        if session is not None:
+            session.remember(self.table_name, id_value, model)
+    
+    def _forget(self, id_value: Any = MISSING):
+        """Drop a model (or, without an ID, the whole table) from the identity map of the active session"""
+        session = get_session()
+        if session is not None:
+            session.forget(self.table_name, id_value)
+    
     def find_by_id(self, id_value: Any) -> Optional[T]:
-        """Find record by ID"""
+        """Find record by ID (from the identity map of the active session when already loaded)"""
+        session = get_session()
+        if session is not None:
+            cached = session.lookup(self.table_name, id_value)
+            if cached is not MISSING:
+                return cached
+        
         try:
-            query = f"SELECT * FROM {self.table_name} WHERE {self.id_column} = %s"
-            result = execute_query(query, (id_value,), fetch_one=True)
+            query = f"SELECT * FROM {self.table_name} WHERE {self.id_column} = $1"
+            result = execute_prepared(('find_by_id', self.table_name, self.id_column), query, (id_value,), fetch_one=True)
             
             if result:
-                return self.dict_to_model(dict(result))
+                model = self.dict_to_model(dict(result))
+                self._remember(id_value, model)
+                return model
             return None
             
         except Exception as e:
             logger.error(f"Error finding {self.table_name} by {self.id_column}={id_value}: {e}")
             raise
     
+    def find_by_ids(self, id_values: List[Any], chunk_size: Optional[int] = None) -> Dict[Any, T]:
+        """
+        Find records for many IDs with chunked = ANY($1) queries
+        
+        Returns:
+            Dict keyed by ID - IDs without a record are absent
+        """
+        if not id_values:
+            return {}
+        
+        chunk_size = chunk_size or FIND_BY_IDS_CHUNK_SIZE
+        unique_ids = list(dict.fromkeys(id_values))
+        query = f"SELECT * FROM {self.table_name} WHERE {self.id_column} = ANY($1)"
+        
+        found = {}
+        session = get_session()
+        if session is not None:
+            for id_value in unique_ids:
+                cached = session.lookup(self.table_name, id_value)
+                if cached is not MISSING:
+                    found[id_value] = cached
+            unique_ids = [id_value for id_value in unique_ids if id_value not in found]
+        
+        try:
+            for start in range(0, len(unique_ids), chunk_size):
+                chunk = unique_ids[start:start + chunk_size]
+                results = execute_prepared(('find_by_ids', self.table_name, self.id_column), query, (array_literal(chunk),))
+                for row in results:
+                    model = self.dict_to_model(dict(row))
+                    found[row[self.id_column]] = model
+                    self._remember(row[self.id_column], model)
+            return found
+            
+        except Exception as e:
+            logger.error(f"Error finding {self.table_name} by {len(unique_ids)} {self.id_column} values: {e}")
+            raise
+    
     def find_all(self, limit: Optional[int] = None, offset: int = 0) -> List[T]:
         """Find all records with optional pagination"""
         try:
@@ -51,41 +160,103 @@ class BaseDAO(Generic[T], ABC):
             if limit:
                 query += f" LIMIT {limit} OFFSET {offset}"
             
-            results = execute_query(query)
-            return [self.dict_to_model(dict(row)) for row in results]
+            with get_db_cursor(dict_cursor=False) as cursor:
+                cursor.execute(query)
+                return self._to_models(tuple(column[0] for column in cursor.description), cursor.fetchall())
             
         except Exception as e:
             logger.error(f"Error finding all {self.table_name}: {e}")
             raise
     
+    def find_page(self, limit: int, after: Any = None,
+                  criteria: Optional[Dict[str, Any]] = None) -> Tuple[List[T], Optional[Any]]:
+        """
+        Find one page of records ordered by ID (keyset pagination)
+        
+        The next page starts after the last ID of the previous one, so every page
+        costs the same index range scan - unlike OFFSET, which reads all skipped rows.
+        
+        Args:
+            limit: Page size
+            after: Last ID of the previous page (None for the first page)
+            criteria: Optional filters as in find_by_criteria
+        
+        Returns:
+            (records, next_after) - next_after is None on the last page
+        
+        Raises:
+            ValueError: limit is smaller than 1
+        """
+        if limit < 1:
+            raise ValueError(f"Page limit must be at least 1, got {limit}")
+        
+        try:
+            where_clause, params, shape = self._where(criteria or {})
+            conditions = [where_clause] if where_clause else []
+            
+            if after is not None:
+                params.append(after)
+                conditions.append(f"{self.id_column} > ${len(params)}")
+            
+            query = f"SELECT * FROM {self.table_name}"
+            if conditions:
+                query += f" WHERE {' AND '.join(conditions)}"
+            
+            # One extra row tells whether another page exists
+            params.append(limit + 1)
+            query += f" ORDER BY {self.id_column} LIMIT ${len(params)}"
+            
+            results = execute_prepared(('find_page', self.table_name, self.id_column, shape, after is not None), query, params)
+            records = [self.dict_to_model(dict(row)) for row in results[:limit]]
+            next_after = results[limit - 1][self.id_column] if len(results) > limit else None
+            return records, next_after
+            
+        except Exception as e:
+            logger.error(f"Error finding {self.table_name} page after {self.id_column}={after}: {e}")
+            raise
+    
+    def find_iter(self, criteria: Optional[Dict[str, Any]] = None, itersize: Optional[int] = None) -> Iterator[T]:
+        """
+        Iterate over all matching records ordered by ID without loading them into memory
+        
+        Backed by a server-side cursor fetching itersize rows per round trip; holds
+        one pooled connection until the iteration ends or the generator is closed.
+        """
+        where_clause, params, _ = self._where(criteria or {})
+        query = f"SELECT * FROM {self.table_name}"
+        if where_clause:
+            query += f" WHERE {where_clause}"
+        query += f" ORDER BY {self.id_column}"
+        
+        try:
+            with get_db_server_cursor(itersize, dict_cursor=False) as cursor:
+                cursor.execute(to_pyformat(query), params)
+                build = None
+                for row in cursor:
+                    if build is None:
+                        # Named cursors describe the result after the first fetch
+                        build = self._row_mapper(tuple(column[0] for column in cursor.description))
+                    yield build(row)
+                    
+        except Exception as e:
+            logger.error(f"Error iterating {self.table_name}: {e}")
+            raise
+    
     def find_by_criteria(self, criteria: Dict[str, Any], limit: Optional[int] = None) -> List[T]:
         """Find records by criteria"""
         try:
             if not criteria:
                 return self.find_all(limit=limit)
             
-            where_clauses = []
-            params = []
-            
-            for key, value in criteria.items():
-                if value is None:
-                    where_clauses.append(f"{key} IS NULL")
-                elif isinstance(value, list):
-                    placeholders = ','.join(['%s'] * len(value))
-                    where_clauses.append(f"{key} IN ({placeholders})")
-                    params.extend(value)
-                else:
-                    where_clauses.append(f"{key} = %s")
-                    params.append(value)
-            
-            where_clause = " AND ".join(where_clauses)
+            where_clause, params, shape = self._where(criteria)
             query = f"SELECT * FROM {self.table_name} WHERE {where_clause} ORDER BY {self.id_column}"
             
             if limit:
-                query += f" LIMIT {limit}"
+                params.append(limit)
+                query += f" LIMIT ${len(params)}"
             
-            results = execute_query(query, tuple(params))
-            return [self.dict_to_model(dict(row)) for row in results]
+            columns, rows = execute_prepared_rows(('find_by_criteria', self.table_name, self.id_column, shape, bool(limit)), query, params)
+            return self._to_models(columns, rows)
             
         except Exception as e:
             logger.error(f"Error finding {self.table_name} by criteria {criteria}: {e}")
@@ -110,7 +281,9 @@ class BaseDAO(Generic[T], ABC):
             """
             
             result = execute_query(query, tuple(values), fetch_one=True)
-            return self.dict_to_model(dict(result))
+            model = self.dict_to_model(dict(result))
+            self._remember(result[self.id_column], model)
+            return model
             
         except Exception as e:
             logger.error(f"Error creating {self.table_name}: {e}")
@@ -139,7 +312,10 @@ class BaseDAO(Generic[T], ABC):
             result = execute_query(query, tuple(values), fetch_one=True)
             
             if result:
-                return self.dict_to_model(dict(result))
+                model = self.dict_to_model(dict(result))
+                self._remember(id_value, model)
+                return model
+            self._forget(id_value)
             return None
             
         except Exception as e:
@@ -151,6 +327,7 @@ class BaseDAO(Generic[T], ABC):
         try:
             query = f"DELETE FROM {self.table_name} WHERE {self.id_column} = %s"
             rowcount = execute_query(query, (id_value,), fetch_all=False)
+            self._forget(id_value)
             return rowcount > 0
             
         except Exception as e:
@@ -160,8 +337,8 @@ class BaseDAO(Generic[T], ABC):
     def exists(self, id_value: Any) -> bool:
         """Check if record exists by ID"""
         try:
-            query = f"SELECT 1 FROM {self.table_name} WHERE {self.id_column} = %s LIMIT 1"
-            result = execute_query(query, (id_value,), fetch_one=True)
+            query = f"SELECT 1 FROM {self.table_name} WHERE {self.id_column} = $1 LIMIT 1"
+            result = execute_prepared(('exists', self.table_name, self.id_column), query, (id_value,), fetch_one=True)
             return result is not None
             
         except Exception as e:
@@ -173,27 +350,13 @@ class BaseDAO(Generic[T], ABC):
         try:
             if not criteria:
                 query = f"SELECT COUNT(*) as count FROM {self.table_name}"
-                result = execute_query(query, fetch_one=True)
+                result = execute_prepared(('count', self.table_name, ()), query, fetch_one=True)
                 return result['count']
             
-            where_clauses = []
-            params = []
-            
-            for key, value in criteria.items():
-                if value is None:
-                    where_clauses.append(f"{key} IS NULL")
-                elif isinstance(value, list):
-                    placeholders = ','.join(['%s'] * len(value))
-                    where_clauses.append(f"{key} IN ({placeholders})")
-                    params.extend(value)
-                else:
-                    where_clauses.append(f"{key} = %s")
-                    params.append(value)
-            
-            where_clause = " AND ".join(where_clauses)
+            where_clause, params, shape = self._where(criteria)
             query = f"SELECT COUNT(*) as count FROM {self.table_name} WHERE {where_clause}"
             
-            result = execute_query(query, tuple(params), fetch_one=True)
+            result = execute_prepared(('count', self.table_name, shape), query, params, fetch_one=True)
             return result['count']
             
         except Exception as e:
@@ -234,6 +397,72 @@ class BaseDAO(Generic[T], ABC):
             logger.error(f"Error bulk creating {self.table_name}: {e}")
             raise
     
+    def _bulk_rows(self, models: List[T], columns: Optional[List[str]]):
+        """Model rows as tuples - by default the columns set in at least one model"""
+        dicts = [self.model_to_dict(model) for model in models]
+        if columns is None:
+            columns = [key for key in dicts[0] if any(data.get(key) is not None for data in dicts)]
+        return columns, [tuple(data.get(column) for column in columns) for data in dicts]
+    
+    def bulk_insert(self, models: List[T], columns: Optional[List[str]] = None,
+                    chunk_size: Optional[int] = None, on_conflict: Optional[str] = None,
+                    conflict_columns: Optional[List[str]] = None,
+                    update_columns: Optional[List[str]] = None,
+                    returning: Optional[List[str]] = None) -> Union[int, List[Any]]:
+        """
+        Insert multiple records with multi-row INSERT statements in a transaction
+        
+        Args:
+            models: Models to insert
+            columns: Inserted columns (default: columns set in at least one model)
+            chunk_size: Rows per statement (default DB_BULK_CHUNK_SIZE)
+            on_conflict: None, 'nothing' or 'update' (upsert on conflict_columns)
+            returning: Columns returned for inserted rows, e.g. [self.id_column]
+        
+        Returns:
+            Number of written rows, or the `returning` values
+        """
+        if not models:
+            return [] if returning else 0
+        
+        try:
+            columns, rows = self._bulk_rows(models, columns)
+            # Upserts may change rows already in the identity map
+            self._forget()
+            with get_db_transaction() as conn:
+                with conn.cursor() as cursor:
+                    return bulk.bulk_insert(cursor, self.table_name, columns, rows, chunk_size,
+                                            on_conflict, conflict_columns, update_columns, returning)
+                    
+        except Exception as e:
+            logger.error(f"Error bulk inserting {self.table_name}: {e}")
+            raise
+    
+    def copy_in(self, models: List[T], columns: Optional[List[str]] = None,
+                chunk_size: Optional[int] = None, on_conflict: Optional[str] = None,
+                conflict_columns: Optional[List[str]] = None,
+                update_columns: Optional[List[str]] = None,
+                returning: Optional[List[str]] = None) -> Union[int, List[Any]]:
+        """
+        Load multiple records with COPY FROM STDIN in a transaction (very large batches)
+        
+        Same arguments and result as bulk_insert.
+        """
+        if not models:
+            return [] if returning else 0
+        
+        try:
+            columns, rows = self._bulk_rows(models, columns)
+            self._forget()
+            with get_db_transaction() as conn:
+                with conn.cursor() as cursor:
+                    return bulk.copy_in(cursor, self.table_name, columns, rows, chunk_size,
+                                        on_conflict, conflict_columns, update_columns, returning)
+                    
+        except Exception as e:
+            logger.error(f"Error copying into {self.table_name}: {e}")
+            raise
+    
     def bulk_delete(self, id_values: List[Any]) -> int:
         """Delete multiple records by IDs"""
         if not id_values:
@@ -243,6 +472,8 @@ class BaseDAO(Generic[T], ABC):
             placeholders = ','.join(['%s'] * len(id_values))
             query = f"DELETE FROM {self.table_name} WHERE {self.id_column} IN ({placeholders})"
             rowcount = execute_query(query, tuple(id_values), fetch_all=False)
+            for id_value in id_values:
+                self._forget(id_value)
             return rowcount
             
         except Exception as e:
@@ -14,9 +14,98 @@ from .models import (
     dict_to_role, dict_to_permission, dict_to_team
 )
 from .connection import execute_query, get_db_cursor
+from .prepared import execute_prepared, array_literal
+from .session import db_session, REPEATABLE_READ
 
 logger = logging.getLogger(__name__)
 
+# Queries shared with the async DAOs (async_dao.py) - both layers run the same SQL
+
+PERMISSIONS_BY_ROLE_QUERY = """
+    SELECT p.* FROM permissions p
+    JOIN role_permissions rp ON p.permission_id = rp.permission_id
+    WHERE rp.role_id = %s
+    ORDER BY p.app_id, p.permission_name
+"""
+
+TEAMS_BY_USER_QUERY = """
+    SELECT t.* FROM teams t
+    JOIN team_memberships tm ON t.team_id = tm.team_id
+    WHERE tm.user_id = %s
+    ORDER BY t.team_name
+"""
+
+ROLES_FOR_USERS_QUERY = """
+    SELECT ur.user_id, r.app_id, r.role_name
+    FROM user_roles ur
+    JOIN roles r ON ur.role_id = r.role_id
+    WHERE ur.user_id = ANY($1) AND ur.tenant_id = $2
+    ORDER BY ur.user_id, r.app_id, r.role_name
+"""
+
+COMPANIES_FOR_USERS_QUERY = """
+    SELECT user_id, company_id FROM user_access
+    WHERE user_id = ANY($1) AND tenant_id = $2
+    ORDER BY user_id, company_id
+"""
+
+USER_EFFECTIVE_PERMISSIONS_QUERY = """
+    SELECT * FROM user_effective_permissions
+    WHERE user_id = %s AND tenant_id = %s
+    ORDER BY app_id, permission_name
+"""
+
+USER_EFFECTIVE_ACCESS_QUERY = """
+    SELECT * FROM user_effective_access
+    WHERE user_id = %s AND tenant_id = %s
+    ORDER BY company_name
+"""
+
+def group_roles_by_user(rows: List[Dict[str, Any]], user_ids: List[str]) -> Dict[str, Dict[str, List[str]]]:
+    """ROLES_FOR_USERS_QUERY rows as {user_id: {app_id: [role_name, ...]}} - users without roles map to {}"""
+    roles_by_user = {user_id: {} for user_id in user_ids}
+    for row in rows:
+        roles_by_user[row['user_id']].setdefault(row['app_id'], []).append(row['role_name'])
+    return roles_by_user
+
+def group_companies_by_user(rows: List[Dict[str, Any]], user_ids: List[str]) -> Dict[str, List[str]]:
+    """COMPANIES_FOR_USERS_QUERY rows as {user_id: [company_id, ...]} - users without access map to []"""
+    companies_by_user = {user_id: [] for user_id in user_ids}
+    for row in rows:
+        companies_by_user[row['user_id']].append(row['company_id'])
+    return companies_by_user
+
+def dict_to_effective_permission(row: Dict[str, Any]) -> UserEffectivePermission:
+    return UserEffectivePermission(
+        user_id=row['user_id'],
+        tenant_id=row['tenant_id'],
+        app_id=row['app_id'],
+        role_name=row['role_name'],
+        permission_name=row['permission_name'],
+        source_type=row['source_type'],
+        source_id=row['source_id']
+    )
+
+def dict_to_effective_access(row: Dict[str, Any]) -> UserEffectiveAccess:
+    return UserEffectiveAccess(
+        user_id=row['user_id'],
+        tenant_id=row['tenant_id'],
+        company_id=row['company_id'],
+        company_name=row['company_name'],
+        source_type=row['source_type'],
+        source_id=row['source_id']
+    )
+
+def permissions_by_app(permissions: List[UserEffectivePermission]) -> Dict[str, List[str]]:
+    """Distinct permission names per application"""
+    grouped = {}
+    for perm in permissions:
+        if perm.app_id not in grouped:
+            grouped[perm.app_id] = []
+        if perm.permission_name not in grouped[perm.app_id]:
+            grouped[perm.app_id].append(perm.permission_name)
+    return grouped
+
 class TenantDAO(BaseDAO[Tenant]):
     """DAO for Tenant entities"""
     
@@ -167,13 +256,7 @@ class PermissionDAO(BaseDAO[Permission]):
     
     def find_by_role(self, role_id: UUID) -> List[Permission]:
         """Find permissions assigned to a role"""
-        query = """
-            SELECT p.* FROM permissions p
-            JOIN role_permissions rp ON p.permission_id = rp.permission_id
-            WHERE rp.role_id = %s
-            ORDER BY p.app_id, p.permission_name
-        """
-        results = execute_query(query, (role_id,))
+        results = execute_query(PERMISSIONS_BY_ROLE_QUERY, (role_id,))
         return [self.dict_to_model(dict(row)) for row in results]
 
 class TeamDAO(BaseDAO[Team]):
@@ -202,13 +285,7 @@ class TeamDAO(BaseDAO[Team]):
     
     def find_by_user(self, user_id: str) -> List[Team]:
         """Find teams that user belongs to"""
-        query = """
-            SELECT t.* FROM teams t
-            JOIN team_memberships tm ON t.team_id = tm.team_id
-            WHERE tm.user_id = %s
-            ORDER BY t.team_name
-        """
-        results = execute_query(query, (user_id,))
+        results = execute_query(TEAMS_BY_USER_QUERY, (user_id,))
         return [self.dict_to_model(dict(row)) for row in results]
 
 class UserRoleDAO(BaseDAO[UserRole]):
@@ -242,25 +319,17 @@ class UserRoleDAO(BaseDAO[UserRole]):
     
     def find_roles_for_user(self, user_id: str, tenant_id: str) -> Dict[str, List[str]]:
         """Get user roles grouped by application"""
-        query = """
-            SELECT r.app_id, r.role_name
-            FROM user_roles ur
-            JOIN roles r ON ur.role_id = r.role_id
-            WHERE ur.user_id = %s AND ur.tenant_id = %s
-            ORDER BY r.app_id, r.role_name
+        return self.find_roles_for_users([user_id], tenant_id)[user_id]
+    
+    def find_roles_for_users(self, user_ids: List[str], tenant_id: str) -> Dict[str, Dict[str, List[str]]]:
         """
-        results = execute_query(query, (user_id, tenant_id))
-        
-        roles_by_app = {}
-        for row in results:
-            app_id = row['app_id']
-            role_name = row['role_name']
-            
-            if app_id not in roles_by_app:
-                roles_by_app[app_id] = []
-            roles_by_app[app_id].append(role_name)
+        Get roles of many users in one query, grouped by user and application
         
-        return roles_by_app
+        Returns:
+            {user_id: {app_id: [role_name, ...]}} - users without roles map to {}
+        """
+        results = execute_prepared(('find_roles_for_users',), ROLES_FOR_USERS_QUERY, (array_literal(user_ids), tenant_id))
+        return group_roles_by_user(results, user_ids)
 
 class UserAccessDAO(BaseDAO[UserAccess]):
     """DAO for UserAccess assignments"""
@@ -295,13 +364,17 @@ class UserAccessDAO(BaseDAO[UserAccess]):
     
     def get_user_companies(self, user_id: str, tenant_id: str) -> List[str]:
         """Get list of company IDs user has access to"""
-        query = """
-            SELECT company_id FROM user_access
-            WHERE user_id = %s AND tenant_id = %s
-            ORDER BY company_id
+        return self.get_companies_for_users([user_id], tenant_id)[user_id]
+    
+    def get_companies_for_users(self, user_ids: List[str], tenant_id: str) -> Dict[str, List[str]]:
         """
-        results = execute_query(query, (user_id, tenant_id))
-        return [row['company_id'] for row in results]
+        Get company IDs of many users in one query
+        
+        Returns:
+            {user_id: [company_id, ...]} - users without access map to []
+        """
+        results = execute_prepared(('get_companies_for_users',), COMPANIES_FOR_USERS_QUERY, (array_literal(user_ids), tenant_id))
+        return group_companies_by_user(results, user_ids)
 
 class TeamMembershipDAO(BaseDAO[TeamMembership]):
     """DAO for TeamMembership assignments"""
@@ -348,70 +421,37 @@ class UserProfileDAO:
     
     def get_user_effective_permissions(self, user_id: str, tenant_id: str) -> List[UserEffectivePermission]:
         """Get all effective permissions for user (direct + team-based)"""
-        query = """
-            SELECT * FROM user_effective_permissions
-            WHERE user_id = %s AND tenant_id = %s
-            ORDER BY app_id, permission_name
-        """
-        results = execute_query(query, (user_id, tenant_id))
-        
-        return [
-            UserEffectivePermission(
-                user_id=row['user_id'],
-                tenant_id=row['tenant_id'],
-                app_id=row['app_id'],
-                role_name=row['role_name'],
-                permission_name=row['permission_name'],
-                source_type=row['source_type'],
-                source_id=row['source_id']
-            )
-            for row in results
-        ]
+        results = execute_query(USER_EFFECTIVE_PERMISSIONS_QUERY, (user_id, tenant_id))
+        return [dict_to_effective_permission(row) for row in results]
     
     def get_user_effective_access(self, user_id: str, tenant_id: str) -> List[UserEffectiveAccess]:
         """Get all effective company access for user (direct + team-based)"""
-        query = """
-            SELECT * FROM user_effective_access
-            WHERE user_id = %s AND tenant_id = %s
-            ORDER BY company_name
-        """
-        results = execute_query(query, (user_id, tenant_id))
-        
-        return [
-            UserEffectiveAccess(
-                user_id=row['user_id'],
-                tenant_id=row['tenant_id'],
-                company_id=row['company_id'],
-                company_name=row['company_name'],
-                source_type=row['source_type'],
-                source_id=row['source_id']
-            )
-            for row in results
-        ]
+        results = execute_query(USER_EFFECTIVE_ACCESS_QUERY, (user_id, tenant_id))
+        return [dict_to_effective_access(row) for row in results]
     
     def get_complete_user_profile(self, user_id: str, tenant_id: str) -> Optional[UserProfile]:
-        """Get complete user profile with all roles, permissions, and access"""
-        user = self.user_dao.find_by_id(user_id)
-        if not user:
-            return None
-        
-        # Get roles by application
-        roles = self.user_role_dao.find_roles_for_user(user_id, tenant_id)
-        
-        # Get permissions by application
-        permissions_data = self.get_user_effective_permissions(user_id, tenant_id)
-        permissions = {}
-        for perm in permissions_data:
-            if perm.app_id not in permissions:
-                permissions[perm.app_id] = []
-            if perm.permission_name not in permissions[perm.app_id]:
-                permissions[perm.app_id].append(perm.permission_name)
-        
-        # Get company access
-        companies = self.user_access_dao.get_user_companies(user_id, tenant_id)
+        """
+        Get complete user profile with all roles, permissions, and access
         
-        # Get team memberships
-        teams = [team.team_name for team in self.team_dao.find_by_user(user_id)]
+        All queries read one REPEATABLE READ snapshot on one connection (or join
+        the caller's session, whose identity map already holds a loaded user).
+        """
+        with db_session(REPEATABLE_READ, readonly=True):
+            user = self.user_dao.find_by_id(user_id)
+            if not user:
+                return None
+            
+            # Get roles by application
+            roles = self.user_role_dao.find_roles_for_user(user_id, tenant_id)
+            
+            # Get permissions by application
+            permissions = permissions_by_app(self.get_user_effective_permissions(user_id, tenant_id))
+            
+            # Get company access
+            companies = self.user_access_dao.get_user_companies(user_id, tenant_id)
+            
+            # Get team memberships
+            teams = [team.team_name for team in self.team_dao.find_by_user(user_id)]
         
         return UserProfile(
             user=user,
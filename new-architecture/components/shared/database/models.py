@@ -2,12 +2,18 @@
 Data models for OPA Zero Poll database entities
 """
 
-from dataclasses import dataclass, field
+import sys
+from dataclasses import dataclass, field, fields, MISSING
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from functools import lru_cache
+from operator import itemgetter
+from typing import Optional, List, Dict, Any, Callable, Sequence, Tuple
 from uuid import UUID
 
-@dataclass
+# Low-cardinality identifiers repeated across rows - interned so all models share one string
+INTERNED_FIELDS = frozenset({'tenant_id', 'app_id', 'role_name', 'permission_name', 'status', 'access_type', 'source_type'})
+
+@dataclass(slots=True)
 class Tenant:
     """Tenant model"""
     tenant_id: str
@@ -18,7 +24,7 @@ class Tenant:
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
-@dataclass
+@dataclass(slots=True)
 class User:
     """User model"""
     user_id: str
@@ -30,7 +36,7 @@ class User:
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
-@dataclass
+@dataclass(slots=True)
 class Application:
     """Application model"""
     app_id: str
@@ -40,7 +46,7 @@ class Application:
     metadata: Dict[str, Any] = field(default_factory=dict)
     created_at: Optional[datetime] = None
 
-@dataclass
+@dataclass(slots=True)
 class Company:
     """Company model"""
     company_id: str
@@ -54,7 +60,7 @@ class Company:
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
-@dataclass
+@dataclass(slots=True)
 class Role:
     """Role model"""
     role_id: UUID
@@ -65,7 +71,7 @@ class Role:
     metadata: Dict[str, Any] = field(default_factory=dict)
     created_at: Optional[datetime] = None
 
-@dataclass
+@dataclass(slots=True)
 class Permission:
     """Permission model"""
     permission_id: UUID
@@ -77,7 +83,7 @@ class Permission:
     metadata: Dict[str, Any] = field(default_factory=dict)
     created_at: Optional[datetime] = None
 
-@dataclass
+@dataclass(slots=True)
 class RolePermission:
     """Role-Permission assignment model"""
     role_id: UUID
@@ -85,7 +91,7 @@ class RolePermission:
     granted_at: Optional[datetime] = None
     granted_by: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class UserRole:
     """User-Role assignment model"""
     user_id: str
@@ -95,7 +101,7 @@ class UserRole:
     assigned_by: Optional[str] = None
     expires_at: Optional[datetime] = None
 
-@dataclass
+@dataclass(slots=True)
 class UserAccess:
     """User-Company access model"""
     user_id: str
@@ -106,7 +112,7 @@ class UserAccess:
     granted_by: Optional[str] = None
     expires_at: Optional[datetime] = None
 
-@dataclass
+@dataclass(slots=True)
 class Team:
     """Team model"""
     team_id: UUID
@@ -120,7 +126,7 @@ class Team:
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
-@dataclass
+@dataclass(slots=True)
 class TeamMembership:
     """Team membership model"""
     user_id: str
@@ -129,7 +135,7 @@ class TeamMembership:
     joined_at: Optional[datetime] = None
     joined_by: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class TeamRole:
     """Team-Role assignment model"""
     team_id: UUID
@@ -137,7 +143,7 @@ class TeamRole:
     assigned_at: Optional[datetime] = None
     assigned_by: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class TeamCompany:
     """Team-Company assignment model"""
     team_id: UUID
@@ -148,7 +154,7 @@ class TeamCompany:
 
 # Composite models for complex queries
 
-@dataclass
+@dataclass(slots=True)
 class UserEffectivePermission:
     """User effective permission (from direct roles and team memberships)"""
     user_id: str
@@ -159,7 +165,7 @@ class UserEffectivePermission:
     source_type: str  # 'direct' or 'team'
     source_id: Optional[str] = None  # team_id if source_type is 'team'
 
-@dataclass
+@dataclass(slots=True)
 class UserEffectiveAccess:
     """User effective company access (from direct assignments and team memberships)"""
     user_id: str
@@ -169,7 +175,7 @@ class UserEffectiveAccess:
     source_type: str  # 'direct' or 'team'
     source_id: Optional[str] = None  # team_id if source_type is 'team'
 
-@dataclass
+@dataclass(slots=True)
 class UserProfile:
     """Complete user profile with roles, permissions, and access"""
     user: User
@@ -179,7 +185,7 @@ class UserProfile:
     teams: List[str]  # list of team names
     tenant_id: str
 
-@dataclass
+@dataclass(slots=True)
 class TenantSummary:
     """Tenant summary with counts"""
     tenant: Tenant
@@ -190,6 +196,50 @@ class TenantSummary:
 
 # Helper functions for model conversion
 
+@lru_cache(maxsize=256)
+def row_mapper(model_class: type, columns: Tuple[str, ...]) -> Callable[[Sequence[Any]], Any]:
+    """
+    Function building model_class instances from tuple rows with the given columns
+    
+    Fields are picked positionally with one itemgetter call per row - no
+    intermediate dicts. Fields missing from the result get their defaults,
+    extra columns are ignored and INTERNED_FIELDS values are interned.
+    """
+    positions = {column: index for index, column in enumerate(columns)}
+    indices = []
+    defaults = []
+    factories = []
+    interned = []
+    for model_field in fields(model_class):
+        if model_field.name in positions:
+            indices.append(positions[model_field.name])
+            if model_field.name in INTERNED_FIELDS:
+                interned.append(model_field.name)
+            continue
+        if model_field.default is MISSING and model_field.default_factory is MISSING:
+            raise KeyError(f"Column {model_field.name} required by {model_class.__name__} not in result")
+        # Missing fields are read from the defaults appended to the row
+        indices.append(len(columns) + len(defaults))
+        defaults.append(None if model_field.default is MISSING else model_field.default)
+        if model_field.default is MISSING:
+            factories.append((model_field.name, model_field.default_factory))
+    
+    pick = itemgetter(*indices) if len(indices) > 1 else (lambda row: (row[indices[0]],))
+    defaults = tuple(defaults)
+    intern = sys.intern
+    
+    def build(row):
+        model = model_class(*pick(row + defaults if defaults else row))
+        for name in interned:
+            value = getattr(model, name)
+            if value.__class__ is str:
+                setattr(model, name, intern(value))
+        for name, factory in factories:
+            setattr(model, name, factory())
+        return model
+    
+    return build
+
 def dict_to_tenant(data: Dict[str, Any]) -> Tenant:
     """Convert dictionary to Tenant model"""
     return Tenant(
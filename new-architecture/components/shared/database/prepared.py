@@ -0,0 +1,180 @@
+"""
+Server-side prepared statement cache for DAO queries
+"""
+
+import os
+import re
+import logging
+import threading
+import itertools
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Sequence, Tuple
+from psycopg2.extensions import TRANSACTION_STATUS_INERROR
+from .connection import get_db_cursor
+from .query_stats import query_stats
+
+logger = logging.getLogger(__name__)
+
+# Prepared statements kept per pooled connection (0 disables - e.g. behind a transaction-mode pgbouncer)
+PREPARED_STATEMENT_CACHE_SIZE = int(os.environ.get('DB_PREPARED_STATEMENT_CACHE_SIZE', 100))
+
+_PLACEHOLDER = re.compile(r'\$\d+')
+
+def to_pyformat(query: str) -> str:
+    """Query with $n placeholders (numbered in parameter order) for plain cursor.execute"""
+    return _PLACEHOLDER.sub('%s', query)
+
+def array_literal(values: Sequence[Any]) -> str:
+    """
+    Render a list as a Postgres array literal
+
+    Passed as an untyped literal, it is coerced to the parameter's array type
+    (uuid[], varchar[], ...) instead of the text[] psycopg2 produces for lists.
+    """
+    elements = []
+    for value in values:
+        if value is None:
+            elements.append('NULL')
+        else:
+            escaped = str(value).replace('\\', '\\\\').replace('"', '\\"')
+            elements.append(f'"{escaped}"')
+    return '{' + ','.join(elements) + '}'
+
+class PreparedStatementCache:
+    """
+    Per-connection LRU of prepared statements keyed by query shape
+
+    The first execution of a shape on a connection runs PREPARE, later ones run
+    EXECUTE - Postgres skips parsing and, after a few executions, planning.
+    Statements live as long as the connection; the least recently used one is
+    deallocated when a connection exceeds max_size statements.
+
+    PREPARE / DEALLOCATE run behind a savepoint inside the caller's transaction,
+    so a failure there does not abort the caller's unit of work. A statement whose
+    EXECUTE failed is deallocated on the next use of the connection, after the
+    failed transaction was rolled back.
+    """
+
+    def __init__(self, max_size: int = PREPARED_STATEMENT_CACHE_SIZE):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._statements = weakref.WeakKeyDictionary()
+        # Names of failed statements still allocated on the server, per connection
+        self._stale = weakref.WeakKeyDictionary()
+        self._names = itertools.count(1)
+        self._metrics = {'hits': 0, 'prepares': 0, 'evictions': 0, 'errors': 0}
+
+    def _count(self, metric: str):
+        with self._lock:
+            self._metrics[metric] += 1
+
+    @staticmethod
+    def _execute_isolated(cursor, statement: str):
+        """Run a cache maintenance statement without aborting the caller's transaction on failure"""
+        if cursor.connection.autocommit:
+            cursor.execute(statement)
+            return
+        cursor.execute("SAVEPOINT prepared_statement_cache")
+        try:
+            cursor.execute(statement)
+        except Exception:
+            cursor.execute("ROLLBACK TO SAVEPOINT prepared_statement_cache")
+            raise
+        cursor.execute("RELEASE SAVEPOINT prepared_statement_cache")
+
+    def _deallocate(self, cursor, name: str):
+        try:
+            self._execute_isolated(cursor, f"DEALLOCATE {name}")
+        except Exception as e:
+            logger.warning(f"Failed to deallocate prepared statement {name}: {e}")
+        query_stats.forget_prepared(name)
+
+    def _deallocate_stale(self, cursor):
+        """DEALLOCATE statements whose EXECUTE failed earlier on this connection"""
+        connection = cursor.connection
+        if connection not in self._stale or connection.get_transaction_status() == TRANSACTION_STATUS_INERROR:
+            return
+        for name in self._stale.pop(connection):
+            self._deallocate(cursor, name)
+
+    def execute(self, cursor, shape: Hashable, query: str, params: Sequence[Any]):
+        """
+        Execute query (with $n placeholders) on cursor, preparing it on first use
+
+        Args:
+            cursor: Cursor of a checked out connection
+            shape: Cache key - everything the query text depends on
+            query: SQL text with $1..$n placeholders matching params
+            params: Parameter values
+        """
+        if self.max_size <= 0:
+            cursor.execute(to_pyformat(query), tuple(params))
+            return
+
+        # A connection is used by one thread at a time - only the mappings themselves need the lock
+        with self._lock:
+            statements = self._statements.setdefault(cursor.connection, OrderedDict())
+        self._deallocate_stale(cursor)
+
+        name = statements.get(shape)
+        if name is None:
+            name = f"dao_stmt_{next(self._names)}"
+            try:
+                # PREPARE is not transactional - the statement survives rollbacks of the request
+                self._execute_isolated(cursor, f"PREPARE {name} AS {query}")
+            except Exception as e:
+                logger.warning(f"Failed to prepare statement {name}, running it unprepared: {e}")
+                self._count('errors')
+                cursor.execute(to_pyformat(query), tuple(params))
+                return
+            statements[shape] = name
+            query_stats.register_prepared(name, query)
+            self._count('prepares')
+            if len(statements) > self.max_size:
+                _, evicted = statements.popitem(last=False)
+                self._deallocate(cursor, evicted)
+                self._count('evictions')
+        else:
+            statements.move_to_end(shape)
+            self._count('hits')
+
+        try:
+            if params:
+                cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", tuple(params))
+            else:
+                cursor.execute(f"EXECUTE {name}")
+        except Exception:
+            # E.g. "cached plan must not change result type" after DDL - prepare again next time;
+            # the transaction is aborted, so DEALLOCATE waits for the next use of the connection
+            statements.pop(shape, None)
+            with self._lock:
+                self._stale.setdefault(cursor.connection, []).append(name)
+            self._count('errors')
+            raise
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Cache hit / prepare counters"""
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['connections'] = len(self._statements)
+        metrics['max_size'] = self.max_size
+        return metrics
+
+# Global instance
+statement_cache = PreparedStatementCache()
+
+def execute_prepared(shape: Hashable, query: str, params: Sequence[Any] = (), fetch_one: bool = False) -> Any:
+    """Execute a query through the prepared statement cache and return results"""
+    with get_db_cursor() as cursor:
+        statement_cache.execute(cursor, shape, query, params)
+
+        if fetch_one:
+            return cursor.fetchone()
+        return cursor.fetchall()
+
+def execute_prepared_rows(shape: Hashable, query: str, params: Sequence[Any] = ()) -> Tuple[Tuple[str, ...], List[tuple]]:
+    """Execute a query through the prepared statement cache on a tuple cursor - returns column names and rows"""
+    with get_db_cursor(dict_cursor=False) as cursor:
+        statement_cache.execute(cursor, shape, query, params)
+        return tuple(column[0] for column in cursor.description), cursor.fetchall()
@@ -0,0 +1,274 @@
+"""
+Opt-in query instrumentation - per-statement latency histograms, slow-query log and EXPLAIN capture
+"""
+
+import os
+import re
+import time
+import random
+import logging
+import threading
+import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+import psycopg2
+import psycopg2.extensions
+
+logger = logging.getLogger(__name__)
+
+# Pooled connections time every statement (off by default - adds a few microseconds per query)
+QUERY_STATS_ENABLED = os.environ.get('DB_QUERY_STATS_ENABLED', 'false').lower() == 'true'
+# Statements slower than this are logged with redacted parameters
+SLOW_QUERY_MS = float(os.environ.get('DB_SLOW_QUERY_MS', 500))
+# Fraction of slow SELECTs re-run under EXPLAIN (ANALYZE, BUFFERS) (0 disables)
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(os.environ.get('DB_SLOW_QUERY_EXPLAIN_SAMPLE_RATE', 0))
+# Distinct statements tracked - the rest are counted under OTHER_STATEMENTS
+QUERY_STATS_MAX_STATEMENTS = int(os.environ.get('DB_QUERY_STATS_MAX_STATEMENTS', 500))
+
+# Upper bounds of the latency histogram buckets (the last bucket is unbounded)
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+OTHER_STATEMENTS = '<other>'
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_VALUES = re.compile(r"\bVALUES\s*\(.*?\)(?=\s*(?:ON\s+CONFLICT|RETURNING|$))", re.IGNORECASE | re.DOTALL)
+_NUMBER = re.compile(r"(?<![\w$.])\d+(?:\.\d+)?\b")
+_STATEMENT_NAME = re.compile(r"^(PREPARE|DEALLOCATE)\s+\w+", re.IGNORECASE)
+_EXECUTE = re.compile(r"^EXECUTE\s+(\w+)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+_MAX_STATEMENT_LENGTH = 2000
+
+def normalize_statement(query: str) -> str:
+    """
+    Statement text with literals replaced by ? - the key statistics are grouped by
+
+    Multi-row VALUES lists (bulk inserts) collapse to VALUES (...) so every chunk
+    size maps to one statement.
+    """
+    statement = _WHITESPACE.sub(' ', query).strip()
+    statement = _STRING.sub('?', statement)
+    statement = _VALUES.sub('VALUES (...)', statement)
+    statement = _NUMBER.sub('?', statement)
+    statement = _STATEMENT_NAME.sub(r'\1 ?', statement)
+    return statement[:_MAX_STATEMENT_LENGTH]
+
+def redact_params(params: Any) -> Any:
+    """Parameter types without their values - safe to log"""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: f"<{type(value).__name__}>" for key, value in params.items()}
+    return [f"<{type(value).__name__}>" for value in params]
+
+def _percentile(buckets: List[int], calls: int, max_ms: float, fraction: float) -> float:
+    """Upper bound of the bucket holding the given fraction of calls (capped at the maximum seen)"""
+    target = fraction * calls
+    seen = 0
+    for bound, count in zip(LATENCY_BUCKETS_MS, buckets):
+        seen += count
+        if seen >= target:
+            return min(bound, max_ms)
+    return max_ms
+
+class QueryStats:
+    """
+    Per normalized statement: calls, rows, errors and a latency histogram
+
+    p50/p95/p99 are read from the histogram, so memory stays constant however
+    many times a statement runs.
+    """
+
+    def __init__(self, slow_query_ms: float = SLOW_QUERY_MS,
+                 explain_sample_rate: float = SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+                 max_statements: int = QUERY_STATS_MAX_STATEMENTS):
+        self.slow_query_ms = slow_query_ms
+        self.explain_sample_rate = explain_sample_rate
+        self.max_statements = max_statements
+        self._lock = threading.Lock()
+        self._prepared = {}
+        self.reset()
+
+    def reset(self):
+        """Drop collected statistics"""
+        with self._lock:
+            self._statements = {}
+            self._since = datetime.datetime.utcnow()
+
+    def register_prepared(self, name: str, query: str):
+        """Remember the text of a prepared statement so EXECUTE is reported as the query itself"""
+        with self._lock:
+            self._prepared[name] = query
+
+    def forget_prepared(self, name: str):
+        with self._lock:
+            self._prepared.pop(name, None)
+
+    def statement_for(self, query: str) -> str:
+        """Normalized statement, resolving EXECUTE of a prepared statement to its query"""
+        match = _EXECUTE.match(query.lstrip())
+        if match:
+            with self._lock:
+                prepared = self._prepared.get(match.group(1))
+            if prepared is not None:
+                query = prepared
+        return normalize_statement(query)
+
+    def record(self, statement: str, elapsed_ms: float, rows: int = 0, failed: bool = False) -> Dict[str, Any]:
+        """Add one execution to the statement's statistics"""
+        with self._lock:
+            entry = self._statements.get(statement)
+            if entry is None:
+                if len(self._statements) >= self.max_statements:
+                    statement = OTHER_STATEMENTS
+                entry = self._statements.setdefault(statement, {
+                    'calls': 0, 'errors': 0, 'slow': 0, 'rows': 0,
+                    'total_ms': 0.0, 'max_ms': 0.0,
+                    'buckets': [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                    'explain': None,
+                })
+            entry['calls'] += 1
+            entry['rows'] += rows
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            if failed:
+                entry['errors'] += 1
+            if elapsed_ms >= self.slow_query_ms:
+                entry['slow'] += 1
+            bucket = len(LATENCY_BUCKETS_MS)
+            for index, bound in enumerate(LATENCY_BUCKETS_MS):
+                if elapsed_ms <= bound:
+                    bucket = index
+                    break
+            entry['buckets'][bucket] += 1
+            return entry
+
+    def observe(self, cursor, query: Any, params: Any, elapsed_ms: float, failed: bool):
+        """Record a statement executed on an instrumented cursor, logging / explaining it when slow"""
+        if isinstance(query, bytes):
+            text = query.decode(cursor.connection.encoding if hasattr(cursor.connection, 'encoding') else 'utf-8',
+                                errors='replace')
+        elif isinstance(query, str):
+            text = query
+        else:
+            # psycopg2.sql.Composed
+            text = query.as_string(cursor.connection)
+
+        statement = self.statement_for(text)
+        rows = cursor.rowcount if not failed and cursor.rowcount > 0 else 0
+        self.record(statement, elapsed_ms, rows, failed)
+
+        if failed or elapsed_ms < self.slow_query_ms:
+            return
+        logger.warning(f"Slow query ({elapsed_ms:.1f} ms, {rows} rows): {statement} params={redact_params(params)}")
+
+        if (self.explain_sample_rate > 0 and not getattr(cursor, 'name', None)
+                and statement.upper().startswith('SELECT') and random.random() < self.explain_sample_rate):
+            plan = self._explain(cursor.connection, text, params)
+            if plan is not None:
+                with self._lock:
+                    entry = self._statements.get(statement)
+                    if entry is not None:
+                        entry['explain'] = {
+                            'plan': plan,
+                            'elapsed_ms': round(elapsed_ms, 3),
+                            'captured_at': datetime.datetime.utcnow().isoformat(),
+                        }
+
+    def _explain(self, conn, query: str, params: Any) -> Optional[str]:
+        """
+        Re-run a read-only statement under EXPLAIN (ANALYZE, BUFFERS)
+
+        Runs on a plain cursor of the same connection (inside the caller's transaction,
+        behind a savepoint) so the caller's cursor keeps its results.
+        """
+        cursor = psycopg2.extensions.cursor(conn)
+        savepoint = not conn.autocommit
+        try:
+            if savepoint:
+                cursor.execute("SAVEPOINT query_stats_explain")
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {query}", params)
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+            if savepoint:
+                cursor.execute("RELEASE SAVEPOINT query_stats_explain")
+            return plan
+        except psycopg2.Error as e:
+            logger.warning(f"EXPLAIN of slow query failed: {e}")
+            if savepoint:
+                try:
+                    cursor.execute("ROLLBACK TO SAVEPOINT query_stats_explain")
+                except psycopg2.Error:
+                    pass
+            return None
+        finally:
+            cursor.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistics per statement, slowest in total first"""
+        with self._lock:
+            entries = [(statement, dict(entry)) for statement, entry in self._statements.items()]
+            since = self._since
+
+        statements = []
+        for statement, entry in sorted(entries, key=lambda item: item[1]['total_ms'], reverse=True):
+            calls = entry['calls']
+            bounds = [str(bound) for bound in LATENCY_BUCKETS_MS] + ['+Inf']
+            statements.append({
+                'statement': statement,
+                'calls': calls,
+                'errors': entry['errors'],
+                'slow': entry['slow'],
+                'rows': entry['rows'],
+                'total_ms': round(entry['total_ms'], 3),
+                'mean_ms': round(entry['total_ms'] / calls, 3),
+                'p50_ms': round(_percentile(entry['buckets'], calls, entry['max_ms'], 0.50), 3),
+                'p95_ms': round(_percentile(entry['buckets'], calls, entry['max_ms'], 0.95), 3),
+                'p99_ms': round(_percentile(entry['buckets'], calls, entry['max_ms'], 0.99), 3),
+                'max_ms': round(entry['max_ms'], 3),
+                'histogram_ms': dict(zip(bounds, entry['buckets'])),
+                'explain': entry['explain'],
+            })
+
+        return {
+            'enabled': QUERY_STATS_ENABLED,
+            'slow_query_ms': self.slow_query_ms,
+            'explain_sample_rate': self.explain_sample_rate,
+            'since': since.isoformat(),
+            'statements': statements,
+        }
+
+# Global instance
+query_stats = QueryStats()
+
+class _InstrumentedCursorMixin:
+    """Times execute/executemany and reports them to query_stats"""
+
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = super().execute(query, vars)
+            failed = False
+            return result
+        finally:
+            query_stats.observe(self, query, vars, (time.perf_counter() - start) * 1000, failed)
+
+    def executemany(self, query, vars_list):
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = super().executemany(query, vars_list)
+            failed = False
+            return result
+        finally:
+            query_stats.observe(self, query, None, (time.perf_counter() - start) * 1000, failed)
+
+@lru_cache(maxsize=None)
+def instrumented_cursor(cursor_factory):
+    """Subclass of cursor_factory (cursor, RealDictCursor, ...) reporting its statements"""
+    return type(f"Instrumented{cursor_factory.__name__}", (_InstrumentedCursorMixin, cursor_factory), {})
+
+class InstrumentedConnection(psycopg2.extensions.connection):
+    """psycopg2 connection_factory whose cursors - of any cursor_factory - are instrumented"""
+
+    def cursor(self, name=None, cursor_factory=None, **kwargs):
+        cursor_factory = cursor_factory or self.cursor_factory or psycopg2.extensions.cursor
+        return super().cursor(name, cursor_factory=instrumented_cursor(cursor_factory), **kwargs)
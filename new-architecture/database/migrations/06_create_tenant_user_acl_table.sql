@@ -0,0 +1,438 @@
+-- Migracja: zmaterializowana tabela ACL tenant_user_acl utrzymywana triggerami
+-- Jeden wiersz na parę (tenant, użytkownik) w formacie dokumentu ACL serwowanego
+-- przez Data Provider API - odczyt tenanta to jeden skan indeksu zamiast sześciu zapytań.
+--
+-- Semantyka odpowiada TenantACLBuilder:
+--   * użytkownicy tenanta = user_access UNION user_roles
+--   * roles       - bezpośrednie role z user_roles (app_id -> [role_name])
+--   * permissions - uprawnienia z widoku user_effective_permissions (bezpośrednie + zespołowe)
+--   * companies   - bezpośredni dostęp z user_access (source_type 'direct' w user_effective_access)
+--   * teams       - zespoły użytkownika (bez filtrowania po tenancie, jak TeamDAO.find_by_user)
+-- team_companies nie wpływa na serwowany dokument, więc nie ma własnego triggera.
+
+BEGIN;
+
+-- ============================================================================
+-- LIVE VIEW - jedyna definicja oczekiwanej zawartości tabeli
+-- ============================================================================
+
+CREATE OR REPLACE VIEW tenant_user_acl_live AS
+SELECT
+    tu.tenant_id,
+    tu.user_id,
+    u.email,
+    u.full_name,
+    COALESCE(r.roles, '{}'::jsonb) AS roles,
+    COALESCE(p.permissions, '{}'::jsonb) AS permissions,
+    COALESCE(c.companies, '[]'::jsonb) AS companies,
+    COALESCE(tm.teams, '[]'::jsonb) AS teams
+FROM (
+    SELECT tenant_id, user_id FROM user_access
+    UNION
+    SELECT tenant_id, user_id FROM user_roles
+) tu
+JOIN users u ON u.user_id = tu.user_id
+LEFT JOIN LATERAL (
+    SELECT jsonb_object_agg(per_app.app_id, per_app.role_names) AS roles
+    FROM (
+        SELECT r.app_id, jsonb_agg(r.role_name ORDER BY r.role_name) AS role_names
+        FROM user_roles ur
+        JOIN roles r ON ur.role_id = r.role_id
+        WHERE ur.tenant_id = tu.tenant_id AND ur.user_id = tu.user_id
+        GROUP BY r.app_id
+    ) per_app
+) r ON TRUE
+LEFT JOIN LATERAL (
+    SELECT jsonb_object_agg(per_app.app_id, per_app.permission_names) AS permissions
+    FROM (
+        SELECT uep.app_id, jsonb_agg(DISTINCT uep.permission_name ORDER BY uep.permission_name) AS permission_names
+        FROM user_effective_permissions uep
+        WHERE uep.tenant_id = tu.tenant_id AND uep.user_id = tu.user_id
+        GROUP BY uep.app_id
+    ) per_app
+) p ON TRUE
+LEFT JOIN LATERAL (
+    SELECT jsonb_agg(uea.company_id ORDER BY uea.company_id) AS companies
+    FROM user_effective_access uea
+    WHERE uea.tenant_id = tu.tenant_id AND uea.user_id = tu.user_id
+      AND uea.source_type = 'direct'
+) c ON TRUE
+LEFT JOIN LATERAL (
+    SELECT jsonb_agg(t.team_name ORDER BY t.team_name) AS teams
+    FROM team_memberships tms
+    JOIN teams t ON tms.team_id = t.team_id
+    WHERE tms.user_id = tu.user_id
+) tm ON TRUE;
+
+-- ============================================================================
+-- TABLE
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS tenant_user_acl (
+    tenant_id VARCHAR(255) NOT NULL REFERENCES tenants(tenant_id) ON DELETE CASCADE,
+    user_id VARCHAR(255) NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    email VARCHAR(255),
+    full_name VARCHAR(255),
+    roles JSONB NOT NULL DEFAULT '{}',
+    permissions JSONB NOT NULL DEFAULT '{}',
+    companies JSONB NOT NULL DEFAULT '[]',
+    teams JSONB NOT NULL DEFAULT '[]',
+    version BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (tenant_id, user_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_tenant_user_acl_user_id ON tenant_user_acl(user_id);
+
+COMMENT ON TABLE tenant_user_acl IS 'Materialized per-user ACL rows maintained by triggers (see tenant_user_acl_live)';
+COMMENT ON COLUMN tenant_user_acl.version IS 'Incremented on every change of the row content';
+
+-- ============================================================================
+-- REFRESH PROCEDURES
+-- ============================================================================
+
+-- Przelicza jeden wiersz (tenant, użytkownik); usuwa go gdy użytkownik nie należy już do tenanta.
+-- Blokada doradcza pary szereguje współbieżne przeliczenia: odczyt widoku po jej uzyskaniu
+-- (nowa migawka w funkcji VOLATILE) widzi zmiany transakcji, która ją zwolniła, więc
+-- ON CONFLICT DO UPDATE nie nadpisze wiersza nieaktualnymi danymi.
+CREATE OR REPLACE FUNCTION refresh_tenant_user_acl(p_tenant_id VARCHAR, p_user_id VARCHAR)
+RETURNS VOID AS $$
+DECLARE
+    v_live RECORD;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext(p_tenant_id), hashtext(p_user_id));
+
+    SELECT * INTO v_live
+    FROM tenant_user_acl_live
+    WHERE tenant_id = p_tenant_id AND user_id = p_user_id;
+
+    IF NOT FOUND THEN
+        DELETE FROM tenant_user_acl WHERE tenant_id = p_tenant_id AND user_id = p_user_id;
+        RETURN;
+    END IF;
+
+    INSERT INTO tenant_user_acl (tenant_id, user_id, email, full_name, roles, permissions, companies, teams)
+    VALUES (v_live.tenant_id, v_live.user_id, v_live.email, v_live.full_name,
+            v_live.roles, v_live.permissions, v_live.companies, v_live.teams)
+    ON CONFLICT (tenant_id, user_id) DO UPDATE SET
+        email = EXCLUDED.email,
+        full_name = EXCLUDED.full_name,
+        roles = EXCLUDED.roles,
+        permissions = EXCLUDED.permissions,
+        companies = EXCLUDED.companies,
+        teams = EXCLUDED.teams,
+        version = tenant_user_acl.version + 1,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE (tenant_user_acl.email, tenant_user_acl.full_name, tenant_user_acl.roles,
+           tenant_user_acl.permissions, tenant_user_acl.companies, tenant_user_acl.teams)
+        IS DISTINCT FROM
+          (EXCLUDED.email, EXCLUDED.full_name, EXCLUDED.roles,
+           EXCLUDED.permissions, EXCLUDED.companies, EXCLUDED.teams);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Przelicza wszystkie wiersze użytkownika (we wszystkich jego tenantach)
+CREATE OR REPLACE FUNCTION refresh_user_acl(p_user_id VARCHAR)
+RETURNS VOID AS $$
+BEGIN
+    PERFORM refresh_tenant_user_acl(affected.tenant_id, p_user_id)
+    FROM (
+        SELECT tenant_id FROM user_access WHERE user_id = p_user_id
+        UNION
+        SELECT tenant_id FROM user_roles WHERE user_id = p_user_id
+        UNION
+        SELECT tenant_id FROM tenant_user_acl WHERE user_id = p_user_id
+    ) affected;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Pełne przeliczenie tenanta (NULL = wszystkie tenanty) - naprawa po niezgodności
+CREATE OR REPLACE FUNCTION refresh_tenant_acl(p_tenant_id VARCHAR DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    v_count INTEGER;
+BEGIN
+    PERFORM refresh_tenant_user_acl(affected.tenant_id, affected.user_id)
+    FROM (
+        SELECT tenant_id, user_id FROM user_access
+        UNION
+        SELECT tenant_id, user_id FROM user_roles
+        UNION
+        SELECT tenant_id, user_id FROM tenant_user_acl
+    ) affected
+    WHERE p_tenant_id IS NULL OR affected.tenant_id = p_tenant_id;
+
+    SELECT COUNT(*) INTO v_count
+    FROM tenant_user_acl
+    WHERE p_tenant_id IS NULL OR tenant_id = p_tenant_id;
+    RETURN v_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================================
+-- TRIGGERS
+-- ============================================================================
+
+-- Triggery działają na poziomie instrukcji: zmienione wiersze przychodzą w tabelach
+-- przejściowych old_rows/new_rows, więc masowy COPY/INSERT (bulk load) przelicza każdą
+-- parę (tenant, użytkownik) raz na instrukcję, a nie raz na wiersz. Pary przeliczane są
+-- w stałej kolejności, żeby blokady doradcze refresh_tenant_user_acl nie zakleszczały się.
+-- Tabela przejściowa istnieje tylko dla operacji, która ją deklaruje - stąd podział po TG_OP
+-- i osobne triggery INSERT/UPDATE/DELETE. REFERENCING wyklucza listę kolumn (UPDATE OF),
+-- więc triggery zmian nazw same porównują stare i nowe wartości kolumn.
+CREATE OR REPLACE FUNCTION sync_tenant_user_acl()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_rows     JSONB := '[]';      -- zmienione wiersze tabel powiązań (old_rows + new_rows)
+    v_pairs    JSONB := '[]';      -- bezpośrednio dotknięte pary (tenant_id, user_id)
+    v_user_ids VARCHAR[] := '{}';  -- użytkownicy przeliczani we wszystkich swoich tenantach
+    v_team_ids UUID[] := '{}';     -- członkowie zespołów przeliczani w tenancie zespołu
+    v_role_ids UUID[] := '{}';     -- posiadacze ról (bezpośrednio i przez zespoły)
+BEGIN
+    IF TG_TABLE_NAME = 'users' THEN
+        v_user_ids := ARRAY(
+            SELECT n.user_id
+            FROM new_rows n
+            JOIN old_rows o ON o.user_id = n.user_id
+            WHERE (n.email, n.full_name) IS DISTINCT FROM (o.email, o.full_name)
+        );
+
+    ELSIF TG_TABLE_NAME = 'teams' THEN
+        v_user_ids := ARRAY(
+            SELECT DISTINCT tms.user_id
+            FROM new_rows n
+            JOIN old_rows o ON o.team_id = n.team_id
+            JOIN team_memberships tms ON tms.team_id = n.team_id
+            WHERE n.team_name IS DISTINCT FROM o.team_name
+        );
+
+    ELSIF TG_TABLE_NAME = 'roles' THEN
+        v_role_ids := ARRAY(
+            SELECT n.role_id
+            FROM new_rows n
+            JOIN old_rows o ON o.role_id = n.role_id
+            WHERE (n.role_name, n.app_id) IS DISTINCT FROM (o.role_name, o.app_id)
+        );
+
+    ELSIF TG_TABLE_NAME = 'permissions' THEN
+        v_role_ids := ARRAY(
+            SELECT DISTINCT rp.role_id
+            FROM new_rows n
+            JOIN old_rows o ON o.permission_id = n.permission_id
+            JOIN role_permissions rp ON rp.permission_id = n.permission_id
+            WHERE (n.permission_name, n.app_id) IS DISTINCT FROM (o.permission_name, o.app_id)
+        );
+
+    ELSE
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            v_rows := v_rows || (SELECT COALESCE(jsonb_agg(to_jsonb(o)), '[]') FROM old_rows o);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            v_rows := v_rows || (SELECT COALESCE(jsonb_agg(to_jsonb(n)), '[]') FROM new_rows n);
+        END IF;
+
+        IF TG_TABLE_NAME IN ('user_roles', 'user_access') THEN
+            v_pairs := v_rows;
+        ELSIF TG_TABLE_NAME = 'team_memberships' THEN
+            v_user_ids := ARRAY(
+                SELECT DISTINCT c.user_id FROM jsonb_to_recordset(v_rows) AS c(user_id VARCHAR)
+            );
+        ELSIF TG_TABLE_NAME = 'team_roles' THEN
+            v_team_ids := ARRAY(
+                SELECT DISTINCT c.team_id FROM jsonb_to_recordset(v_rows) AS c(team_id UUID)
+            );
+        ELSIF TG_TABLE_NAME = 'role_permissions' THEN
+            v_role_ids := ARRAY(
+                SELECT DISTINCT c.role_id FROM jsonb_to_recordset(v_rows) AS c(role_id UUID)
+            );
+        END IF;
+    END IF;
+
+    PERFORM refresh_tenant_user_acl(affected.tenant_id, affected.user_id)
+    FROM (
+        SELECT c.tenant_id, c.user_id
+        FROM jsonb_to_recordset(v_pairs) AS c(tenant_id VARCHAR, user_id VARCHAR)
+        UNION
+        SELECT tenant_id, user_id FROM user_access WHERE user_id = ANY(v_user_ids)
+        UNION
+        SELECT tenant_id, user_id FROM user_roles WHERE user_id = ANY(v_user_ids)
+        UNION
+        SELECT tenant_id, user_id FROM tenant_user_acl WHERE user_id = ANY(v_user_ids)
+        UNION
+        SELECT t.tenant_id, tms.user_id
+        FROM teams t
+        JOIN team_memberships tms ON tms.team_id = t.team_id
+        WHERE t.team_id = ANY(v_team_ids)
+        UNION
+        SELECT ur.tenant_id, ur.user_id
+        FROM user_roles ur
+        WHERE ur.role_id = ANY(v_role_ids)
+        UNION
+        SELECT t.tenant_id, tms.user_id
+        FROM team_roles tr
+        JOIN teams t ON tr.team_id = t.team_id
+        JOIN team_memberships tms ON tms.team_id = t.team_id
+        WHERE tr.role_id = ANY(v_role_ids)
+        ORDER BY 1, 2
+    ) affected;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Pierwszy DROP w każdej grupie usuwa trigger wierszowy z poprzedniej wersji migracji
+DROP TRIGGER IF EXISTS sync_tenant_user_acl_user_roles ON user_roles;
+DROP TRIGGER IF EXISTS sync_tenant_user_acl_user_roles_insert ON user_roles;
+CREATE TRIGGER sync_tenant_user_acl_user_roles_insert
+    AFTER INSERT ON user_roles
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_tenant_user_acl();
+DROP TRIGGER IF EXISTS sync_tenant_user_acl_user_roles_update ON user_roles;
+CREATE TRIGGER sync_tenant_user_acl_user_roles_update
+    AFTER UPDATE ON user_roles
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_tenant_user_acl();
+DROP TRIGGER IF EXISTS sync_tenant_user_acl_user_roles_delete ON user_roles;
+CREATE TRIGGER sync_tenant_user_acl_user_roles_delete
+    AFTER DELETE ON user_roles
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_tenant_user_acl();
+
+DROP TRIGGER IF EXISTS sync_tenant_user_acl_user_access ON user_access;
+DROP TRIGGER IF EXISTS sync_tenant_user_acl_user_access_insert ON user_access;
+CREATE TRIGGER sync_tenant_user_acl_user_access_insert
+    AFTER INSERT ON user_access
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_tenant_user_acl();
+DROP TRIGGER IF EXISTS sync_tenant_user_acl_user_access_update ON user_access;
+CREATE TRIGGER sync_tenant_user_acl_user_access_update
+    AFTER UPDATE ON user_access
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_tenant_user_acl();
+DROP TRIGGER IF EXISTS sync_tenant_user_acl_user_access_delete ON user_access;
+CREATE TRIGGER sync_tenant_user_acl_user_access_delete
+    AFTER DELETE ON user_access
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_tenant_user_acl();
+
+DROP TRIGGER IF EXISTS sync_tenant_user_acl_team_memberships ON team_memberships;
+DROP TRIGGER IF EXISTS sync_tenant_user_acl_team_memberships_insert ON team_memberships;
+CREATE TRIGGER sync_tenant_user_acl_team_memberships_insert
+    AFTER INSERT ON team_memberships
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_tenant_user_acl();
+DROP TRIGGER IF EXISTS sync_tenant_user_acl_team_memberships_update ON team_memberships;
+CREATE TRIGGER sync_tenant_user_acl_team_memberships_update
+    AFTER UPDATE ON team_memberships
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_tenant_user_acl();
+DROP TRIGGER IF EXISTS sync_tenant_user_acl_team_memberships_delete ON team_memberships;
+CREATE TRIGGER sync_tenant_user_acl_team_memberships_delete
+    AFTER DELETE ON team_memberships
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_tenant_user_acl();
+
+DROP TRIGGER IF EXISTS sync_tenant_user_acl_team_roles ON team_roles;
+DROP TRIGGER IF EXISTS sync_tenant_user_acl_team_roles_insert ON team_roles;
+CREATE TRIGGER sync_tenant_user_acl_team_roles_insert
+    AFTER INSERT ON team_roles
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_tenant_user_acl();
+DROP TRIGGER IF EXISTS sync_tenant_user_acl_team_roles_update ON team_roles;
+CREATE TRIGGER sync_tenant_user_acl_team_roles_update
+    AFTER UPDATE ON team_roles
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_tenant_user_acl();
+DROP TRIGGER IF EXISTS sync_tenant_user_acl_team_roles_delete ON team_roles;
+CREATE TRIGGER sync_tenant_user_acl_team_roles_delete
+    AFTER DELETE ON team_roles
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_tenant_user_acl();
+
+DROP TRIGGER IF EXISTS sync_tenant_user_acl_role_permissions ON role_permissions;
+DROP TRIGGER IF EXISTS sync_tenant_user_acl_role_permissions_insert ON role_permissions;
+CREATE TRIGGER sync_tenant_user_acl_role_permissions_insert
+    AFTER INSERT ON role_permissions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_tenant_user_acl();
+DROP TRIGGER IF EXISTS sync_tenant_user_acl_role_permissions_update ON role_permissions;
+CREATE TRIGGER sync_tenant_user_acl_role_permissions_update
+    AFTER UPDATE ON role_permissions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_tenant_user_acl();
+DROP TRIGGER IF EXISTS sync_tenant_user_acl_role_permissions_delete ON role_permissions;
+CREATE TRIGGER sync_tenant_user_acl_role_permissions_delete
+    AFTER DELETE ON role_permissions
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_tenant_user_acl();
+
+DROP TRIGGER IF EXISTS sync_tenant_user_acl_teams ON teams;
+CREATE TRIGGER sync_tenant_user_acl_teams
+    AFTER UPDATE ON teams
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_tenant_user_acl();
+
+DROP TRIGGER IF EXISTS sync_tenant_user_acl_users ON users;
+CREATE TRIGGER sync_tenant_user_acl_users
+    AFTER UPDATE ON users
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_tenant_user_acl();
+
+DROP TRIGGER IF EXISTS sync_tenant_user_acl_roles ON roles;
+CREATE TRIGGER sync_tenant_user_acl_roles
+    AFTER UPDATE ON roles
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_tenant_user_acl();
+
+DROP TRIGGER IF EXISTS sync_tenant_user_acl_permissions ON permissions;
+CREATE TRIGGER sync_tenant_user_acl_permissions
+    AFTER UPDATE ON permissions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_tenant_user_acl();
+
+-- ============================================================================
+-- CONSISTENCY CHECK
+-- ============================================================================
+
+-- Porównuje tabelę z widokami na żywo (NULL = wszystkie tenanty)
+--   missing - wiersz oczekiwany, brak w tabeli
+--   orphan  - wiersz w tabeli, użytkownik nie należy do tenanta
+--   stale   - zawartość wiersza różni się od widoków
+CREATE OR REPLACE FUNCTION check_tenant_user_acl(p_tenant_id VARCHAR DEFAULT NULL)
+RETURNS TABLE (tenant_id VARCHAR, user_id VARCHAR, issue TEXT) AS $$
+    SELECT
+        COALESCE(l.tenant_id, m.tenant_id)::VARCHAR,
+        COALESCE(l.user_id, m.user_id)::VARCHAR,
+        CASE
+            WHEN m.user_id IS NULL THEN 'missing'
+            WHEN l.user_id IS NULL THEN 'orphan'
+            ELSE 'stale'
+        END
+    FROM (
+        SELECT * FROM tenant_user_acl_live
+        WHERE p_tenant_id IS NULL OR tenant_user_acl_live.tenant_id = p_tenant_id
+    ) l
+    FULL OUTER JOIN (
+        SELECT * FROM tenant_user_acl
+        WHERE p_tenant_id IS NULL OR tenant_user_acl.tenant_id = p_tenant_id
+    ) m ON m.tenant_id = l.tenant_id AND m.user_id = l.user_id
+    WHERE l.user_id IS NULL
+       OR m.user_id IS NULL
+       OR (l.email, l.full_name, l.roles, l.permissions, l.companies, l.teams)
+          IS DISTINCT FROM
+          (m.email, m.full_name, m.roles, m.permissions, m.companies, m.teams)
+    ORDER BY 1, 2;
+$$ LANGUAGE sql STABLE;
+
+-- Początkowe wypełnienie tabeli
+INSERT INTO tenant_user_acl (tenant_id, user_id, email, full_name, roles, permissions, companies, teams)
+SELECT tenant_id, user_id, email, full_name, roles, permissions, companies, teams
+FROM tenant_user_acl_live
+ON CONFLICT (tenant_id, user_id) DO NOTHING;
+
+-- Sprawdź rezultat
+SELECT COUNT(*) AS tenant_user_acl_rows FROM tenant_user_acl;
+SELECT * FROM check_tenant_user_acl();
+
+COMMIT;
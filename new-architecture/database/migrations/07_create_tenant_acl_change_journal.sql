@@ -0,0 +1,105 @@
+-- Migracja: dziennik zmian ACL z numerem sekwencyjnym per tenant
+-- Wymaga migracji 06 (tabela tenant_user_acl). Każda zmiana wiersza tenant_user_acl
+-- podbija wersję tenanta i zapisuje (tenant, wersja, użytkownik, operacja) w dzienniku.
+-- Endpoint /tenants/<tenant_id>/acl/changes?since=<wersja> zwraca tylko zmienione wpisy.
+
+BEGIN;
+
+-- Aktualna wersja ACL tenanta oraz wersja, do której dziennik został skompaktowany
+-- (bez kluczy obcych - dziennik musi przetrwać kaskadowe usunięcie tenanta w tej samej instrukcji)
+CREATE TABLE IF NOT EXISTS tenant_acl_versions (
+    tenant_id VARCHAR(255) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    compacted_through BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS tenant_acl_changes (
+    tenant_id VARCHAR(255) NOT NULL,
+    seq BIGINT NOT NULL,
+    user_id VARCHAR(255) NOT NULL,
+    op VARCHAR(10) NOT NULL CHECK (op IN ('upsert', 'delete')),
+    changed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (tenant_id, seq)
+);
+
+CREATE INDEX IF NOT EXISTS idx_tenant_acl_changes_changed_at ON tenant_acl_changes(changed_at);
+
+COMMENT ON TABLE tenant_acl_versions IS 'Per-tenant ACL version (sequence of tenant_acl_changes) and journal compaction mark';
+COMMENT ON TABLE tenant_acl_changes IS 'Journal of tenant_user_acl row changes, ordered by per-tenant seq';
+
+-- Blokada wiersza wersji serializuje zapisy w obrębie tenanta, więc numery
+-- sekwencyjne są nadawane w kolejności zatwierdzania transakcji
+CREATE OR REPLACE FUNCTION journal_tenant_user_acl()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_tenant_id VARCHAR(255);
+    v_user_id VARCHAR(255);
+    v_version BIGINT;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        v_tenant_id := OLD.tenant_id;
+        v_user_id := OLD.user_id;
+    ELSE
+        v_tenant_id := NEW.tenant_id;
+        v_user_id := NEW.user_id;
+    END IF;
+
+    INSERT INTO tenant_acl_versions (tenant_id, version)
+    VALUES (v_tenant_id, 1)
+    ON CONFLICT (tenant_id) DO UPDATE SET
+        version = tenant_acl_versions.version + 1,
+        updated_at = CURRENT_TIMESTAMP
+    RETURNING version INTO v_version;
+
+    INSERT INTO tenant_acl_changes (tenant_id, seq, user_id, op)
+    VALUES (v_tenant_id, v_version, v_user_id, CASE WHEN TG_OP = 'DELETE' THEN 'delete' ELSE 'upsert' END);
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS journal_tenant_user_acl ON tenant_user_acl;
+CREATE TRIGGER journal_tenant_user_acl
+    AFTER INSERT OR UPDATE OR DELETE ON tenant_user_acl
+    FOR EACH ROW EXECUTE FUNCTION journal_tenant_user_acl();
+
+-- Usuwa wpisy dziennika starsze niż p_older_than; klienci z wersją sprzed
+-- compacted_through dostają odpowiedź "full resync required"
+CREATE OR REPLACE FUNCTION compact_tenant_acl_changes(p_older_than INTERVAL DEFAULT INTERVAL '7 days')
+RETURNS INTEGER AS $$
+DECLARE
+    v_removed INTEGER;
+BEGIN
+    WITH removed AS (
+        DELETE FROM tenant_acl_changes
+        WHERE changed_at < CURRENT_TIMESTAMP - p_older_than
+        RETURNING tenant_id, seq
+    ),
+    marks AS (
+        SELECT tenant_id, MAX(seq) AS max_seq, COUNT(*) AS removed_count
+        FROM removed
+        GROUP BY tenant_id
+    ),
+    updated AS (
+        UPDATE tenant_acl_versions v
+        SET compacted_through = GREATEST(v.compacted_through, marks.max_seq)
+        FROM marks
+        WHERE v.tenant_id = marks.tenant_id
+    )
+    SELECT COALESCE(SUM(removed_count), 0) INTO v_removed FROM marks;
+
+    RETURN v_removed;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Istniejące tenanty zaczynają od wersji 0 (pełny dokument ACL odpowiada wersji 0)
+INSERT INTO tenant_acl_versions (tenant_id, version, compacted_through)
+SELECT tenant_id, 0, 0 FROM tenants
+ON CONFLICT (tenant_id) DO NOTHING;
+
+-- Sprawdź rezultat
+SELECT * FROM tenant_acl_versions ORDER BY tenant_id;
+
+COMMIT;
@@ -0,0 +1,15 @@
+-- Migracja: indeksy dla stronicowania kursorem (keyset) list /api/users, /api/companies, /api/profiles
+-- Listy są sortowane po (created_at DESC, id DESC) - kolejna strona zaczyna się od klucza
+-- ostatniego wiersza, więc koszt strony nie rośnie z jej numerem jak przy OFFSET.
+
+BEGIN;
+
+CREATE INDEX IF NOT EXISTS idx_users_status_created_at ON users(status, created_at DESC, user_id DESC);
+CREATE INDEX IF NOT EXISTS idx_companies_status_created_at ON companies(status, created_at DESC, company_id DESC);
+CREATE INDEX IF NOT EXISTS idx_companies_tenant_status_created_at ON companies(tenant_id, status, created_at DESC, company_id DESC);
+CREATE INDEX IF NOT EXISTS idx_application_profiles_created_at ON application_profiles(created_at DESC, profile_id DESC);
+
+-- Liczba użytkowników firmy na liście firm (klucz główny user_access zaczyna się od user_id)
+CREATE INDEX IF NOT EXISTS idx_user_access_company_id ON user_access(company_id);
+
+COMMIT;
@@ -0,0 +1,198 @@
+-- Migracja: kanał zmian uprawnień LISTEN/NOTIFY (acl_changes) dla Data Provider API
+-- Każda zmiana tabel uprawnień - także bezpośrednim SQL (skrypty seed, load_ksef_data.sql,
+-- ręczne poprawki) - zapisuje zdarzenie (tenant, użytkownik, tabela, operacja) w
+-- acl_change_events i wysyła je przez pg_notify. Listener (acl_change_feed.py) unieważnia
+-- cache ACL i publikuje zmiany do OPAL; po ponownym połączeniu doczytuje pominięte
+-- zdarzenia z acl_change_events (event_id > ostatnie przetworzone).
+--
+-- user_id NULL oznacza zmianę całego tenanta (team_roles, role_permissions, zmiana nazwy zespołu,
+-- roli lub uprawnienia).
+-- NOTIFY jest dostarczane dopiero po zatwierdzeniu transakcji; wycofane zmiany nie generują zdarzeń.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS acl_change_events (
+    event_id BIGSERIAL PRIMARY KEY,
+    tenant_id VARCHAR(255) NOT NULL,
+    user_id VARCHAR(255),
+    table_name VARCHAR(63) NOT NULL,
+    op VARCHAR(10) NOT NULL CHECK (op IN ('INSERT', 'UPDATE', 'DELETE')),
+    changed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_acl_change_events_changed_at ON acl_change_events(changed_at);
+
+COMMENT ON TABLE acl_change_events IS 'Permission changes published on the acl_changes NOTIFY channel (catch-up source for listeners)';
+
+-- Zapisuje zdarzenie i wysyła je na kanał acl_changes (ładunek JSON znacznie poniżej limitu 8000 bajtów)
+CREATE OR REPLACE FUNCTION emit_acl_change(p_tenant_id VARCHAR, p_user_id VARCHAR, p_table VARCHAR, p_op VARCHAR)
+RETURNS VOID AS $$
+DECLARE
+    v_event_id BIGINT;
+BEGIN
+    IF p_tenant_id IS NULL THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO acl_change_events (tenant_id, user_id, table_name, op)
+    VALUES (p_tenant_id, p_user_id, p_table, p_op)
+    RETURNING event_id INTO v_event_id;
+
+    PERFORM pg_notify('acl_changes', json_build_object(
+        'id', v_event_id,
+        'tenant_id', p_tenant_id,
+        'user_id', p_user_id,
+        'table', p_table,
+        'op', p_op
+    )::text);
+END;
+$$ LANGUAGE plpgsql;
+
+-- OLD/NEW niedostępne dla danej operacji mają wartość NULL (PostgreSQL 11+)
+CREATE OR REPLACE FUNCTION notify_acl_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_TABLE_NAME IN ('user_roles', 'user_access') THEN
+        PERFORM emit_acl_change(changed.tenant_id, changed.user_id, TG_TABLE_NAME, TG_OP)
+        FROM (
+            SELECT OLD.tenant_id, OLD.user_id
+            UNION
+            SELECT NEW.tenant_id, NEW.user_id
+        ) changed;
+
+    ELSIF TG_TABLE_NAME = 'team_memberships' THEN
+        PERFORM emit_acl_change(changed.tenant_id, changed.user_id, TG_TABLE_NAME, TG_OP)
+        FROM (
+            SELECT DISTINCT t.tenant_id, tms.user_id
+            FROM (VALUES (OLD.team_id, OLD.user_id), (NEW.team_id, NEW.user_id)) tms(team_id, user_id)
+            JOIN teams t ON t.team_id = tms.team_id
+        ) changed;
+
+    ELSIF TG_TABLE_NAME = 'team_roles' THEN
+        PERFORM emit_acl_change(changed.tenant_id, NULL, TG_TABLE_NAME, TG_OP)
+        FROM (
+            SELECT DISTINCT t.tenant_id
+            FROM teams t
+            WHERE t.team_id IN (OLD.team_id, NEW.team_id)
+        ) changed;
+
+    ELSIF TG_TABLE_NAME = 'role_permissions' THEN
+        PERFORM emit_acl_change(changed.tenant_id, NULL, TG_TABLE_NAME, TG_OP)
+        FROM (
+            SELECT ur.tenant_id
+            FROM user_roles ur
+            WHERE ur.role_id IN (OLD.role_id, NEW.role_id)
+            UNION
+            SELECT t.tenant_id
+            FROM team_roles tr
+            JOIN teams t ON tr.team_id = t.team_id
+            WHERE tr.role_id IN (OLD.role_id, NEW.role_id)
+        ) changed;
+
+    ELSIF TG_TABLE_NAME = 'roles' THEN
+        -- Zmiana nazwy roli - tenanty jej posiadaczy (bezpośrednio i przez zespoły)
+        PERFORM emit_acl_change(changed.tenant_id, NULL, TG_TABLE_NAME, TG_OP)
+        FROM (
+            SELECT ur.tenant_id
+            FROM user_roles ur
+            WHERE ur.role_id = NEW.role_id
+            UNION
+            SELECT t.tenant_id
+            FROM team_roles tr
+            JOIN teams t ON tr.team_id = t.team_id
+            WHERE tr.role_id = NEW.role_id
+        ) changed;
+
+    ELSIF TG_TABLE_NAME = 'permissions' THEN
+        -- Zmiana nazwy uprawnienia - tenanty posiadaczy ról, które je nadają
+        PERFORM emit_acl_change(changed.tenant_id, NULL, TG_TABLE_NAME, TG_OP)
+        FROM (
+            SELECT ur.tenant_id
+            FROM role_permissions rp
+            JOIN user_roles ur ON ur.role_id = rp.role_id
+            WHERE rp.permission_id = NEW.permission_id
+            UNION
+            SELECT t.tenant_id
+            FROM role_permissions rp
+            JOIN team_roles tr ON tr.role_id = rp.role_id
+            JOIN teams t ON tr.team_id = t.team_id
+            WHERE rp.permission_id = NEW.permission_id
+        ) changed;
+
+    ELSIF TG_TABLE_NAME = 'teams' THEN
+        PERFORM emit_acl_change(NEW.tenant_id, NULL, TG_TABLE_NAME, TG_OP);
+
+    ELSIF TG_TABLE_NAME = 'users' THEN
+        PERFORM emit_acl_change(changed.tenant_id, NEW.user_id, TG_TABLE_NAME, TG_OP)
+        FROM (
+            SELECT tenant_id FROM user_roles WHERE user_id = NEW.user_id
+            UNION
+            SELECT tenant_id FROM user_access WHERE user_id = NEW.user_id
+        ) changed;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS notify_acl_change_user_roles ON user_roles;
+CREATE TRIGGER notify_acl_change_user_roles
+    AFTER INSERT OR UPDATE OR DELETE ON user_roles
+    FOR EACH ROW EXECUTE FUNCTION notify_acl_change();
+
+DROP TRIGGER IF EXISTS notify_acl_change_user_access ON user_access;
+CREATE TRIGGER notify_acl_change_user_access
+    AFTER INSERT OR UPDATE OR DELETE ON user_access
+    FOR EACH ROW EXECUTE FUNCTION notify_acl_change();
+
+DROP TRIGGER IF EXISTS notify_acl_change_team_memberships ON team_memberships;
+CREATE TRIGGER notify_acl_change_team_memberships
+    AFTER INSERT OR UPDATE OR DELETE ON team_memberships
+    FOR EACH ROW EXECUTE FUNCTION notify_acl_change();
+
+DROP TRIGGER IF EXISTS notify_acl_change_team_roles ON team_roles;
+CREATE TRIGGER notify_acl_change_team_roles
+    AFTER INSERT OR UPDATE OR DELETE ON team_roles
+    FOR EACH ROW EXECUTE FUNCTION notify_acl_change();
+
+DROP TRIGGER IF EXISTS notify_acl_change_role_permissions ON role_permissions;
+CREATE TRIGGER notify_acl_change_role_permissions
+    AFTER INSERT OR UPDATE OR DELETE ON role_permissions
+    FOR EACH ROW EXECUTE FUNCTION notify_acl_change();
+
+DROP TRIGGER IF EXISTS notify_acl_change_teams ON teams;
+CREATE TRIGGER notify_acl_change_teams
+    AFTER UPDATE OF team_name ON teams
+    FOR EACH ROW EXECUTE FUNCTION notify_acl_change();
+
+DROP TRIGGER IF EXISTS notify_acl_change_users ON users;
+CREATE TRIGGER notify_acl_change_users
+    AFTER UPDATE OF email, full_name ON users
+    FOR EACH ROW EXECUTE FUNCTION notify_acl_change();
+
+DROP TRIGGER IF EXISTS notify_acl_change_roles ON roles;
+CREATE TRIGGER notify_acl_change_roles
+    AFTER UPDATE OF role_name, app_id ON roles
+    FOR EACH ROW EXECUTE FUNCTION notify_acl_change();
+
+DROP TRIGGER IF EXISTS notify_acl_change_permissions ON permissions;
+CREATE TRIGGER notify_acl_change_permissions
+    AFTER UPDATE OF permission_name, app_id ON permissions
+    FOR EACH ROW EXECUTE FUNCTION notify_acl_change();
+
+-- Usuwa zdarzenia starsze niż p_older_than; okres retencji musi przekraczać najdłuższą
+-- spodziewaną przerwę w działaniu listenera (doczytanie zdarzeń po ponownym połączeniu)
+CREATE OR REPLACE FUNCTION compact_acl_change_events(p_older_than INTERVAL DEFAULT INTERVAL '1 day')
+RETURNS INTEGER AS $$
+DECLARE
+    v_removed INTEGER;
+BEGIN
+    DELETE FROM acl_change_events
+    WHERE changed_at < CURRENT_TIMESTAMP - p_older_than;
+    GET DIAGNOSTICS v_removed = ROW_COUNT;
+
+    RETURN v_removed;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMIT;